@@ -0,0 +1,129 @@
+"""参照されなくなったファイル本体 (file_blobs と S3 の blobs/ 以下) の削除
+
+案件の削除で ProjectFile が消えても本体の参照数はその場では減らないので、まず参照数を
+ProjectFile から数え直し、--grace-hours より前から参照の無い本体を S3 と file_blobs から
+消す。行をロックしたまま S3 のオブジェクトを消してから行を消すので、その間に同じ内容が
+アップロードされても参照数の更新がロックを待ち、行が消えた後は新しく送り直す。
+アップロードの途中で失敗して行の無いまま残ったオブジェクトも、猶予を過ぎたら消す。
+一覧を取ってから消すまでの間に同じ内容が送り直されることがあるので、消す直前に
+HEAD で更新時刻を確かめ、猶予の内側になっていれば残す。
+
+最後に重複排除の効果 (ファイルの合計サイズと S3 に保存している本体の合計サイズ) を表示する。
+
+使い方:
+    python -m app.commands.blob_gc
+    python -m app.commands.blob_gc --dry-run --grace-hours 48
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import async_session_factory
+from app.models.file_blob import FileBlob
+from app.repositories.file_blob_repository import FileBlobRepository
+from app.utils.s3 import blob_key, s3_storage
+
+
+async def collect_garbage(
+    session_factory, before: datetime, batch_size: int, dry_run: bool
+) -> dict:
+    result = {"recounted": 0, "deleted": 0, "deleted_bytes": 0, "orphans": 0}
+    async with session_factory() as session:
+        repo = FileBlobRepository(session)
+        result["recounted"] = await repo.recount()
+        if dry_run:
+            blobs = await repo.lock_unreferenced(before, limit=None)
+            result["deleted"] = len(blobs)
+            result["deleted_bytes"] = sum(blob.size for blob in blobs)
+            await session.rollback()
+        else:
+            await session.commit()
+
+    while not dry_run:
+        async with session_factory() as session:
+            repo = FileBlobRepository(session)
+            blobs = await repo.lock_unreferenced(before, batch_size)
+            if not blobs:
+                break
+            for blob in blobs:
+                await s3_storage.delete(blob_key(blob.digest))
+            await repo.delete([blob.digest for blob in blobs])
+            await session.commit()
+        result["deleted"] += len(blobs)
+        result["deleted_bytes"] += sum(blob.size for blob in blobs)
+
+    result["orphans"] = await _delete_orphans(session_factory, before, dry_run)
+    async with session_factory() as session:
+        result["usage"] = await FileBlobRepository(session).usage()
+    return result
+
+
+async def _delete_orphans(session_factory, before: datetime, dry_run: bool) -> int:
+    """行の無い blobs/ 以下のオブジェクト (登録前に失敗したアップロード) を消す"""
+    orphans = 0
+    paginator = s3_storage.client.get_paginator("list_objects_v2")
+    pages = paginator.paginate(Bucket=settings.S3_BUCKET_NAME, Prefix="blobs/")
+    iterator = iter(pages)
+    while page := await s3_storage.call(next, iterator, None):
+        candidates = {
+            item["Key"].rsplit("/", 1)[1]: item["Key"]
+            for item in page.get("Contents", [])
+            if item["LastModified"] < before
+        }
+        if not candidates:
+            continue
+        async with session_factory() as session:
+            known = set(
+                await session.scalars(
+                    select(FileBlob.digest).where(FileBlob.digest.in_(candidates))
+                )
+            )
+        for digest, key in candidates.items():
+            if digest in known:
+                continue
+            # 一覧の後に送り直されたオブジェクト (登録はこれから) は消さない
+            head = await s3_storage.head(key)
+            if head is None or head["LastModified"] >= before:
+                continue
+            orphans += 1
+            if not dry_run:
+                await s3_storage.delete(key)
+    return orphans
+
+
+async def run(grace_hours: float, batch_size: int, dry_run: bool) -> int:
+    before = datetime.now(timezone.utc) - timedelta(hours=grace_hours)
+    result = await collect_garbage(async_session_factory, before, batch_size, dry_run)
+    await s3_storage.stop()
+    usage = result["usage"]
+    mb = 1024 * 1024
+    verb = "would delete" if dry_run else "deleted"
+    print(f"ref counts corrected: {result['recounted']}")
+    print(
+        f"unreferenced blobs {verb}: {result['deleted']} "
+        f"({result['deleted_bytes'] / mb:.1f} MB), orphan objects: {result['orphans']}"
+    )
+    print(
+        f"{usage['files']} files ({usage['logical_bytes'] / mb:.1f} MB) stored as "
+        f"{usage['blobs']} blobs ({usage['stored_bytes'] / mb:.1f} MB), "
+        f"saved {usage['saved_bytes'] / mb:.1f} MB"
+    )
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delete unreferenced file blobs")
+    parser.add_argument("--grace-hours", type=float, default=24.0)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.grace_hours, args.batch_size, args.dry_run)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""company_stats の再計算・整合性チェック
+
+元テーブル (projects / quotes / orders / direct_orders / reviews) から
+カウンタを再計算し、保存値とのずれを表示する。
+
+使い方:
+    python -m app.commands.company_stats          # ずれを表示するだけ
+    python -m app.commands.company_stats --fix    # ずれた行を再計算値で置き換える
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.database import async_session_factory
+from app.repositories.company_stats_repository import CompanyStatsRepository
+from app.services.company_stats_service import CompanyStatsService
+
+
+async def run(fix: bool) -> int:
+    async with async_session_factory() as session:
+        service = CompanyStatsService(CompanyStatsRepository(session))
+        drift = await service.reconcile(fix=fix)
+        if fix:
+            await session.commit()
+
+    for item in drift:
+        print(
+            f"{item['company_id']}  {item['column']:<24} "
+            f"stored={item['stored']} expected={item['expected']}"
+        )
+    companies = len({item["company_id"] for item in drift})
+    action = "fixed" if fix else "found"
+    print(f"drift {action}: {len(drift)} counters in {companies} companies")
+    return 1 if drift and not fix else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild and reconcile company_stats")
+    parser.add_argument("--fix", action="store_true", help="rewrite drifted rows")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.fix)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""案件所在地・企業住所のジオコーディング結果を作り直す
+
+参照表 (app/data/municipalities.csv) を更新した後や、マイグレーション・一括投入で
+prefecture_code などが未設定の行がある場合に全件を再解決する。
+
+使い方:
+    python -m app.commands.geocode
+    python -m app.commands.geocode --batch-size 5000
+"""
+
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session_factory
+from app.models.company import Company
+from app.models.project import Project
+from app.utils.geocoder import geo_columns
+
+
+async def _regeocode(session: AsyncSession, model, column, batch_size: int) -> tuple[int, int]:
+    """(処理件数, 解決できた件数) を返す"""
+    total = resolved = 0
+    last_id = None
+    while True:
+        query = select(model.id, column).order_by(model.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(model.id > last_id)
+        batch = (await session.execute(query)).all()
+        if not batch:
+            return total, resolved
+        rows = [{"id": row_id, **geo_columns(address)} for row_id, address in batch]
+        # 主キー指定の一括 UPDATE (executemany)
+        await session.execute(update(model), rows)
+        total += len(rows)
+        resolved += sum(1 for row in rows if row["prefecture_code"] is not None)
+        last_id = batch[-1][0]
+
+
+async def run(batch_size: int) -> int:
+    async with async_session_factory() as session:
+        results = {
+            "projects": await _regeocode(session, Project, Project.location, batch_size),
+            "companies": await _regeocode(session, Company, Company.address, batch_size),
+        }
+        await session.commit()
+    for name, (total, resolved) in results.items():
+        print(f"{name}: {resolved}/{total} geocoded")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-geocode project and company addresses")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.batch_size)))
+
+
+if __name__ == "__main__":
+    main()
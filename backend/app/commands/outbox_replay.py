@@ -0,0 +1,63 @@
+"""アウトボックスのイベントを未配信に戻して再配信させる
+
+failed になったイベントや、ハンドラの不具合を直した後に配信済みのイベントを
+もう一度流したいときに使う。戻したイベントは中継 (API プロセスまたは
+python -m app.worker) が拾う。配信は少なくとも 1 回なので、通知のハンドラは
+イベント ID をキーに作成済みの通知を作り直さない (notifications.outbox_event_id)。
+
+使い方:
+    python -m app.commands.outbox_replay --failed                  # failed をすべて戻す
+    python -m app.commands.outbox_replay --type quote.accepted --since 2026-10-01
+    python -m app.commands.outbox_replay --from-id 12000           # ID 12000 以降を戻す
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timezone
+
+from app.constants import OutboxStatus
+from app.database import async_session_factory
+from app.repositories.outbox_repository import OutboxRepository
+
+
+def _parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+async def run(
+    failed: bool,
+    event_type: str | None,
+    since: datetime | None,
+    until: datetime | None,
+    from_id: int | None,
+) -> int:
+    async with async_session_factory() as session:
+        requeued = await OutboxRepository(session).requeue(
+            status=OutboxStatus.FAILED if failed else None,
+            event_type=event_type,
+            since=since,
+            until=until,
+            from_id=from_id,
+        )
+        await session.commit()
+    print(f"events requeued: {requeued}")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Requeue outbox events for redelivery")
+    parser.add_argument("--failed", action="store_true", help="only failed events")
+    parser.add_argument("--type", dest="event_type", help="event type (e.g. quote.accepted)")
+    parser.add_argument("--since", type=_parse_time, help="created at or after (ISO 8601)")
+    parser.add_argument("--until", type=_parse_time, help="created before (ISO 8601)")
+    parser.add_argument("--from-id", type=int, help="event id to start from")
+    args = parser.parse_args()
+    if not (args.failed or args.event_type or args.since or args.until or args.from_id):
+        parser.error("specify at least one of --failed, --type, --since, --until, --from-id")
+    sys.exit(asyncio.run(run(args.failed, args.event_type, args.since, args.until, args.from_id)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""相場インデックス (price_sketches) の再構築
+
+全受注 (Order・DirectOrder) の金額から専門分野・都道府県・月ごとの分位点スケッチを作り直す。
+各ワーカーは起動時にこの結果を読み込み、再構築後に作られた受注だけを再生するため、
+定期的 (日次など) に実行すると起動が速くなる。マイグレーション直後や
+PRICE_INDEX_RELATIVE_ACCURACY の変更後にも実行する。
+
+使い方:
+    python -m app.commands.price_index
+    python -m app.commands.price_index --batch-size 5000
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.database import async_session_factory
+from app.utils.price_index import price_index
+
+
+async def run(batch_size: int) -> int:
+    async with async_session_factory() as session:
+        samples = await price_index.rebuild(session, batch_size)
+        await session.commit()
+    stats = price_index.stats()
+    print(f"price index rebuilt: {samples} orders, {stats['buckets']} buckets")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the market price index")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.batch_size)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""企業検索インデックス (検索列と company_search_grams) の再構築
+
+ORM を通らない一括投入やマイグレーション直後など、インデックスが企業データと
+ずれている場合に全件から作り直す。
+
+使い方:
+    python -m app.commands.search_index
+    python -m app.commands.search_index --batch-size 5000
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.database import async_session_factory
+from app.repositories.company_repository import CompanyRepository
+
+
+async def run(batch_size: int) -> int:
+    async with async_session_factory() as session:
+        rebuilt = await CompanyRepository(session).rebuild_search_index(batch_size)
+        await session.commit()
+    print(f"search index rebuilt: {rebuilt} companies")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the company search index")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.batch_size)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+from typing import Self
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -17,10 +20,81 @@ class Settings(BaseSettings):
     AWS_REGION: str = "ap-northeast-1"
     S3_BUCKET_NAME: str = "kensetsu-files"
     S3_ENDPOINT_URL: str = "http://localhost:4566"
+    # アップロード: マルチパートの 1 パートの大きさ (S3 の下限は 5 MiB。1 件あたりのメモリは
+    # この 2 倍まで)、1 ファイルの上限
+    S3_UPLOAD_PART_SIZE_BYTES: int = 8 * 1024 * 1024
+    # S3 の HTTP 接続プールの大きさ (通信を実行するスレッドも同じ数)、署名付き URL の有効期間
+    # (ダウンロード用と、ブラウザから直接アップロードする POST 用)
+    S3_MAX_POOL_CONNECTIONS: int = 16
+    S3_PRESIGN_EXPIRE_SECONDS: int = 3600
+    S3_UPLOAD_URL_EXPIRE_SECONDS: int = 900
+    # ダウンロード用 URL のキャッシュ: 期限の何秒前まで使い回すか (案件一覧の結果キャッシュの
+    # TTL + 猶予より長くする。起動時に検証する)、保持するキーの数
+    S3_DOWNLOAD_URL_REFRESH_MARGIN_SECONDS: int = 300
+    S3_DOWNLOAD_URL_CACHE_SIZE: int = 20_000
+    FILE_UPLOAD_MAX_BYTES: int = 200 * 1024 * 1024
 
     CORS_ORIGINS: str = "http://localhost:3000"
 
+    # 通知のサーバープッシュ: "memory" (ワーカー内のみ) または "postgres" (LISTEN/NOTIFY)
+    NOTIFICATION_PUSH_BACKEND: str = "memory"
+    NOTIFICATION_STREAM_HEARTBEAT_SECONDS: int = 15
+
+    # 認証ユーザー (有効/ロール/企業) のプロセス内キャッシュの有効期間
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+
+    # 専門分野レジストリを DB から読み直す間隔 (他ワーカーでの変更の反映用)
+    SPECIALTY_REGISTRY_REFRESH_SECONDS: int = 300
+
+    # 公開案件一覧の結果キャッシュ: TTL と、TTL 切れ後に古い結果を返しながら更新する猶予
+    PROJECT_LIST_CACHE_TTL_SECONDS: int = 10
+    PROJECT_LIST_CACHE_STALE_SECONDS: int = 60
+
+    # 推薦用の特徴量表を DB から全件読み直す間隔 (他ワーカーでの変更の反映用)
+    MATCHING_INDEX_REFRESH_SECONDS: int = 300
+
+    # 相場インデックス: 分位点の相対誤差 (変更したら price_index コマンドで再構築する)、
+    # 目安に使う直近の月数、粗い集計に切り替えるサンプル数の下限
+    PRICE_INDEX_RELATIVE_ACCURACY: float = 0.01
+    PRICE_INDEX_WINDOW_MONTHS: int = 12
+    PRICE_INDEX_MIN_SAMPLES: int = 5
+
+    # バックグラウンドジョブ: API プロセス内でもワーカーを動かすか (false なら
+    # python -m app.worker を別に起動する)、キューごとの同時実行数 ("キュー=数" のカンマ区切り)、
+    # ポーリング間隔、再試行の待ち時間 (指数バックオフの初期値と上限)、
+    # 実行中のまま放置されたジョブを待ちに戻すまでの時間
+    JOB_WORKER_IN_PROCESS: bool = True
+    JOB_QUEUES: str = "default=4,ratings=1"
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_RETRY_BASE_SECONDS: float = 5.0
+    JOB_RETRY_MAX_SECONDS: float = 3600.0
+    JOB_LOCK_TIMEOUT_SECONDS: int = 600
+
+    # ドメインイベントの中継: API プロセス内で動かすか (false なら python -m app.worker が
+    # 中継する)、1 回に配信するイベント数、ポーリング間隔、failed にするまでの試行回数
+    OUTBOX_RELAY_IN_PROCESS: bool = True
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_MAX_ATTEMPTS: int = 10
+
     APP_ENV: str = "development"
 
+    @model_validator(mode="after")
+    def download_url_margin_must_fit(self) -> Self:
+        # 署名の窓 (有効期間 - 余裕) が正でないと窓を区切れない。余裕が一覧の結果キャッシュに
+        # 載る時間より短いと、キャッシュから返した一覧の URL が期限切れになる
+        if self.S3_DOWNLOAD_URL_REFRESH_MARGIN_SECONDS >= self.S3_PRESIGN_EXPIRE_SECONDS:
+            raise ValueError(
+                "S3_DOWNLOAD_URL_REFRESH_MARGIN_SECONDS は S3_PRESIGN_EXPIRE_SECONDS より"
+                "短くしてください"
+            )
+        cached = self.PROJECT_LIST_CACHE_TTL_SECONDS + self.PROJECT_LIST_CACHE_STALE_SECONDS
+        if self.S3_DOWNLOAD_URL_REFRESH_MARGIN_SECONDS <= cached:
+            raise ValueError(
+                "S3_DOWNLOAD_URL_REFRESH_MARGIN_SECONDS は PROJECT_LIST_CACHE_TTL_SECONDS + "
+                "PROJECT_LIST_CACHE_STALE_SECONDS より長くしてください"
+            )
+        return self
+
 
 settings = Settings()
@@ -29,6 +29,32 @@ class OrderStatus(str, enum.Enum):
     CANCELLED = "cancelled"
 
 
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"  # 再試行の上限に達した
+
+
+class EventType(str, enum.Enum):
+    """アウトボックスに記録するドメインイベントの種別"""
+
+    QUOTE_SUBMITTED = "quote.submitted"
+    QUOTE_ACCEPTED = "quote.accepted"
+    QUOTE_REJECTED = "quote.rejected"
+    DIRECT_ORDER_CREATED = "direct_order.created"
+    DIRECT_ORDER_ACCEPTED = "direct_order.accepted"
+    DIRECT_ORDER_DECLINED = "direct_order.declined"
+    DIRECT_ORDER_COMPLETED = "direct_order.completed"
+    DIRECT_ORDER_CANCELLED = "direct_order.cancelled"
+
+
+class OutboxStatus(str, enum.Enum):
+    PENDING = "pending"
+    DISPATCHED = "dispatched"
+    FAILED = "failed"  # 再試行の上限に達した (app.commands.outbox_replay で戻せる)
+
+
 class DirectOrderStatus(str, enum.Enum):
     PENDING = "pending"
     ACCEPTED = "accepted"
@@ -1,15 +1,17 @@
 import uuid
 
-from fastapi import Depends
+from fastapi import Depends, Query
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.constants import UserRole
 from app.database import get_db
 from app.exceptions import ForbiddenException, UnauthorizedException
-from app.models.user import User
+from app.repositories.company_repository import CompanyRepository
 from app.repositories.user_repository import UserRepository
+from app.utils.principal_cache import Principal, principal_cache
 from app.utils.security import decode_token
+from app.utils.specialty_registry import SpecialtyRegistry, specialty_registry
 
 security = HTTPBearer()
 
@@ -17,8 +19,19 @@ security = HTTPBearer()
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db),
-) -> User:
-    token = credentials.credentials
+) -> Principal:
+    return await _authenticate(credentials.credentials, db)
+
+
+async def get_current_user_from_query(
+    access_token: str = Query(...),
+    db: AsyncSession = Depends(get_db),
+) -> Principal:
+    """ヘッダーを付けられない EventSource 用にクエリ文字列のトークンで認証する"""
+    return await _authenticate(access_token, db)
+
+
+async def _authenticate(token: str, db: AsyncSession) -> Principal:
     payload = decode_token(token)
     if not payload or payload.get("type") != "access":
         raise UnauthorizedException("無効なトークンです")
@@ -32,20 +45,63 @@ async def get_current_user(
     except ValueError:
         raise UnauthorizedException("無効なトークンです")
 
-    user_repo = UserRepository(db)
-    user = await user_repo.get_by_id(user_id)
-    if not user or not user.is_active:
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        row = await UserRepository(db).get_principal(user_id)
+        if row is None:
+            raise UnauthorizedException("ユーザーが見つかりません")
+        principal = Principal(*row)
+        principal_cache.set(principal)
+    if not principal.is_active:
         raise UnauthorizedException("ユーザーが見つかりません")
-    return user
+    return principal
 
 
-async def require_contractor(user: User = Depends(get_current_user)) -> User:
+async def require_contractor(user: Principal = Depends(get_current_user)) -> Principal:
     if user.role != UserRole.CONTRACTOR.value:
         raise ForbiddenException("元請け企業のみ利用可能です")
     return user
 
 
-async def require_subcontractor(user: User = Depends(get_current_user)) -> User:
+async def require_subcontractor(user: Principal = Depends(get_current_user)) -> Principal:
     if user.role != UserRole.SUBCONTRACTOR.value:
         raise ForbiddenException("下請け業者のみ利用可能です")
     return user
+
+
+async def get_current_company_id(
+    user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> uuid.UUID:
+    """リクエスト中の利用者の企業 ID (FastAPI の依存キャッシュによりリクエスト内で 1 回だけ解決)"""
+    return await _resolve_company_id(user, db)
+
+
+async def get_contractor_company_id(
+    user: Principal = Depends(require_contractor),
+    db: AsyncSession = Depends(get_db),
+) -> uuid.UUID:
+    return await _resolve_company_id(user, db)
+
+
+async def get_subcontractor_company_id(
+    user: Principal = Depends(require_subcontractor),
+    db: AsyncSession = Depends(get_db),
+) -> uuid.UUID:
+    return await _resolve_company_id(user, db)
+
+
+async def _resolve_company_id(user: Principal, db: AsyncSession) -> uuid.UUID:
+    if user.company_id is not None:
+        return user.company_id
+    # 企業未登録のままキャッシュされていても他ワーカーで登録済みかもしれないので ID だけ確認する
+    company_id = await CompanyRepository(db).get_id_by_user_id(user.id)
+    if company_id is None:
+        raise ForbiddenException("企業情報を先に登録してください")
+    return company_id
+
+
+async def get_specialty_registry(db: AsyncSession = Depends(get_db)) -> SpecialtyRegistry:
+    """専門分野レジストリを返す (stale か読み直し間隔を過ぎていれば読み直す)"""
+    await specialty_registry.ensure_fresh(db)
+    return specialty_registry
@@ -0,0 +1,133 @@
+"""ドメインイベント (アウトボックス) のハンドラ
+
+API プロセス (プロセス内の中継) とワーカープロセスの両方で import して登録する。
+イベントは種別ごとにまとめて渡されるので、宛先の解決や INSERT はバッチ単位で 1 回にする。
+配信は少なくとも 1 回なので、通知はイベント ID をキーにして、再配信では作り直さない。
+"""
+
+import uuid
+from dataclasses import replace
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.constants import EventType, NotificationType
+from app.repositories.notification_repository import NotificationRepository
+from app.services.notification_service import CompanyNotification, NotificationService
+from app.utils.outbox import event_handler
+
+
+def _quote_submitted(payload: dict) -> list[CompanyNotification]:
+    return [
+        CompanyNotification(
+            company_id=uuid.UUID(payload["contractor_company_id"]),
+            notification_type=NotificationType.QUOTE_RECEIVED,
+            title="見積もりを受信しました",
+            message=f"「{payload['project_title']}」に見積もりが届きました。",
+            reference_id=uuid.UUID(payload["quote_id"]),
+        )
+    ]
+
+
+def _quote_accepted(payload: dict) -> list[CompanyNotification]:
+    title = payload["project_title"]
+    return [
+        CompanyNotification(
+            company_id=uuid.UUID(payload["company_id"]),
+            notification_type=NotificationType.QUOTE_ACCEPTED,
+            title="見積もりが採用されました",
+            message=f"「{title}」の見積もりが採用されました。",
+            reference_id=uuid.UUID(payload["quote_id"]),
+        ),
+        *(
+            CompanyNotification(
+                company_id=uuid.UUID(company_id),
+                notification_type=NotificationType.QUOTE_REJECTED,
+                title="見積もりは採用されませんでした",
+                message=f"「{title}」は他社の見積もりが採用されました。",
+                reference_id=uuid.UUID(quote_id),
+            )
+            for quote_id, company_id in payload["rejected"]
+        ),
+    ]
+
+
+def _quote_rejected(payload: dict) -> list[CompanyNotification]:
+    return [
+        CompanyNotification(
+            company_id=uuid.UUID(payload["company_id"]),
+            notification_type=NotificationType.QUOTE_REJECTED,
+            title="見積もりは採用されませんでした",
+            message=f"「{payload['project_title']}」の見積もりは却下されました。",
+            reference_id=uuid.UUID(payload["quote_id"]),
+        )
+    ]
+
+
+# 直接発注のイベント -> (通知種別, タイトル, 本文の述語)。宛先は操作した企業の相手方
+_DIRECT_ORDER_NOTIFICATIONS = {
+    EventType.DIRECT_ORDER_CREATED: (
+        NotificationType.DIRECT_ORDER_RECEIVED,
+        "直接発注を受信しました",
+        "届きました",
+    ),
+    EventType.DIRECT_ORDER_ACCEPTED: (
+        NotificationType.DIRECT_ORDER_ACCEPTED,
+        "直接発注が承認されました",
+        "承認されました",
+    ),
+    EventType.DIRECT_ORDER_DECLINED: (
+        NotificationType.DIRECT_ORDER_DECLINED,
+        "直接発注が辞退されました",
+        "辞退されました",
+    ),
+    EventType.DIRECT_ORDER_COMPLETED: (
+        NotificationType.DIRECT_ORDER_COMPLETED,
+        "直接発注が完了しました",
+        "完了しました",
+    ),
+    EventType.DIRECT_ORDER_CANCELLED: (
+        NotificationType.DIRECT_ORDER_CANCELLED,
+        "直接発注がキャンセルされました",
+        "キャンセルされました",
+    ),
+}
+
+
+def _direct_order(event_type: EventType, payload: dict) -> list[CompanyNotification]:
+    notification_type, title, verb = _DIRECT_ORDER_NOTIFICATIONS[event_type]
+    if payload["actor_company_id"] == payload["contractor_company_id"]:
+        recipient = payload["subcontractor_company_id"]
+    else:
+        recipient = payload["contractor_company_id"]
+    return [
+        CompanyNotification(
+            company_id=uuid.UUID(recipient),
+            notification_type=notification_type,
+            title=title,
+            message=f"「{payload['title']}」の直接発注が{verb}。",
+            reference_id=uuid.UUID(payload["direct_order_id"]),
+        )
+    ]
+
+
+_NOTIFICATION_BUILDERS = {
+    EventType.QUOTE_SUBMITTED.value: _quote_submitted,
+    EventType.QUOTE_ACCEPTED.value: _quote_accepted,
+    EventType.QUOTE_REJECTED.value: _quote_rejected,
+    **{
+        event_type.value: lambda payload, event_type=event_type: _direct_order(event_type, payload)
+        for event_type in _DIRECT_ORDER_NOTIFICATIONS
+    },
+}
+
+
+@event_handler(*_NOTIFICATION_BUILDERS)
+async def send_notifications(db: AsyncSession, events: list) -> None:
+    """イベントを通知に変換し、バッチ全体の通知を 1 回の notify_companies で作成する"""
+    await NotificationService(NotificationRepository(db)).notify_companies(
+        [
+            replace(notification, outbox_event_id=event.id)
+            for event in events
+            for notification in _NOTIFICATION_BUILDERS[event.event_type](event.payload)
+        ]
+    )
@@ -0,0 +1,22 @@
+"""バックグラウンドジョブのハンドラ
+
+API プロセス (JobService.enqueue で積む側・プロセス内ワーカー) とワーカープロセスの
+両方で import して登録する。ハンドラは再試行されても結果が変わらないようにする。
+"""
+
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories.company_repository import CompanyRepository
+from app.repositories.review_repository import ReviewRepository
+from app.utils.job_queue import job_handler
+
+
+@job_handler("ratings.recompute", queue="ratings")
+async def recompute_company_rating(db: AsyncSession, payload: dict) -> None:
+    """レビューから企業の average_rating (検索・推薦の並び順に使う) を計算し直す"""
+    company_id = uuid.UUID(payload["company_id"])
+    avg_rating = await ReviewRepository(db).get_average_rating(company_id)
+    if avg_rating is not None:
+        await CompanyRepository(db).update_average_rating(company_id, avg_rating)
@@ -1,7 +1,13 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+import app.events  # noqa: F401  (イベントのハンドラを登録する)
+import app.jobs  # noqa: F401  (ジョブのハンドラを登録する)
 from app.config import settings
+from app.database import async_session_factory
 from app.exceptions import AppException, app_exception_handler
 from app.routers import (
     auth,
@@ -12,10 +18,46 @@ from app.routers import (
     health,
     notifications,
     orders,
+    prices,
     projects,
     quotes,
     reviews,
 )
+from app.utils.job_queue import JobWorker, parse_queues
+from app.utils.matching import matching_index
+from app.utils.notification_hub import notification_hub
+from app.utils.outbox import OutboxRelay
+from app.utils.price_index import price_index
+from app.utils.s3 import s3_storage
+from app.utils.specialty_registry import specialty_registry
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    async with async_session_factory() as session:
+        await specialty_registry.load(session)
+        await matching_index.load(session)
+        await price_index.load(session)
+    await notification_hub.start()
+    await s3_storage.start()
+    worker = worker_task = None
+    if settings.JOB_WORKER_IN_PROCESS:
+        worker = JobWorker(async_session_factory, parse_queues(settings.JOB_QUEUES))
+        worker_task = asyncio.create_task(worker.run())
+    relay = relay_task = None
+    if settings.OUTBOX_RELAY_IN_PROCESS:
+        relay = OutboxRelay(async_session_factory)
+        relay_task = asyncio.create_task(relay.run())
+    yield
+    if relay is not None:
+        relay.stop()
+        await relay_task
+    if worker is not None:
+        worker.stop()
+        await worker_task
+    await s3_storage.stop()
+    await notification_hub.stop()
+
 
 app = FastAPI(
     title="Kensetsu Matching API",
@@ -23,6 +65,7 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -46,3 +89,4 @@ app.include_router(notifications.router, prefix="/api/notifications", tags=["not
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
 app.include_router(direct_orders.router, prefix="/api/direct-orders", tags=["direct-orders"])
 app.include_router(files.router, prefix="/api", tags=["files"])
+app.include_router(prices.router, prefix="/api", tags=["prices"])
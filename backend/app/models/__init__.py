@@ -1,8 +1,13 @@
 from app.models.base import Base
-from app.models.company import Company, Specialty, company_specialties
+from app.models.company import Company, CompanySearchGram, Specialty, company_specialties
+from app.models.company_stats import CompanyStats
 from app.models.direct_order import DirectOrder
+from app.models.file_blob import FileBlob
+from app.models.job import Job
 from app.models.notification import Notification
 from app.models.order import Order
+from app.models.outbox_event import OutboxEvent
+from app.models.price_sketch import PriceSketch
 from app.models.project import Project, ProjectFile
 from app.models.quote import Quote
 from app.models.review import Review
@@ -11,9 +16,15 @@ from app.models.user import User
 __all__ = [
     "Base",
     "Company",
+    "CompanySearchGram",
+    "CompanyStats",
     "DirectOrder",
+    "FileBlob",
+    "Job",
     "Notification",
     "Order",
+    "OutboxEvent",
+    "PriceSketch",
     "Project",
     "ProjectFile",
     "Quote",
@@ -1,7 +1,7 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, Uuid, func
+from sqlalchemy import DateTime, Float, String, Uuid, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -9,17 +9,36 @@ class Base(DeclarativeBase):
     pass
 
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class TimestampMixin:
+    # サーバー側で決まる既定値を INSERT/UPDATE の RETURNING で受け取り、
+    # flush 後に失効させない (書き込み後の再 SELECT を不要にする)
+    __mapper_args__ = {"eager_defaults": True}
+
+    # created_at はキーセットページネーションの並び順に、updated_at は ETag に使うため、
+    # DB ごとの now() の精度差が出ないようアプリ側でも値を入れる
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
+        DateTime(timezone=True), default=_utcnow, server_default=func.now(), nullable=False
     )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
+        default=_utcnow,
         server_default=func.now(),
-        onupdate=func.now(),
+        onupdate=_utcnow,
         nullable=False,
     )
 
 
 class UUIDPrimaryKeyMixin:
     id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
+
+
+class GeoLocationMixin:
+    # 住所から解決した JIS 地方公共団体コードと代表点 (app.utils.geocoder が flush 時に更新)
+    prefecture_code: Mapped[str | None] = mapped_column(String(2))
+    municipality_code: Mapped[str | None] = mapped_column(String(5))
+    latitude: Mapped[float | None] = mapped_column(Float)
+    longitude: Mapped[float | None] = mapped_column(Float)
@@ -1,9 +1,9 @@
 import uuid
 
-from sqlalchemy import Column, Float, ForeignKey, Integer, String, Table, Uuid
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import Column, Float, ForeignKey, Index, Integer, String, Table, Text, Uuid
+from sqlalchemy.orm import Mapped, backref, mapped_column, relationship
 
-from app.models.base import Base, TimestampMixin, UUIDPrimaryKeyMixin
+from app.models.base import Base, GeoLocationMixin, TimestampMixin, UUIDPrimaryKeyMixin
 
 company_specialties = Table(
     "company_specialties",
@@ -19,8 +19,14 @@ class Specialty(UUIDPrimaryKeyMixin, Base):
     name: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
 
 
-class Company(UUIDPrimaryKeyMixin, TimestampMixin, Base):
+class Company(UUIDPrimaryKeyMixin, TimestampMixin, GeoLocationMixin, Base):
     __tablename__ = "companies"
+    __table_args__ = (
+        Index("ix_companies_created_at_id", "created_at", "id"),
+        # 同一都道府県・半径検索用
+        Index("ix_companies_prefecture_municipality", "prefecture_code", "municipality_code"),
+        Index("ix_companies_latitude_longitude", "latitude", "longitude"),
+    )
 
     user_id: Mapped[uuid.UUID] = mapped_column(
         Uuid, ForeignKey("users.id"), unique=True, nullable=False
@@ -33,6 +39,23 @@ class Company(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     established_year: Mapped[int | None] = mapped_column(Integer)
     employee_count: Mapped[int | None] = mapped_column(Integer)
     average_rating: Mapped[float | None] = mapped_column(Float, default=None)
+    # 検索用に正規化した name + description / address (app.utils.search が flush 時に更新)
+    search_text: Mapped[str | None] = mapped_column(Text)
+    search_address: Mapped[str | None] = mapped_column(String(500))
+
+    user = relationship(
+        "User", backref=backref("company", lazy="raise_on_sql"), lazy="raise_on_sql"
+    )
+    specialties = relationship("Specialty", secondary=company_specialties, lazy="raise_on_sql")
+
 
-    user = relationship("User", backref="company")
-    specialties = relationship("Specialty", secondary=company_specialties, lazy="selectin")
+class CompanySearchGram(Base):
+    """企業検索用の n-gram 転置インデックス (企業・フィールド・gram ごとに 1 行)"""
+
+    __tablename__ = "company_search_grams"
+
+    gram: Mapped[str] = mapped_column(String(8), primary_key=True)
+    field: Mapped[str] = mapped_column(String(20), primary_key=True)
+    company_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
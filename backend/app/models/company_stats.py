@@ -0,0 +1,50 @@
+import uuid
+
+from sqlalchemy import ForeignKey, Integer, Uuid
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, TimestampMixin
+
+
+def _counter() -> Mapped[int]:
+    return mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+
+class CompanyStats(TimestampMixin, Base):
+    """ダッシュボード用の企業別カウンタ (各サービスの状態遷移で差分更新する)"""
+
+    __tablename__ = "company_stats"
+
+    company_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("companies.id"), primary_key=True
+    )
+
+    # 元請けとしての集計
+    total_projects: Mapped[int] = _counter()
+    open_projects: Mapped[int] = _counter()
+    in_progress_projects: Mapped[int] = _counter()
+    completed_projects: Mapped[int] = _counter()
+    total_orders: Mapped[int] = _counter()
+    pending_quotes: Mapped[int] = _counter()
+
+    # 下請けとしての集計
+    total_quotes: Mapped[int] = _counter()
+    accepted_quotes: Mapped[int] = _counter()
+    active_orders: Mapped[int] = _counter()
+    completed_orders: Mapped[int] = _counter()
+
+    # 直接発注 (発注側・受注側の両方で数える)
+    pending_direct_orders: Mapped[int] = _counter()
+    active_direct_orders: Mapped[int] = _counter()
+    completed_direct_orders: Mapped[int] = _counter()
+
+    # 受け取ったレビュー
+    review_count: Mapped[int] = _counter()
+    rating_total: Mapped[int] = _counter()
+
+
+COUNTER_COLUMNS: tuple[str, ...] = tuple(
+    column.key
+    for column in CompanyStats.__table__.columns
+    if column.key not in ("company_id", "created_at", "updated_at")
+)
@@ -1,7 +1,7 @@
 import uuid
-from datetime import date
+from datetime import date, datetime
 
-from sqlalchemy import Date, ForeignKey, Numeric, String, Text, Uuid
+from sqlalchemy import Date, DateTime, ForeignKey, Numeric, String, Text, Uuid
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, TimestampMixin, UUIDPrimaryKeyMixin
@@ -26,11 +26,13 @@ class DirectOrder(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     )
     status: Mapped[str] = mapped_column(String(50), nullable=False, default="pending")
     decline_reason: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # 受注先が承認した日時 (相場のサンプルは承認時点の金額として数える)
+    accepted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     contractor_company = relationship(
-        "Company", foreign_keys=[contractor_company_id], lazy="selectin"
+        "Company", foreign_keys=[contractor_company_id], lazy="raise_on_sql"
     )
     subcontractor_company = relationship(
-        "Company", foreign_keys=[subcontractor_company_id], lazy="selectin"
+        "Company", foreign_keys=[subcontractor_company_id], lazy="raise_on_sql"
     )
-    specialty = relationship("Specialty", lazy="selectin")
+    specialty = relationship("Specialty", lazy="raise_on_sql")
@@ -0,0 +1,18 @@
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, TimestampMixin
+
+
+class FileBlob(TimestampMixin, Base):
+    """内容アドレスで保存したファイル本体 (S3 のキーは app.utils.s3.blob_key(digest))
+
+    ref_count は同じ内容を指す ProjectFile (checksum == digest) の数。アップロードで増やし、
+    案件の削除で消えた分は GC (python -m app.commands.blob_gc) が数え直す。
+    """
+
+    __tablename__ = "file_blobs"
+
+    digest: Mapped[str] = mapped_column(String(64), primary_key=True)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.constants import JobStatus
+from app.models.base import Base, TimestampMixin, UUIDPrimaryKeyMixin
+
+
+class Job(UUIDPrimaryKeyMixin, TimestampMixin, Base):
+    """バックグラウンドジョブ (app.utils.job_queue のワーカーが取得して実行する)"""
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # ワーカーの取得 (キューごとに実行可能なジョブを優先度・予定時刻順に並べる) 用
+        Index("ix_jobs_queue_status_priority_run_at", "queue", "status", "priority", "run_at"),
+    )
+
+    queue: Mapped[str] = mapped_column(String(50), nullable=False)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, default=dict, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), default=JobStatus.QUEUED.value, nullable=False)
+    # 大きいほど先に実行する
+    priority: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=5, nullable=False)
+    run_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    locked_by: Mapped[str | None] = mapped_column(String(100))
+    locked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    last_error: Mapped[str | None] = mapped_column(Text)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
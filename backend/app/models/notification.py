@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Boolean, ForeignKey, String, Text, Uuid
+from sqlalchemy import BigInteger, Boolean, ForeignKey, Index, Integer, String, Text, Uuid
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base, TimestampMixin, UUIDPrimaryKeyMixin
@@ -8,12 +8,26 @@ from app.models.base import Base, TimestampMixin, UUIDPrimaryKeyMixin
 
 class Notification(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     __tablename__ = "notifications"
-
-    user_id: Mapped[uuid.UUID] = mapped_column(
-        Uuid, ForeignKey("users.id"), nullable=False, index=True
+    __table_args__ = (
+        # 受信箱の一覧 (user_id, is_read で絞り込み created_at 降順) と未読件数の集計用
+        Index("ix_notifications_user_id_is_read_created_at", "user_id", "is_read", "created_at"),
+        # 同じイベントを再配信しても同じ通知を二重に作らない (NotificationRepository.create_many)
+        Index(
+            "uq_notifications_outbox_event_id_user_id_reference_id",
+            "outbox_event_id",
+            "user_id",
+            "reference_id",
+            unique=True,
+        ),
     )
+
+    user_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("users.id"), nullable=False)
     type: Mapped[str] = mapped_column(String(50), nullable=False)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     message: Mapped[str | None] = mapped_column(Text)
     is_read: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     reference_id: Mapped[uuid.UUID | None] = mapped_column(Uuid)
+    # 通知の元になったアウトボックスのイベント (イベント以外から作った通知は None)
+    outbox_event_id: Mapped[int | None] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite")
+    )
@@ -22,11 +22,11 @@ class Order(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     amount: Mapped[int] = mapped_column(Numeric(15, 0), nullable=False)
     status: Mapped[str] = mapped_column(String(50), nullable=False, default="confirmed")
 
-    project = relationship("Project", lazy="selectin")
-    quote = relationship("Quote", lazy="selectin")
+    project = relationship("Project", lazy="raise_on_sql")
+    quote = relationship("Quote", lazy="raise_on_sql")
     contractor_company = relationship(
-        "Company", foreign_keys=[contractor_company_id], lazy="selectin"
+        "Company", foreign_keys=[contractor_company_id], lazy="raise_on_sql"
     )
     subcontractor_company = relationship(
-        "Company", foreign_keys=[subcontractor_company_id], lazy="selectin"
+        "Company", foreign_keys=[subcontractor_company_id], lazy="raise_on_sql"
     )
@@ -0,0 +1,33 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import JSON, BigInteger, DateTime, Index, Integer, String, Text, Uuid
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.constants import OutboxStatus
+from app.models.base import Base, TimestampMixin
+
+
+class OutboxEvent(TimestampMixin, Base):
+    """ドメインイベントの送信待ち (状態の変更と同じトランザクションで書き、中継が配信する)"""
+
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # 中継 (未配信を配信可能時刻・発生順に取得) 用
+        Index("ix_outbox_events_status_available_at_id", "status", "available_at", "id"),
+    )
+
+    # 発生順 (配信順) の通し番号
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True
+    )
+    event_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    aggregate_id: Mapped[uuid.UUID | None] = mapped_column(Uuid)
+    payload: Mapped[dict] = mapped_column(JSON, default=dict, nullable=False)
+    status: Mapped[str] = mapped_column(
+        String(20), default=OutboxStatus.PENDING.value, nullable=False
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    available_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    dispatched_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    last_error: Mapped[str | None] = mapped_column(Text)
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class PriceSketch(Base):
+    """相場インデックスの再構築結果 (専門分野・都道府県・月ごとの分位点スケッチ)
+
+    未指定の専門分野・都道府県は空文字で表す。built_through は再構築時点で取り込んだ
+    受注の最終作成日時で、起動時はこれより後の受注だけを再生する。
+    """
+
+    __tablename__ = "price_sketches"
+
+    specialty_key: Mapped[str] = mapped_column(String(36), primary_key=True)
+    prefecture_key: Mapped[str] = mapped_column(String(2), primary_key=True)
+    month: Mapped[str] = mapped_column(String(7), primary_key=True)
+    sample_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    bins: Mapped[str] = mapped_column(Text, nullable=False)
+    built_through: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
@@ -1,13 +1,21 @@
 import uuid
 
-from sqlalchemy import ForeignKey, Integer, Numeric, String, Text, Uuid
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import ForeignKey, Index, Integer, Numeric, String, Text, Uuid
+from sqlalchemy.orm import Mapped, backref, mapped_column, relationship
 
-from app.models.base import Base, TimestampMixin, UUIDPrimaryKeyMixin
+from app.models.base import Base, GeoLocationMixin, TimestampMixin, UUIDPrimaryKeyMixin
 
 
-class Project(UUIDPrimaryKeyMixin, TimestampMixin, Base):
+class Project(UUIDPrimaryKeyMixin, TimestampMixin, GeoLocationMixin, Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        # キーセットページネーション用 (created_at DESC, id DESC)
+        Index("ix_projects_created_at_id", "created_at", "id"),
+        Index("ix_projects_status_created_at_id", "status", "created_at", "id"),
+        # 同一都道府県・半径検索用
+        Index("ix_projects_prefecture_municipality", "prefecture_code", "municipality_code"),
+        Index("ix_projects_latitude_longitude", "latitude", "longitude"),
+    )
 
     company_id: Mapped[uuid.UUID] = mapped_column(Uuid, ForeignKey("companies.id"), nullable=False)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -21,10 +29,14 @@ class Project(UUIDPrimaryKeyMixin, TimestampMixin, Base):
         Uuid, ForeignKey("specialties.id")
     )
 
-    company = relationship("Company", backref="projects", lazy="selectin")
-    required_specialty = relationship("Specialty", lazy="selectin")
-    files = relationship("ProjectFile", back_populates="project", lazy="selectin")
-    quotes = relationship("Quote", back_populates="project", lazy="selectin")
+    # 関連は既定で読み込まない (必要な関連はリポジトリの loader プロファイルで指定する)。
+    # セッションに無い関連へ暗黙にアクセスすると例外になり、N+1 や過剰取得をテストで検出できる
+    company = relationship(
+        "Company", backref=backref("projects", lazy="raise_on_sql"), lazy="raise_on_sql"
+    )
+    required_specialty = relationship("Specialty", lazy="raise_on_sql")
+    files = relationship("ProjectFile", back_populates="project", lazy="raise_on_sql")
+    quotes = relationship("Quote", back_populates="project", lazy="raise_on_sql")
 
 
 class ProjectFile(UUIDPrimaryKeyMixin, TimestampMixin, Base):
@@ -36,5 +48,7 @@ class ProjectFile(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     file_name: Mapped[str] = mapped_column(String(255), nullable=False)
     file_url: Mapped[str] = mapped_column(String(1000), nullable=False)
     file_size: Mapped[int | None] = mapped_column(Integer)
+    # 内容の SHA-256 (16 進)。アップロード時に計算し、FileBlob の参照数を数えるのにも使う
+    checksum: Mapped[str | None] = mapped_column(String(64), index=True)
 
-    project = relationship("Project", back_populates="files")
+    project = relationship("Project", back_populates="files", lazy="raise_on_sql")
@@ -16,5 +16,5 @@ class Quote(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     estimated_days: Mapped[int | None] = mapped_column()
     status: Mapped[str] = mapped_column(String(50), nullable=False, default="submitted")
 
-    project = relationship("Project", back_populates="quotes")
-    company = relationship("Company", lazy="selectin")
+    project = relationship("Project", back_populates="quotes", lazy="raise_on_sql")
+    company = relationship("Company", lazy="raise_on_sql")
@@ -22,6 +22,10 @@ class Review(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     rating: Mapped[int] = mapped_column(Integer, nullable=False)
     comment: Mapped[str | None] = mapped_column(Text)
 
-    order = relationship("Order", lazy="selectin")
-    reviewer_company = relationship("Company", foreign_keys=[reviewer_company_id], lazy="selectin")
-    reviewee_company = relationship("Company", foreign_keys=[reviewee_company_id], lazy="selectin")
+    order = relationship("Order", lazy="raise_on_sql")
+    reviewer_company = relationship(
+        "Company", foreign_keys=[reviewer_company_id], lazy="raise_on_sql"
+    )
+    reviewee_company = relationship(
+        "Company", foreign_keys=[reviewee_company_id], lazy="raise_on_sql"
+    )
@@ -1,11 +1,26 @@
 import uuid
+from datetime import datetime, timezone
+from typing import Literal
 
-from sqlalchemy import func, select
+from sqlalchemy import case, delete, distinct, func, insert, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.models.company import Company, Specialty, company_specialties
+from app.models.company import Company, CompanySearchGram, Specialty, company_specialties
 from app.models.user import User
+from app.utils.geocoder import GeoPoint, within_radius
+from app.utils.search import (
+    FIELD_WEIGHTS,
+    KEYWORD_FIELDS,
+    LOCATION_FIELDS,
+    RATING_WEIGHT,
+    gram_rows,
+    grams,
+    normalize,
+    search_columns,
+)
+
+CompanyLoad = Literal["minimal", "detail"]
 
 
 class CompanyRepository:
@@ -20,33 +35,53 @@ class CompanyRepository:
         )
         return result.scalar_one_or_none()
 
-    async def get_by_id(self, company_id: uuid.UUID) -> Company | None:
+    async def get_id_by_user_id(self, user_id: uuid.UUID) -> uuid.UUID | None:
+        result = await self.db.execute(select(Company.id).where(Company.user_id == user_id))
+        return result.scalar_one_or_none()
+
+    async def get_by_id(
+        self, company_id: uuid.UUID, load: CompanyLoad = "detail"
+    ) -> Company | None:
+        """load="minimal" は列のみ、"detail" は specialties も読み込む"""
+        query = select(Company).where(Company.id == company_id)
+        if load == "detail":
+            query = query.options(selectinload(Company.specialties))
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none()
+
+    async def get_many(self, company_ids: list[uuid.UUID]) -> list[Company]:
+        """ID の順に企業を返す (見つからない ID は除く)"""
         result = await self.db.execute(
             select(Company)
             .options(selectinload(Company.specialties))
-            .where(Company.id == company_id)
+            .where(Company.id.in_(company_ids))
         )
+        companies = {company.id: company for company in result.scalars().all()}
+        return [companies[i] for i in company_ids if i in companies]
+
+    async def get_updated_at(self, company_id: uuid.UUID) -> datetime | None:
+        result = await self.db.execute(select(Company.updated_at).where(Company.id == company_id))
         return result.scalar_one_or_none()
 
     async def create(self, user_id: uuid.UUID, **kwargs) -> Company:
-        company = Company(user_id=user_id, **kwargs)
+        company = Company(user_id=user_id, specialties=[], **kwargs)
         self.db.add(company)
         await self.db.flush()
-        # Re-fetch with selectinload to ensure specialties is loaded
-        return await self.get_by_user_id(user_id)
+        return company
 
     async def update(self, company: Company, **kwargs) -> Company:
         for key, value in kwargs.items():
             if value is not None:
                 setattr(company, key, value)
         await self.db.flush()
-        # Re-fetch to ensure all attributes are loaded
-        return await self.get_by_id(company.id)
+        return company
 
     async def set_specialties(self, company: Company, specialty_ids: list[uuid.UUID]) -> Company:
         result = await self.db.execute(select(Specialty).where(Specialty.id.in_(specialty_ids)))
         specialties = list(result.scalars().all())
         company.specialties = specialties
+        # 関連表だけの変更では企業の行が更新されないため、ETag 用に updated_at を進める
+        company.updated_at = datetime.now(timezone.utc)
         await self.db.flush()
         return company
 
@@ -55,10 +90,34 @@ class CompanyRepository:
         return list(result.scalars().all())
 
     async def update_average_rating(self, company_id: uuid.UUID, avg_rating: float) -> None:
-        company = await self.get_by_id(company_id)
-        if company:
-            company.average_rating = avg_rating
-            await self.db.flush()
+        await self.db.execute(
+            update(Company).where(Company.id == company_id).values(average_rating=avg_rating)
+        )
+
+    async def rebuild_search_index(self, batch_size: int = 1000) -> int:
+        """全企業の検索列と n-gram インデックスを作り直し、処理した企業数を返す"""
+        await self.db.execute(delete(CompanySearchGram))
+        rebuilt = 0
+        last_id = None
+        while True:
+            query = select(Company.id, Company.name, Company.description, Company.address)
+            if last_id is not None:
+                query = query.where(Company.id > last_id)
+            result = await self.db.execute(query.order_by(Company.id).limit(batch_size))
+            batch = result.all()
+            if not batch:
+                return rebuilt
+            for company_id, name, description, address in batch:
+                await self.db.execute(
+                    update(Company)
+                    .where(Company.id == company_id)
+                    .values(**search_columns(name, description, address))
+                )
+            rows = [row for company in batch for row in gram_rows(*company)]
+            if rows:
+                await self.db.execute(insert(CompanySearchGram), rows)
+            rebuilt += len(batch)
+            last_id = batch[-1].id
 
     async def list_subcontractors(
         self,
@@ -66,9 +125,19 @@ class CompanyRepository:
         keyword: str | None = None,
         location: str | None = None,
         min_rating: float | None = None,
+        prefecture_code: str | None = None,
+        near: tuple[GeoPoint, float] | None = None,
         page: int = 1,
         per_page: int = 20,
-    ) -> tuple[list[Company], int]:
+        after: tuple[datetime, uuid.UUID] | None = None,
+        with_total: bool = True,
+    ) -> tuple[list[Company], int | None, bool]:
+        """下請け企業一覧を返す (after と戻り値は list_projects と同じ)
+
+        keyword を指定すると n-gram インデックスで絞り込み、関連度と average_rating の
+        合成スコア順に並べる (この場合 after は使えない)。指定しなければ新しい順。
+        near は (基準点, 半径 km)。
+        """
         # Base query: join Company with User and filter subcontractors only
         base_query = (
             select(Company)
@@ -81,32 +150,74 @@ class CompanyRepository:
                 company_specialties.c.specialty_id == specialty_id
             )
 
+        relevance = None
         if keyword is not None:
-            pattern = f"%{keyword}%"
-            base_query = base_query.where(
-                Company.name.ilike(pattern) | Company.description.ilike(pattern)
+            base_query, relevance = _match_grams(
+                base_query, Company.search_text, keyword, KEYWORD_FIELDS
             )
 
         if location is not None:
-            base_query = base_query.where(Company.address.ilike(f"%{location}%"))
+            base_query, _ = _match_grams(
+                base_query, Company.search_address, location, LOCATION_FIELDS
+            )
 
         if min_rating is not None:
             base_query = base_query.where(Company.average_rating >= min_rating)
 
+        if prefecture_code is not None:
+            base_query = base_query.where(Company.prefecture_code == prefecture_code)
+
+        if near is not None:
+            base_query = base_query.where(
+                *within_radius(Company.latitude, Company.longitude, *near)
+            )
+
         # Count total
-        count_query = select(func.count()).select_from(base_query.subquery())
-        total_result = await self.db.execute(count_query)
-        total = total_result.scalar_one()
-
-        # Fetch paginated items
-        offset = (page - 1) * per_page
-        items_query = (
-            base_query.options(selectinload(Company.specialties))
-            .order_by(Company.created_at.desc())
-            .offset(offset)
-            .limit(per_page)
-        )
-        items_result = await self.db.execute(items_query)
+        total = None
+        if with_total:
+            count_query = select(func.count()).select_from(base_query.subquery())
+            total_result = await self.db.execute(count_query)
+            total = total_result.scalar_one()
+
+        # Fetch paginated items (one extra row tells whether a next page exists)
+        items_query = base_query.options(selectinload(Company.specialties))
+        if keyword is not None:
+            score = func.coalesce(relevance, 0) + RATING_WEIGHT * func.coalesce(
+                Company.average_rating, 0
+            )
+            items_query = items_query.order_by(score.desc(), Company.id.desc())
+        else:
+            items_query = items_query.order_by(Company.created_at.desc(), Company.id.desc())
+        if after is not None:
+            items_query = items_query.where(
+                tuple_(Company.created_at, Company.id) < tuple_(*after)
+            )
+        else:
+            items_query = items_query.offset((page - 1) * per_page)
+        items_result = await self.db.execute(items_query.limit(per_page + 1))
         items = list(items_result.scalars().all())
 
-        return items, total
+        return items[:per_page], total, len(items) > per_page
+
+
+def _match_grams(query, column, text: str, fields: tuple[str, ...]):
+    """検索語の n-gram をすべて含み、検索列に連続して一致する企業に絞り込む
+
+    戻り値は (query, 関連度)。関連度は一致したフィールドの重みの gram あたり平均。
+    """
+    needle = normalize(text)
+    query = query.where(column.contains(needle, autoescape=True))
+    terms = grams(needle)
+    if not terms:
+        # n-gram にならない短い語は検索列の部分一致だけで絞り込む (全件走査になる)
+        return query, None
+    weight = case(FIELD_WEIGHTS, value=CompanySearchGram.field)
+    matches = (
+        select(CompanySearchGram.company_id, func.sum(weight).label("weight"))
+        .where(CompanySearchGram.gram.in_(terms), CompanySearchGram.field.in_(fields))
+        .group_by(CompanySearchGram.company_id)
+        .having(func.count(distinct(CompanySearchGram.gram)) == len(terms))
+        .subquery()
+    )
+    query = query.join(matches, matches.c.company_id == Company.id)
+    return query, matches.c.weight / float(len(terms))
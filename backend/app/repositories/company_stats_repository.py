@@ -0,0 +1,182 @@
+import uuid
+
+from sqlalchemy import func, select, union_all, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.constants import DirectOrderStatus, OrderStatus, ProjectStatus, QuoteStatus
+from app.models.company_stats import COUNTER_COLUMNS, CompanyStats
+from app.models.direct_order import DirectOrder
+from app.models.order import Order
+from app.models.project import Project
+from app.models.quote import Quote
+from app.models.review import Review
+
+
+class CompanyStatsRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, company_id: uuid.UUID) -> CompanyStats | None:
+        return await self.db.get(CompanyStats, company_id)
+
+    async def get_or_create(self, company_id: uuid.UUID) -> CompanyStats:
+        stats = await self.get(company_id)
+        if stats is None:
+            stats = await self._insert_from_source(company_id)
+        return stats
+
+    async def increment(self, company_id: uuid.UUID, **deltas: int) -> None:
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        result = await self.db.execute(
+            update(CompanyStats)
+            .where(CompanyStats.company_id == company_id)
+            .values({key: getattr(CompanyStats, key) + delta for key, delta in deltas.items()})
+        )
+        if result.rowcount == 0:
+            # 行がまだ無い企業は元テーブルから初期値を作る (変更は flush 済みなので反映されている)
+            try:
+                await self._insert_from_source(company_id)
+            except IntegrityError:
+                # 並行リクエストが先に行を作成した場合は差分更新をやり直す
+                await self.increment(company_id, **deltas)
+
+    async def compute_from_source(
+        self, company_ids: list[uuid.UUID] | None = None
+    ) -> dict[uuid.UUID, dict[str, int]]:
+        """projects / quotes / orders / direct_orders / reviews からカウンタを再計算する"""
+        counters: dict[uuid.UUID, dict[str, int]] = {}
+        if company_ids is not None:
+            # 活動の無い企業もゼロ行として返す
+            for company_id in company_ids:
+                counters[company_id] = dict.fromkeys(COUNTER_COLUMNS, 0)
+
+        def scoped(query, column):
+            return query.where(column.in_(company_ids)) if company_ids is not None else query
+
+        queries = [
+            scoped(
+                select(
+                    Project.company_id,
+                    func.count().label("total_projects"),
+                    _count_status(Project.status, ProjectStatus.OPEN).label("open_projects"),
+                    _count_status(Project.status, ProjectStatus.IN_PROGRESS).label(
+                        "in_progress_projects"
+                    ),
+                    _count_status(Project.status, ProjectStatus.COMPLETED).label(
+                        "completed_projects"
+                    ),
+                ).group_by(Project.company_id),
+                Project.company_id,
+            ),
+            scoped(
+                select(
+                    Project.company_id,
+                    func.count().label("pending_quotes"),
+                )
+                .join(Quote, Quote.project_id == Project.id)
+                .where(Quote.status == QuoteStatus.SUBMITTED.value)
+                .group_by(Project.company_id),
+                Project.company_id,
+            ),
+            scoped(
+                select(
+                    Order.contractor_company_id,
+                    func.count().label("total_orders"),
+                ).group_by(Order.contractor_company_id),
+                Order.contractor_company_id,
+            ),
+            scoped(
+                select(
+                    Quote.company_id,
+                    func.count().label("total_quotes"),
+                    _count_status(Quote.status, QuoteStatus.ACCEPTED).label("accepted_quotes"),
+                ).group_by(Quote.company_id),
+                Quote.company_id,
+            ),
+            scoped(
+                select(
+                    Order.subcontractor_company_id,
+                    _count_status(Order.status, OrderStatus.CONFIRMED).label("active_orders"),
+                    _count_status(Order.status, OrderStatus.COMPLETED).label("completed_orders"),
+                ).group_by(Order.subcontractor_company_id),
+                Order.subcontractor_company_id,
+            ),
+            scoped(
+                select(
+                    Review.reviewee_company_id,
+                    func.count().label("review_count"),
+                    func.coalesce(func.sum(Review.rating), 0).label("rating_total"),
+                ).group_by(Review.reviewee_company_id),
+                Review.reviewee_company_id,
+            ),
+        ]
+
+        parties = union_all(
+            select(
+                DirectOrder.contractor_company_id.label("company_id"),
+                DirectOrder.status,
+            ),
+            select(
+                DirectOrder.subcontractor_company_id.label("company_id"),
+                DirectOrder.status,
+            ),
+        ).subquery()
+        queries.append(
+            scoped(
+                select(
+                    parties.c.company_id,
+                    _count_status(parties.c.status, DirectOrderStatus.PENDING).label(
+                        "pending_direct_orders"
+                    ),
+                    func.count()
+                    .filter(
+                        parties.c.status.in_(
+                            [
+                                DirectOrderStatus.ACCEPTED.value,
+                                DirectOrderStatus.IN_PROGRESS.value,
+                            ]
+                        )
+                    )
+                    .label("active_direct_orders"),
+                    _count_status(parties.c.status, DirectOrderStatus.COMPLETED).label(
+                        "completed_direct_orders"
+                    ),
+                ).group_by(parties.c.company_id),
+                parties.c.company_id,
+            )
+        )
+
+        for query in queries:
+            result = await self.db.execute(query)
+            for company_id, *values in result.all():
+                counters.setdefault(company_id, dict.fromkeys(COUNTER_COLUMNS, 0)).update(
+                    zip(list(result.keys())[1:], (int(v or 0) for v in values), strict=True)
+                )
+        return counters
+
+    async def list_all(self) -> dict[uuid.UUID, CompanyStats]:
+        result = await self.db.execute(select(CompanyStats))
+        return {stats.company_id: stats for stats in result.scalars().all()}
+
+    async def replace(self, company_id: uuid.UUID, counters: dict[str, int]) -> None:
+        stats = await self.get(company_id)
+        if stats is None:
+            self.db.add(CompanyStats(company_id=company_id, **counters))
+        else:
+            for key, value in counters.items():
+                setattr(stats, key, value)
+        await self.db.flush()
+
+    async def _insert_from_source(self, company_id: uuid.UUID) -> CompanyStats:
+        counters = (await self.compute_from_source([company_id]))[company_id]
+        stats = CompanyStats(company_id=company_id, **counters)
+        async with self.db.begin_nested():
+            self.db.add(stats)
+        return stats
+
+
+def _count_status(column, status):
+    return func.count().filter(column == status.value)
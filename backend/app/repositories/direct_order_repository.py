@@ -1,9 +1,13 @@
 import uuid
+from datetime import datetime, timezone
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.constants import DirectOrderStatus
+from app.models.company import Company
 from app.models.direct_order import DirectOrder
 
 
@@ -17,12 +21,27 @@ class DirectOrderRepository:
             .options(
                 selectinload(DirectOrder.contractor_company),
                 selectinload(DirectOrder.subcontractor_company),
-                selectinload(DirectOrder.specialty),
             )
             .where(DirectOrder.id == direct_order_id)
         )
         return result.scalar_one_or_none()
 
+    async def get_version(self, direct_order_id: uuid.UUID):
+        """ETag 用に (updated_at, specialty_id, 元請け・下請け企業の updated_at) だけを返す"""
+        contractor, subcontractor = aliased(Company), aliased(Company)
+        result = await self.db.execute(
+            select(
+                DirectOrder.updated_at,
+                DirectOrder.specialty_id,
+                contractor.updated_at,
+                subcontractor.updated_at,
+            )
+            .join(contractor, contractor.id == DirectOrder.contractor_company_id)
+            .join(subcontractor, subcontractor.id == DirectOrder.subcontractor_company_id)
+            .where(DirectOrder.id == direct_order_id)
+        )
+        return result.one_or_none()
+
     async def list_by_company(
         self, company_id: uuid.UUID, status: str | None = None
     ) -> list[DirectOrder]:
@@ -31,7 +50,6 @@ class DirectOrderRepository:
             .options(
                 selectinload(DirectOrder.contractor_company),
                 selectinload(DirectOrder.subcontractor_company),
-                selectinload(DirectOrder.specialty),
             )
             .where(
                 (DirectOrder.contractor_company_id == company_id)
@@ -48,12 +66,22 @@ class DirectOrderRepository:
         direct_order = DirectOrder(**kwargs)
         self.db.add(direct_order)
         await self.db.flush()
-        return await self.get_by_id(direct_order.id)
+        # レスポンスに含める関連を埋める (セッションに読み込み済みならクエリは発行しない)。
+        # 専門分野名はレスポンス側で specialty_registry から引く
+        references = {
+            "contractor_company": direct_order.contractor_company_id,
+            "subcontractor_company": direct_order.subcontractor_company_id,
+        }
+        for name, key in references.items():
+            set_committed_value(direct_order, name, await self.db.get(Company, key))
+        return direct_order
 
     async def update_status(self, direct_order: DirectOrder, status: str) -> DirectOrder:
         direct_order.status = status
+        if status == DirectOrderStatus.ACCEPTED.value:
+            direct_order.accepted_at = datetime.now(timezone.utc)
         await self.db.flush()
-        return await self.get_by_id(direct_order.id)
+        return direct_order
 
     async def update_decline_reason(self, direct_order: DirectOrder, reason: str | None) -> None:
         direct_order.decline_reason = reason
@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.file_blob import FileBlob
+from app.models.project import ProjectFile
+
+
+class FileBlobRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def exists(self, digest: str) -> bool:
+        digests = await self.db.scalars(select(FileBlob.digest).where(FileBlob.digest == digest))
+        return digests.first() is not None
+
+    async def acquire(self, digest: str) -> bool:
+        """既存の本体の参照数を 1 増やす (無ければ False)
+
+        行ロックはトランザクションの終わりまで続くため、GC は参照が増えた本体を消さない。
+        """
+        result = await self.db.execute(
+            update(FileBlob)
+            .where(FileBlob.digest == digest)
+            .values(ref_count=FileBlob.ref_count + 1, updated_at=datetime.now(timezone.utc))
+        )
+        return result.rowcount > 0
+
+    async def create(self, digest: str, size: int) -> None:
+        """S3 に保存した本体を参照数 1 で登録する"""
+        try:
+            async with self.db.begin_nested():
+                self.db.add(FileBlob(digest=digest, size=size, ref_count=1))
+        except IntegrityError:
+            # 同じ内容の並行アップロードが先に登録した (オブジェクトの中身は同じ)
+            await self.acquire(digest)
+
+    async def recount(self) -> int:
+        """参照数を ProjectFile から数え直す (案件の削除で消えた参照を反映する)"""
+        references = (
+            select(func.count())
+            .where(ProjectFile.checksum == FileBlob.digest)
+            .correlate(FileBlob)
+            .scalar_subquery()
+        )
+        result = await self.db.execute(
+            update(FileBlob)
+            .where(FileBlob.ref_count != references)
+            # updated_at は参照が増えた時刻として GC の猶予に使うので変えない
+            .values(ref_count=references, updated_at=FileBlob.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    async def lock_unreferenced(self, before: datetime, limit: int | None) -> list[FileBlob]:
+        """before より前から参照の無い本体を最大 limit 件ロックして返す"""
+        result = await self.db.scalars(
+            select(FileBlob)
+            .where(FileBlob.ref_count == 0, FileBlob.updated_at < before)
+            .order_by(FileBlob.updated_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(result)
+
+    async def delete(self, digests: list[str]) -> None:
+        await self.db.execute(
+            delete(FileBlob)
+            .where(FileBlob.digest.in_(digests))
+            .execution_options(synchronize_session=False)
+        )
+
+    async def usage(self) -> dict:
+        """重複排除の効果 (ファイルとしての合計サイズと、S3 に保存している本体の合計サイズ)"""
+        files, logical_bytes = (
+            await self.db.execute(
+                select(func.count(), func.coalesce(func.sum(ProjectFile.file_size), 0)).where(
+                    ProjectFile.checksum.in_(select(FileBlob.digest))
+                )
+            )
+        ).one()
+        blobs, stored_bytes = (
+            await self.db.execute(select(func.count(), func.coalesce(func.sum(FileBlob.size), 0)))
+        ).one()
+        return {
+            "files": files,
+            "blobs": blobs,
+            "logical_bytes": logical_bytes,
+            "stored_bytes": stored_bytes,
+            "saved_bytes": logical_bytes - stored_bytes,
+        }
@@ -0,0 +1,121 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.constants import JobStatus
+from app.models.job import Job
+
+# PostgreSQL で別プロセスのワーカーを起こす LISTEN/NOTIFY のチャンネル
+PG_CHANNEL = "jobs"
+
+
+class JobRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, **kwargs) -> Job:
+        job = Job(**kwargs)
+        self.db.add(job)
+        await self.db.flush()
+        if self.db.get_bind().dialect.name == "postgresql":
+            # NOTIFY はコミット時に配信されるため、ロールバックされたジョブでは起こさない
+            await self.db.execute(select(func.pg_notify(PG_CHANNEL, job.queue)))
+        return job
+
+    async def claim(self, queue: str, limit: int, worker_id: str, now: datetime) -> list:
+        """実行可能なジョブを最大 limit 件まで実行中にして返す (優先度の高い順)
+
+        PostgreSQL では FOR UPDATE SKIP LOCKED で他のワーカーが取得中の行を飛ばす。
+        SQLite では FOR UPDATE が出力されないが、書き込みは直列化されるうえ
+        status の条件で二重取得を防ぐので、同じ文がそのまま使える。
+        """
+        candidates = (
+            select(Job.id)
+            .where(Job.queue == queue, Job.status == JobStatus.QUEUED.value, Job.run_at <= now)
+            .order_by(Job.priority.desc(), Job.run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.db.execute(
+            update(Job)
+            .where(Job.id.in_(candidates.scalar_subquery()), Job.status == JobStatus.QUEUED.value)
+            .values(
+                status=JobStatus.RUNNING.value,
+                attempts=Job.attempts + 1,
+                locked_by=worker_id,
+                locked_at=now,
+            )
+            .returning(
+                Job.id,
+                Job.name,
+                Job.payload,
+                Job.priority,
+                Job.run_at,
+                Job.attempts,
+                Job.max_attempts,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        # RETURNING の順序は保証されないので、取得したときと同じ順に並べ直す
+        return sorted(result.all(), key=lambda row: (-row.priority, row.run_at))
+
+    async def heartbeat(self, worker_id: str, now: datetime) -> int:
+        """worker_id が実行中のジョブのロックを延長する (release_stale で戻されないように)"""
+        result = await self.db.execute(
+            update(Job)
+            .where(Job.locked_by == worker_id, Job.status == JobStatus.RUNNING.value)
+            .values(locked_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    async def complete(self, job_id: uuid.UUID, worker_id: str, now: datetime) -> bool:
+        return await self._finish(
+            job_id, worker_id, status=JobStatus.SUCCEEDED.value, finished_at=now
+        )
+
+    async def retry(self, job_id: uuid.UUID, worker_id: str, error: str, run_at: datetime) -> bool:
+        return await self._finish(
+            job_id, worker_id, status=JobStatus.QUEUED.value, last_error=error, run_at=run_at
+        )
+
+    async def fail(self, job_id: uuid.UUID, worker_id: str, error: str, now: datetime) -> bool:
+        return await self._finish(
+            job_id, worker_id, status=JobStatus.FAILED.value, last_error=error, finished_at=now
+        )
+
+    async def _finish(self, job_id: uuid.UUID, worker_id: str, **values) -> bool:
+        """worker_id が実行中のジョブを終える。ロックを失っていれば (期限切れで戻された後に
+        他のワーカーが取得したなど) 何もせず False を返す"""
+        result = await self.db.execute(
+            update(Job)
+            .where(
+                Job.id == job_id,
+                Job.locked_by == worker_id,
+                Job.status == JobStatus.RUNNING.value,
+            )
+            .values(locked_by=None, locked_at=None, **values)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount > 0
+
+    async def release_stale(self, locked_before: datetime) -> int:
+        """ワーカーが落ちて実行中のまま残ったジョブを待ち状態に戻す"""
+        result = await self.db.execute(
+            update(Job)
+            .where(Job.status == JobStatus.RUNNING.value, Job.locked_at < locked_before)
+            .values(status=JobStatus.QUEUED.value, locked_by=None, locked_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    async def count_by_status(self) -> dict[str, dict[str, int]]:
+        result = await self.db.execute(
+            select(Job.queue, Job.status, func.count()).group_by(Job.queue, Job.status)
+        )
+        counts: dict[str, dict[str, int]] = {}
+        for queue, status, count in result.all():
+            counts.setdefault(queue, {})[status] = count
+        return counts
@@ -0,0 +1,70 @@
+import uuid
+from collections.abc import Collection
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.constants import ProjectStatus, QuoteStatus, UserRole
+from app.models.company import Company, company_specialties
+from app.models.project import Project
+from app.models.quote import Quote
+from app.models.user import User
+
+
+class MatchingRepository:
+    """推薦用の特徴量を読み込む (ids を指定するとその行だけ、None なら全件)"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_open_project_features(self, ids: Collection[uuid.UUID] | None = None):
+        query = select(
+            Project.id,
+            Project.required_specialty_id,
+            Project.prefecture_code,
+            Project.latitude,
+            Project.longitude,
+            Project.budget_min,
+            Project.budget_max,
+        ).where(Project.status == ProjectStatus.OPEN.value)
+        if ids is not None:
+            query = query.where(Project.id.in_(ids))
+        result = await self.db.execute(query)
+        return result.all()
+
+    async def get_subcontractor_features(self, ids: Collection[uuid.UUID] | None = None):
+        query = (
+            select(
+                Company.id,
+                Company.prefecture_code,
+                Company.latitude,
+                Company.longitude,
+                Company.average_rating,
+            )
+            .join(User, User.id == Company.user_id)
+            .where(User.role == UserRole.SUBCONTRACTOR.value, User.is_active.is_(True))
+        )
+        if ids is not None:
+            query = query.where(Company.id.in_(ids))
+        result = await self.db.execute(query)
+        return result.all()
+
+    async def get_specialty_pairs(self, company_ids: Collection[uuid.UUID] | None = None):
+        """(company_id, specialty_id) の組"""
+        query = select(company_specialties.c.company_id, company_specialties.c.specialty_id)
+        if company_ids is not None:
+            query = query.where(company_specialties.c.company_id.in_(company_ids))
+        result = await self.db.execute(query)
+        return result.all()
+
+    async def get_accepted_quote_stats(self, company_ids: Collection[uuid.UUID] | None = None):
+        """企業ごとの (company_id, 採用された見積もり数, 採用額の平均)"""
+        query = (
+            select(Quote.company_id, func.count(), func.avg(Quote.amount))
+            .where(Quote.status == QuoteStatus.ACCEPTED.value)
+            .group_by(Quote.company_id)
+        )
+        if company_ids is not None:
+            query = query.where(Quote.company_id.in_(company_ids))
+        result = await self.db.execute(query)
+        return result.all()
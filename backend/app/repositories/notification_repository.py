@@ -1,9 +1,13 @@
 import uuid
+from datetime import datetime
 
-from sqlalchemy import func, select, update
+from sqlalchemy import and_, func, insert, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models.company import Company
 from app.models.notification import Notification
+from app.models.user import User
 
 
 class NotificationRepository:
@@ -16,15 +20,83 @@ class NotificationRepository:
         await self.db.flush()
         return notification
 
+    async def create_many(self, rows: list[dict]) -> list[Notification]:
+        """複数の通知を 1 つの複数行 INSERT で作成し、rows と同じ順で返す
+
+        outbox_event_id を持つ行は、同じイベント・宛先・参照先の通知が既にあれば作らない
+        (再配信されたイベント)。その場合は作成した分だけを返す。
+        """
+        if not rows:
+            return []
+        if not any(row.get("outbox_event_id") is not None for row in rows):
+            result = await self.db.execute(
+                insert(Notification).returning(Notification, sort_by_parameter_order=True), rows
+            )
+            return list(result.scalars().all())
+        dialect = self.db.get_bind().dialect.name
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        result = await self.db.execute(
+            dialect_insert(Notification).on_conflict_do_nothing().returning(Notification), rows
+        )
+        return list(result.scalars().all())
+
+    async def get_recipient_user_ids(
+        self, company_ids: list[uuid.UUID]
+    ) -> dict[uuid.UUID, uuid.UUID]:
+        """企業 ID から通知先ユーザー ID を 1 回の結合で引く (無効化されたユーザーは除く)"""
+        if not company_ids:
+            return {}
+        result = await self.db.execute(
+            select(Company.id, Company.user_id)
+            .join(User, User.id == Company.user_id)
+            .where(Company.id.in_(set(company_ids)), User.is_active.is_(True))
+        )
+        return dict(result.all())
+
     async def list_by_user(
-        self, user_id: uuid.UUID, unread_only: bool = False
-    ) -> list[Notification]:
-        query = select(Notification).where(Notification.user_id == user_id)
+        self,
+        user_id: uuid.UUID,
+        unread_only: bool = False,
+        limit: int = 50,
+        after: tuple[datetime, uuid.UUID] | None = None,
+    ) -> tuple[list[Notification], int, int, bool]:
+        """受信箱の 1 ページと件数を 1 回のクエリで取得する
+
+        件数集計の 1 行サブクエリに通知を LEFT JOIN するため、通知が 0 件でも件数は返る。
+        戻り値は (items, total, unread_count, has_more)。
+        """
+        conditions = [Notification.user_id == user_id]
         if unread_only:
-            query = query.where(Notification.is_read.is_(False))
-        query = query.order_by(Notification.created_at.desc())
-        result = await self.db.execute(query)
-        return list(result.scalars().all())
+            conditions.append(Notification.is_read.is_(False))
+
+        counts = (
+            select(
+                func.count().label("total"),
+                func.count().filter(Notification.is_read.is_(False)).label("unread_count"),
+            )
+            .where(Notification.user_id == user_id)
+            .subquery()
+        )
+
+        page_conditions = list(conditions)
+        if after is not None:
+            page_conditions.append(
+                tuple_(Notification.created_at, Notification.id) < tuple_(*after)
+            )
+        query = (
+            select(counts.c.total, counts.c.unread_count, Notification)
+            .select_from(counts)
+            .outerjoin(Notification, and_(*page_conditions))
+            .order_by(Notification.created_at.desc(), Notification.id.desc())
+            .limit(limit + 1)
+        )
+        rows = (await self.db.execute(query)).all()
+
+        total, unread_count = rows[0].total, rows[0].unread_count
+        if unread_only:
+            total = unread_count
+        items = [row.Notification for row in rows if row.Notification is not None]
+        return items[:limit], total, unread_count, len(items) > limit
 
     async def count_unread(self, user_id: uuid.UUID) -> int:
         result = await self.db.execute(
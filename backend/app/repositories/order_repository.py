@@ -1,8 +1,8 @@
 import uuid
+from datetime import datetime
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app.models.order import Order
 
@@ -12,16 +12,11 @@ class OrderRepository:
         self.db = db
 
     async def get_by_id(self, order_id: uuid.UUID) -> Order | None:
-        result = await self.db.execute(
-            select(Order)
-            .options(
-                selectinload(Order.project),
-                selectinload(Order.quote),
-                selectinload(Order.contractor_company),
-                selectinload(Order.subcontractor_company),
-            )
-            .where(Order.id == order_id)
-        )
+        result = await self.db.execute(select(Order).where(Order.id == order_id))
+        return result.scalar_one_or_none()
+
+    async def get_updated_at(self, order_id: uuid.UUID) -> datetime | None:
+        result = await self.db.execute(select(Order.updated_at).where(Order.id == order_id))
         return result.scalar_one_or_none()
 
     async def get_by_quote_id(self, quote_id: uuid.UUID) -> Order | None:
@@ -31,11 +26,6 @@ class OrderRepository:
     async def list_by_company(self, company_id: uuid.UUID) -> list[Order]:
         result = await self.db.execute(
             select(Order)
-            .options(
-                selectinload(Order.project),
-                selectinload(Order.contractor_company),
-                selectinload(Order.subcontractor_company),
-            )
             .where(
                 (Order.contractor_company_id == company_id)
                 | (Order.subcontractor_company_id == company_id)
@@ -48,9 +38,9 @@ class OrderRepository:
         order = Order(**kwargs)
         self.db.add(order)
         await self.db.flush()
-        return await self.get_by_id(order.id)
+        return order
 
     async def update_status(self, order: Order, status: str) -> Order:
         order.status = status
         await self.db.flush()
-        return await self.get_by_id(order.id)
+        return order
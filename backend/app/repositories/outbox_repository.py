@@ -0,0 +1,124 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.constants import OutboxStatus
+from app.models.outbox_event import OutboxEvent
+
+# PostgreSQL で中継を起こす LISTEN/NOTIFY のチャンネル
+PG_CHANNEL = "outbox"
+
+
+class OutboxRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def add(
+        self, event_type: str, payload: dict, aggregate_id: uuid.UUID | None = None
+    ) -> OutboxEvent:
+        """イベントを記録する (呼び出し元のトランザクションがコミットされたら配信される)"""
+        event = OutboxEvent(
+            event_type=event_type,
+            aggregate_id=aggregate_id,
+            payload=payload,
+            available_at=datetime.now(timezone.utc),
+        )
+        self.db.add(event)
+        await self.db.flush()
+        if self.db.get_bind().dialect.name == "postgresql":
+            await self.db.execute(select(func.pg_notify(PG_CHANNEL, event_type)))
+        return event
+
+    async def claim(self, limit: int, now: datetime) -> list:
+        """配信可能なイベントを発生順に最大 limit 件ロックして返す
+
+        ロックはトランザクションの終わりまで続き、PostgreSQL では他の中継は
+        SKIP LOCKED で飛ばす (SQLite では書き込みが直列化される)。
+        """
+        result = await self.db.execute(
+            select(
+                OutboxEvent.id,
+                OutboxEvent.event_type,
+                OutboxEvent.aggregate_id,
+                OutboxEvent.payload,
+                OutboxEvent.attempts,
+                OutboxEvent.created_at,
+            )
+            .where(
+                OutboxEvent.status == OutboxStatus.PENDING.value, OutboxEvent.available_at <= now
+            )
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(result.all())
+
+    async def mark_dispatched(self, event_ids: list[int], now: datetime) -> None:
+        if event_ids:
+            await self._update(event_ids, status=OutboxStatus.DISPATCHED.value, dispatched_at=now)
+
+    async def retry(self, event_ids: list[int], error: str, available_at: datetime) -> None:
+        await self._update(
+            event_ids,
+            attempts=OutboxEvent.attempts + 1,
+            last_error=error,
+            available_at=available_at,
+        )
+
+    async def fail(self, event_ids: list[int], error: str) -> None:
+        await self._update(
+            event_ids,
+            status=OutboxStatus.FAILED.value,
+            attempts=OutboxEvent.attempts + 1,
+            last_error=error,
+        )
+
+    async def _update(self, event_ids: list[int], **values) -> None:
+        await self.db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(event_ids))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def requeue(
+        self,
+        status: OutboxStatus | None = None,
+        event_type: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        from_id: int | None = None,
+    ) -> int:
+        """条件に合うイベントを未配信に戻し (再試行回数も戻す)、件数を返す"""
+        conditions = []
+        if status is not None:
+            conditions.append(OutboxEvent.status == status.value)
+        if event_type is not None:
+            conditions.append(OutboxEvent.event_type == event_type)
+        if since is not None:
+            conditions.append(OutboxEvent.created_at >= since)
+        if until is not None:
+            conditions.append(OutboxEvent.created_at < until)
+        if from_id is not None:
+            conditions.append(OutboxEvent.id >= from_id)
+        result = await self.db.execute(
+            update(OutboxEvent)
+            .where(*conditions)
+            .values(
+                status=OutboxStatus.PENDING.value,
+                attempts=0,
+                available_at=datetime.now(timezone.utc),
+                dispatched_at=None,
+                last_error=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    async def count_by_status(self) -> dict[str, int]:
+        result = await self.db.execute(
+            select(OutboxEvent.status, func.count()).group_by(OutboxEvent.status)
+        )
+        return dict(result.all())
@@ -0,0 +1,67 @@
+from collections.abc import AsyncIterator
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.constants import DirectOrderStatus
+from app.models.direct_order import DirectOrder
+from app.models.order import Order
+from app.models.price_sketch import PriceSketch
+from app.models.project import Project
+
+# 承認された (金額が成立した) 直接発注の状態
+ACCEPTED_DIRECT_ORDER_STATUSES = (
+    DirectOrderStatus.ACCEPTED,
+    DirectOrderStatus.IN_PROGRESS,
+    DirectOrderStatus.COMPLETED,
+)
+
+
+class PriceRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_sketches(self) -> list[PriceSketch]:
+        result = await self.db.execute(select(PriceSketch))
+        return list(result.scalars().all())
+
+    async def iter_order_amounts(
+        self, since: datetime | None = None, batch_size: int = 1000
+    ) -> AsyncIterator:
+        """受注 (見積もり承認) ごとの (専門分野, 都道府県, 金額, 作成日時) を順に返す"""
+        query = select(
+            Project.required_specialty_id, Project.prefecture_code, Order.amount, Order.created_at
+        ).join(Project, Project.id == Order.project_id)
+        if since is not None:
+            query = query.where(Order.created_at > since)
+        result = await self.db.stream(query.execution_options(yield_per=batch_size))
+        async for row in result:
+            yield row
+
+    async def iter_direct_order_amounts(
+        self, since: datetime | None = None, batch_size: int = 1000
+    ) -> AsyncIterator:
+        """承認された直接発注ごとの (専門分野, 所在地, 金額, 承認日時) を順に返す
+
+        承認待ち・辞退・キャンセルは成立した金額ではないので数えない。
+        """
+        query = select(
+            DirectOrder.specialty_id,
+            DirectOrder.location,
+            DirectOrder.amount,
+            DirectOrder.accepted_at,
+        ).where(
+            DirectOrder.status.in_([status.value for status in ACCEPTED_DIRECT_ORDER_STATUSES]),
+            DirectOrder.accepted_at.is_not(None),
+        )
+        if since is not None:
+            query = query.where(DirectOrder.accepted_at > since)
+        result = await self.db.stream(query.execution_options(yield_per=batch_size))
+        async for row in result:
+            yield row
+
+    async def replace_sketches(self, rows: list[dict], batch_size: int = 1000) -> None:
+        await self.db.execute(delete(PriceSketch))
+        for start in range(0, len(rows), batch_size):
+            await self.db.execute(insert(PriceSketch), rows[start : start + batch_size])
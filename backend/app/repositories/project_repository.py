@@ -1,28 +1,129 @@
 import uuid
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, Literal
 
-from sqlalchemy import func, select
+from sqlalchemy import (
+    and_,
+    func,
+    literal,
+    null,
+    or_,
+    select,
+    tuple_,
+    type_coerce,
+    union_all,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.models.project import Project, ProjectFile
+from app.utils.geocoder import GeoPoint, geocoder, within_radius
+
+ProjectLoad = Literal["minimal", "detail", "with_quotes"]
+
+# 呼び出し側が必要とする関連だけを読み込むための loader プロファイル
+#   minimal:     列のみ (権限・ステータス確認用)
+#   detail:      ProjectResponse に含める files
+#   with_quotes: detail に加えて案件の見積もり一覧
+_LOADERS = {
+    "minimal": (),
+    "detail": (selectinload(Project.files),),
+    "with_quotes": (selectinload(Project.files), selectinload(Project.quotes)),
+}
+
+ProjectFacet = Literal["status", "specialty", "prefecture"]
+
+# ファセット名 -> 集計する列
+FACET_COLUMNS = {
+    "status": Project.status,
+    "specialty": Project.required_specialty_id,
+    "prefecture": Project.prefecture_code,
+}
+
+
+def _filter_conditions(
+    status: str | None = None,
+    company_id: uuid.UUID | None = None,
+    specialty_id: uuid.UUID | None = None,
+    location: str | None = None,
+    prefecture_code: str | None = None,
+    near: tuple[GeoPoint, float] | None = None,
+) -> list:
+    """一覧・ファセット集計で共通の WHERE 条件"""
+    conditions = []
+    if status:
+        conditions.append(Project.status == status)
+    if company_id:
+        conditions.append(Project.company_id == company_id)
+    if specialty_id:
+        conditions.append(Project.required_specialty_id == specialty_id)
+    if location:
+        area = geocoder.resolve_area(location)
+        matches_text = Project.location.ilike(f"%{location}%")
+        if area is None:
+            conditions.append(matches_text)
+        else:
+            in_area = [Project.prefecture_code == area.prefecture_code]
+            if area.municipality_code is not None:
+                in_area.append(Project.municipality_code == area.municipality_code)
+            # ジオコーディングされていない (コードの無い) 案件は文字列で一致させる
+            conditions.append(or_(and_(*in_area), matches_text))
+    if prefecture_code:
+        conditions.append(Project.prefecture_code == prefecture_code)
+    if near is not None:
+        conditions.extend(within_radius(Project.latitude, Project.longitude, *near))
+    return conditions
 
 
 class ProjectRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def get_by_id(self, project_id: uuid.UUID) -> Project | None:
+    async def get_by_id(
+        self, project_id: uuid.UUID, load: ProjectLoad = "detail"
+    ) -> Project | None:
         result = await self.db.execute(
-            select(Project)
-            .options(
-                selectinload(Project.files),
-                selectinload(Project.quotes),
-                selectinload(Project.company),
-                selectinload(Project.required_specialty),
+            select(Project).options(*_LOADERS[load]).where(Project.id == project_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_many(
+        self, project_ids: list[uuid.UUID], load: ProjectLoad = "detail"
+    ) -> list[Project]:
+        """ID の順に案件を返す (見つからない ID は除く)"""
+        result = await self.db.execute(
+            select(Project).options(*_LOADERS[load]).where(Project.id.in_(project_ids))
+        )
+        projects = {project.id: project for project in result.scalars().all()}
+        return [projects[i] for i in project_ids if i in projects]
+
+    async def get_version(self, project_id: uuid.UUID):
+        """ETag 用に (updated_at, ファイル数, ファイルの最終更新日時) だけを返す"""
+        result = await self.db.execute(
+            select(
+                Project.updated_at, func.count(ProjectFile.id), func.max(ProjectFile.updated_at)
             )
+            .outerjoin(ProjectFile, ProjectFile.project_id == Project.id)
             .where(Project.id == project_id)
+            .group_by(Project.id, Project.updated_at)
         )
-        return result.scalar_one_or_none()
+        return result.one_or_none()
+
+    async def get_geo_point(self, project_id: uuid.UUID) -> tuple[bool, GeoPoint | None]:
+        """(案件が存在するか, 所在地の代表点) を返す。所在地を特定できない案件は None"""
+        result = await self.db.execute(
+            select(
+                Project.prefecture_code,
+                Project.municipality_code,
+                Project.latitude,
+                Project.longitude,
+            ).where(Project.id == project_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return False, None
+        return True, GeoPoint(*row) if row.prefecture_code is not None else None
 
     async def list_projects(
         self,
@@ -30,51 +131,123 @@ class ProjectRepository:
         company_id: uuid.UUID | None = None,
         specialty_id: uuid.UUID | None = None,
         location: str | None = None,
+        prefecture_code: str | None = None,
+        near: tuple[GeoPoint, float] | None = None,
         page: int = 1,
         per_page: int = 20,
-    ) -> tuple[list[Project], int]:
-        query = select(Project).options(
-            selectinload(Project.files),
-            selectinload(Project.company),
+        after: tuple[datetime, uuid.UUID] | None = None,
+        with_total: bool = True,
+    ) -> tuple[list[Project], int | None, bool]:
+        """案件一覧を新しい順に返す
+
+        ``after`` を指定するとその (created_at, id) より後ろをキーセットで取得し、
+        ``page`` は無視する。戻り値は (items, total, has_more)。
+        ``near`` は (基準点, 半径 km)。location が地域名だけなら解決済みのコードで絞り込む。
+        """
+        query = (
+            select(Project)
+            .options(*_LOADERS["detail"])
+            .where(
+                *_filter_conditions(
+                    status, company_id, specialty_id, location, prefecture_code, near
+                )
+            )
         )
 
-        if status:
-            query = query.where(Project.status == status)
-        if company_id:
-            query = query.where(Project.company_id == company_id)
-        if specialty_id:
-            query = query.where(Project.required_specialty_id == specialty_id)
-        if location:
-            query = query.where(Project.location.ilike(f"%{location}%"))
-
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await self.db.execute(count_query)
-        total = total_result.scalar_one()
-
-        query = query.order_by(Project.created_at.desc())
-        query = query.offset((page - 1) * per_page).limit(per_page)
-        result = await self.db.execute(query)
+        total = None
+        if with_total:
+            count_query = select(func.count()).select_from(query.subquery())
+            total_result = await self.db.execute(count_query)
+            total = total_result.scalar_one()
+
+        query = query.order_by(Project.created_at.desc(), Project.id.desc())
+        if after is not None:
+            query = query.where(tuple_(Project.created_at, Project.id) < tuple_(*after))
+        else:
+            query = query.offset((page - 1) * per_page)
+        # 1 件多く取得して次ページの有無を判定する
+        result = await self.db.execute(query.limit(per_page + 1))
         projects = list(result.scalars().all())
 
-        return projects, total
+        return projects[:per_page], total, len(projects) > per_page
+
+    async def count_facets(
+        self, facets: Sequence[ProjectFacet], **filters
+    ) -> tuple[int, dict[str, list[tuple[Any, int]]]]:
+        """絞り込み後の総件数と、ファセットごとの (値, 件数) を 1 回のクエリで返す
+
+        PostgreSQL では GROUPING SETS ((status), (required_specialty_id), ..., ()) で
+        1 回の走査にまとめる。GROUPING SETS の無い DB (SQLite) では同じ形の行を返す
+        GROUP BY の UNION ALL にする。filters は list_projects の絞り込み引数と同じ。
+        """
+        columns = [FACET_COLUMNS[facet] for facet in facets]
+        conditions = _filter_conditions(**filters)
+        if self.db.get_bind().dialect.name == "postgresql":
+            query = (
+                select(*(func.grouping(c) for c in columns), *columns, func.count())
+                .where(*conditions)
+                .group_by(func.grouping_sets(*(tuple_(c) for c in columns), tuple_()))
+            )
+        else:
+            # 集計しない列は GROUPING() と同じく 1 にし、値は型を揃えた NULL にする
+            grouping_sets = [*({i} for i in range(len(columns))), set()]
+            query = union_all(
+                *(
+                    select(
+                        *(literal(0 if i in grouped else 1) for i in range(len(columns))),
+                        *(
+                            c if i in grouped else type_coerce(null(), c.type)
+                            for i, c in enumerate(columns)
+                        ),
+                        func.count(),
+                    )
+                    .select_from(Project)
+                    .where(*conditions)
+                    .group_by(*(columns[i] for i in grouped))
+                    for grouped in grouping_sets
+                )
+            )
+        result = await self.db.execute(query)
+
+        total = 0
+        counts: dict[str, list[tuple[Any, int]]] = {facet: [] for facet in facets}
+        for row in result.all():
+            flags, values, count = row[: len(columns)], row[len(columns) : -1], row[-1]
+            if all(flags):
+                total = count
+                continue
+            index = flags.index(0)
+            counts[facets[index]].append((values[index], count))
+        for facet_counts in counts.values():
+            facet_counts.sort(key=lambda item: (-item[1], item[0] is None, str(item[0])))
+        return total, counts
 
     async def create(self, company_id: uuid.UUID, **kwargs) -> Project:
-        project = Project(company_id=company_id, **kwargs)
+        # 新規案件のコレクションは空と分かっているので、読み込み済みとして持たせる
+        project = Project(company_id=company_id, files=[], quotes=[], **kwargs)
         self.db.add(project)
         await self.db.flush()
-        return await self.get_by_id(project.id)
+        return project
 
     async def update(self, project: Project, **kwargs) -> Project:
         for key, value in kwargs.items():
             if value is not None:
                 setattr(project, key, value)
         await self.db.flush()
-        return await self.get_by_id(project.id)
+        return project
 
     async def update_status(self, project: Project, status: str) -> Project:
         project.status = status
         await self.db.flush()
-        return await self.get_by_id(project.id)
+        return project
+
+    async def get_file_by_url(self, project_id: uuid.UUID, file_url: str) -> ProjectFile | None:
+        result = await self.db.execute(
+            select(ProjectFile).where(
+                ProjectFile.project_id == project_id, ProjectFile.file_url == file_url
+            )
+        )
+        return result.scalar_one_or_none()
 
     async def add_file(self, project_id: uuid.UUID, **kwargs) -> ProjectFile:
         file = ProjectFile(project_id=project_id, **kwargs)
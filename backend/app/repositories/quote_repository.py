@@ -2,7 +2,6 @@ import uuid
 
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app.constants import QuoteStatus
 from app.models.quote import Quote
@@ -13,9 +12,7 @@ class QuoteRepository:
         self.db = db
 
     async def get_by_id(self, quote_id: uuid.UUID) -> Quote | None:
-        result = await self.db.execute(
-            select(Quote).options(selectinload(Quote.company)).where(Quote.id == quote_id)
-        )
+        result = await self.db.execute(select(Quote).where(Quote.id == quote_id))
         return result.scalar_one_or_none()
 
     async def get_by_project_and_company(
@@ -31,35 +28,38 @@ class QuoteRepository:
 
     async def list_by_project(self, project_id: uuid.UUID) -> list[Quote]:
         result = await self.db.execute(
-            select(Quote)
-            .options(selectinload(Quote.company))
-            .where(Quote.project_id == project_id)
-            .order_by(Quote.created_at.desc())
+            select(Quote).where(Quote.project_id == project_id).order_by(Quote.created_at.desc())
         )
         return list(result.scalars().all())
 
     async def list_by_company(self, company_id: uuid.UUID) -> list[Quote]:
         result = await self.db.execute(
-            select(Quote)
-            .options(selectinload(Quote.company))
-            .where(Quote.company_id == company_id)
-            .order_by(Quote.created_at.desc())
+            select(Quote).where(Quote.company_id == company_id).order_by(Quote.created_at.desc())
         )
         return list(result.scalars().all())
 
+    async def list_project_ids_by_company(self, company_id: uuid.UUID) -> set[uuid.UUID]:
+        result = await self.db.execute(
+            select(Quote.project_id).where(Quote.company_id == company_id)
+        )
+        return set(result.scalars().all())
+
     async def create(self, project_id: uuid.UUID, company_id: uuid.UUID, **kwargs) -> Quote:
         quote = Quote(project_id=project_id, company_id=company_id, **kwargs)
         self.db.add(quote)
         await self.db.flush()
-        return await self.get_by_id(quote.id)
+        return quote
 
     async def update_status(self, quote: Quote, status: str) -> Quote:
         quote.status = status
         await self.db.flush()
-        return await self.get_by_id(quote.id)
+        return quote
 
-    async def reject_other_quotes(self, project_id: uuid.UUID, accepted_quote_id: uuid.UUID):
-        await self.db.execute(
+    async def reject_other_quotes(
+        self, project_id: uuid.UUID, accepted_quote_id: uuid.UUID
+    ) -> list[tuple[uuid.UUID, uuid.UUID]]:
+        """提出中の他の見積もりを一括で却下し、却下した (見積もり ID, 企業 ID) を返す"""
+        result = await self.db.execute(
             update(Quote)
             .where(
                 Quote.project_id == project_id,
@@ -67,5 +67,8 @@ class QuoteRepository:
                 Quote.status == QuoteStatus.SUBMITTED.value,
             )
             .values(status=QuoteStatus.REJECTED.value)
+            .returning(Quote.id, Quote.company_id)
         )
+        rejected = list(result.all())
         await self.db.flush()
+        return rejected
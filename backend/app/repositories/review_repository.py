@@ -2,7 +2,6 @@ import uuid
 
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app.models.review import Review
 
@@ -25,7 +24,6 @@ class ReviewRepository:
     async def list_by_reviewee(self, reviewee_company_id: uuid.UUID) -> list[Review]:
         result = await self.db.execute(
             select(Review)
-            .options(selectinload(Review.reviewer_company))
             .where(Review.reviewee_company_id == reviewee_company_id)
             .order_by(Review.created_at.desc())
         )
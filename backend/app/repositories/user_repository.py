@@ -3,6 +3,7 @@ import uuid
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models.company import Company
 from app.models.user import User
 
 
@@ -14,6 +15,15 @@ class UserRepository:
         result = await self.db.execute(select(User).where(User.id == user_id))
         return result.scalar_one_or_none()
 
+    async def get_principal(self, user_id: uuid.UUID) -> tuple | None:
+        """認証に必要な (id, role, is_active, company_id) だけを 1 クエリで取得する"""
+        result = await self.db.execute(
+            select(User.id, User.role, User.is_active, Company.id)
+            .outerjoin(Company, Company.user_id == User.id)
+            .where(User.id == user_id)
+        )
+        return result.one_or_none()
+
     async def get_by_email(self, email: str) -> User | None:
         result = await self.db.execute(select(User).where(User.email == email))
         return result.scalar_one_or_none()
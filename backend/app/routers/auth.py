@@ -3,7 +3,6 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.dependencies import get_current_user
-from app.models.user import User
 from app.repositories.user_repository import UserRepository
 from app.schemas.auth import (
     RefreshTokenRequest,
@@ -13,6 +12,7 @@ from app.schemas.auth import (
     UserResponse,
 )
 from app.services.auth_service import AuthService
+from app.utils.principal_cache import Principal
 
 router = APIRouter()
 
@@ -38,5 +38,8 @@ async def refresh(body: RefreshTokenRequest, service: AuthService = Depends(_get
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(user: User = Depends(get_current_user)):
-    return user
+async def get_me(
+    user: Principal = Depends(get_current_user),
+    service: AuthService = Depends(_get_auth_service),
+):
+    return await service.get_me(user.id)
@@ -1,12 +1,12 @@
 import uuid
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.dependencies import get_current_user
-from app.models.user import User
+from app.dependencies import get_current_user, get_specialty_registry
 from app.repositories.company_repository import CompanyRepository
+from app.repositories.project_repository import ProjectRepository
 from app.schemas.company import (
     CompanyCreate,
     CompanySpecialtiesUpdate,
@@ -16,18 +16,21 @@ from app.schemas.company import (
     SubcontractorListResponse,
 )
 from app.services.company_service import CompanyService
+from app.utils.http_cache import Validator
+from app.utils.principal_cache import Principal
+from app.utils.specialty_registry import SpecialtyRegistry
 
 router = APIRouter()
 
 
 def _get_company_service(db: AsyncSession = Depends(get_db)) -> CompanyService:
-    return CompanyService(CompanyRepository(db))
+    return CompanyService(CompanyRepository(db), ProjectRepository(db))
 
 
 @router.post("/me", response_model=CompanyWithSpecialtiesResponse, status_code=201)
 async def create_my_company(
     body: CompanyCreate,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
     service: CompanyService = Depends(_get_company_service),
 ):
     return await service.create_company(user_id=user.id, **body.model_dump())
@@ -35,7 +38,7 @@ async def create_my_company(
 
 @router.get("/me", response_model=CompanyWithSpecialtiesResponse)
 async def get_my_company(
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
     service: CompanyService = Depends(_get_company_service),
 ):
     return await service.get_my_company(user_id=user.id)
@@ -44,7 +47,7 @@ async def get_my_company(
 @router.patch("/me", response_model=CompanyWithSpecialtiesResponse)
 async def update_my_company(
     body: CompanyUpdate,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
     service: CompanyService = Depends(_get_company_service),
 ):
     return await service.update_company(user_id=user.id, **body.model_dump(exclude_unset=True))
@@ -53,15 +56,24 @@ async def update_my_company(
 @router.put("/me/specialties", response_model=CompanyWithSpecialtiesResponse)
 async def update_my_specialties(
     body: CompanySpecialtiesUpdate,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
     service: CompanyService = Depends(_get_company_service),
 ):
     return await service.update_specialties(user_id=user.id, specialty_ids=body.specialty_ids)
 
 
 @router.get("/specialties", response_model=list[SpecialtyResponse])
-async def list_specialties(service: CompanyService = Depends(_get_company_service)):
-    return await service.get_all_specialties()
+async def list_specialties(
+    response: Response,
+    if_none_match: str | None = Header(None),
+    registry: SpecialtyRegistry = Depends(get_specialty_registry),
+):
+    snapshot = registry.snapshot
+    validator = Validator(etag=snapshot.etag)
+    if validator.matches(if_none_match):
+        return validator.not_modified()
+    validator.apply(response)
+    return snapshot.entries
 
 
 @router.get("/subcontractors", response_model=SubcontractorListResponse)
@@ -70,8 +82,13 @@ async def list_subcontractors(
     keyword: str | None = Query(None),
     location: str | None = Query(None),
     min_rating: float | None = Query(None),
+    near_project_id: uuid.UUID | None = Query(None),
+    radius_km: float | None = Query(None, gt=0, le=500),
+    same_prefecture: bool = Query(False),
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+    include_total: bool = Query(True),
     service: CompanyService = Depends(_get_company_service),
 ):
     return await service.list_subcontractors(
@@ -79,14 +96,30 @@ async def list_subcontractors(
         keyword=keyword,
         location=location,
         min_rating=min_rating,
+        near_project_id=near_project_id,
+        radius_km=radius_km,
+        same_prefecture=same_prefecture,
         page=page,
         per_page=per_page,
+        cursor=cursor,
+        include_total=include_total,
     )
 
 
 @router.get("/{company_id}", response_model=CompanyWithSpecialtiesResponse)
 async def get_company(
     company_id: uuid.UUID,
+    response: Response,
+    if_none_match: str | None = Header(None),
+    if_modified_since: str | None = Header(None),
+    _registry: SpecialtyRegistry = Depends(get_specialty_registry),
     service: CompanyService = Depends(_get_company_service),
 ):
-    return await service.get_company(company_id)
+    # 条件付き GET は updated_at だけを引いて判定し、一致すれば企業を読み込まない
+    if if_none_match or if_modified_since:
+        validator = await service.get_company_validator(company_id)
+        if validator.matches(if_none_match, if_modified_since):
+            return validator.not_modified()
+    company = await service.get_company(company_id)
+    service.company_validator(company).apply(response)
+    return company
@@ -1,15 +1,20 @@
 import uuid
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.dependencies import get_current_user, require_contractor, require_subcontractor
-from app.exceptions import ForbiddenException
-from app.models.user import User
+from app.dependencies import (
+    get_contractor_company_id,
+    get_current_company_id,
+    get_current_user,
+    get_specialty_registry,
+    get_subcontractor_company_id,
+)
 from app.repositories.company_repository import CompanyRepository
+from app.repositories.company_stats_repository import CompanyStatsRepository
 from app.repositories.direct_order_repository import DirectOrderRepository
-from app.repositories.notification_repository import NotificationRepository
+from app.repositories.outbox_repository import OutboxRepository
 from app.schemas.direct_order import (
     DirectOrderCreate,
     DirectOrderDecline,
@@ -17,55 +22,25 @@ from app.schemas.direct_order import (
     DirectOrderResponse,
 )
 from app.services.direct_order_service import DirectOrderService
+from app.utils.principal_cache import Principal
 
-router = APIRouter()
+# レスポンスの専門分野名を解決するため、レジストリを読み込み済みにしておく
+router = APIRouter(dependencies=[Depends(get_specialty_registry)])
 
 
 def _get_direct_order_service(db: AsyncSession = Depends(get_db)) -> DirectOrderService:
     return DirectOrderService(
         direct_order_repo=DirectOrderRepository(db),
         company_repo=CompanyRepository(db),
-        notification_repo=NotificationRepository(db),
+        outbox_repo=OutboxRepository(db),
+        stats_repo=CompanyStatsRepository(db),
     )
 
 
-async def _get_user_company_id(
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
-) -> uuid.UUID:
-    company_repo = CompanyRepository(db)
-    company = await company_repo.get_by_user_id(user.id)
-    if not company:
-        raise ForbiddenException("企業情報を先に登録してください")
-    return company.id
-
-
-async def _get_contractor_company_id(
-    user: User = Depends(require_contractor),
-    db: AsyncSession = Depends(get_db),
-) -> uuid.UUID:
-    company_repo = CompanyRepository(db)
-    company = await company_repo.get_by_user_id(user.id)
-    if not company:
-        raise ForbiddenException("企業情報を先に登録してください")
-    return company.id
-
-
-async def _get_subcontractor_company_id(
-    user: User = Depends(require_subcontractor),
-    db: AsyncSession = Depends(get_db),
-) -> uuid.UUID:
-    company_repo = CompanyRepository(db)
-    company = await company_repo.get_by_user_id(user.id)
-    if not company:
-        raise ForbiddenException("企業情報を先に登録してください")
-    return company.id
-
-
 @router.post("", response_model=DirectOrderResponse)
 async def create_direct_order(
     data: DirectOrderCreate,
-    company_id: uuid.UUID = Depends(_get_contractor_company_id),
+    company_id: uuid.UUID = Depends(get_contractor_company_id),
     service: DirectOrderService = Depends(_get_direct_order_service),
 ):
     return await service.create_direct_order(contractor_company_id=company_id, data=data)
@@ -74,7 +49,7 @@ async def create_direct_order(
 @router.get("", response_model=DirectOrderListResponse)
 async def list_my_direct_orders(
     status: str | None = Query(None),
-    company_id: uuid.UUID = Depends(_get_user_company_id),
+    company_id: uuid.UUID = Depends(get_current_company_id),
     service: DirectOrderService = Depends(_get_direct_order_service),
 ):
     return await service.list_my_direct_orders(company_id=company_id, status=status)
@@ -83,16 +58,26 @@ async def list_my_direct_orders(
 @router.get("/{direct_order_id}", response_model=DirectOrderResponse)
 async def get_direct_order(
     direct_order_id: uuid.UUID,
-    _user: User = Depends(get_current_user),
+    response: Response,
+    if_none_match: str | None = Header(None),
+    if_modified_since: str | None = Header(None),
+    _user: Principal = Depends(get_current_user),
     service: DirectOrderService = Depends(_get_direct_order_service),
 ):
-    return await service.get_direct_order(direct_order_id)
+    # 条件付き GET は発注と両企業の updated_at だけを引いて判定し、一致すれば読み込まない
+    if if_none_match or if_modified_since:
+        validator = await service.get_direct_order_validator(direct_order_id)
+        if validator.matches(if_none_match, if_modified_since):
+            return validator.not_modified()
+    direct_order = await service.get_direct_order(direct_order_id)
+    service.direct_order_validator(direct_order).apply(response)
+    return direct_order
 
 
 @router.post("/{direct_order_id}/accept", response_model=DirectOrderResponse)
 async def accept_direct_order(
     direct_order_id: uuid.UUID,
-    company_id: uuid.UUID = Depends(_get_subcontractor_company_id),
+    company_id: uuid.UUID = Depends(get_subcontractor_company_id),
     service: DirectOrderService = Depends(_get_direct_order_service),
 ):
     return await service.accept_direct_order(
@@ -104,7 +89,7 @@ async def accept_direct_order(
 async def decline_direct_order(
     direct_order_id: uuid.UUID,
     body: DirectOrderDecline | None = None,
-    company_id: uuid.UUID = Depends(_get_subcontractor_company_id),
+    company_id: uuid.UUID = Depends(get_subcontractor_company_id),
     service: DirectOrderService = Depends(_get_direct_order_service),
 ):
     reason = body.decline_reason if body else None
@@ -118,7 +103,7 @@ async def decline_direct_order(
 @router.post("/{direct_order_id}/start", response_model=DirectOrderResponse)
 async def start_direct_order(
     direct_order_id: uuid.UUID,
-    company_id: uuid.UUID = Depends(_get_user_company_id),
+    company_id: uuid.UUID = Depends(get_current_company_id),
     service: DirectOrderService = Depends(_get_direct_order_service),
 ):
     return await service.start_direct_order(direct_order_id=direct_order_id, company_id=company_id)
@@ -127,7 +112,7 @@ async def start_direct_order(
 @router.post("/{direct_order_id}/complete", response_model=DirectOrderResponse)
 async def complete_direct_order(
     direct_order_id: uuid.UUID,
-    company_id: uuid.UUID = Depends(_get_user_company_id),
+    company_id: uuid.UUID = Depends(get_current_company_id),
     service: DirectOrderService = Depends(_get_direct_order_service),
 ):
     return await service.complete_direct_order(
@@ -138,7 +123,7 @@ async def complete_direct_order(
 @router.post("/{direct_order_id}/cancel", response_model=DirectOrderResponse)
 async def cancel_direct_order(
     direct_order_id: uuid.UUID,
-    company_id: uuid.UUID = Depends(_get_contractor_company_id),
+    company_id: uuid.UUID = Depends(get_contractor_company_id),
     service: DirectOrderService = Depends(_get_direct_order_service),
 ):
     return await service.cancel_direct_order(
@@ -4,17 +4,24 @@ from fastapi import APIRouter, Depends, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.dependencies import get_current_user
-from app.exceptions import ForbiddenException, NotFoundException
-from app.models.user import User
-from app.repositories.company_repository import CompanyRepository
+from app.dependencies import get_current_company_id
+from app.repositories.file_blob_repository import FileBlobRepository
 from app.repositories.project_repository import ProjectRepository
-from app.schemas.project import ProjectFileResponse
-from app.utils.s3 import upload_file
+from app.schemas.project import (
+    ProjectFileResponse,
+    ProjectFileUploadComplete,
+    ProjectFileUploadUrlRequest,
+    ProjectFileUploadUrlResponse,
+)
+from app.services.file_service import FileService
 
 router = APIRouter()
 
 
+def _get_file_service(db: AsyncSession = Depends(get_db)) -> FileService:
+    return FileService(ProjectRepository(db), FileBlobRepository(db))
+
+
 @router.post(
     "/projects/{project_id}/files",
     response_model=ProjectFileResponse,
@@ -23,32 +30,42 @@ router = APIRouter()
 async def upload_project_file(
     project_id: uuid.UUID,
     file: UploadFile,
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    company_id: uuid.UUID = Depends(get_current_company_id),
+    service: FileService = Depends(_get_file_service),
 ):
-    company_repo = CompanyRepository(db)
-    company = await company_repo.get_by_user_id(user.id)
-    if not company:
-        raise ForbiddenException("企業情報を先に登録してください")
-
-    project_repo = ProjectRepository(db)
-    project = await project_repo.get_by_id(project_id)
-    if not project:
-        raise NotFoundException("案件が見つかりません")
-    if project.company_id != company.id:
-        raise ForbiddenException("この案件にファイルをアップロードする権限がありません")
-
-    content = await file.read()
-    file_url = upload_file(
-        file_content=content,
+    return await service.upload_file(
+        project_id,
+        company_id,
+        file,
         file_name=file.filename or "unnamed",
         content_type=file.content_type or "application/octet-stream",
     )
 
-    project_file = await project_repo.add_file(
-        project_id=project_id,
-        file_name=file.filename or "unnamed",
-        file_url=file_url,
-        file_size=len(content),
+
+@router.post(
+    "/projects/{project_id}/files/upload-url",
+    response_model=ProjectFileUploadUrlResponse,
+)
+async def create_project_file_upload_url(
+    project_id: uuid.UUID,
+    data: ProjectFileUploadUrlRequest,
+    company_id: uuid.UUID = Depends(get_current_company_id),
+    service: FileService = Depends(_get_file_service),
+):
+    return await service.create_upload_url(
+        project_id, company_id, data.file_name, data.content_type, data.file_size
     )
-    return project_file
+
+
+@router.post(
+    "/projects/{project_id}/files/complete",
+    response_model=ProjectFileResponse,
+    status_code=201,
+)
+async def complete_project_file_upload(
+    project_id: uuid.UUID,
+    data: ProjectFileUploadComplete,
+    company_id: uuid.UUID = Depends(get_current_company_id),
+    service: FileService = Depends(_get_file_service),
+):
+    return await service.complete_upload(project_id, company_id, data.key)
@@ -3,6 +3,17 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
+from app.repositories.job_repository import JobRepository
+from app.repositories.outbox_repository import OutboxRepository
+from app.utils.download_urls import download_urls
+from app.utils.job_queue import worker_stats
+from app.utils.matching import matching_index
+from app.utils.outbox import relay_stats
+from app.utils.price_index import price_index
+from app.utils.principal_cache import principal_cache
+from app.utils.result_cache import project_list_cache
+from app.utils.s3 import s3_storage
+from app.utils.specialty_registry import specialty_registry
 
 router = APIRouter()
 
@@ -11,3 +22,36 @@ router = APIRouter()
 async def health_check(db: AsyncSession = Depends(get_db)):
     await db.execute(text("SELECT 1"))
     return {"status": "ok"}
+
+
+@router.get("/health/cache")
+async def cache_stats():
+    return {
+        "principal": principal_cache.stats(),
+        "specialties": specialty_registry.stats(),
+        "project_list": project_list_cache.stats(),
+        "matching": matching_index.stats(),
+        "price_index": price_index.stats(),
+        "download_urls": download_urls.stats(),
+    }
+
+
+@router.get("/health/storage")
+async def storage_stats():
+    return s3_storage.stats()
+
+
+@router.get("/health/jobs")
+async def job_stats(db: AsyncSession = Depends(get_db)):
+    return {
+        "queues": await JobRepository(db).count_by_status(),
+        "workers": worker_stats(),
+    }
+
+
+@router.get("/health/outbox")
+async def outbox_stats(db: AsyncSession = Depends(get_db)):
+    return {
+        "events": await OutboxRepository(db).count_by_status(),
+        "relays": relay_stats(),
+    }
@@ -1,14 +1,16 @@
 import uuid
 
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.dependencies import get_current_user
-from app.models.user import User
+from app.dependencies import get_current_user, get_current_user_from_query
 from app.repositories.notification_repository import NotificationRepository
 from app.schemas.notification import NotificationListResponse
 from app.services.notification_service import NotificationService
+from app.utils.notification_hub import notification_hub
+from app.utils.principal_cache import Principal
 
 router = APIRouter()
 
@@ -22,16 +24,33 @@ def _get_notification_service(
 @router.get("", response_model=NotificationListResponse)
 async def list_notifications(
     unread_only: bool = Query(False),
-    user: User = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: str | None = Query(None),
+    user: Principal = Depends(get_current_user),
     service: NotificationService = Depends(_get_notification_service),
 ):
-    return await service.list_notifications(user.id, unread_only)
+    return await service.list_notifications(user.id, unread_only, limit=limit, cursor=cursor)
+
+
+@router.get("/stream")
+async def stream_notifications(
+    user: Principal = Depends(get_current_user_from_query),
+    db: AsyncSession = Depends(get_db),
+):
+    """新着通知を Server-Sent Events で配信する"""
+    # 接続中ずっと DB コネクションを握らないよう、認証後にセッションを閉じる
+    await db.close()
+    return StreamingResponse(
+        notification_hub.stream(user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/{notification_id}/read")
 async def mark_as_read(
     notification_id: uuid.UUID,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
     service: NotificationService = Depends(_get_notification_service),
 ):
     await service.mark_as_read(notification_id, user.id)
@@ -40,7 +59,7 @@ async def mark_as_read(
 
 @router.post("/read-all")
 async def mark_all_as_read(
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
     service: NotificationService = Depends(_get_notification_service),
 ):
     count = await service.mark_all_as_read(user.id)
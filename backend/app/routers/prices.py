@@ -0,0 +1,25 @@
+import uuid
+
+from fastapi import APIRouter, Depends
+
+from app.dependencies import get_current_user
+from app.schemas.price import PriceHintResponse
+from app.utils.geocoder import geocoder
+from app.utils.price_index import price_index
+from app.utils.principal_cache import Principal
+
+router = APIRouter()
+
+
+@router.get("/price-hints", response_model=PriceHintResponse | None)
+async def get_price_hint(
+    specialty_id: uuid.UUID | None = None,
+    prefecture_code: str | None = None,
+    location: str | None = None,
+    _user: Principal = Depends(get_current_user),
+):
+    """専門分野・地域の直近の受注金額 (p10 / p50 / p90)。予算や見積額の入力時の目安"""
+    if prefecture_code is None and location:
+        point = geocoder.geocode(location)
+        prefecture_code = point.prefecture_code if point else None
+    return price_index.hint(specialty_id, prefecture_code)
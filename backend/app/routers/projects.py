@@ -1,14 +1,22 @@
 import uuid
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.dependencies import get_current_user, require_contractor
-from app.exceptions import ForbiddenException
-from app.models.user import User
+from app.dependencies import (
+    get_contractor_company_id,
+    get_current_company_id,
+    get_subcontractor_company_id,
+)
 from app.repositories.company_repository import CompanyRepository
+from app.repositories.company_stats_repository import CompanyStatsRepository
 from app.repositories.project_repository import ProjectRepository
+from app.repositories.quote_repository import QuoteRepository
+from app.schemas.matching import (
+    RecommendedProjectListResponse,
+    RecommendedSubcontractorListResponse,
+)
 from app.schemas.project import (
     ProjectCreate,
     ProjectListResponse,
@@ -16,31 +24,24 @@ from app.schemas.project import (
     ProjectStatusUpdate,
     ProjectUpdate,
 )
+from app.services.matching_service import MatchingService
 from app.services.project_service import ProjectService
 
 router = APIRouter()
 
 
 def _get_project_service(db: AsyncSession = Depends(get_db)) -> ProjectService:
-    return ProjectService(ProjectRepository(db))
+    return ProjectService(ProjectRepository(db), CompanyStatsRepository(db))
 
 
-async def _get_user_company_id(
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
-) -> uuid.UUID:
-    company_repo = CompanyRepository(db)
-    company = await company_repo.get_by_user_id(user.id)
-    if not company:
-        raise ForbiddenException("企業情報を先に登録してください")
-    return company.id
+def _get_matching_service(db: AsyncSession = Depends(get_db)) -> MatchingService:
+    return MatchingService(ProjectRepository(db), CompanyRepository(db), QuoteRepository(db))
 
 
 @router.post("", response_model=ProjectResponse, status_code=201)
 async def create_project(
     body: ProjectCreate,
-    user: User = Depends(require_contractor),
-    company_id: uuid.UUID = Depends(_get_user_company_id),
+    company_id: uuid.UUID = Depends(get_contractor_company_id),
     service: ProjectService = Depends(_get_project_service),
 ):
     return await service.create_project(company_id=company_id, **body.model_dump())
@@ -52,8 +53,14 @@ async def list_projects(
     company_id: uuid.UUID | None = None,
     specialty_id: uuid.UUID | None = None,
     location: str | None = None,
+    near_project_id: uuid.UUID | None = None,
+    radius_km: float | None = Query(None, gt=0, le=500),
+    same_prefecture: bool = Query(False),
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+    include_total: bool = Query(True),
+    facets: str | None = Query(None),
     service: ProjectService = Depends(_get_project_service),
 ):
     return await service.list_projects(
@@ -61,42 +68,82 @@ async def list_projects(
         company_id=company_id,
         specialty_id=specialty_id,
         location=location,
+        near_project_id=near_project_id,
+        radius_km=radius_km,
+        same_prefecture=same_prefecture,
         page=page,
         per_page=per_page,
+        cursor=cursor,
+        include_total=include_total,
+        facets=facets,
     )
 
 
+@router.get("/recommended", response_model=RecommendedProjectListResponse)
+async def list_recommended_projects(
+    limit: int = Query(20, ge=1, le=100),
+    company_id: uuid.UUID = Depends(get_subcontractor_company_id),
+    service: MatchingService = Depends(_get_matching_service),
+):
+    return {"items": await service.recommend_projects(company_id, limit)}
+
+
 @router.get("/{project_id}", response_model=ProjectResponse)
 async def get_project(
     project_id: uuid.UUID,
+    response: Response,
+    if_none_match: str | None = Header(None),
+    if_modified_since: str | None = Header(None),
     service: ProjectService = Depends(_get_project_service),
 ):
-    return await service.get_project(project_id)
+    # 条件付き GET は updated_at とファイルの版だけを引いて判定し、一致すれば案件を読み込まない
+    if if_none_match or if_modified_since:
+        validator = await service.get_project_validator(project_id)
+        if validator.matches(if_none_match, if_modified_since):
+            return validator.not_modified()
+    project = await service.get_project(project_id)
+    service.project_validator(project).apply(response)
+    return await service.project_response(project)
+
+
+@router.get(
+    "/{project_id}/recommended-subcontractors",
+    response_model=RecommendedSubcontractorListResponse,
+)
+async def list_recommended_subcontractors(
+    project_id: uuid.UUID,
+    limit: int = Query(20, ge=1, le=100),
+    company_id: uuid.UUID = Depends(get_contractor_company_id),
+    service: MatchingService = Depends(_get_matching_service),
+):
+    return {"items": await service.recommend_subcontractors(project_id, company_id, limit)}
 
 
 @router.patch("/{project_id}", response_model=ProjectResponse)
 async def update_project(
     project_id: uuid.UUID,
     body: ProjectUpdate,
-    company_id: uuid.UUID = Depends(_get_user_company_id),
+    company_id: uuid.UUID = Depends(get_current_company_id),
     service: ProjectService = Depends(_get_project_service),
 ):
-    return await service.update_project(
+    project = await service.update_project(
         project_id=project_id,
         company_id=company_id,
         **body.model_dump(exclude_unset=True),
     )
+    return await service.project_response(project)
 
 
 @router.patch("/{project_id}/status", response_model=ProjectResponse)
 async def update_project_status(
     project_id: uuid.UUID,
     body: ProjectStatusUpdate,
-    company_id: uuid.UUID = Depends(_get_user_company_id),
+    company_id: uuid.UUID = Depends(get_current_company_id),
     service: ProjectService = Depends(_get_project_service),
 ):
-    return await service.update_status(
+    project = await service.update_status(
         project_id=project_id,
         company_id=company_id,
         status=body.status,
     )
+    return await service.project_response(project)
@@ -4,15 +4,24 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.dependencies import get_current_user, require_contractor, require_subcontractor
-from app.exceptions import ForbiddenException
-from app.models.user import User
-from app.repositories.company_repository import CompanyRepository
+from app.dependencies import (
+    get_contractor_company_id,
+    get_current_user,
+    get_subcontractor_company_id,
+)
+from app.repositories.company_stats_repository import CompanyStatsRepository
 from app.repositories.order_repository import OrderRepository
+from app.repositories.outbox_repository import OutboxRepository
 from app.repositories.project_repository import ProjectRepository
 from app.repositories.quote_repository import QuoteRepository
-from app.schemas.quote import QuoteCreate, QuoteListResponse, QuoteResponse
+from app.schemas.quote import (
+    QuoteCreate,
+    QuoteListResponse,
+    QuoteResponse,
+    QuoteSubmitResponse,
+)
 from app.services.quote_service import QuoteService
+from app.utils.principal_cache import Principal
 
 router = APIRouter()
 
@@ -21,31 +30,21 @@ def _get_quote_service(db: AsyncSession = Depends(get_db)) -> QuoteService:
     return QuoteService(
         quote_repo=QuoteRepository(db),
         project_repo=ProjectRepository(db),
+        stats_repo=CompanyStatsRepository(db),
         order_repo=OrderRepository(db),
+        outbox_repo=OutboxRepository(db),
     )
 
 
-async def _get_user_company_id(
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
-) -> uuid.UUID:
-    company_repo = CompanyRepository(db)
-    company = await company_repo.get_by_user_id(user.id)
-    if not company:
-        raise ForbiddenException("企業情報を先に登録してください")
-    return company.id
-
-
 @router.post(
     "/projects/{project_id}/quotes",
-    response_model=QuoteResponse,
+    response_model=QuoteSubmitResponse,
     status_code=201,
 )
 async def submit_quote(
     project_id: uuid.UUID,
     body: QuoteCreate,
-    user: User = Depends(require_subcontractor),
-    company_id: uuid.UUID = Depends(_get_user_company_id),
+    company_id: uuid.UUID = Depends(get_subcontractor_company_id),
     service: QuoteService = Depends(_get_quote_service),
 ):
     return await service.submit_quote(
@@ -56,7 +55,7 @@ async def submit_quote(
 @router.get("/projects/{project_id}/quotes", response_model=QuoteListResponse)
 async def list_project_quotes(
     project_id: uuid.UUID,
-    _user: User = Depends(get_current_user),
+    _user: Principal = Depends(get_current_user),
     service: QuoteService = Depends(_get_quote_service),
 ):
     return await service.list_project_quotes(project_id)
@@ -64,8 +63,7 @@ async def list_project_quotes(
 
 @router.get("/my-quotes", response_model=QuoteListResponse)
 async def list_my_quotes(
-    user: User = Depends(require_subcontractor),
-    company_id: uuid.UUID = Depends(_get_user_company_id),
+    company_id: uuid.UUID = Depends(get_subcontractor_company_id),
     service: QuoteService = Depends(_get_quote_service),
 ):
     return await service.list_my_quotes(company_id)
@@ -74,8 +72,7 @@ async def list_my_quotes(
 @router.post("/quotes/{quote_id}/accept", response_model=QuoteResponse)
 async def accept_quote(
     quote_id: uuid.UUID,
-    user: User = Depends(require_contractor),
-    company_id: uuid.UUID = Depends(_get_user_company_id),
+    company_id: uuid.UUID = Depends(get_contractor_company_id),
     service: QuoteService = Depends(_get_quote_service),
 ):
     return await service.accept_quote(quote_id=quote_id, contractor_company_id=company_id)
@@ -84,8 +81,7 @@ async def accept_quote(
 @router.post("/quotes/{quote_id}/reject", response_model=QuoteResponse)
 async def reject_quote(
     quote_id: uuid.UUID,
-    user: User = Depends(require_contractor),
-    company_id: uuid.UUID = Depends(_get_user_company_id),
+    company_id: uuid.UUID = Depends(get_contractor_company_id),
     service: QuoteService = Depends(_get_quote_service),
 ):
     return await service.reject_quote(quote_id=quote_id, contractor_company_id=company_id)
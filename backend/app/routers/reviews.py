@@ -4,10 +4,9 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.dependencies import get_current_user
-from app.exceptions import ForbiddenException
-from app.models.user import User
-from app.repositories.company_repository import CompanyRepository
+from app.dependencies import get_current_company_id
+from app.repositories.company_stats_repository import CompanyStatsRepository
+from app.repositories.job_repository import JobRepository
 from app.repositories.order_repository import OrderRepository
 from app.repositories.review_repository import ReviewRepository
 from app.schemas.review import ReviewCreate, ReviewListResponse, ReviewResponse
@@ -20,26 +19,16 @@ def _get_review_service(db: AsyncSession = Depends(get_db)) -> ReviewService:
     return ReviewService(
         review_repo=ReviewRepository(db),
         order_repo=OrderRepository(db),
-        company_repo=CompanyRepository(db),
+        stats_repo=CompanyStatsRepository(db),
+        job_repo=JobRepository(db),
     )
 
 
-async def _get_user_company_id(
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
-) -> uuid.UUID:
-    company_repo = CompanyRepository(db)
-    company = await company_repo.get_by_user_id(user.id)
-    if not company:
-        raise ForbiddenException("企業情報を先に登録してください")
-    return company.id
-
-
 @router.post("/orders/{order_id}/reviews", response_model=ReviewResponse, status_code=201)
 async def create_review(
     order_id: uuid.UUID,
     body: ReviewCreate,
-    company_id: uuid.UUID = Depends(_get_user_company_id),
+    company_id: uuid.UUID = Depends(get_current_company_id),
     service: ReviewService = Depends(_get_review_service),
 ):
     return await service.create_review(
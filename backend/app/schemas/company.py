@@ -35,6 +35,10 @@ class CompanyResponse(BaseModel):
     established_year: int | None = None
     employee_count: int | None = None
     average_rating: float | None = None
+    prefecture_code: str | None = None
+    municipality_code: str | None = None
+    latitude: float | None = None
+    longitude: float | None = None
     created_at: datetime
     updated_at: datetime
 
@@ -58,7 +62,8 @@ class CompanySpecialtiesUpdate(BaseModel):
 
 class SubcontractorListResponse(BaseModel):
     items: list[CompanyWithSpecialtiesResponse]
-    total: int
-    page: int
+    total: int | None = None
+    page: int | None = None
     per_page: int
-    pages: int
+    pages: int | None = None
+    next_cursor: str | None = None
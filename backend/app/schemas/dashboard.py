@@ -8,6 +8,9 @@ class ContractorDashboard(BaseModel):
     completed_projects: int
     total_orders: int
     pending_quotes: int
+    pending_direct_orders: int = 0
+    active_direct_orders: int = 0
+    completed_direct_orders: int = 0
 
 
 class SubcontractorDashboard(BaseModel):
@@ -15,4 +18,7 @@ class SubcontractorDashboard(BaseModel):
     accepted_quotes: int
     active_orders: int
     completed_orders: int
+    pending_direct_orders: int = 0
+    active_direct_orders: int = 0
+    completed_direct_orders: int = 0
     average_rating: float | None = None
@@ -1,7 +1,9 @@
 import uuid
 from datetime import date, datetime
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
+
+from app.utils.specialty_registry import specialty_registry
 
 
 class DirectOrderCreate(BaseModel):
@@ -53,12 +55,18 @@ class DirectOrderResponse(BaseModel):
     decline_reason: str | None = None
     contractor_company: CompanyBrief | None = None
     subcontractor_company: CompanyBrief | None = None
-    specialty: SpecialtyBrief | None = None
+    specialty: SpecialtyBrief | None = Field(None, validation_alias="specialty_id")
     created_at: datetime
     updated_at: datetime
 
     model_config = {"from_attributes": True}
 
+    @field_validator("specialty", mode="before")
+    @classmethod
+    def resolve_specialty(cls, v):
+        # 専門分野名は DB を引かずにプロセス内レジストリから解決する
+        return specialty_registry.get(v) if isinstance(v, uuid.UUID) else v
+
 
 class DirectOrderListResponse(BaseModel):
     items: list[DirectOrderResponse]
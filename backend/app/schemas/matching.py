@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+
+from app.schemas.company import CompanyWithSpecialtiesResponse
+from app.schemas.project import ProjectResponse
+
+
+class MatchScores(BaseModel):
+    specialty: float
+    distance: float
+    rating: float
+    budget: float
+    experience: float
+
+
+class RecommendedProject(BaseModel):
+    project: ProjectResponse
+    score: float
+    scores: MatchScores
+
+
+class RecommendedProjectListResponse(BaseModel):
+    items: list[RecommendedProject]
+
+
+class RecommendedSubcontractor(BaseModel):
+    company: CompanyWithSpecialtiesResponse
+    score: float
+    scores: MatchScores
+
+
+class RecommendedSubcontractorListResponse(BaseModel):
+    items: list[RecommendedSubcontractor]
@@ -21,3 +21,4 @@ class NotificationListResponse(BaseModel):
     items: list[NotificationResponse]
     total: int
     unread_count: int
+    next_cursor: str | None = None
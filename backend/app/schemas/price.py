@@ -0,0 +1,15 @@
+import uuid
+
+from pydantic import BaseModel
+
+
+class PriceHintResponse(BaseModel):
+    p10: int
+    p50: int
+    p90: int
+    sample_count: int
+    # 目安に使った集計の条件 (サンプル不足で粗い集計に切り替えた項目は null)
+    specialty_id: uuid.UUID | None = None
+    prefecture_code: str | None = None
+
+    model_config = {"from_attributes": True}
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.constants import ProjectStatus
 
@@ -35,10 +35,31 @@ class ProjectFileResponse(BaseModel):
     file_name: str
     file_url: str
     file_size: int | None = None
+    checksum: str | None = None
+    # ダウンロード用の署名付き URL (app.utils.download_urls で付ける)
+    download_url: str | None = None
 
     model_config = {"from_attributes": True}
 
 
+class ProjectFileUploadUrlRequest(BaseModel):
+    file_name: str = Field(min_length=1, max_length=200)
+    content_type: str = Field("application/octet-stream", max_length=255)
+    file_size: int = Field(gt=0)
+
+
+class ProjectFileUploadUrlResponse(BaseModel):
+    # url に fields とファイル本体 (最後のフィールド "file") を multipart/form-data で POST する
+    url: str
+    fields: dict[str, str]
+    key: str
+    expires_in: int
+
+
+class ProjectFileUploadComplete(BaseModel):
+    key: str
+
+
 class ProjectResponse(BaseModel):
     id: uuid.UUID
     company_id: uuid.UUID
@@ -50,6 +71,10 @@ class ProjectResponse(BaseModel):
     deadline: str | None = None
     status: str
     required_specialty_id: uuid.UUID | None = None
+    prefecture_code: str | None = None
+    municipality_code: str | None = None
+    latitude: float | None = None
+    longitude: float | None = None
     created_at: datetime
     updated_at: datetime
     files: list[ProjectFileResponse] = []
@@ -57,9 +82,22 @@ class ProjectResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class FacetCount(BaseModel):
+    value: str | None
+    count: int
+
+
+class ProjectFacets(BaseModel):
+    status: list[FacetCount] | None = None
+    specialty: list[FacetCount] | None = None
+    prefecture: list[FacetCount] | None = None
+
+
 class ProjectListResponse(BaseModel):
     items: list[ProjectResponse]
-    total: int
-    page: int
+    total: int | None = None
+    page: int | None = None
     per_page: int
-    pages: int
+    pages: int | None = None
+    next_cursor: str | None = None
+    facets: ProjectFacets | None = None
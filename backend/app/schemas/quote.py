@@ -3,6 +3,8 @@ from datetime import datetime
 
 from pydantic import BaseModel
 
+from app.schemas.price import PriceHintResponse
+
 
 class QuoteCreate(BaseModel):
     amount: int
@@ -24,6 +26,11 @@ class QuoteResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class QuoteSubmitResponse(QuoteResponse):
+    # 案件の専門分野・地域の直近の受注金額 (提出した金額と比べる目安)
+    price_hint: PriceHintResponse | None = None
+
+
 class QuoteListResponse(BaseModel):
     items: list[QuoteResponse]
     total: int
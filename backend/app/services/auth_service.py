@@ -66,3 +66,9 @@ class AuthService:
             "refresh_token": new_refresh_token,
             "token_type": "bearer",
         }
+
+    async def get_me(self, user_id: uuid.UUID):
+        user = await self.user_repo.get_by_id(user_id)
+        if not user:
+            raise UnauthorizedException("ユーザーが見つかりません")
+        return user
@@ -1,12 +1,18 @@
 import uuid
 
-from app.exceptions import ForbiddenException, NotFoundException
+from app.exceptions import BadRequestException, ForbiddenException, NotFoundException
 from app.repositories.company_repository import CompanyRepository
+from app.repositories.project_repository import ProjectRepository
+from app.services.project_service import resolve_nearby_filters
+from app.utils.http_cache import Validator
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.specialty_registry import specialty_registry
 
 
 class CompanyService:
-    def __init__(self, company_repo: CompanyRepository):
+    def __init__(self, company_repo: CompanyRepository, project_repo: ProjectRepository):
         self.company_repo = company_repo
+        self.project_repo = project_repo
 
     async def get_my_company(self, user_id: uuid.UUID):
         company = await self.company_repo.get_by_user_id(user_id)
@@ -20,6 +26,17 @@ class CompanyService:
             raise NotFoundException("企業が見つかりません")
         return company
 
+    async def get_company_validator(self, company_id: uuid.UUID) -> Validator:
+        """企業を読み込まずに ETag を求める (専門分野名の変更はレジストリの ETag で表す)"""
+        updated_at = await self.company_repo.get_updated_at(company_id)
+        if updated_at is None:
+            raise NotFoundException("企業が見つかりません")
+        return Validator.from_versions(updated_at, specialty_registry.snapshot.etag)
+
+    @staticmethod
+    def company_validator(company) -> Validator:
+        return Validator.from_versions(company.updated_at, specialty_registry.snapshot.etag)
+
     async def create_company(self, user_id: uuid.UUID, **kwargs):
         existing = await self.company_repo.get_by_user_id(user_id)
         if existing:
@@ -38,31 +55,47 @@ class CompanyService:
             raise NotFoundException("企業情報が登録されていません")
         return await self.company_repo.set_specialties(company, specialty_ids)
 
-    async def get_all_specialties(self):
-        return await self.company_repo.get_all_specialties()
-
     async def list_subcontractors(
         self,
         specialty_id: uuid.UUID | None = None,
         keyword: str | None = None,
         location: str | None = None,
         min_rating: float | None = None,
+        near_project_id: uuid.UUID | None = None,
+        radius_km: float | None = None,
+        same_prefecture: bool = False,
         page: int = 1,
         per_page: int = 20,
+        cursor: str | None = None,
+        include_total: bool = True,
     ) -> dict:
-        items, total = await self.company_repo.list_subcontractors(
+        if cursor and keyword is not None:
+            # キーワード検索は関連度順のため、作成日時のカーソルでは続きを取得できない
+            raise BadRequestException("キーワード検索ではカーソルを指定できません")
+        nearby = await resolve_nearby_filters(
+            self.project_repo, near_project_id, radius_km, same_prefecture
+        )
+        after = decode_cursor(cursor) if cursor else None
+        items, total, has_more = await self.company_repo.list_subcontractors(
             specialty_id=specialty_id,
             keyword=keyword,
             location=location,
             min_rating=min_rating,
+            **nearby,
             page=page,
             per_page=per_page,
+            after=after,
+            with_total=include_total and after is None,
         )
-        pages = (total + per_page - 1) // per_page if per_page > 0 else 0
+        pages = None
+        if total is not None:
+            pages = (total + per_page - 1) // per_page if per_page > 0 else 0
+        last = items[-1] if has_more and keyword is None else None
         return {
             "items": items,
             "total": total,
-            "page": page,
+            "page": page if after is None else None,
             "per_page": per_page,
             "pages": pages,
+            "next_cursor": encode_cursor(last.created_at, last.id) if last else None,
         }
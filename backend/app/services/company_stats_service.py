@@ -0,0 +1,126 @@
+import uuid
+from collections import Counter
+
+from app.constants import DirectOrderStatus, OrderStatus, ProjectStatus
+from app.models.company_stats import COUNTER_COLUMNS
+from app.repositories.company_stats_repository import CompanyStatsRepository
+
+# ステータス -> 対応するカウンタ列 (集計対象外のステータスは含めない)
+_PROJECT_STATUS_COUNTERS = {
+    ProjectStatus.OPEN.value: "open_projects",
+    ProjectStatus.IN_PROGRESS.value: "in_progress_projects",
+    ProjectStatus.COMPLETED.value: "completed_projects",
+}
+_ORDER_STATUS_COUNTERS = {
+    OrderStatus.CONFIRMED.value: "active_orders",
+    OrderStatus.COMPLETED.value: "completed_orders",
+}
+_DIRECT_ORDER_STATUS_COUNTERS = {
+    DirectOrderStatus.PENDING.value: "pending_direct_orders",
+    DirectOrderStatus.ACCEPTED.value: "active_direct_orders",
+    DirectOrderStatus.IN_PROGRESS.value: "active_direct_orders",
+    DirectOrderStatus.COMPLETED.value: "completed_direct_orders",
+}
+
+
+class CompanyStatsService:
+    """状態遷移を company_stats の差分更新に変換する
+
+    呼び出し側の変更と同じトランザクション内で実行し、変更を flush した後に呼ぶこと。
+    """
+
+    def __init__(self, stats_repo: CompanyStatsRepository):
+        self.stats_repo = stats_repo
+
+    async def project_created(self, company_id: uuid.UUID, status: str):
+        await self.stats_repo.increment(
+            company_id, total_projects=1, **_transition(_PROJECT_STATUS_COUNTERS, None, status)
+        )
+
+    async def project_status_changed(self, company_id: uuid.UUID, old: str, new: str):
+        await self.stats_repo.increment(
+            company_id, **_transition(_PROJECT_STATUS_COUNTERS, old, new)
+        )
+
+    async def quote_submitted(
+        self, contractor_company_id: uuid.UUID, subcontractor_company_id: uuid.UUID
+    ):
+        await self.stats_repo.increment(contractor_company_id, pending_quotes=1)
+        await self.stats_repo.increment(subcontractor_company_id, total_quotes=1)
+
+    async def quote_accepted(
+        self,
+        contractor_company_id: uuid.UUID,
+        subcontractor_company_id: uuid.UUID,
+        rejected_count: int,
+    ):
+        await self.stats_repo.increment(
+            contractor_company_id, pending_quotes=-(1 + rejected_count)
+        )
+        await self.stats_repo.increment(subcontractor_company_id, accepted_quotes=1)
+
+    async def quote_rejected(self, contractor_company_id: uuid.UUID):
+        await self.stats_repo.increment(contractor_company_id, pending_quotes=-1)
+
+    async def order_created(
+        self,
+        contractor_company_id: uuid.UUID,
+        subcontractor_company_id: uuid.UUID,
+        status: str,
+    ):
+        await self.stats_repo.increment(contractor_company_id, total_orders=1)
+        await self.stats_repo.increment(
+            subcontractor_company_id, **_transition(_ORDER_STATUS_COUNTERS, None, status)
+        )
+
+    async def order_status_changed(self, subcontractor_company_id: uuid.UUID, old: str, new: str):
+        await self.stats_repo.increment(
+            subcontractor_company_id, **_transition(_ORDER_STATUS_COUNTERS, old, new)
+        )
+
+    async def review_created(self, reviewee_company_id: uuid.UUID, rating: int):
+        await self.stats_repo.increment(reviewee_company_id, review_count=1, rating_total=rating)
+
+    async def direct_order_status_changed(
+        self,
+        contractor_company_id: uuid.UUID,
+        subcontractor_company_id: uuid.UUID,
+        old: str | None,
+        new: str,
+    ):
+        deltas = _transition(_DIRECT_ORDER_STATUS_COUNTERS, old, new)
+        await self.stats_repo.increment(contractor_company_id, **deltas)
+        await self.stats_repo.increment(subcontractor_company_id, **deltas)
+
+    async def reconcile(self, fix: bool = False) -> list[dict]:
+        """元テーブルから再計算し、保存値とのずれを返す (fix=True なら書き戻す)"""
+        expected = await self.stats_repo.compute_from_source()
+        stored = await self.stats_repo.list_all()
+
+        drift = []
+        for company_id in sorted(expected.keys() | stored.keys(), key=str):
+            actual = expected.get(company_id, dict.fromkeys(COUNTER_COLUMNS, 0))
+            row = stored.get(company_id)
+            company_drift = [
+                {
+                    "company_id": company_id,
+                    "column": column,
+                    "stored": getattr(row, column) if row is not None else None,
+                    "expected": actual[column],
+                }
+                for column in COUNTER_COLUMNS
+                if row is None or getattr(row, column) != actual[column]
+            ]
+            if fix and company_drift:
+                await self.stats_repo.replace(company_id, actual)
+            drift.extend(company_drift)
+        return drift
+
+
+def _transition(counters: dict[str, str], old: str | None, new: str) -> dict[str, int]:
+    deltas: Counter[str] = Counter()
+    if old in counters:
+        deltas[counters[old]] -= 1
+    if new in counters:
+        deltas[counters[new]] += 1
+    return dict(deltas)
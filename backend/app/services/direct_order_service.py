@@ -1,12 +1,15 @@
 import uuid
 
-from app.constants import DirectOrderStatus, NotificationType
+from app.constants import DirectOrderStatus, EventType
 from app.exceptions import BadRequestException, ForbiddenException, NotFoundException
 from app.repositories.company_repository import CompanyRepository
+from app.repositories.company_stats_repository import CompanyStatsRepository
 from app.repositories.direct_order_repository import DirectOrderRepository
-from app.repositories.notification_repository import NotificationRepository
+from app.repositories.outbox_repository import OutboxRepository
 from app.schemas.direct_order import DirectOrderCreate
-from app.services.notification_service import NotificationService
+from app.services.company_stats_service import CompanyStatsService
+from app.utils.http_cache import Validator
+from app.utils.specialty_registry import specialty_registry
 
 
 class DirectOrderService:
@@ -14,11 +17,29 @@ class DirectOrderService:
         self,
         direct_order_repo: DirectOrderRepository,
         company_repo: CompanyRepository,
-        notification_repo: NotificationRepository,
+        outbox_repo: OutboxRepository,
+        stats_repo: CompanyStatsRepository,
     ):
         self.direct_order_repo = direct_order_repo
         self.company_repo = company_repo
-        self.notification_service = NotificationService(notification_repo)
+        self.outbox_repo = outbox_repo
+        self.stats_service = CompanyStatsService(stats_repo)
+
+    async def _record(
+        self, event_type: EventType, direct_order, actor_company_id: uuid.UUID
+    ) -> None:
+        # 相手方への通知はアウトボックス経由で行う (app.events)
+        await self.outbox_repo.add(
+            event_type.value,
+            {
+                "direct_order_id": str(direct_order.id),
+                "title": direct_order.title,
+                "contractor_company_id": str(direct_order.contractor_company_id),
+                "subcontractor_company_id": str(direct_order.subcontractor_company_id),
+                "actor_company_id": str(actor_company_id),
+            },
+            aggregate_id=direct_order.id,
+        )
 
     async def create_direct_order(self, contractor_company_id: uuid.UUID, data: DirectOrderCreate):
         # Validate contractor != subcontractor
@@ -26,7 +47,9 @@ class DirectOrderService:
             raise BadRequestException("自社に直接発注はできません")
 
         # Validate subcontractor exists
-        subcontractor = await self.company_repo.get_by_id(data.subcontractor_company_id)
+        subcontractor = await self.company_repo.get_by_id(
+            data.subcontractor_company_id, load="minimal"
+        )
         if not subcontractor:
             raise NotFoundException("指定された下請け企業が見つかりません")
 
@@ -41,16 +64,13 @@ class DirectOrderService:
             specialty_id=data.specialty_id,
             status=DirectOrderStatus.PENDING.value,
         )
-
-        # Notify the subcontractor
-        await self.notification_service.create_notification(
-            user_id=subcontractor.user_id,
-            notification_type=NotificationType.DIRECT_ORDER_RECEIVED,
-            title="直接発注を受信しました",
-            message=f"「{data.title}」の直接発注が届きました。",
-            reference_id=direct_order.id,
+        await self.stats_service.direct_order_status_changed(
+            contractor_company_id, data.subcontractor_company_id, None, direct_order.status
         )
 
+        # Notify the subcontractor (app.events)
+        await self._record(EventType.DIRECT_ORDER_CREATED, direct_order, contractor_company_id)
+
         return direct_order
 
     async def get_direct_order(self, direct_order_id: uuid.UUID):
@@ -59,6 +79,28 @@ class DirectOrderService:
             raise NotFoundException("直接発注が見つかりません")
         return direct_order
 
+    async def get_direct_order_validator(self, direct_order_id: uuid.UUID) -> Validator:
+        """発注と元請け・下請け企業の updated_at だけで ETag を求める"""
+        version = await self.direct_order_repo.get_version(direct_order_id)
+        if version is None:
+            raise NotFoundException("直接発注が見つかりません")
+        updated_at, specialty_id, contractor_updated_at, subcontractor_updated_at = version
+        return Validator.from_versions(
+            updated_at,
+            specialty_registry.get(specialty_id),
+            contractor_updated_at,
+            subcontractor_updated_at,
+        )
+
+    @staticmethod
+    def direct_order_validator(direct_order) -> Validator:
+        return Validator.from_versions(
+            direct_order.updated_at,
+            specialty_registry.get(direct_order.specialty_id),
+            direct_order.contractor_company.updated_at,
+            direct_order.subcontractor_company.updated_at,
+        )
+
     async def list_my_direct_orders(self, company_id: uuid.UUID, status: str | None = None):
         direct_orders = await self.direct_order_repo.list_by_company(company_id, status)
         return {"items": direct_orders, "total": len(direct_orders)}
@@ -76,20 +118,10 @@ class DirectOrderService:
         if direct_order.status != DirectOrderStatus.PENDING.value:
             raise BadRequestException("この直接発注は承認できる状態ではありません")
 
-        direct_order = await self.direct_order_repo.update_status(
-            direct_order, DirectOrderStatus.ACCEPTED.value
-        )
+        direct_order = await self._transition(direct_order, DirectOrderStatus.ACCEPTED)
 
-        # Notify the contractor
-        contractor = await self.company_repo.get_by_id(direct_order.contractor_company_id)
-        if contractor:
-            await self.notification_service.create_notification(
-                user_id=contractor.user_id,
-                notification_type=NotificationType.DIRECT_ORDER_ACCEPTED,
-                title="直接発注が承認されました",
-                message=f"「{direct_order.title}」の直接発注が承認されました。",
-                reference_id=direct_order.id,
-            )
+        # Notify the contractor (app.events)
+        await self._record(EventType.DIRECT_ORDER_ACCEPTED, direct_order, subcontractor_company_id)
 
         return direct_order
 
@@ -112,20 +144,10 @@ class DirectOrderService:
         if reason:
             await self.direct_order_repo.update_decline_reason(direct_order, reason)
 
-        direct_order = await self.direct_order_repo.update_status(
-            direct_order, DirectOrderStatus.DECLINED.value
-        )
+        direct_order = await self._transition(direct_order, DirectOrderStatus.DECLINED)
 
-        # Notify the contractor
-        contractor = await self.company_repo.get_by_id(direct_order.contractor_company_id)
-        if contractor:
-            await self.notification_service.create_notification(
-                user_id=contractor.user_id,
-                notification_type=NotificationType.DIRECT_ORDER_DECLINED,
-                title="直接発注が辞退されました",
-                message=f"「{direct_order.title}」の直接発注が辞退されました。",
-                reference_id=direct_order.id,
-            )
+        # Notify the contractor (app.events)
+        await self._record(EventType.DIRECT_ORDER_DECLINED, direct_order, subcontractor_company_id)
 
         return direct_order
 
@@ -142,9 +164,7 @@ class DirectOrderService:
         if direct_order.status != DirectOrderStatus.ACCEPTED.value:
             raise BadRequestException("この直接発注は開始できる状態ではありません")
 
-        direct_order = await self.direct_order_repo.update_status(
-            direct_order, DirectOrderStatus.IN_PROGRESS.value
-        )
+        direct_order = await self._transition(direct_order, DirectOrderStatus.IN_PROGRESS)
 
         return direct_order
 
@@ -161,26 +181,10 @@ class DirectOrderService:
         if direct_order.status != DirectOrderStatus.IN_PROGRESS.value:
             raise BadRequestException("この直接発注は完了できる状態ではありません")
 
-        direct_order = await self.direct_order_repo.update_status(
-            direct_order, DirectOrderStatus.COMPLETED.value
-        )
+        direct_order = await self._transition(direct_order, DirectOrderStatus.COMPLETED)
 
-        # Notify the other party
-        if is_contractor:
-            other_company = await self.company_repo.get_by_id(
-                direct_order.subcontractor_company_id
-            )
-        else:
-            other_company = await self.company_repo.get_by_id(direct_order.contractor_company_id)
-
-        if other_company:
-            await self.notification_service.create_notification(
-                user_id=other_company.user_id,
-                notification_type=NotificationType.DIRECT_ORDER_COMPLETED,
-                title="直接発注が完了しました",
-                message=f"「{direct_order.title}」の直接発注が完了しました。",
-                reference_id=direct_order.id,
-            )
+        # Notify the other party (app.events)
+        await self._record(EventType.DIRECT_ORDER_COMPLETED, direct_order, company_id)
 
         return direct_order
 
@@ -200,19 +204,20 @@ class DirectOrderService:
         ):
             raise BadRequestException("この直接発注はキャンセルできる状態ではありません")
 
-        direct_order = await self.direct_order_repo.update_status(
-            direct_order, DirectOrderStatus.CANCELLED.value
-        )
+        direct_order = await self._transition(direct_order, DirectOrderStatus.CANCELLED)
+
+        # Notify the subcontractor (app.events)
+        await self._record(EventType.DIRECT_ORDER_CANCELLED, direct_order, contractor_company_id)
 
-        # Notify the subcontractor
-        subcontractor = await self.company_repo.get_by_id(direct_order.subcontractor_company_id)
-        if subcontractor:
-            await self.notification_service.create_notification(
-                user_id=subcontractor.user_id,
-                notification_type=NotificationType.DIRECT_ORDER_CANCELLED,
-                title="直接発注がキャンセルされました",
-                message=f"「{direct_order.title}」の直接発注がキャンセルされました。",
-                reference_id=direct_order.id,
-            )
+        return direct_order
 
+    async def _transition(self, direct_order, status: DirectOrderStatus):
+        old_status = direct_order.status
+        direct_order = await self.direct_order_repo.update_status(direct_order, status.value)
+        await self.stats_service.direct_order_status_changed(
+            direct_order.contractor_company_id,
+            direct_order.subcontractor_company_id,
+            old_status,
+            direct_order.status,
+        )
         return direct_order
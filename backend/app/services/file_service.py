@@ -0,0 +1,108 @@
+import uuid
+
+from app.config import settings
+from app.exceptions import BadRequestException, ForbiddenException, NotFoundException
+from app.repositories.file_blob_repository import FileBlobRepository
+from app.repositories.project_repository import ProjectRepository
+from app.schemas.project import ProjectFileResponse, ProjectFileUploadUrlResponse
+from app.utils.download_urls import attach_download_urls
+from app.utils.s3 import (
+    AsyncSeekable,
+    blob_key,
+    check_upload_size,
+    digest_stream,
+    new_key,
+    object_url,
+    s3_storage,
+)
+
+
+class FileService:
+    def __init__(self, project_repo: ProjectRepository, blob_repo: FileBlobRepository):
+        self.project_repo = project_repo
+        self.blob_repo = blob_repo
+
+    async def _check_owner(self, project_id: uuid.UUID, company_id: uuid.UUID) -> None:
+        project = await self.project_repo.get_by_id(project_id, load="minimal")
+        if not project:
+            raise NotFoundException("案件が見つかりません")
+        if project.company_id != company_id:
+            raise ForbiddenException("この案件にファイルをアップロードする権限がありません")
+
+    @staticmethod
+    async def _response(project_file) -> ProjectFileResponse:
+        response = ProjectFileResponse.model_validate(project_file)
+        await attach_download_urls([response])
+        return response
+
+    async def upload_file(
+        self,
+        project_id: uuid.UUID,
+        company_id: uuid.UUID,
+        file: AsyncSeekable,
+        file_name: str,
+        content_type: str,
+    ):
+        """API を経由するアップロード (本文全体は読み込まず、パートごとに S3 へ送る)
+
+        内容の SHA-256 をキーにして保存し、同じ内容が既にあれば S3 には送らない。
+        """
+        await self._check_owner(project_id, company_id)
+        # 本文は Starlette が一時ファイルに書き出しているので、先に読んでハッシュを計算する
+        digest, size = await digest_stream(file)
+        key = blob_key(digest)
+        # 無いときに書き込みのトランザクションを開いたまま S3 へ送らないよう、先に読んで確かめる。
+        # 読んだ後に GC が消した場合は acquire が False になり、送り直す
+        if not (await self.blob_repo.exists(digest) and await self.blob_repo.acquire(digest)):
+            await s3_storage.upload_stream(file, file_name, content_type, key=key)
+            await self.blob_repo.create(digest, size)
+        project_file = await self.project_repo.add_file(
+            project_id=project_id,
+            file_name=file_name,
+            file_url=object_url(key),
+            file_size=size,
+            checksum=digest,
+        )
+        return await self._response(project_file)
+
+    async def create_upload_url(
+        self,
+        project_id: uuid.UUID,
+        company_id: uuid.UUID,
+        file_name: str,
+        content_type: str,
+        file_size: int,
+    ) -> ProjectFileUploadUrlResponse:
+        """ブラウザから S3 へ直接アップロードするための署名付き POST を発行する"""
+        await self._check_owner(project_id, company_id)
+        check_upload_size(file_size, settings.FILE_UPLOAD_MAX_BYTES)
+        # 完了の通知で案件を確かめられるよう、キーに案件 ID を含める
+        key = new_key(file_name, str(project_id))
+        post = s3_storage.presigned_post(key, content_type, file_size)
+        return ProjectFileUploadUrlResponse(
+            url=post["url"],
+            fields=post["fields"],
+            key=key,
+            expires_in=settings.S3_UPLOAD_URL_EXPIRE_SECONDS,
+        )
+
+    async def complete_upload(self, project_id: uuid.UUID, company_id: uuid.UUID, key: str):
+        """直接アップロードされたオブジェクトを確認して案件のファイルとして登録する"""
+        await self._check_owner(project_id, company_id)
+        if not key.startswith(f"uploads/{project_id}/") or key.count("/") != 3:
+            raise BadRequestException("アップロード先が不正です")
+        file_url = object_url(key)
+        # 完了の通知が再送されても二重に登録しない
+        existing = await self.project_repo.get_file_by_url(project_id, file_url)
+        if existing:
+            return await self._response(existing)
+        head = await s3_storage.head(key)
+        if head is None:
+            raise BadRequestException("アップロードされたファイルが見つかりません")
+        project_file = await self.project_repo.add_file(
+            project_id=project_id,
+            file_name=key.rsplit("/", 1)[1],
+            file_url=file_url,
+            file_size=head["ContentLength"],
+        )
+        return await self._response(project_file)
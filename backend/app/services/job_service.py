@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta, timezone
+
+from app.repositories.job_repository import JobRepository
+from app.utils.job_queue import handlers
+
+
+class JobService:
+    def __init__(self, job_repo: JobRepository):
+        self.job_repo = job_repo
+
+    async def enqueue(
+        self,
+        name: str,
+        payload: dict | None = None,
+        priority: int | None = None,
+        delay: float = 0.0,
+    ):
+        """ジョブを積む (呼び出し元のトランザクションがコミットされたら実行される)
+
+        キュー・優先度・試行回数の上限はハンドラの登録内容を既定値にする。
+        payload は JSON に変換できる値だけにする (UUID は文字列にする)。
+        """
+        handler = handlers.get(name)
+        if handler is None:
+            raise ValueError(f"unknown job: {name}")
+        return await self.job_repo.create(
+            queue=handler.queue,
+            name=name,
+            payload=payload or {},
+            priority=handler.priority if priority is None else priority,
+            max_attempts=handler.max_attempts,
+            run_at=datetime.now(timezone.utc) + timedelta(seconds=delay),
+        )
@@ -0,0 +1,63 @@
+import uuid
+
+from app.constants import ProjectStatus
+from app.exceptions import BadRequestException, ForbiddenException, NotFoundException
+from app.repositories.company_repository import CompanyRepository
+from app.repositories.project_repository import ProjectRepository
+from app.repositories.quote_repository import QuoteRepository
+from app.schemas.project import ProjectResponse
+from app.utils.download_urls import attach_download_urls
+from app.utils.matching import matching_index
+
+
+class MatchingService:
+    def __init__(
+        self,
+        project_repo: ProjectRepository,
+        company_repo: CompanyRepository,
+        quote_repo: QuoteRepository,
+    ):
+        self.project_repo = project_repo
+        self.company_repo = company_repo
+        self.quote_repo = quote_repo
+
+    async def recommend_projects(self, company_id: uuid.UUID, limit: int) -> list[dict]:
+        """下請け業者への推薦案件 (見積もり済みの案件は除く)"""
+        await matching_index.ensure_fresh(self.project_repo.db)
+        quoted = await self.quote_repo.list_project_ids_by_company(company_id)
+        matches = matching_index.recommend_projects(company_id, limit, exclude=quoted)
+        if not matches:
+            return []
+        projects = await self.project_repo.get_many([match.id for match in matches])
+        by_id = {project.id: ProjectResponse.model_validate(project) for project in projects}
+        # 推薦した全案件のファイルの URL を 1 回で署名する
+        await attach_download_urls(file for project in by_id.values() for file in project.files)
+        return [
+            {"project": by_id[match.id], "score": match.score, "scores": match.scores}
+            for match in matches
+            if match.id in by_id
+        ]
+
+    async def recommend_subcontractors(
+        self, project_id: uuid.UUID, company_id: uuid.UUID, limit: int
+    ) -> list[dict]:
+        """募集中の自社案件への推薦下請け業者"""
+        project = await self.project_repo.get_by_id(project_id, load="minimal")
+        if not project:
+            raise NotFoundException("案件が見つかりません")
+        if project.company_id != company_id:
+            raise ForbiddenException("この案件の推薦業者を閲覧する権限がありません")
+        if project.status != ProjectStatus.OPEN.value:
+            raise BadRequestException("募集中の案件のみ推薦業者を表示できます")
+
+        await matching_index.ensure_fresh(self.project_repo.db)
+        matches = matching_index.recommend_subcontractors(project_id, limit)
+        if not matches:
+            return []
+        companies = await self.company_repo.get_many([match.id for match in matches])
+        by_id = {company.id: company for company in companies}
+        return [
+            {"company": by_id[match.id], "score": match.score, "scores": match.scores}
+            for match in matches
+            if match.id in by_id
+        ]
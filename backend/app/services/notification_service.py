@@ -1,7 +1,24 @@
 import uuid
+from dataclasses import dataclass
 
 from app.constants import NotificationType
 from app.repositories.notification_repository import NotificationRepository
+from app.schemas.notification import NotificationResponse
+from app.utils.notification_hub import notification_hub
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+@dataclass(frozen=True, slots=True)
+class CompanyNotification:
+    """企業宛ての通知 (通知先ユーザーは NotificationService.notify_companies がまとめて解決する)"""
+
+    company_id: uuid.UUID
+    notification_type: NotificationType
+    title: str
+    message: str | None = None
+    reference_id: uuid.UUID | None = None
+    # 元のアウトボックスのイベント (再配信で同じ通知を作らないためのキー)
+    outbox_event_id: int | None = None
 
 
 class NotificationService:
@@ -16,21 +33,70 @@ class NotificationService:
         message: str | None = None,
         reference_id: uuid.UUID | None = None,
     ):
-        return await self.notification_repo.create(
+        notification = await self.notification_repo.create(
             user_id=user_id,
             type=notification_type.value,
             title=title,
             message=message,
             reference_id=reference_id,
         )
+        self._publish(notification)
+        return notification
+
+    async def notify_companies(self, notifications: list[CompanyNotification]):
+        """企業宛ての通知を、通知先の解決 1 回と複数行 INSERT 1 回でまとめて作成する
+
+        入札者全員への却下通知のように宛先が多い場合でも、文の数は宛先数によらない。
+        通知先ユーザーが見つからない (無効化された) 企業の分は作成しない。
+        """
+        recipients = await self.notification_repo.get_recipient_user_ids(
+            [n.company_id for n in notifications]
+        )
+        created = await self.notification_repo.create_many(
+            [
+                {
+                    "user_id": recipients[n.company_id],
+                    "type": n.notification_type.value,
+                    "title": n.title,
+                    "message": n.message,
+                    "reference_id": n.reference_id,
+                    "outbox_event_id": n.outbox_event_id,
+                }
+                for n in notifications
+                if n.company_id in recipients
+            ]
+        )
+        for notification in created:
+            self._publish(notification)
+        return created
 
-    async def list_notifications(self, user_id: uuid.UUID, unread_only: bool = False):
-        notifications = await self.notification_repo.list_by_user(user_id, unread_only)
-        unread_count = await self.notification_repo.count_unread(user_id)
+    def _publish(self, notification) -> None:
+        # コミット後に購読中の接続へプッシュする
+        notification_hub.publish_on_commit(
+            self.notification_repo.db,
+            notification.user_id,
+            NotificationResponse.model_validate(notification).model_dump_json(),
+        )
+
+    async def list_notifications(
+        self,
+        user_id: uuid.UUID,
+        unread_only: bool = False,
+        limit: int = 50,
+        cursor: str | None = None,
+    ):
+        notifications, total, unread_count, has_more = await self.notification_repo.list_by_user(
+            user_id,
+            unread_only,
+            limit=limit,
+            after=decode_cursor(cursor) if cursor else None,
+        )
+        last = notifications[-1] if has_more else None
         return {
             "items": notifications,
-            "total": len(notifications),
+            "total": total,
             "unread_count": unread_count,
+            "next_cursor": encode_cursor(last.created_at, last.id) if last else None,
         }
 
     async def mark_as_read(self, notification_id: uuid.UUID, user_id: uuid.UUID):
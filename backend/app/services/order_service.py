@@ -2,14 +2,23 @@ import uuid
 
 from app.constants import OrderStatus, ProjectStatus
 from app.exceptions import BadRequestException, ForbiddenException, NotFoundException
+from app.repositories.company_stats_repository import CompanyStatsRepository
 from app.repositories.order_repository import OrderRepository
 from app.repositories.project_repository import ProjectRepository
+from app.services.company_stats_service import CompanyStatsService
+from app.utils.http_cache import Validator
 
 
 class OrderService:
-    def __init__(self, order_repo: OrderRepository, project_repo: ProjectRepository):
+    def __init__(
+        self,
+        order_repo: OrderRepository,
+        project_repo: ProjectRepository,
+        stats_repo: CompanyStatsRepository,
+    ):
         self.order_repo = order_repo
         self.project_repo = project_repo
+        self.stats_service = CompanyStatsService(stats_repo)
 
     async def get_order(self, order_id: uuid.UUID):
         order = await self.order_repo.get_by_id(order_id)
@@ -17,6 +26,16 @@ class OrderService:
             raise NotFoundException("発注が見つかりません")
         return order
 
+    async def get_order_validator(self, order_id: uuid.UUID) -> Validator:
+        updated_at = await self.order_repo.get_updated_at(order_id)
+        if updated_at is None:
+            raise NotFoundException("発注が見つかりません")
+        return Validator.from_versions(updated_at)
+
+    @staticmethod
+    def order_validator(order) -> Validator:
+        return Validator.from_versions(order.updated_at)
+
     async def list_my_orders(self, company_id: uuid.UUID):
         orders = await self.order_repo.list_by_company(company_id)
         return {"items": orders, "total": len(orders)}
@@ -34,11 +53,19 @@ class OrderService:
         if order.status != OrderStatus.CONFIRMED.value:
             raise BadRequestException("この発注は完了できる状態ではありません")
 
+        old_status = order.status
         order = await self.order_repo.update_status(order, OrderStatus.COMPLETED.value)
+        await self.stats_service.order_status_changed(
+            order.subcontractor_company_id, old_status, order.status
+        )
 
         # Also complete the project
-        project = await self.project_repo.get_by_id(order.project_id)
+        project = await self.project_repo.get_by_id(order.project_id, load="minimal")
         if project:
+            old_project_status = project.status
             await self.project_repo.update_status(project, ProjectStatus.COMPLETED.value)
+            await self.stats_service.project_status_changed(
+                project.company_id, old_project_status, ProjectStatus.COMPLETED.value
+            )
 
         return order
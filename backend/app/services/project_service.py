@@ -1,17 +1,146 @@
 import uuid
+from functools import partial
 from math import ceil
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.constants import ProjectStatus
 from app.exceptions import BadRequestException, ForbiddenException, NotFoundException
-from app.repositories.project_repository import ProjectRepository
+from app.repositories.company_stats_repository import CompanyStatsRepository
+from app.repositories.project_repository import FACET_COLUMNS, ProjectRepository
+from app.schemas.project import ProjectListResponse, ProjectResponse
+from app.services.company_stats_service import CompanyStatsService
+from app.utils.download_urls import attach_download_urls, download_urls
+from app.utils.http_cache import Validator, latest
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.result_cache import cache_key, project_list_cache
+
+
+async def resolve_nearby_filters(
+    project_repo: ProjectRepository,
+    near_project_id: uuid.UUID | None,
+    radius_km: float | None,
+    same_prefecture: bool,
+) -> dict:
+    """基準案件からの半径・同一都道府県の指定を、一覧取得の絞り込み引数に変換する"""
+    if near_project_id is None:
+        if radius_km is not None or same_prefecture:
+            raise BadRequestException("基準となる案件 (near_project_id) を指定してください")
+        return {}
+    if radius_km is None and not same_prefecture:
+        raise BadRequestException("radius_km または same_prefecture を指定してください")
+    exists, point = await project_repo.get_geo_point(near_project_id)
+    if not exists:
+        raise NotFoundException("案件が見つかりません")
+    if point is None:
+        raise BadRequestException("基準となる案件の所在地を特定できません")
+    return {
+        "prefecture_code": point.prefecture_code if same_prefecture else None,
+        "near": (point, radius_km) if radius_km is not None else None,
+    }
+
+
+def parse_facets(facets: str | None) -> tuple[str, ...]:
+    """「status,prefecture」形式の指定を検証し、重複を除いた順序付きのタプルにする"""
+    if not facets:
+        return ()
+    names = [name.strip() for name in facets.split(",") if name.strip()]
+    unknown = [name for name in names if name not in FACET_COLUMNS]
+    if unknown:
+        raise BadRequestException(
+            f"facets に指定できるのは {', '.join(FACET_COLUMNS)} です: {', '.join(unknown)}"
+        )
+    return tuple(name for name in FACET_COLUMNS if name in names)
+
+
+async def _load_project_list(
+    db: AsyncSession,
+    status: str | None = None,
+    company_id: uuid.UUID | None = None,
+    specialty_id: uuid.UUID | None = None,
+    location: str | None = None,
+    near_project_id: uuid.UUID | None = None,
+    radius_km: float | None = None,
+    same_prefecture: bool = False,
+    page: int = 1,
+    per_page: int = 20,
+    cursor: str | None = None,
+    include_total: bool = True,
+    facets: tuple[str, ...] = (),
+) -> ProjectListResponse:
+    """案件一覧を DB から読み込む (セッションに依存しないレスポンスにしてキャッシュに載せる)"""
+    project_repo = ProjectRepository(db)
+    nearby = await resolve_nearby_filters(
+        project_repo, near_project_id, radius_km, same_prefecture
+    )
+    filters = {
+        "status": status,
+        "company_id": company_id,
+        "specialty_id": specialty_id,
+        "location": location,
+        **nearby,
+    }
+    # カーソル指定時はキーセットで取得し、件数は数えない
+    after = decode_cursor(cursor) if cursor else None
+    with_total = include_total and after is None
+    facet_counts = None
+    if facets:
+        # 総件数もファセット集計の () グループから得られるので、件数クエリは発行しない
+        facet_total, facet_counts = await project_repo.count_facets(facets, **filters)
+    projects, total, has_more = await project_repo.list_projects(
+        **filters,
+        page=page,
+        per_page=per_page,
+        after=after,
+        with_total=with_total and not facets,
+    )
+    if facets and with_total:
+        total = facet_total
+    last = projects[-1] if has_more else None
+    response = ProjectListResponse.model_validate(
+        {
+            "items": projects,
+            "total": total,
+            "page": page if after is None else None,
+            "per_page": per_page,
+            "pages": (ceil(total / per_page) if total > 0 else 0) if total is not None else None,
+            "next_cursor": encode_cursor(last.created_at, last.id) if last else None,
+            "facets": (
+                {
+                    facet: [
+                        {"value": str(value) if value is not None else None, "count": count}
+                        for value, count in counts
+                    ]
+                    for facet, counts in facet_counts.items()
+                }
+                if facet_counts is not None
+                else None
+            ),
+        }
+    )
+    # ページ内の全ファイルの URL を 1 回で署名する (結果キャッシュに URL ごと載る)
+    await attach_download_urls(file for project in response.items for file in project.files)
+    return response
+
+
+def _project_validator(updated_at, file_count: int, files_updated_at) -> Validator:
+    versions = [updated_at, file_count, files_updated_at]
+    if file_count:
+        # レスポンスの download_url は署名の窓ごとに変わるので、窓が変われば 304 にしない
+        # (If-Modified-Since でも判定できるよう、窓の始まりを時刻として含める)
+        versions.append(download_urls.window_started_at())
+    return Validator.from_versions(*versions)
 
 
 class ProjectService:
-    def __init__(self, project_repo: ProjectRepository):
+    def __init__(self, project_repo: ProjectRepository, stats_repo: CompanyStatsRepository):
         self.project_repo = project_repo
+        self.stats_service = CompanyStatsService(stats_repo)
 
     async def create_project(self, company_id: uuid.UUID, **kwargs):
-        return await self.project_repo.create(company_id=company_id, **kwargs)
+        project = await self.project_repo.create(company_id=company_id, **kwargs)
+        await self.stats_service.project_created(company_id, project.status)
+        return project
 
     async def get_project(self, project_id: uuid.UUID):
         project = await self.project_repo.get_by_id(project_id)
@@ -19,30 +148,34 @@ class ProjectService:
             raise NotFoundException("案件が見つかりません")
         return project
 
-    async def list_projects(
-        self,
-        status: str | None = None,
-        company_id: uuid.UUID | None = None,
-        specialty_id: uuid.UUID | None = None,
-        location: str | None = None,
-        page: int = 1,
-        per_page: int = 20,
-    ):
-        projects, total = await self.project_repo.list_projects(
-            status=status,
-            company_id=company_id,
-            specialty_id=specialty_id,
-            location=location,
-            page=page,
-            per_page=per_page,
+    async def get_project_validator(self, project_id: uuid.UUID) -> Validator:
+        """案件を読み込まずに ETag を求める (条件付き GET 用)"""
+        version = await self.project_repo.get_version(project_id)
+        if version is None:
+            raise NotFoundException("案件が見つかりません")
+        updated_at, file_count, files_updated_at = version
+        return _project_validator(updated_at, file_count, latest([files_updated_at]))
+
+    @staticmethod
+    async def project_response(project) -> ProjectResponse:
+        """ファイルのダウンロード用 URL を付けたレスポンス"""
+        response = ProjectResponse.model_validate(project)
+        await attach_download_urls(response.files)
+        return response
+
+    @staticmethod
+    def project_validator(project) -> Validator:
+        files_updated_at = latest(file.updated_at for file in project.files)
+        return _project_validator(project.updated_at, len(project.files), files_updated_at)
+
+    async def list_projects(self, facets: str | None = None, **filters) -> ProjectListResponse:
+        """案件一覧 (公開) を結果キャッシュ経由で返す。引数は _load_project_list と同じ"""
+        filters["facets"] = parse_facets(facets)
+        return await project_list_cache.get(
+            cache_key(**filters),
+            partial(_load_project_list, **filters),
+            self.project_repo.db,
         )
-        return {
-            "items": projects,
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "pages": ceil(total / per_page) if total > 0 else 0,
-        }
 
     async def update_project(self, project_id: uuid.UUID, company_id: uuid.UUID, **kwargs):
         project = await self.project_repo.get_by_id(project_id)
@@ -73,4 +206,7 @@ class ProjectService:
                 f"ステータスを {project.status} から {status.value} に変更できません"
             )
 
-        return await self.project_repo.update_status(project, status.value)
+        old_status = project.status
+        project = await self.project_repo.update_status(project, status.value)
+        await self.stats_service.project_status_changed(company_id, old_status, project.status)
+        return project
@@ -1,10 +1,16 @@
 import uuid
 
-from app.constants import ProjectStatus, QuoteStatus
+from app.constants import EventType, ProjectStatus, QuoteStatus
 from app.exceptions import BadRequestException, ForbiddenException, NotFoundException
+from app.repositories.company_stats_repository import CompanyStatsRepository
 from app.repositories.order_repository import OrderRepository
+from app.repositories.outbox_repository import OutboxRepository
 from app.repositories.project_repository import ProjectRepository
 from app.repositories.quote_repository import QuoteRepository
+from app.schemas.price import PriceHintResponse
+from app.schemas.quote import QuoteSubmitResponse
+from app.services.company_stats_service import CompanyStatsService
+from app.utils.price_index import price_index
 
 
 class QuoteService:
@@ -12,14 +18,34 @@ class QuoteService:
         self,
         quote_repo: QuoteRepository,
         project_repo: ProjectRepository,
+        stats_repo: CompanyStatsRepository,
         order_repo: OrderRepository | None = None,
+        outbox_repo: OutboxRepository | None = None,
     ):
         self.quote_repo = quote_repo
         self.project_repo = project_repo
         self.order_repo = order_repo
+        self.outbox_repo = outbox_repo
+        self.stats_service = CompanyStatsService(stats_repo)
+
+    async def _record(self, event_type: EventType, quote, project, **payload) -> None:
+        # 通知などの後続処理はアウトボックス経由で行う (app.events)
+        if self.outbox_repo:
+            await self.outbox_repo.add(
+                event_type.value,
+                {
+                    "quote_id": str(quote.id),
+                    "project_id": str(project.id),
+                    "project_title": project.title,
+                    "company_id": str(quote.company_id),
+                    "contractor_company_id": str(project.company_id),
+                    **payload,
+                },
+                aggregate_id=quote.id,
+            )
 
     async def submit_quote(self, project_id: uuid.UUID, company_id: uuid.UUID, **kwargs):
-        project = await self.project_repo.get_by_id(project_id)
+        project = await self.project_repo.get_by_id(project_id, load="minimal")
         if not project:
             raise NotFoundException("案件が見つかりません")
         if project.status != ProjectStatus.OPEN.value:
@@ -31,7 +57,15 @@ class QuoteService:
         if existing:
             raise BadRequestException("既にこの案件に見積もりを提出しています")
 
-        return await self.quote_repo.create(project_id=project_id, company_id=company_id, **kwargs)
+        quote = await self.quote_repo.create(
+            project_id=project_id, company_id=company_id, **kwargs
+        )
+        await self.stats_service.quote_submitted(project.company_id, company_id)
+        await self._record(EventType.QUOTE_SUBMITTED, quote, project)
+        hint = price_index.hint(project.required_specialty_id, project.prefecture_code)
+        response = QuoteSubmitResponse.model_validate(quote)
+        response.price_hint = PriceHintResponse.model_validate(hint) if hint else None
+        return response
 
     async def list_project_quotes(self, project_id: uuid.UUID):
         quotes = await self.quote_repo.list_by_project(project_id)
@@ -47,7 +81,7 @@ class QuoteService:
         if not quote:
             raise NotFoundException("見積もりが見つかりません")
 
-        project = await self.project_repo.get_by_id(quote.project_id)
+        project = await self.project_repo.get_by_id(quote.project_id, load="minimal")
         if not project:
             raise NotFoundException("案件が見つかりません")
         if project.company_id != contractor_company_id:
@@ -59,20 +93,38 @@ class QuoteService:
         quote = await self.quote_repo.update_status(quote, QuoteStatus.ACCEPTED.value)
 
         # Reject other submitted quotes
-        await self.quote_repo.reject_other_quotes(quote.project_id, quote.id)
+        rejected = await self.quote_repo.reject_other_quotes(quote.project_id, quote.id)
+        await self.stats_service.quote_accepted(
+            contractor_company_id, quote.company_id, len(rejected)
+        )
 
         # Auto-create order
         if self.order_repo:
-            await self.order_repo.create(
+            order = await self.order_repo.create(
                 project_id=quote.project_id,
                 quote_id=quote.id,
                 contractor_company_id=contractor_company_id,
                 subcontractor_company_id=quote.company_id,
                 amount=quote.amount,
             )
+            await self.stats_service.order_created(
+                contractor_company_id, quote.company_id, order.status
+            )
 
         # Close the project
+        old_status = project.status
         await self.project_repo.update_status(project, ProjectStatus.CLOSED.value)
+        await self.stats_service.project_status_changed(
+            contractor_company_id, old_status, ProjectStatus.CLOSED.value
+        )
+
+        # The winner and every rejected bidder are notified from one event
+        await self._record(
+            EventType.QUOTE_ACCEPTED,
+            quote,
+            project,
+            rejected=[[str(quote_id), str(company_id)] for quote_id, company_id in rejected],
+        )
 
         return quote
 
@@ -81,7 +133,7 @@ class QuoteService:
         if not quote:
             raise NotFoundException("見積もりが見つかりません")
 
-        project = await self.project_repo.get_by_id(quote.project_id)
+        project = await self.project_repo.get_by_id(quote.project_id, load="minimal")
         if not project:
             raise NotFoundException("案件が見つかりません")
         if project.company_id != contractor_company_id:
@@ -89,4 +141,7 @@ class QuoteService:
         if quote.status != QuoteStatus.SUBMITTED.value:
             raise BadRequestException("この見積もりは既に処理されています")
 
-        return await self.quote_repo.update_status(quote, QuoteStatus.REJECTED.value)
+        quote = await self.quote_repo.update_status(quote, QuoteStatus.REJECTED.value)
+        await self.stats_service.quote_rejected(contractor_company_id)
+        await self._record(EventType.QUOTE_REJECTED, quote, project)
+        return quote
@@ -2,9 +2,12 @@ import uuid
 
 from app.constants import OrderStatus
 from app.exceptions import BadRequestException, ForbiddenException, NotFoundException
-from app.repositories.company_repository import CompanyRepository
+from app.repositories.company_stats_repository import CompanyStatsRepository
+from app.repositories.job_repository import JobRepository
 from app.repositories.order_repository import OrderRepository
 from app.repositories.review_repository import ReviewRepository
+from app.services.company_stats_service import CompanyStatsService
+from app.services.job_service import JobService
 
 
 class ReviewService:
@@ -12,11 +15,13 @@ class ReviewService:
         self,
         review_repo: ReviewRepository,
         order_repo: OrderRepository,
-        company_repo: CompanyRepository,
+        stats_repo: CompanyStatsRepository,
+        job_repo: JobRepository,
     ):
         self.review_repo = review_repo
         self.order_repo = order_repo
-        self.company_repo = company_repo
+        self.stats_service = CompanyStatsService(stats_repo)
+        self.job_service = JobService(job_repo)
 
     async def create_review(
         self,
@@ -52,11 +57,12 @@ class ReviewService:
             rating=rating,
             comment=comment,
         )
+        await self.stats_service.review_created(reviewee_company_id, rating)
 
-        # Update average rating
-        avg_rating = await self.review_repo.get_average_rating(reviewee_company_id)
-        if avg_rating is not None:
-            await self.company_repo.update_average_rating(reviewee_company_id, avg_rating)
+        # Recompute the reviewee's average rating in the background (see app.jobs)
+        await self.job_service.enqueue(
+            "ratings.recompute", {"company_id": str(reviewee_company_id)}
+        )
 
         return review
 
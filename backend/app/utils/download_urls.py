@@ -0,0 +1,121 @@
+"""ファイルのダウンロード用署名付き URL のプロセス内キャッシュ
+
+ProjectFile.file_url はバケット内の位置を示すだけなので、レスポンスには署名付き URL
+(download_url) を添える。一覧では全案件のファイルのキーをまとめて get_many に渡し、
+キャッシュに無い分だけを 1 回のスレッド実行でまとめて署名する。
+
+署名した URL は、時刻を「有効期限 (S3_PRESIGN_EXPIRE_SECONDS) -
+余裕 (S3_DOWNLOAD_URL_REFRESH_MARGIN_SECONDS)」秒ごとに区切った署名の窓 (window) の終わりまで
+使い回す。窓の中で返した URL は、窓が終わってからも少なくとも余裕の秒数は有効なので、案件詳細の
+ETag に窓の始まりを含めれば、304 で使い続けている URL が切れる前に新しい URL を取り直させられる。
+余裕は案件一覧の結果キャッシュに載っている時間 (TTL + 猶予) より長くして、キャッシュから返した
+一覧の URL も期限切れにならないようにする。
+
+同じ内容のファイルは 1 つのオブジェクトを共有する (app.utils.s3.blob_key) ため、URL には
+保存時のファイル名を含めており、キャッシュのキーも (オブジェクトのキー, ファイル名) にする。
+"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.utils.s3 import s3_storage
+
+
+def key_from_url(file_url: str) -> str | None:
+    """object_url で保存した URL からキーを取り出す (別のバケット・外部 URL なら None)"""
+    # object_url はキーをエンコードせずに連結しているので、URL として解釈すると
+    # ファイル名の "#" や "?" で切れる。スキームとホストだけを外し、残りは文字列のまま扱う
+    _, _, rest = file_url.partition("://")
+    path = rest[rest.find("/") :] if "/" in rest else ""
+    prefix = f"/{settings.S3_BUCKET_NAME}/"
+    return path[len(prefix) :] if path.startswith(prefix) else None
+
+
+class DownloadUrlCache:
+    def __init__(self, expiration: int, refresh_margin: int, max_size: int = 10_000):
+        if not 0 <= refresh_margin < expiration:
+            raise ValueError("refresh_margin は 0 以上 expiration 未満にしてください")
+        self.expiration = expiration
+        self.refresh_margin = refresh_margin
+        self.refresh_interval = expiration - refresh_margin
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.batches = 0
+        self._entries: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+
+    def window(self, now: float | None = None) -> int:
+        """署名の窓の番号 (変わると使い回していた URL を署名し直す)"""
+        return int((time.time() if now is None else now) // self.refresh_interval)
+
+    def window_started_at(self) -> datetime:
+        """今の署名の窓が始まった時刻"""
+        return datetime.fromtimestamp(self.window() * self.refresh_interval, timezone.utc)
+
+    async def get_many(self, keys: Iterable[tuple[str, str]]) -> dict[tuple[str, str], str]:
+        """(キー, ファイル名) ごとの署名付き URL (キャッシュに無いものはまとめて署名する)"""
+        now = time.time()
+        urls, missing = {}, []
+        for key in dict.fromkeys(keys):
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                urls[key] = entry[1]
+            else:
+                missing.append(key)
+        self.hits += len(urls)
+        if missing:
+            self.misses += len(missing)
+            self.batches += 1
+            signed = await s3_storage.call(self._sign, missing)
+            # 窓の終わりまで使う (署名は窓の中なので、期限は窓の終わりの refresh_margin 秒以上先)
+            reuse_until = (self.window(now) + 1) * self.refresh_interval
+            for key, url in signed.items():
+                self._entries[key] = (reuse_until, url)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            urls.update(signed)
+        return urls
+
+    def _sign(self, keys: list[tuple[str, str]]) -> dict[tuple[str, str], str]:
+        return {
+            (key, file_name): s3_storage.presigned_url(key, self.expiration, file_name)
+            for key, file_name in keys
+        }
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "batches": self.batches,
+        }
+
+
+async def attach_download_urls(files: Iterable) -> None:
+    """ProjectFileResponse (file_url を持つもの) の download_url をまとめて埋める"""
+    files = [(file, key_from_url(file.file_url)) for file in files]
+    urls = await download_urls.get_many(
+        (key, file.file_name) for file, key in files if key is not None
+    )
+    for file, key in files:
+        file.download_url = urls.get((key, file.file_name))
+
+
+download_urls = DownloadUrlCache(
+    expiration=settings.S3_PRESIGN_EXPIRE_SECONDS,
+    refresh_margin=settings.S3_DOWNLOAD_URL_REFRESH_MARGIN_SECONDS,
+    max_size=settings.S3_DOWNLOAD_URL_CACHE_SIZE,
+)
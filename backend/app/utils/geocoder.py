@@ -0,0 +1,160 @@
+"""住所のオフラインジオコーディングと距離条件
+
+同梱の参照表 (app/data/municipalities.csv) で住所の先頭を都道府県・市区町村名に
+照合し、JIS 地方公共団体コード (都道府県 2 桁・市区町村 5 桁) と代表点の緯度経度を返す。
+代表点は都道府県庁・市区町村役所の位置で、表に無い市区町村は都道府県の代表点になる。
+外部 API は呼ばないため、書き込み時に同期的に解決できる。
+
+Project.location / Company.address から解決した値は Session の flush 時に保存する。
+半径検索は (latitude, longitude) の複合インデックスで矩形に絞り込んでから、
+正距円筒近似の距離で判定する (三角関数を使わないため SQLite でも同じ SQL で動く)。
+"""
+
+import csv
+import re
+import unicodedata
+from dataclasses import dataclass
+from math import cos, radians
+from pathlib import Path
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models.company import Company
+from app.models.project import Project
+
+REFERENCE_PATH = Path(__file__).resolve().parent.parent / "data" / "municipalities.csv"
+
+# 緯度 1 度あたりの距離 (km)。経度方向は cos(緯度) を掛ける
+KM_PER_DEGREE = 111.2
+
+_POSTAL_CODE = re.compile(r"^〒?\s*\d{3}-?\d{4}")
+_SPACES = re.compile(r"\s+")
+# 住所列ごとの監視対象 (モデル -> 住所の属性名)
+_ADDRESS_ATTRS = {Project: "location", Company: "address"}
+
+
+@dataclass(frozen=True, slots=True)
+class GeoPoint:
+    prefecture_code: str
+    municipality_code: str | None
+    latitude: float
+    longitude: float
+
+
+@dataclass(frozen=True, slots=True)
+class _Area:
+    prefecture: str
+    municipality: str
+    point: GeoPoint
+
+
+class Geocoder:
+    def __init__(self, areas: list[_Area]):
+        self._prefectures = {a.prefecture: a for a in areas if not a.municipality}
+        # 「東京」「大阪」のように 都・府・県 を省いた表記 (北海道はそのまま)
+        self._short_prefectures = {
+            name[:-1]: area for name, area in self._prefectures.items() if name != "北海道"
+        }
+        self._municipalities: dict[str, list[_Area]] = {}
+        for area in areas:
+            if area.municipality:
+                self._municipalities.setdefault(area.municipality, []).append(area)
+        self._municipality_lengths = sorted(
+            {len(name) for name in self._municipalities}, reverse=True
+        )
+
+    @classmethod
+    def from_csv(cls, path: Path = REFERENCE_PATH) -> "Geocoder":
+        with path.open(encoding="utf-8", newline="") as f:
+            areas = [
+                _Area(
+                    prefecture=row["prefecture"],
+                    municipality=row["municipality"],
+                    point=GeoPoint(
+                        prefecture_code=row["code"][:2],
+                        municipality_code=row["code"] if row["municipality"] else None,
+                        latitude=float(row["latitude"]),
+                        longitude=float(row["longitude"]),
+                    ),
+                )
+                for row in csv.DictReader(f)
+            ]
+        return cls(areas)
+
+    def geocode(self, address: str | None) -> GeoPoint | None:
+        """住所の先頭から都道府県・市区町村を特定する (特定できなければ None)"""
+        area, _rest = self._match(address)
+        return area.point if area else None
+
+    def resolve_area(self, text: str | None) -> GeoPoint | None:
+        """「東京都港区」「大阪府」のように地域名だけの文字列を解決する
+
+        番地などが続く場合は None (呼び出し側で部分一致に切り替える)。
+        """
+        area, rest = self._match(text)
+        return area.point if area and not rest else None
+
+    def _match(self, address: str | None) -> tuple[_Area | None, str]:
+        text = _SPACES.sub("", _POSTAL_CODE.sub("", unicodedata.normalize("NFKC", address or "")))
+        prefecture = None
+        for name, area in self._prefectures.items():
+            if text.startswith(name):
+                prefecture, text = area, text[len(name) :]
+                break
+        municipality = self._match_municipality(text, prefecture)
+        if municipality is not None:
+            return municipality, text[len(municipality.municipality) :]
+        if prefecture is None:
+            for name, area in self._short_prefectures.items():
+                if text.startswith(name):
+                    return area, text[len(name) :]
+        return prefecture, text
+
+    def _match_municipality(self, text: str, prefecture: _Area | None) -> _Area | None:
+        for length in self._municipality_lengths:
+            candidates = self._municipalities.get(text[:length], ())
+            if prefecture is not None:
+                candidates = [a for a in candidates if a.prefecture == prefecture.prefecture]
+            if len(candidates) == 1:
+                return candidates[0]
+        return None
+
+
+geocoder = Geocoder.from_csv()
+
+
+def within_radius(latitude, longitude, origin: GeoPoint, radius_km: float) -> list:
+    """origin から radius_km 以内を表す WHERE 条件 (矩形 + 近似距離) を返す"""
+    lat_span = radius_km / KM_PER_DEGREE
+    lon_scale = cos(radians(origin.latitude))
+    lon_span = lat_span / max(lon_scale, 0.01)
+    dy = (latitude - origin.latitude) * KM_PER_DEGREE
+    dx = (longitude - origin.longitude) * (KM_PER_DEGREE * lon_scale)
+    return [
+        latitude.between(origin.latitude - lat_span, origin.latitude + lat_span),
+        longitude.between(origin.longitude - lon_span, origin.longitude + lon_span),
+        dx * dx + dy * dy <= radius_km * radius_km,
+    ]
+
+
+def geo_columns(address: str | None) -> dict:
+    point = geocoder.geocode(address)
+    return {
+        "prefecture_code": point.prefecture_code if point else None,
+        "municipality_code": point.municipality_code if point else None,
+        "latitude": point.latitude if point else None,
+        "longitude": point.longitude if point else None,
+    }
+
+
+@event.listens_for(Session, "before_flush")
+def _geocode_addresses(session: Session, _flush_context, _instances) -> None:
+    for obj in (*session.new, *session.dirty):
+        attr = _ADDRESS_ATTRS.get(type(obj))
+        if attr is None:
+            continue
+        if obj not in session.new and not inspect(obj).attrs[attr].history.has_changes():
+            continue
+        for key, value in geo_columns(getattr(obj, attr)).items():
+            setattr(obj, key, value)
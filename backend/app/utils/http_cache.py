@@ -0,0 +1,73 @@
+"""ETag / Last-Modified による条件付き GET の共通処理"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Response
+
+# クライアントには毎回 If-None-Match で再検証させる
+CACHE_CONTROL = "no-cache"
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match が etag に一致するか (GET は弱い比較なので W/ は無視する)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite は tz なしで返すため、保存時と同じ UTC とみなす
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def latest(values) -> datetime | None:
+    """子コレクションの updated_at などの最大値 (空なら None)"""
+    return max((_as_utc(v) for v in values if v is not None), default=None)
+
+
+@dataclass(frozen=True, slots=True)
+class Validator:
+    etag: str
+    last_modified: datetime | None = None
+
+    @classmethod
+    def from_versions(cls, *versions) -> "Validator":
+        """updated_at や子コレクションの件数などのバージョン値から検証子を作る"""
+        parts = [_as_utc(v) if isinstance(v, datetime) else v for v in versions]
+        body = "|".join(v.isoformat() if isinstance(v, datetime) else str(v) for v in parts)
+        stamps = [v for v in parts if isinstance(v, datetime)]
+        return cls(
+            etag=f'"{hashlib.sha256(body.encode()).hexdigest()[:32]}"',
+            last_modified=max(stamps, default=None),
+        )
+
+    def matches(self, if_none_match: str | None, if_modified_since: str | None = None) -> bool:
+        # If-None-Match があれば If-Modified-Since は無視する (RFC 9110)
+        if if_none_match is not None:
+            return etag_matches(if_none_match, self.etag)
+        if not if_modified_since or self.last_modified is None:
+            return False
+        try:
+            since = _as_utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return False
+        return self.last_modified.replace(microsecond=0) <= since
+
+    def headers(self) -> dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": CACHE_CONTROL}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+    def apply(self, response: Response) -> None:
+        response.headers.update(self.headers())
+
+    def not_modified(self) -> Response:
+        return Response(status_code=304, headers=self.headers())
@@ -0,0 +1,310 @@
+"""データベース (jobs テーブル) を使ったバックグラウンドジョブのキュー
+
+リクエスト中に済ませなくてよい処理 (評価平均の再計算など) を JobService.enqueue で積み、
+ワーカー (API プロセス内のタスク、または python -m app.worker) が取得して実行する。
+積むのはリクエストと同じトランザクションなので、ロールバックされたジョブは実行されない。
+
+- 取得: PostgreSQL では FOR UPDATE SKIP LOCKED で複数ワーカーが重ならずに取得する。
+  SQLite では同じ UPDATE 文をポーリングで実行する (書き込みが直列化されるため安全)。
+- 起床: 同じプロセスで積まれたジョブはコミット直後に、別プロセスで積まれたジョブは
+  PostgreSQL の LISTEN/NOTIFY で拾う。それ以外は JOB_POLL_INTERVAL_SECONDS ごとに確認する。
+- 同時実行数: キューごとに JOB_QUEUES の上限まで並行して実行する。
+- 再試行: 失敗したジョブは指数バックオフ (ジッター付き) で待ちに戻し、max_attempts 回
+  失敗したら failed にする。ハンドラの更新とジョブの完了は同じトランザクションでコミットする。
+- ロック: 実行中はロックの時刻を JOB_LOCK_TIMEOUT_SECONDS の 1/3 ごとに延長する。延長が
+  止まったジョブ (ワーカーが落ちたなど) は期限切れで待ちに戻す。完了・失敗の記録は
+  ロックを持っているワーカーだけができ、ロックを失っていたらハンドラの更新も取り消す。
+"""
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import partial
+
+import asyncpg
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.config import settings
+from app.models.job import Job
+from app.repositories.job_repository import PG_CHANNEL, JobRepository
+
+logger = logging.getLogger(__name__)
+
+_ENQUEUED_KEY = "job_queue.enqueued"
+
+Handler = Callable[[AsyncSession, dict], Awaitable[None]]
+
+
+@dataclass(frozen=True, slots=True)
+class JobHandler:
+    fn: Handler
+    queue: str
+    priority: int
+    max_attempts: int
+
+
+# ジョブ名 -> ハンドラ (app.jobs で登録する)
+handlers: dict[str, JobHandler] = {}
+
+
+def job_handler(name: str, queue: str = "default", priority: int = 0, max_attempts: int = 5):
+    """ジョブのハンドラを登録するデコレーター。ハンドラは (session, payload) を受け取る"""
+
+    def decorator(fn: Handler) -> Handler:
+        handlers[name] = JobHandler(fn, queue, priority, max_attempts)
+        return fn
+
+    return decorator
+
+
+def parse_queues(spec: str) -> dict[str, int]:
+    """ "default=4,ratings=1" をキューごとの同時実行数に変換する"""
+    queues = {}
+    for item in spec.split(","):
+        if item.strip():
+            name, _, concurrency = item.partition("=")
+            queues[name.strip()] = max(1, int(concurrency or 1))
+    return queues
+
+
+def retry_delay(attempts: int) -> float:
+    """attempts 回目の失敗後に待つ秒数 (上限付きの指数バックオフに 50-100% のジッター)"""
+    delay = min(
+        settings.JOB_RETRY_MAX_SECONDS, settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def pg_listen(session_factory, channel: str, callback):
+    """PostgreSQL なら channel を LISTEN する接続を返す (それ以外や失敗時は None でポーリング)"""
+    async with session_factory() as session:
+        bind = session.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    dsn = bind.engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+    try:
+        conn = await asyncpg.connect(dsn)
+        await conn.add_listener(channel, callback)
+    except Exception:
+        logger.exception("Failed to LISTEN on %s; falling back to polling", channel)
+        return None
+    return conn
+
+
+class JobWorker:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] | Callable[[], AsyncSession],
+        queues: dict[str, int],
+        worker_id: str | None = None,
+        poll_interval: float | None = None,
+        lock_timeout: float | None = None,
+    ):
+        self.session_factory = session_factory
+        self.queues = queues
+        # ロックの持ち主の識別用 (ホスト名:PID:ランダム)
+        self.worker_id = worker_id or ":".join(
+            (socket.gethostname(), str(os.getpid()), uuid.uuid4().hex[:6])
+        )
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL_SECONDS
+        self.lock_timeout = lock_timeout or settings.JOB_LOCK_TIMEOUT_SECONDS
+        self.counts = {"succeeded": 0, "retried": 0, "failed": 0}
+        self._running: dict[str, set[asyncio.Task]] = {queue: set() for queue in queues}
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._pg_conn = None
+
+    def wake(self, queue: str | None = None) -> None:
+        if queue is None or queue in self.queues:
+            self._wake.set()
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+
+    async def run(self) -> None:
+        """stop() されるまでジョブを取得・実行し続ける (終了時は実行中のジョブを待つ)"""
+        _workers.add(self)
+        await self._listen()
+        heartbeat = asyncio.create_task(self._heartbeat())
+        next_sweep = 0.0
+        loop = asyncio.get_running_loop()
+        try:
+            while not self._stopping:
+                self._wake.clear()
+                try:
+                    if loop.time() >= next_sweep:
+                        await self._release_stale()
+                        next_sweep = loop.time() + self.lock_timeout / 2
+                    await self._fill()
+                except Exception:
+                    logger.exception("Failed to claim jobs; retrying after the poll interval")
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except TimeoutError:
+                    pass
+        finally:
+            _workers.discard(self)
+            await self._unlisten()
+            tasks = [task for tasks in self._running.values() for task in tasks]
+            await asyncio.gather(*tasks, return_exceptions=True)
+            heartbeat.cancel()
+
+    async def drain(self) -> int:
+        """実行可能なジョブがなくなるまで 1 件ずつ順に実行し、実行した件数を返す"""
+        executed = 0
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            while True:
+                claimed = False
+                for queue in self.queues:
+                    for job in await self._claim(queue, 1):
+                        await self._execute(job)
+                        executed += 1
+                        claimed = True
+                if not claimed:
+                    return executed
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self) -> None:
+        """実行中のジョブのロックを期限切れになる前に延長し続ける"""
+        while True:
+            await asyncio.sleep(self.lock_timeout / 3)
+            try:
+                async with self.session_factory() as session:
+                    await JobRepository(session).heartbeat(self.worker_id, _utcnow())
+                    await session.commit()
+            except Exception:
+                logger.exception("Failed to extend the job locks of %s", self.worker_id)
+
+    async def _fill(self) -> None:
+        for queue, limit in self.queues.items():
+            free = limit - len(self._running[queue])
+            if free <= 0:
+                continue
+            for job in await self._claim(queue, free):
+                task = asyncio.create_task(self._execute(job))
+                self._running[queue].add(task)
+                task.add_done_callback(partial(self._finished, queue))
+
+    def _finished(self, queue: str, task: asyncio.Task) -> None:
+        self._running[queue].discard(task)
+        # 空いた枠ですぐに次のジョブを取得する
+        self._wake.set()
+
+    async def _claim(self, queue: str, limit: int) -> list:
+        async with self.session_factory() as session:
+            jobs = await JobRepository(session).claim(queue, limit, self.worker_id, _utcnow())
+            await session.commit()
+        return jobs
+
+    async def _execute(self, job) -> None:
+        handler = handlers.get(job.name)
+        try:
+            if handler is None:
+                raise LookupError(f"unknown job: {job.name}")
+            async with self.session_factory() as session:
+                await handler.fn(session, job.payload)
+                if not await JobRepository(session).complete(job.id, self.worker_id, _utcnow()):
+                    # 他のワーカーが実行し直すので、この実行の更新は取り消す
+                    await session.rollback()
+                    logger.warning("Lost the lock of job %s (%s); discarded", job.id, job.name)
+                    return
+                await session.commit()
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed on attempt %d", job.id, job.name, job.attempts)
+            await self._record_failure(job, handler, f"{type(exc).__name__}: {exc}")
+        else:
+            self.counts["succeeded"] += 1
+
+    async def _record_failure(self, job, handler: JobHandler | None, error: str) -> None:
+        try:
+            async with self.session_factory() as session:
+                repo = JobRepository(session)
+                # 未登録のジョブは再試行しても成功しないので、すぐに failed にする
+                if handler is not None and job.attempts < job.max_attempts:
+                    run_at = _utcnow() + timedelta(seconds=retry_delay(job.attempts))
+                    outcome = "retried"
+                    recorded = await repo.retry(job.id, self.worker_id, error, run_at)
+                else:
+                    outcome = "failed"
+                    recorded = await repo.fail(job.id, self.worker_id, error, _utcnow())
+                await session.commit()
+            if recorded:
+                self.counts[outcome] += 1
+            else:
+                logger.warning("Lost the lock of job %s; failure not recorded", job.id)
+        except Exception:
+            # 記録できなくても、ロックの期限切れで待ちに戻る
+            logger.exception("Failed to record the failure of job %s", job.id)
+
+    async def _release_stale(self) -> None:
+        async with self.session_factory() as session:
+            released = await JobRepository(session).release_stale(
+                _utcnow() - timedelta(seconds=self.lock_timeout)
+            )
+            await session.commit()
+        if released:
+            logger.warning("Released %d stale jobs", released)
+
+    async def _listen(self) -> None:
+        self._pg_conn = await pg_listen(self.session_factory, PG_CHANNEL, self._on_pg_notify)
+
+    async def _unlisten(self) -> None:
+        if self._pg_conn is not None:
+            conn, self._pg_conn = self._pg_conn, None
+            await conn.close()
+
+    def _on_pg_notify(self, _conn, _pid, _channel, queue: str) -> None:
+        self.wake(queue)
+
+    def stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "queues": {
+                queue: {"running": len(self._running[queue]), "concurrency": limit}
+                for queue, limit in self.queues.items()
+            },
+            **self.counts,
+        }
+
+
+# このプロセスで動いているワーカー (コミット直後の起床とヘルスチェック用)
+_workers: set[JobWorker] = set()
+
+
+def worker_stats() -> list[dict]:
+    return [worker.stats() for worker in _workers]
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_enqueued(session: Session, _flush_context) -> None:
+    queues = {obj.queue for obj in session.new if isinstance(obj, Job)}
+    if queues:
+        session.info.setdefault(_ENQUEUED_KEY, set()).update(queues)
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers(session: Session) -> None:
+    for queue in session.info.pop(_ENQUEUED_KEY, ()):
+        for worker in _workers:
+            worker.wake(queue)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_enqueued(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_ENQUEUED_KEY, None)
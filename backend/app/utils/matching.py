@@ -0,0 +1,444 @@
+"""案件と下請け業者の推薦スコア (プロセス内の特徴量表)
+
+募集中の案件と下請け業者の特徴量を列ごとの NumPy 配列で保持し、推薦リクエストでは
+1 件の案件 (または業者) に対する全候補のスコアをベクトル演算でまとめて求める。
+DB へは結合を伴う検索を発行しない。
+
+スコアは次の 5 項目 (いずれも 0〜1) の重み付き和:
+  specialty:  案件の必要専門分野を業者が持つか (案件に指定が無ければ 0.5)
+  distance:   代表点どうしの距離 (DISTANCE_SCALE_KM で減衰。不明なら同一都道府県で 0.5)
+  rating:     業者の average_rating (未評価は 0.5)
+  budget:     業者の過去の採用額の平均が案件の予算に収まるか (不明なら 0.5)
+  experience: 業者の採用された見積もり数
+
+案件・企業・見積もりの変更は flush 時とコミット後に ID 単位で記録し、次の ensure_fresh で
+該当行だけを読み直す (募集開始で追加、募集終了で削除)。他ワーカーでの変更は
+MATCHING_INDEX_REFRESH_SECONDS ごとの全件読み直しで反映される。
+"""
+
+import time
+import uuid
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session, SessionTransaction
+
+from app.config import settings
+from app.models.company import Company
+from app.models.project import Project
+from app.models.quote import Quote
+from app.repositories.matching_repository import MatchingRepository
+from app.utils.geocoder import KM_PER_DEGREE
+
+WEIGHTS = {
+    "specialty": 0.35,
+    "distance": 0.25,
+    "rating": 0.15,
+    "budget": 0.15,
+    "experience": 0.10,
+}
+# 距離スコアが 1/e になる距離
+DISTANCE_SCALE_KM = 50.0
+# 採用数スコアが 1 - 1/e になる件数
+EXPERIENCE_SCALE = 5.0
+
+_CHANGED_KEY = "matching_index.changed"
+
+_PROJECT_COLUMNS = {
+    "specialty": (np.int32, -1),
+    "prefecture": (np.int16, -1),
+    "latitude": (np.float64, np.nan),
+    "longitude": (np.float64, np.nan),
+    "budget_min": (np.float64, np.nan),
+    "budget_max": (np.float64, np.nan),
+}
+_SUBCONTRACTOR_COLUMNS = {
+    "prefecture": (np.int16, -1),
+    "latitude": (np.float64, np.nan),
+    "longitude": (np.float64, np.nan),
+    "rating": (np.float64, np.nan),
+    "accepted": (np.float64, 0.0),
+    "accepted_amount": (np.float64, np.nan),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Match:
+    id: uuid.UUID
+    score: float
+    scores: dict[str, float]
+
+
+class _FeatureTable:
+    """ID ごとに 1 行を持つ列指向の特徴量表 (削除した行は次の追加で再利用する)"""
+
+    def __init__(self, columns: dict[str, tuple[type, float]], capacity: int = 64):
+        self._columns = columns
+        self.ids: list[uuid.UUID | None] = [None] * capacity
+        self.rows: dict[uuid.UUID, int] = {}
+        self._free = list(range(capacity - 1, -1, -1))
+        self.active = np.zeros(capacity, dtype=bool)
+        self.data = {
+            name: np.full(capacity, fill, dtype=dtype) for name, (dtype, fill) in columns.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.active)
+
+    def upsert(self, key: uuid.UUID, **values) -> int:
+        row = self.rows.get(key)
+        if row is None:
+            if not self._free:
+                self._grow(self.capacity * 2)
+            row = self._free.pop()
+            self.rows[key] = row
+            self.ids[row] = key
+            self.active[row] = True
+        for name, (_dtype, fill) in self._columns.items():
+            value = values.get(name)
+            self.data[name][row] = fill if value is None else value
+        return row
+
+    def remove(self, key: uuid.UUID) -> int | None:
+        row = self.rows.pop(key, None)
+        if row is not None:
+            self.ids[row] = None
+            self.active[row] = False
+            for name, (_dtype, fill) in self._columns.items():
+                self.data[name][row] = fill
+            self._free.append(row)
+        return row
+
+    def _grow(self, capacity: int) -> None:
+        old = self.capacity
+        self.ids.extend([None] * (capacity - old))
+        self._free.extend(range(capacity - 1, old - 1, -1))
+        self.active = np.concatenate([self.active, np.zeros(capacity - old, dtype=bool)])
+        for name, (dtype, fill) in self._columns.items():
+            self.data[name] = np.concatenate(
+                [self.data[name], np.full(capacity - old, fill, dtype=dtype)]
+            )
+
+
+def _prefecture(code: str | None) -> int | None:
+    return int(code) if code else None
+
+
+def _distance_score(lat, lon, prefecture, origin_lat, origin_lon, origin_prefecture):
+    """正距円筒近似の距離による減衰。緯度経度が不明な組は同一都道府県なら 0.5"""
+    dy = (lat - origin_lat) * KM_PER_DEGREE
+    dx = (lon - origin_lon) * KM_PER_DEGREE * np.cos(np.radians(origin_lat))
+    score = np.exp(-np.hypot(dx, dy) / DISTANCE_SCALE_KM)
+    same_prefecture = (prefecture == origin_prefecture) & (prefecture >= 0)
+    return np.where(np.isnan(score), np.where(same_prefecture, 0.5, 0.0), score)
+
+
+def _budget_score(amount, budget_min, budget_max):
+    """採用額の平均が予算内なら 1、外れた割合に応じて減衰。どちらかが不明なら 0.5"""
+    lo = np.nan_to_num(budget_min, nan=0.0)
+    hi = np.where(np.isnan(budget_max), np.inf, budget_max)
+    with np.errstate(invalid="ignore"):
+        below = np.maximum(lo - amount, 0) / np.maximum(lo, 1)
+        above = np.maximum(amount - hi, 0) / np.maximum(hi, 1)
+    unknown = np.isnan(amount) | (np.isnan(budget_min) & np.isnan(budget_max))
+    return np.where(unknown, 0.5, np.exp(-2 * (below + above)))
+
+
+def _rating_score(rating):
+    return np.where(np.isnan(rating), 0.5, (np.nan_to_num(rating, nan=3.0) - 1) / 4)
+
+
+def _experience_score(accepted):
+    return 1 - np.exp(-accepted / EXPERIENCE_SCALE)
+
+
+class MatchingIndex:
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self.loaded_at: float | None = None
+        self.reloads = 0
+        self.incremental_updates = 0
+        self._reset_tables()
+        self._reset_pending()
+
+    def _reset_tables(self) -> None:
+        self.projects = _FeatureTable(_PROJECT_COLUMNS)
+        self.subcontractors = _FeatureTable(_SUBCONTRACTOR_COLUMNS)
+        # 専門分野 ID -> 列番号と、業者 × 専門分野の所有行列 (列は常に 1 以上確保する)
+        self.specialty_columns: dict[uuid.UUID, int] = {}
+        self.specialty_matrix = np.zeros((self.subcontractors.capacity, 1), dtype=bool)
+
+    def _reset_pending(self) -> None:
+        self._pending_projects: set[uuid.UUID] = set()
+        self._pending_companies: set[uuid.UUID] = set()
+        self._all_companies_stale = False
+
+    def clear(self) -> None:
+        """未読み込みの状態に戻す (次の ensure_fresh で全件を読む)"""
+        self._reset_tables()
+        self._reset_pending()
+        self.loaded_at = None
+
+    def mark(self, project_ids=(), company_ids=()) -> None:
+        self._pending_projects.update(project_ids)
+        self._pending_companies.update(company_ids)
+
+    def mark_all_companies(self) -> None:
+        self._all_companies_stale = True
+
+    async def load(self, db: AsyncSession) -> None:
+        # 読み込み中に記録された変更は次の ensure_fresh で反映する
+        self._reset_pending()
+        repo = MatchingRepository(db)
+        projects = await repo.get_open_project_features()
+        subcontractors = await repo.get_subcontractor_features()
+        specialty_pairs = await repo.get_specialty_pairs()
+        quote_stats = await repo.get_accepted_quote_stats()
+        self._reset_tables()
+        for row in projects:
+            self._upsert_project(row)
+        self._apply_subcontractors(subcontractors, specialty_pairs, quote_stats)
+        self.loaded_at = time.monotonic()
+        self.reloads += 1
+
+    async def ensure_fresh(self, db: AsyncSession) -> None:
+        expired = (
+            self.loaded_at is None or time.monotonic() - self.loaded_at > self.refresh_interval
+        )
+        if expired:
+            await self.load(db)
+            return
+        project_ids, self._pending_projects = self._pending_projects, set()
+        company_ids, self._pending_companies = self._pending_companies, set()
+        all_companies, self._all_companies_stale = self._all_companies_stale, False
+        if not (project_ids or company_ids or all_companies):
+            return
+        try:
+            await self._refresh(db, project_ids, None if all_companies else company_ids)
+        except Exception:
+            self.mark(project_ids, company_ids)
+            self._all_companies_stale |= all_companies
+            raise
+        self.incremental_updates += 1
+
+    async def _refresh(self, db: AsyncSession, project_ids, company_ids) -> None:
+        repo = MatchingRepository(db)
+        if project_ids:
+            rows = await repo.get_open_project_features(project_ids)
+            for row in rows:
+                self._upsert_project(row)
+            # 募集中でなくなった (または削除された) 案件を除く
+            for project_id in project_ids - {row.id for row in rows}:
+                self.projects.remove(project_id)
+        if company_ids is None or company_ids:
+            subcontractors = await repo.get_subcontractor_features(company_ids)
+            specialty_pairs = await repo.get_specialty_pairs(company_ids)
+            quote_stats = await repo.get_accepted_quote_stats(company_ids)
+            stale = set(self.subcontractors.rows) if company_ids is None else company_ids
+            for company_id in stale - {row.id for row in subcontractors}:
+                self._remove_subcontractor(company_id)
+            self._apply_subcontractors(subcontractors, specialty_pairs, quote_stats)
+
+    def _upsert_project(self, row) -> None:
+        specialty = None
+        if row.required_specialty_id is not None:
+            specialty = self._specialty_column(row.required_specialty_id)
+        self.projects.upsert(
+            row.id,
+            specialty=specialty,
+            prefecture=_prefecture(row.prefecture_code),
+            latitude=row.latitude,
+            longitude=row.longitude,
+            budget_min=row.budget_min,
+            budget_max=row.budget_max,
+        )
+
+    def _apply_subcontractors(self, subcontractors, specialty_pairs, quote_stats) -> None:
+        stats = {company_id: (count, amount) for company_id, count, amount in quote_stats}
+        specialties: dict[uuid.UUID, list[int]] = {}
+        for company_id, specialty_id in specialty_pairs:
+            specialties.setdefault(company_id, []).append(self._specialty_column(specialty_id))
+        for row in subcontractors:
+            count, amount = stats.get(row.id, (0, None))
+            index = self.subcontractors.upsert(
+                row.id,
+                prefecture=_prefecture(row.prefecture_code),
+                latitude=row.latitude,
+                longitude=row.longitude,
+                rating=row.average_rating,
+                accepted=count,
+                accepted_amount=amount,
+            )
+            self._resize_matrix()
+            self.specialty_matrix[index] = False
+            self.specialty_matrix[index, specialties.get(row.id, [])] = True
+
+    def _remove_subcontractor(self, company_id: uuid.UUID) -> None:
+        index = self.subcontractors.remove(company_id)
+        if index is not None:
+            self.specialty_matrix[index] = False
+
+    def _specialty_column(self, specialty_id: uuid.UUID) -> int:
+        column = self.specialty_columns.get(specialty_id)
+        if column is None:
+            column = self.specialty_columns[specialty_id] = len(self.specialty_columns)
+            self._resize_matrix()
+        return column
+
+    def _resize_matrix(self) -> None:
+        rows, columns = self.specialty_matrix.shape
+        capacity, needed = self.subcontractors.capacity, len(self.specialty_columns)
+        if rows < capacity or columns < needed:
+            # 列は追加が頻繁にならないよう余裕を持って広げる
+            matrix = np.zeros(
+                (capacity, max(needed, columns * 2 if columns < needed else columns)),
+                dtype=bool,
+            )
+            matrix[:rows, :columns] = self.specialty_matrix
+            self.specialty_matrix = matrix
+
+    def recommend_projects(
+        self, company_id: uuid.UUID, limit: int, exclude=()
+    ) -> list[Match] | None:
+        """下請け業者に向く募集中の案件 (業者が索引に無ければ None)"""
+        sub = self.subcontractors.rows.get(company_id)
+        if sub is None:
+            return None
+        p, s = self.projects.data, self.subcontractors.data
+        specialty = p["specialty"]
+        owned = self.specialty_matrix[sub][np.maximum(specialty, 0)]
+        scores = {
+            "specialty": np.where(specialty >= 0, owned, 0.5),
+            "distance": _distance_score(
+                p["latitude"],
+                p["longitude"],
+                p["prefecture"],
+                s["latitude"][sub],
+                s["longitude"][sub],
+                s["prefecture"][sub],
+            ),
+            "rating": np.broadcast_to(_rating_score(s["rating"][sub]), specialty.shape),
+            "budget": _budget_score(s["accepted_amount"][sub], p["budget_min"], p["budget_max"]),
+            "experience": np.broadcast_to(_experience_score(s["accepted"][sub]), specialty.shape),
+        }
+        return self._top(self.projects, scores, limit, exclude)
+
+    def recommend_subcontractors(
+        self, project_id: uuid.UUID, limit: int, exclude=()
+    ) -> list[Match] | None:
+        """募集中の案件に向く下請け業者 (案件が索引に無ければ None)"""
+        project = self.projects.rows.get(project_id)
+        if project is None:
+            return None
+        p, s = self.projects.data, self.subcontractors.data
+        specialty = int(p["specialty"][project])
+        size = self.subcontractors.capacity
+        scores = {
+            "specialty": (
+                self.specialty_matrix[:, specialty].astype(np.float64)
+                if specialty >= 0
+                else np.full(size, 0.5)
+            ),
+            "distance": _distance_score(
+                s["latitude"],
+                s["longitude"],
+                s["prefecture"],
+                p["latitude"][project],
+                p["longitude"][project],
+                p["prefecture"][project],
+            ),
+            "rating": _rating_score(s["rating"]),
+            "budget": _budget_score(
+                s["accepted_amount"], p["budget_min"][project], p["budget_max"][project]
+            ),
+            "experience": _experience_score(s["accepted"]),
+        }
+        return self._top(self.subcontractors, scores, limit, exclude)
+
+    @staticmethod
+    def _top(table: _FeatureTable, scores: dict, limit: int, exclude) -> list[Match]:
+        total = sum(WEIGHTS[name] * values for name, values in scores.items())
+        total = np.where(table.active, total, -np.inf)
+        excluded = list({table.rows[key] for key in exclude if key in table.rows})
+        if excluded:
+            total[excluded] = -np.inf
+        k = min(limit, len(table) - len(excluded))
+        if k <= 0:
+            return []
+        top = np.argpartition(-total, k - 1)[:k]
+        top = top[np.argsort(-total[top], kind="stable")]
+        return [
+            Match(
+                id=table.ids[row],
+                score=round(float(total[row]), 4),
+                scores={name: round(float(values[row]), 4) for name, values in scores.items()},
+            )
+            for row in top
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "projects": len(self.projects),
+            "subcontractors": len(self.subcontractors),
+            "specialties": len(self.specialty_columns),
+            "pending": len(self._pending_projects) + len(self._pending_companies),
+            "reloads": self.reloads,
+            "incremental_updates": self.incremental_updates,
+        }
+
+
+matching_index = MatchingIndex(refresh_interval=settings.MATCHING_INDEX_REFRESH_SECONDS)
+
+
+def _quote_status_changed(quote: Quote) -> bool:
+    return inspect(quote).attrs.status.history.has_changes()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_matching_changes(session: Session, _flush_context) -> None:
+    project_ids, company_ids = set(), set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Project):
+            project_ids.add(obj.id)
+        elif isinstance(obj, Company):
+            company_ids.add(obj.id)
+        elif isinstance(obj, Quote) and obj not in session.new and _quote_status_changed(obj):
+            # 採用数・採用額が変わるのは既存の見積もりの状態遷移だけ
+            company_ids.add(obj.company_id)
+    if project_ids or company_ids:
+        matching_index.mark(project_ids, company_ids)
+        changed = session.info.setdefault(_CHANGED_KEY, [set(), set(), False])
+        changed[0] |= project_ids
+        changed[1] |= company_ids
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_company_updates(orm_execute_state: ORMExecuteState) -> None:
+    # average_rating などの一括 UPDATE は対象 ID が分からないため、業者を全件読み直す
+    mapper = orm_execute_state.bind_mapper
+    if orm_execute_state.is_update and mapper is not None and mapper.class_ is Company:
+        matching_index.mark_all_companies()
+        session = orm_execute_state.session
+        session.info.setdefault(_CHANGED_KEY, [set(), set(), False])[2] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_committed(session: Session) -> None:
+    changed = session.info.pop(_CHANGED_KEY, None)
+    if changed is not None:
+        project_ids, company_ids, all_companies = changed
+        matching_index.mark(project_ids, company_ids)
+        if all_companies:
+            matching_index.mark_all_companies()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_CHANGED_KEY, None)
@@ -0,0 +1,137 @@
+"""通知のサーバープッシュ用 pub/sub ハブ
+
+user_id ごとに購読キューを持ち、1 ユーザーの複数接続 (タブ・端末) へ配信する。
+既定ではプロセス内だけで配信する。NOTIFICATION_PUSH_BACKEND=postgres の場合は
+PostgreSQL の LISTEN/NOTIFY を経由させ、別の uvicorn ワーカーに接続している
+購読者にも届ける。
+
+配信はトランザクションのコミット後に行う (ロールバックされた通知は送らない)。
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import asyncpg
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PG_CHANNEL = "notifications"
+# NOTIFY のペイロード上限 (8000 bytes) に収まらない場合は本文を省く
+_PG_PAYLOAD_LIMIT = 7900
+_PENDING_KEY = "notification_hub.pending"
+
+
+class NotificationHub:
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: dict[uuid.UUID, set[asyncio.Queue[str]]] = {}
+        self._pg_conn = None
+        self._pg_lock = asyncio.Lock()
+        # イベントループはタスクを弱参照でしか持たないので、NOTIFY が終わるまで参照を持つ
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: uuid.UUID) -> AsyncIterator[asyncio.Queue[str]]:
+        queue: asyncio.Queue[str] = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(user_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[user_id]
+
+    async def stream(
+        self, user_id: uuid.UUID, heartbeat: float | None = None
+    ) -> AsyncIterator[str]:
+        """SSE 形式のイベントを返し続ける (一定時間何もなければコメント行で keep-alive)"""
+        heartbeat = heartbeat or settings.NOTIFICATION_STREAM_HEARTBEAT_SECONDS
+        async with self.subscribe(user_id) as queue:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: notification\ndata: {data}\n\n"
+
+    def publish(self, user_id: uuid.UUID, data: str) -> None:
+        if self._pg_conn is not None:
+            task = asyncio.get_running_loop().create_task(self._pg_notify(user_id, data))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            self._deliver(user_id, data)
+
+    def publish_on_commit(self, db: AsyncSession, user_id: uuid.UUID, data: str) -> None:
+        db.sync_session.info.setdefault(_PENDING_KEY, []).append((user_id, data))
+
+    def _deliver(self, user_id: uuid.UUID, data: str) -> None:
+        for queue in self._subscribers.get(user_id, ()):
+            if queue.full():
+                # 読み出しが追いつかない接続は古いイベントから捨てる
+                queue.get_nowait()
+            queue.put_nowait(data)
+
+    async def start(self) -> None:
+        if settings.NOTIFICATION_PUSH_BACKEND != "postgres":
+            return
+        dsn = settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+        self._pg_conn = await asyncpg.connect(dsn)
+        await self._pg_conn.add_listener(PG_CHANNEL, self._on_pg_notify)
+
+    async def stop(self) -> None:
+        if self._tasks:
+            # 送信中の NOTIFY を待ってから接続を閉じる
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._pg_conn is not None:
+            conn, self._pg_conn = self._pg_conn, None
+            await conn.close()
+
+    async def _pg_notify(self, user_id: uuid.UUID, data: str) -> None:
+        payload = json.dumps({"user_id": str(user_id), "data": data})
+        if len(payload.encode()) > _PG_PAYLOAD_LIMIT:
+            body = json.loads(data)
+            body["message"] = None
+            payload = json.dumps({"user_id": str(user_id), "data": json.dumps(body)})
+        try:
+            async with self._pg_lock:
+                await self._pg_conn.execute("SELECT pg_notify($1, $2)", PG_CHANNEL, payload)
+        except Exception:
+            logger.exception("Failed to NOTIFY; delivering locally only")
+            self._deliver(user_id, data)
+
+    def _on_pg_notify(self, _conn, _pid, _channel, payload: str) -> None:
+        message = json.loads(payload)
+        self._deliver(uuid.UUID(message["user_id"]), message["data"])
+
+
+notification_hub = NotificationHub()
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session: Session) -> None:
+    for user_id, data in session.info.pop(_PENDING_KEY, ()):
+        notification_hub.publish(user_id, data)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
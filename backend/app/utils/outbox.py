@@ -0,0 +1,267 @@
+"""トランザクショナルアウトボックスとイベント中継
+
+サービスは状態の変更と同じトランザクションで OutboxRepository.add によりドメインイベント
+(quote.accepted など) を outbox_events に書く。コミットされたイベントだけが残るため、
+リクエストのトランザクションが成功すれば後続の処理 (通知など) が失われることはない。
+
+OutboxRelay は未配信のイベントを発生順にまとめて取得し、イベント種別ごとに登録された
+ハンドラへ一括で渡す (ハンドラは同じ種別のイベントのリストを受け取る)。ハンドラの
+書き込みと配信済みへの更新は同じトランザクションでコミットする。ハンドラが失敗した種別は
+SAVEPOINT ごと取り消してから 1 件ずつ配信し直し、それでも失敗したイベントだけをバックオフ後に
+再配信して、OUTBOX_MAX_ATTEMPTS 回失敗したら failed にする (app.commands.outbox_replay で
+未配信に戻せる)。配信は少なくとも 1 回なので、ハンドラは同じイベントを 2 回受け取っても
+困らないようにする (通知はイベント ID をキーにして二重に作らない)。
+
+プロセス内のキャッシュ (principal・案件一覧・推薦・相場など) の更新は、各ワーカーの
+コミット後リスナーのまま残す (中継は 1 プロセスでしか動かないため)。
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter, defaultdict, deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.config import settings
+from app.models.outbox_event import OutboxEvent
+from app.repositories.outbox_repository import PG_CHANNEL, OutboxRepository
+from app.utils.job_queue import pg_listen, retry_delay
+
+logger = logging.getLogger(__name__)
+
+_RECORDED_KEY = "outbox.recorded"
+
+# 直近の配信速度 (events/s) を求める期間
+THROUGHPUT_WINDOW_SECONDS = 60
+
+EventHandlerFn = Callable[[AsyncSession, list], Awaitable[None]]
+
+
+@dataclass(frozen=True, slots=True)
+class EventHandler:
+    name: str
+    fn: EventHandlerFn
+
+
+# イベント種別 -> ハンドラ (app.events で登録する。登録順に呼ぶ)
+handlers: dict[str, list[EventHandler]] = defaultdict(list)
+
+
+def event_handler(*event_types: str):
+    """イベントのハンドラを登録するデコレーター。ハンドラは (session, events) を受け取る"""
+
+    def decorator(fn: EventHandlerFn) -> EventHandlerFn:
+        for event_type in event_types:
+            handlers[event_type].append(EventHandler(fn.__name__, fn))
+        return fn
+
+    return decorator
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class OutboxRelay:
+    def __init__(
+        self,
+        session_factory,
+        batch_size: int | None = None,
+        poll_interval: float | None = None,
+        max_attempts: int | None = None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        self.poll_interval = poll_interval or settings.OUTBOX_POLL_INTERVAL_SECONDS
+        self.max_attempts = max_attempts or settings.OUTBOX_MAX_ATTEMPTS
+        # 配信の計測値
+        self.batches = 0
+        self.dispatched = 0
+        self.retried = 0
+        self.failed = 0
+        self.by_type: Counter[str] = Counter()
+        self.handler_seconds: defaultdict[str, float] = defaultdict(float)
+        self.lag_seconds: float | None = None
+        self._recent: deque[tuple[float, int]] = deque()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._pg_conn = None
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+
+    async def run(self) -> None:
+        """stop() されるまで、未配信のイベントがあれば配信し続ける"""
+        _relays.add(self)
+        self._pg_conn = await pg_listen(
+            self.session_factory, PG_CHANNEL, lambda *_args: self.wake()
+        )
+        try:
+            while not self._stopping:
+                self._wake.clear()
+                try:
+                    # 満杯のバッチが続く間は待たずに次を取りに行く
+                    while not self._stopping and await self._relay_once() == self.batch_size:
+                        pass
+                except Exception:
+                    logger.exception("Failed to relay outbox events")
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except TimeoutError:
+                    pass
+        finally:
+            _relays.discard(self)
+            if self._pg_conn is not None:
+                conn, self._pg_conn = self._pg_conn, None
+                await conn.close()
+
+    async def drain(self) -> int:
+        """配信可能なイベントがなくなるまで配信し、取得した件数を返す"""
+        total = 0
+        while count := await self._relay_once():
+            total += count
+        return total
+
+    async def _relay_once(self) -> int:
+        async with self.session_factory() as session:
+            count = await self.dispatch_batch(session)
+            await session.commit()
+        return count
+
+    async def dispatch_batch(self, session: AsyncSession) -> int:
+        """1 バッチを取得して配信する (コミットは呼び出し側)。取得した件数を返す"""
+        repo = OutboxRepository(session)
+        now = _utcnow()
+        events = await repo.claim(self.batch_size, now)
+        if not events:
+            return 0
+
+        groups: dict[str, list] = defaultdict(list)
+        for row in events:
+            groups[row.event_type].append(row)
+        delivered = []
+        for event_type, group in groups.items():
+            try:
+                await self._dispatch_group(session, event_type, group)
+            except Exception as exc:
+                if len(group) == 1:
+                    logger.exception("Outbox handler failed for %s event", event_type)
+                    await self._record_failure(repo, group, _describe(exc), now)
+                    continue
+                # どのイベントが原因か分からないので 1 件ずつ配信し直し、失敗した分だけ再試行にする
+                logger.warning(
+                    "Outbox handler failed for %d %s events; retrying one by one",
+                    len(group),
+                    event_type,
+                )
+                ok = []
+                for row in group:
+                    try:
+                        await self._dispatch_group(session, event_type, [row])
+                    except Exception as row_exc:
+                        logger.exception(
+                            "Outbox handler failed for %s event %s", event_type, row.id
+                        )
+                        await self._record_failure(repo, [row], _describe(row_exc), now)
+                    else:
+                        ok.append(row)
+                group = ok
+            delivered.extend(row.id for row in group)
+            self.by_type[event_type] += len(group)
+        await repo.mark_dispatched(delivered, now)
+
+        self.batches += 1
+        self.dispatched += len(delivered)
+        self.lag_seconds = max(
+            0.0, (now - min(_aware(row.created_at) for row in events)).total_seconds()
+        )
+        self._recent.append((time.monotonic(), len(delivered)))
+        return len(events)
+
+    async def _dispatch_group(self, session: AsyncSession, event_type: str, group: list) -> None:
+        # 失敗した分の書き込みだけを取り消す
+        async with session.begin_nested():
+            for handler in handlers.get(event_type, ()):
+                start = time.perf_counter()
+                await handler.fn(session, group)
+                self.handler_seconds[handler.name] += time.perf_counter() - start
+
+    async def _record_failure(self, repo: OutboxRepository, group: list, error: str, now):
+        retry = [row for row in group if row.attempts + 1 < self.max_attempts]
+        give_up = [row.id for row in group if row.attempts + 1 >= self.max_attempts]
+        # 再試行までの時間は、同じバッチの中で最も試行回数の多いイベントに合わせる
+        if retry:
+            delay = retry_delay(max(row.attempts for row in retry) + 1)
+            await repo.retry([row.id for row in retry], error, now + timedelta(seconds=delay))
+            self.retried += len(retry)
+        if give_up:
+            await repo.fail(give_up, error)
+            self.failed += len(give_up)
+
+    def throughput(self) -> float:
+        """直近 THROUGHPUT_WINDOW_SECONDS 秒の配信速度 (events/s)"""
+        cutoff = time.monotonic() - THROUGHPUT_WINDOW_SECONDS
+        while self._recent and self._recent[0][0] < cutoff:
+            self._recent.popleft()
+        return sum(count for _, count in self._recent) / THROUGHPUT_WINDOW_SECONDS
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "dispatched": self.dispatched,
+            "retried": self.retried,
+            "failed": self.failed,
+            "avg_batch_size": round(self.dispatched / self.batches, 2) if self.batches else None,
+            "events_per_second": round(self.throughput(), 3),
+            "lag_seconds": round(self.lag_seconds, 3) if self.lag_seconds is not None else None,
+            "by_type": dict(self.by_type),
+            "handler_seconds": {
+                name: round(seconds, 3) for name, seconds in self.handler_seconds.items()
+            },
+        }
+
+
+def _describe(exc: BaseException) -> str:
+    return f"{type(exc).__name__}: {exc}"
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite ではタイムゾーンなしで読み出される
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+# このプロセスで動いている中継 (コミット直後の起床とヘルスチェック用)
+_relays: set[OutboxRelay] = set()
+
+
+def relay_stats() -> list[dict]:
+    return [relay.stats() for relay in _relays]
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_recorded(session: Session, _flush_context) -> None:
+    if any(isinstance(obj, OutboxEvent) for obj in session.new):
+        session.info[_RECORDED_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_relays(session: Session) -> None:
+    if session.info.pop(_RECORDED_KEY, False):
+        for relay in _relays:
+            relay.wake()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_recorded(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_RECORDED_KEY, None)
@@ -1,5 +1,12 @@
+import base64
+import binascii
+import uuid
+from datetime import datetime
+
 from pydantic import BaseModel
 
+from app.exceptions import BadRequestException
+
 
 class PaginationParams(BaseModel):
     page: int = 1
@@ -20,3 +27,18 @@ class PaginatedResponse(BaseModel):
     page: int
     per_page: int
     pages: int
+
+
+def encode_cursor(created_at: datetime, item_id: uuid.UUID) -> str:
+    """(created_at, id) を不透明なカーソル文字列に変換する"""
+    raw = f"{created_at.isoformat()}|{item_id.hex}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, item_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(item_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise BadRequestException("無効なカーソルです")
@@ -0,0 +1,341 @@
+"""相場 (受注金額の分位点) のプロセス内インデックス
+
+受注 (見積もり承認で作られる Order と、受注先が承認した DirectOrder) の金額を、
+専門分野・都道府県・月ごとの分位点スケッチに蓄積し、見積もり提出や予算入力の目安として
+p10 / p50 / p90 を返す。
+採用された見積もりの金額は Order.amount と同じなので、Order として 1 回だけ数える。
+
+スケッチは DDSketch 方式 (値を相対誤差 alpha の対数ビンに数える) で、分位点の相対誤差が
+alpha 以下になり、ビンの加算だけでマージできる。最小単位 (専門分野, 都道府県, 月) のほかに
+専門分野のみ・都道府県のみ・全体の集計キーにも同時に加算しておき、目安は直近の
+PRICE_INDEX_WINDOW_MONTHS か月分をマージして求める。サンプルが
+PRICE_INDEX_MIN_SAMPLES に満たなければ、より粗い集計に切り替える。
+
+新しい受注はコミット後に加算する (ロールバックされた受注は数えない)。直接発注は作成時ではなく
+承認された時点で数え、承認待ち・辞退・キャンセルの金額は含めない (承認後にキャンセルされた分は
+次の再構築で外れる)。起動時は
+price_sketches (python -m app.commands.price_index で再構築) を読み込み、その後に作られた
+受注だけを再生する。
+"""
+
+import json
+import math
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+from sqlalchemy.orm.util import identity_key
+
+from app.config import settings
+from app.constants import DirectOrderStatus
+from app.models.direct_order import DirectOrder
+from app.models.order import Order
+from app.models.project import Project
+from app.repositories.price_repository import PriceRepository
+from app.utils.geocoder import geocoder
+
+# 集計キーの「すべて」と「未指定」
+ALL = "*"
+UNSPECIFIED = ""
+
+QUANTILES = (0.1, 0.5, 0.9)
+
+_SAMPLES_KEY = "price_index.samples"
+
+
+class QuantileSketch:
+    """相対誤差 alpha で分位点を返すスケッチ (DDSketch)"""
+
+    __slots__ = ("alpha", "gamma", "_log_gamma", "bins", "zero_count", "count")
+
+    def __init__(self, alpha: float = 0.01):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value <= 0:
+            self.zero_count += count
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.count += count
+
+    def merge(self, other: "QuantileSketch") -> None:
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> float | None:
+        """q 分位点 (小さい方から q * (count - 1) 番目の値の近似)。空なら None"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                # ビン (gamma^(k-1), gamma^k] の代表値。範囲内のどの値とも相対誤差 alpha 以内
+                return 2 * self.gamma**key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_json(self) -> str:
+        return json.dumps({"zero": self.zero_count, "bins": sorted(self.bins.items())})
+
+    @classmethod
+    def from_json(cls, text: str, alpha: float) -> "QuantileSketch":
+        data = json.loads(text)
+        sketch = cls(alpha)
+        sketch.zero_count = data["zero"]
+        sketch.bins = {int(key): count for key, count in data["bins"]}
+        sketch.count = sketch.zero_count + sum(sketch.bins.values())
+        return sketch
+
+
+@dataclass(frozen=True, slots=True)
+class PriceSample:
+    specialty_id: uuid.UUID | None
+    prefecture_code: str | None
+    amount: float
+    created_at: datetime
+
+
+@dataclass(frozen=True, slots=True)
+class PriceHint:
+    p10: int
+    p50: int
+    p90: int
+    sample_count: int
+    # 目安に使った集計 (指定された条件のうち、どこまで絞り込めたか)
+    specialty_id: uuid.UUID | None
+    prefecture_code: str | None
+
+
+def month_of(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime("%Y-%m")
+
+
+def _recent_months(now: datetime, count: int) -> list[str]:
+    year, month = now.year, now.month
+    months = []
+    for _ in range(count):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months
+
+
+def _rollups(key: tuple[str, str, str]) -> set[tuple[str, str, str]]:
+    specialty, prefecture, month = key
+    return {
+        (specialty, prefecture, month),
+        (specialty, ALL, month),
+        (ALL, prefecture, month),
+        (ALL, ALL, month),
+    }
+
+
+def bucket_key(sample: PriceSample) -> tuple[str, str, str]:
+    """最小単位のキー (専門分野, 都道府県, 月)"""
+    return (
+        str(sample.specialty_id) if sample.specialty_id else UNSPECIFIED,
+        sample.prefecture_code or UNSPECIFIED,
+        month_of(sample.created_at),
+    )
+
+
+class PriceIndex:
+    def __init__(self, alpha: float, window_months: int, min_samples: int):
+        self.alpha = alpha
+        self.window_months = window_months
+        self.min_samples = min_samples
+        self.sketches: dict[tuple[str, str, str], QuantileSketch] = {}
+        self.built_through: datetime | None = None
+        self.samples = 0
+
+    def clear(self) -> None:
+        self.sketches = {}
+        self.built_through = None
+        self.samples = 0
+
+    def add(self, sample: PriceSample) -> None:
+        for key in _rollups(bucket_key(sample)):
+            self._sketch(key).add(sample.amount)
+        self.samples += 1
+
+    def load_bucket(self, key: tuple[str, str, str], sketch: QuantileSketch) -> None:
+        """再構築済みの最小単位のスケッチを、集計キーにも反映して取り込む"""
+        for rollup in _rollups(key):
+            self._sketch(rollup).merge(sketch)
+        self.samples += sketch.count
+
+    def _sketch(self, key: tuple[str, str, str]) -> QuantileSketch:
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = QuantileSketch(self.alpha)
+        return sketch
+
+    def hint(
+        self,
+        specialty_id: uuid.UUID | None,
+        prefecture_code: str | None,
+        now: datetime | None = None,
+    ) -> PriceHint | None:
+        """直近の受注金額の p10 / p50 / p90 (サンプル不足なら粗い集計、それも無ければ None)"""
+        months = _recent_months(now or datetime.now(timezone.utc), self.window_months)
+        specialty = str(specialty_id) if specialty_id else ALL
+        prefecture = prefecture_code or ALL
+        levels = dict.fromkeys(
+            [(specialty, prefecture), (specialty, ALL), (ALL, prefecture), (ALL, ALL)]
+        )
+        for level_specialty, level_prefecture in levels:
+            merged = QuantileSketch(self.alpha)
+            for month in months:
+                sketch = self.sketches.get((level_specialty, level_prefecture, month))
+                if sketch is not None:
+                    merged.merge(sketch)
+            if merged.count >= self.min_samples:
+                p10, p50, p90 = (round(merged.quantile(q)) for q in QUANTILES)
+                return PriceHint(
+                    p10=p10,
+                    p50=p50,
+                    p90=p90,
+                    sample_count=merged.count,
+                    specialty_id=specialty_id if level_specialty != ALL else None,
+                    prefecture_code=prefecture_code if level_prefecture != ALL else None,
+                )
+        return None
+
+    async def load(self, db: AsyncSession, batch_size: int = 1000) -> None:
+        """再構築済みのスケッチを読み込み、その後に作られた受注を再生する"""
+        repo = PriceRepository(db)
+        self.clear()
+        built_through = None
+        for row in await repo.get_sketches():
+            key = (row.specialty_key, row.prefecture_key, row.month)
+            self.load_bucket(key, QuantileSketch.from_json(row.bins, self.alpha))
+            if row.built_through is not None:
+                built_through = max(built_through or row.built_through, row.built_through)
+        async for sample in _iter_samples(repo, built_through, batch_size):
+            self.add(sample)
+        self.built_through = built_through
+
+    async def rebuild(self, db: AsyncSession, batch_size: int = 1000) -> int:
+        """全受注からスケッチを作り直して price_sketches に保存し、取り込んだ件数を返す"""
+        repo = PriceRepository(db)
+        buckets: dict[tuple[str, str, str], QuantileSketch] = {}
+        built_through = None
+        async for sample in _iter_samples(repo, None, batch_size):
+            key = bucket_key(sample)
+            sketch = buckets.get(key)
+            if sketch is None:
+                sketch = buckets[key] = QuantileSketch(self.alpha)
+            sketch.add(sample.amount)
+            built_through = max(built_through or sample.created_at, sample.created_at)
+        await repo.replace_sketches(
+            [
+                {
+                    "specialty_key": specialty,
+                    "prefecture_key": prefecture,
+                    "month": month,
+                    "sample_count": sketch.count,
+                    "bins": sketch.to_json(),
+                    "built_through": built_through,
+                }
+                for (specialty, prefecture, month), sketch in buckets.items()
+            ],
+            batch_size,
+        )
+        self.clear()
+        for key, sketch in buckets.items():
+            self.load_bucket(key, sketch)
+        self.built_through = built_through
+        return self.samples
+
+    def stats(self) -> dict:
+        return {
+            "buckets": len(self.sketches),
+            "samples": self.samples,
+            "built_through": self.built_through.isoformat() if self.built_through else None,
+        }
+
+
+price_index = PriceIndex(
+    alpha=settings.PRICE_INDEX_RELATIVE_ACCURACY,
+    window_months=settings.PRICE_INDEX_WINDOW_MONTHS,
+    min_samples=settings.PRICE_INDEX_MIN_SAMPLES,
+)
+
+
+async def _iter_samples(repo: PriceRepository, since: datetime | None, batch_size: int):
+    async for specialty_id, prefecture_code, amount, created_at in repo.iter_order_amounts(
+        since, batch_size
+    ):
+        yield PriceSample(specialty_id, prefecture_code, float(amount), created_at)
+    async for specialty_id, location, amount, created_at in repo.iter_direct_order_amounts(
+        since, batch_size
+    ):
+        yield _direct_order_sample(specialty_id, location, amount, created_at)
+
+
+def _order_sample(session: Session, order: Order) -> PriceSample | None:
+    # 見積もり承認では案件を読み込み済みなので、識別子マップから専門分野と所在地を取る
+    project = session.identity_map.get(identity_key(Project, order.project_id))
+    if project is not None:
+        specialty_id, prefecture_code = project.required_specialty_id, project.prefecture_code
+    else:
+        row = session.connection().execute(
+            select(Project.required_specialty_id, Project.prefecture_code).where(
+                Project.id == order.project_id
+            )
+        )
+        specialty_id, prefecture_code = row.one()
+    return PriceSample(specialty_id, prefecture_code, float(order.amount), order.created_at)
+
+
+def _direct_order_sample(specialty_id, location, amount, created_at) -> PriceSample:
+    # 直接発注は所在地の列を持たないため、ここで都道府県を解決する
+    point = geocoder.geocode(location)
+    return PriceSample(
+        specialty_id, point.prefecture_code if point else None, float(amount), created_at
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_new_orders(session: Session, _flush_context) -> None:
+    samples = []
+    for obj in session.new:
+        if isinstance(obj, Order):
+            samples.append(_order_sample(session, obj))
+    for obj in session.dirty:
+        # after_flush の時点では変更前後の値が残っているので、承認への遷移だけを拾う
+        if isinstance(obj, DirectOrder) and DirectOrderStatus.ACCEPTED.value in (
+            inspect(obj).attrs.status.history.added
+        ):
+            samples.append(
+                _direct_order_sample(obj.specialty_id, obj.location, obj.amount, obj.accepted_at)
+            )
+    if samples:
+        session.info.setdefault(_SAMPLES_KEY, []).extend(samples)
+
+
+@event.listens_for(Session, "after_commit")
+def _add_committed(session: Session) -> None:
+    for sample in session.info.pop(_SAMPLES_KEY, ()):
+        price_index.add(sample)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_SAMPLES_KEY, None)
@@ -0,0 +1,100 @@
+"""認証済みユーザー (principal) のプロセス内キャッシュ
+
+get_current_user は JWT を検証した後、user_id -> (is_active, role, company_id) を
+ここから引くため、キャッシュヒット時は認証に DB アクセスが発生しない。
+
+ユーザーの有効/無効・ロール、企業の作成/付け替えを flush した時点と、そのコミット後の
+2 回該当エントリを破棄する (コミット前に並行リクエストが古い値を載せ直しても残らない)。
+他ワーカーでの変更は TTL が切れるまで反映されない。
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.config import settings
+from app.models.company import Company
+from app.models.user import User
+
+_INVALIDATE_KEY = "principal_cache.invalidate"
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    id: uuid.UUID
+    role: str
+    is_active: bool
+    company_id: uuid.UUID | None
+
+
+class PrincipalCache:
+    def __init__(self, ttl: float, max_size: int = 10_000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[uuid.UUID, tuple[float, Principal]] = OrderedDict()
+
+    def get(self, user_id: uuid.UUID) -> Principal | None:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, principal: Principal) -> None:
+        self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+principal_cache = PrincipalCache(ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_principal_changes(session: Session, _flush_context) -> None:
+    user_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            user_ids.add(obj.id)
+        elif isinstance(obj, Company):
+            user_ids.add(obj.user_id)
+            history = inspect(obj).attrs.user_id.history
+            user_ids.update(uid for uid in history.deleted if uid is not None)
+    for user_id in user_ids:
+        principal_cache.invalidate(user_id)
+    session.info.setdefault(_INVALIDATE_KEY, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    for user_id in session.info.pop(_INVALIDATE_KEY, ()):
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_INVALIDATE_KEY, None)
@@ -0,0 +1,208 @@
+"""クエリ結果のプロセス内キャッシュ (公開案件一覧用)
+
+キーごとに 1 件の結果を持ち、TTL 内はそのまま返す。TTL 切れから stale 猶予の間は
+古い結果を返しつつ、バックグラウンドで 1 回だけ読み直す (stale-while-revalidate)。
+キャッシュに無いキーへの同時リクエストは最初の 1 件だけが DB を引き、
+残りはその結果を待つ (single-flight)。最初のリクエストが切断などで取り消されたら、
+待っていた側が自分のセッションで読み直す。
+
+案件・案件ファイルの変更を flush した時点と、そのコミット後の 2 回全件を破棄する。
+破棄より前に始まった読み込みの結果は保存しない。他ワーカーでの変更は TTL 内は反映されない。
+"""
+
+import asyncio
+import logging
+import statistics
+import time
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.config import settings
+from app.database import async_session_factory
+from app.models.project import Project, ProjectFile
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[AsyncSession], Awaitable[Any]]
+
+_INVALIDATE_KEY = "result_cache.invalidate"
+
+
+@dataclass(slots=True)
+class _Entry:
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+
+class ResultCache:
+    def __init__(
+        self,
+        ttl: float,
+        stale_ttl: float,
+        max_size: int = 1024,
+        session_factory: Callable[[], Any] = async_session_factory,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        # バックグラウンド更新はリクエストのセッションを使えないため、別に開く
+        self.session_factory = session_factory
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._refreshing: set[Hashable] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._generation = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refresh_errors = 0
+        self._load_ms: deque[float] = deque(maxlen=500)
+
+    async def get(self, key: Hashable, loader: Loader, db: AsyncSession) -> Any:
+        """key の結果を返す。無ければ loader(db) で読み込む"""
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and now < entry.fresh_until:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry.value
+        if entry is not None and now < entry.stale_until:
+            self.stale_hits += 1
+            self._schedule_refresh(key, loader)
+            return entry.value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # 取り消されたのが自分ではなく読み込み中のリクエストなら、読み直す
+                if asyncio.current_task().cancelling() or not inflight.cancelled():
+                    raise
+            return await self.get(key, loader, db)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._load(key, loader, db)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # 待っている側がいなくても未取得の例外として警告させない
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+    def clear(self) -> None:
+        self.invalidate()
+        self.hits = self.stale_hits = self.misses = self.coalesced = self.refresh_errors = 0
+        self._load_ms.clear()
+
+    async def wait_for_refreshes(self) -> None:
+        """実行中のバックグラウンド更新の完了を待つ (テスト・終了処理用)"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        served = self.hits + self.stale_hits + self.coalesced
+        timings = sorted(self._load_ms)
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refresh_errors": self.refresh_errors,
+            "hit_ratio": round(served / lookups, 4) if lookups else None,
+            "load_p50_ms": round(statistics.median(timings), 2) if timings else None,
+            "load_p95_ms": (
+                round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2)
+                if timings
+                else None
+            ),
+        }
+
+    async def _load(self, key: Hashable, loader: Loader, db: AsyncSession) -> Any:
+        generation = self._generation
+        start = time.perf_counter()
+        value = await loader(db)
+        self._load_ms.append((time.perf_counter() - start) * 1000)
+        if generation == self._generation:
+            now = time.monotonic()
+            self._entries[key] = _Entry(value, now + self.ttl, now + self.ttl + self.stale_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def _schedule_refresh(self, key: Hashable, loader: Loader) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        task = asyncio.get_running_loop().create_task(self._refresh(key, loader))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, key: Hashable, loader: Loader) -> None:
+        try:
+            async with self.session_factory() as db:
+                await self._load(key, loader, db)
+        except Exception:
+            self.refresh_errors += 1
+            logger.exception("Failed to refresh cached result")
+        finally:
+            self._refreshing.discard(key)
+
+
+def cache_key(**params) -> tuple:
+    """未指定 (None・空文字) を除いた引数から、順序によらないキーを作る"""
+    return tuple(
+        sorted((name, str(value)) for name, value in params.items() if value not in (None, ""))
+    )
+
+
+project_list_cache = ResultCache(
+    ttl=settings.PROJECT_LIST_CACHE_TTL_SECONDS,
+    stale_ttl=settings.PROJECT_LIST_CACHE_STALE_SECONDS,
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_project_changes(session: Session, _flush_context) -> None:
+    changed = (*session.new, *session.dirty, *session.deleted)
+    if any(isinstance(obj, (Project, ProjectFile)) for obj in changed):
+        project_list_cache.invalidate()
+        session.info[_INVALIDATE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    if session.info.pop(_INVALIDATE_KEY, False):
+        project_list_cache.invalidate()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_INVALIDATE_KEY, None)
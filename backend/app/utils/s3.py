@@ -1,42 +1,309 @@
+"""S3 (開発環境は LocalStack) へのファイル保存
+
+クライアントはプロセスで 1 つ (s3_storage) を API の lifespan で作り、使い回す
+(boto3 のクライアントはスレッドセーフ)。作成時の認証情報の解決やエンドポイントの設定は
+起動時に 1 回だけ行う。通信を伴う呼び出しは S3_MAX_POOL_CONNECTIONS 本のスレッドで実行し、
+イベントループを止めない (スレッド数と HTTP の接続プールの大きさを揃えている)。
+署名付き URL はローカルで署名を計算するだけなので、通信もスレッドも使わない。
+
+アップロードは UploadFile を S3_UPLOAD_PART_SIZE_BYTES ずつ読み、マルチパートアップロードの
+パートとして送る。メモリに持つのは送信中の 1 パートと読み込み中の 1 パートだけで、
+ファイル全体は持たない (リクエスト本文は Starlette が一時ファイルに書き出している)。
+サイズと SHA-256 は送りながら計算する。1 パートに収まる小さいファイルは put_object 1 回で送る。
+
+API を経由したファイルは内容の SHA-256 をキーにして保存する (blob_key)。同じ内容のファイルは
+1 つのオブジェクトを共有するので、先に digest_stream でハッシュを計算し、既にあれば送らない。
+"""
+
+import asyncio
+import hashlib
+import logging
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Protocol
+from urllib.parse import quote
 
 import boto3
 from botocore.config import Config
+from botocore.exceptions import ClientError
 
 from app.config import settings
+from app.exceptions import BadRequestException
+
+logger = logging.getLogger(__name__)
+
 
+class AsyncReadable(Protocol):
+    async def read(self, size: int = -1) -> bytes: ...
 
-def get_s3_client():
-    return boto3.client(
+
+class AsyncSeekable(AsyncReadable, Protocol):
+    async def seek(self, offset: int) -> None: ...
+
+
+@dataclass(frozen=True, slots=True)
+class UploadResult:
+    key: str
+    url: str
+    size: int
+    checksum: str  # SHA-256 (16 進)
+
+
+def create_s3_client(max_pool_connections: int | None = None):
+    # boto3 の既定セッションはスレッドセーフではないため、専用のセッションから作る
+    return boto3.session.Session().client(
         "s3",
         endpoint_url=settings.S3_ENDPOINT_URL,
         aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
         aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
         region_name=settings.AWS_REGION,
-        config=Config(signature_version="s3v4"),
+        config=Config(
+            signature_version="s3v4",
+            max_pool_connections=max_pool_connections or settings.S3_MAX_POOL_CONNECTIONS,
+        ),
     )
 
 
-def upload_file(
-    file_content: bytes,
-    file_name: str,
-    content_type: str = "application/octet-stream",
-) -> str:
-    s3 = get_s3_client()
-    key = f"uploads/{uuid.uuid4().hex}/{file_name}"
-    s3.put_object(
+def new_key(file_name: str, *prefixes: str) -> str:
+    """アップロード先のキー (uploads/<prefixes>/<ランダム>/<ファイル名>)"""
+    # パス区切りを含むファイル名で別のキーを指せないようにする
+    name = file_name.replace("/", "_").replace("\\", "_") or "unnamed"
+    return "/".join(("uploads", *prefixes, uuid.uuid4().hex, name))
+
+
+def blob_key(digest: str) -> str:
+    """内容アドレスのキー (先頭 2 文字で分けて 1 つのプレフィックスに集中させない)"""
+    return f"blobs/{digest[:2]}/{digest}"
+
+
+def object_url(key: str) -> str:
+    return f"{settings.S3_ENDPOINT_URL}/{settings.S3_BUCKET_NAME}/{key}"
+
+
+class S3Storage:
+    def __init__(self, max_pool_connections: int | None = None):
+        self.max_pool_connections = max_pool_connections or settings.S3_MAX_POOL_CONNECTIONS
+        self._client = None
+        self._executor: ThreadPoolExecutor | None = None
+        self.calls = 0
+        self.in_flight = 0
+        self.presigned = 0
+
+    @property
+    def client(self):
+        # lifespan の外 (コマンド・ベンチマーク) では最初に使うときに作る
+        if self._client is None:
+            self._client = create_s3_client(self.max_pool_connections)
+        return self._client
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_pool_connections, thread_name_prefix="s3"
+            )
+        return self._executor
+
+    async def start(self) -> None:
+        # サービス定義の読み込みで時間がかかるので、起動時にスレッドで作っておく
+        await asyncio.get_running_loop().run_in_executor(self.executor, lambda: self.client)
+
+    async def stop(self) -> None:
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown)
+        if self._client is not None:
+            client, self._client = self._client, None
+            client.close()
+
+    async def call(self, fn, *args, **kwargs):
+        """通信を伴う処理を S3 用のスレッドで実行する (同時実行数は接続プールの大きさまで)"""
+        self.calls += 1
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, partial(fn, *args, **kwargs)
+            )
+        finally:
+            self.in_flight -= 1
+
+    def presigned_url(
+        self, key: str, expiration: int | None = None, file_name: str | None = None
+    ) -> str:
+        """ダウンロード用の署名付き URL (通信せずにローカルで署名する)
+
+        file_name を渡すと、その名前で保存されるよう Content-Disposition を指定する
+        (内容アドレスのキーはファイル名を含まないため)。
+        """
+        self.presigned += 1
+        params = {"Bucket": settings.S3_BUCKET_NAME, "Key": key}
+        if file_name:
+            params["ResponseContentDisposition"] = (
+                f"attachment; filename*=UTF-8''{quote(file_name, safe='')}"
+            )
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params=params,
+            ExpiresIn=expiration or settings.S3_PRESIGN_EXPIRE_SECONDS,
+        )
+
+    def presigned_post(self, key: str, content_type: str, size: int) -> dict:
+        """ブラウザから S3 へ直接送るための署名付き POST (キー・種類・サイズを固定する)"""
+        self.presigned += 1
+        return self.client.generate_presigned_post(
+            Bucket=settings.S3_BUCKET_NAME,
+            Key=key,
+            Fields={"Content-Type": content_type},
+            Conditions=[{"Content-Type": content_type}, ["content-length-range", size, size]],
+            ExpiresIn=settings.S3_UPLOAD_URL_EXPIRE_SECONDS,
+        )
+
+    async def head(self, key: str) -> dict | None:
+        """オブジェクトのメタデータ (無ければ None)"""
+        try:
+            return await self.call(
+                self.client.head_object, Bucket=settings.S3_BUCKET_NAME, Key=key
+            )
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    async def delete(self, key: str) -> None:
+        await self.call(self.client.delete_object, Bucket=settings.S3_BUCKET_NAME, Key=key)
+
+    def stats(self) -> dict:
+        return {
+            "started": self._client is not None,
+            "max_pool_connections": self.max_pool_connections,
+            # 実行中とスレッドの空き待ちの合計 (接続プールの大きさを超えたら待ちが出ている)
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "presigned": self.presigned,
+        }
+
+    async def upload_stream(
+        self,
+        file: AsyncReadable,
+        file_name: str,
+        content_type: str = "application/octet-stream",
+        part_size: int | None = None,
+        max_bytes: int | None = None,
+        key: str | None = None,
+    ) -> UploadResult:
+        """file を先頭から読みながら S3 に送る (max_bytes を超えたら中止して 400)"""
+        part_size = part_size or settings.S3_UPLOAD_PART_SIZE_BYTES
+        max_bytes = max_bytes or settings.FILE_UPLOAD_MAX_BYTES
+        s3 = self.client
+        key = key or new_key(file_name)
+        hasher = hashlib.sha256()
+
+        chunk = await _read_part(file, part_size)
+        if len(chunk) < part_size:
+            check_upload_size(len(chunk), max_bytes)
+            await self.call(_put_object, s3, key, chunk, content_type, hasher)
+            return UploadResult(key, object_url(key), len(chunk), hasher.hexdigest())
+
+        upload = await self.call(
+            s3.create_multipart_upload,
+            Bucket=settings.S3_BUCKET_NAME,
+            Key=key,
+            ContentType=content_type,
+        )
+        upload_id = upload["UploadId"]
+        parts: list[dict] = []
+        size = 0
+        in_flight: asyncio.Task | None = None
+        try:
+            while chunk:
+                size += len(chunk)
+                check_upload_size(size, max_bytes)
+                if in_flight is not None:
+                    parts.append(await in_flight)
+                # 前のパートの送信が終わってから次を送る (ハッシュの更新順を保つ)。
+                # 送信中に次のパートを読む
+                in_flight = asyncio.create_task(
+                    self.call(_upload_part, s3, key, upload_id, len(parts) + 1, chunk, hasher)
+                )
+                chunk = await _read_part(file, part_size)
+            parts.append(await in_flight)
+            await self.call(
+                s3.complete_multipart_upload,
+                Bucket=settings.S3_BUCKET_NAME,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            if in_flight is not None:
+                await asyncio.gather(in_flight, return_exceptions=True)
+            await asyncio.shield(self.call(_abort, s3, key, upload_id))
+            raise
+        return UploadResult(key, object_url(key), size, hasher.hexdigest())
+
+
+async def digest_stream(
+    file: AsyncSeekable,
+    part_size: int | None = None,
+    max_bytes: int | None = None,
+) -> tuple[str, int]:
+    """file の SHA-256 とサイズを計算し、先頭に戻す (max_bytes を超えたら 400)"""
+    part_size = part_size or settings.S3_UPLOAD_PART_SIZE_BYTES
+    max_bytes = max_bytes or settings.FILE_UPLOAD_MAX_BYTES
+    hasher = hashlib.sha256()
+    size = 0
+    while chunk := await _read_part(file, part_size):
+        size += len(chunk)
+        check_upload_size(size, max_bytes)
+        # hashlib は大きいデータの計算中に GIL を手放すので、スレッドで計算してループを止めない
+        await asyncio.to_thread(hasher.update, chunk)
+    await file.seek(0)
+    return hasher.hexdigest(), size
+
+
+async def _read_part(file: AsyncReadable, size: int) -> bytes:
+    """size バイト (末尾ではそれ未満) を読む。read が途中までしか返さない場合も埋める"""
+    data = await file.read(size)
+    if not data or len(data) == size:
+        return data
+    buffer = bytearray(data)
+    while len(buffer) < size and (data := await file.read(size - len(buffer))):
+        buffer += data
+    return bytes(buffer)
+
+
+def check_upload_size(size: int, max_bytes: int) -> None:
+    if size > max_bytes:
+        raise BadRequestException(
+            f"ファイルサイズが上限 ({max_bytes // (1024 * 1024)} MB) を超えています"
+        )
+
+
+def _put_object(s3, key: str, body: bytes, content_type: str, hasher) -> None:
+    hasher.update(body)
+    s3.put_object(Bucket=settings.S3_BUCKET_NAME, Key=key, Body=body, ContentType=content_type)
+
+
+def _upload_part(s3, key: str, upload_id: str, part_number: int, body: bytes, hasher) -> dict:
+    hasher.update(body)
+    response = s3.upload_part(
         Bucket=settings.S3_BUCKET_NAME,
         Key=key,
-        Body=file_content,
-        ContentType=content_type,
+        UploadId=upload_id,
+        PartNumber=part_number,
+        Body=body,
     )
-    return f"{settings.S3_ENDPOINT_URL}/{settings.S3_BUCKET_NAME}/{key}"
+    return {"PartNumber": part_number, "ETag": response["ETag"]}
 
 
-def generate_presigned_url(key: str, expiration: int = 3600) -> str:
-    s3 = get_s3_client()
-    return s3.generate_presigned_url(
-        "get_object",
-        Params={"Bucket": settings.S3_BUCKET_NAME, "Key": key},
-        ExpiresIn=expiration,
-    )
+def _abort(s3, key: str, upload_id: str) -> None:
+    try:
+        s3.abort_multipart_upload(Bucket=settings.S3_BUCKET_NAME, Key=key, UploadId=upload_id)
+    except Exception:
+        # 残ったパートはバケットのライフサイクルルールで削除される
+        logger.exception("Failed to abort multipart upload %s", upload_id)
+
+
+s3_storage = S3Storage()
@@ -0,0 +1,100 @@
+"""企業検索用の正規化と n-gram 分割
+
+日本語は単語境界が無いため、かな・漢字の連続部分は 2-gram、英数字の連続部分は
+3-gram に分割して company_search_grams (転置インデックス) に保存する。
+検索語も同じ規則で分割し、すべての gram を含む企業を候補にしたうえで、
+正規化済みの検索列に対する部分一致で連続した一致かを確認する。
+
+インデックスは Session の flush 時に更新するため、ORM 経由で企業を書き込めば
+作成・更新経路によらず最新に保たれる (Core の一括 INSERT では更新されない)。
+"""
+
+import re
+import unicodedata
+import uuid
+
+from sqlalchemy import delete, event, insert, inspect
+from sqlalchemy.orm import Session
+
+from app.models.company import Company, CompanySearchGram
+
+# フィールドごとの重み (名前の一致を説明文より高く評価する)
+FIELD_WEIGHTS = {"name": 3, "description": 1, "address": 1}
+KEYWORD_FIELDS = ("name", "description")
+LOCATION_FIELDS = ("address",)
+# 関連度 (1 gram あたりの重み) に加える average_rating の係数。
+# 評価は最大 +0.5 なので、一致の度合いが同程度の企業どうしの順位だけを入れ替える
+RATING_WEIGHT = 0.1
+
+# ひらがな・カタカナ・CJK 統合漢字 (拡張 A・互換漢字を含む)・々
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3005"
+_RUN = re.compile(rf"[{_CJK}]+|[^\W{_CJK}]+")
+_CJK_CHAR = re.compile(rf"[{_CJK}]")
+_PENDING_KEY = "company_search.pending"
+
+
+def normalize(text: str | None) -> str:
+    """全角英数・半角カナの揺れと大文字小文字を吸収する"""
+    return unicodedata.normalize("NFKC", text or "").casefold()
+
+
+def grams(text: str) -> set[str]:
+    """正規化済みの文字列を n-gram に分割する (n に満たない連続部分は含めない)"""
+    result = set()
+    for run in _RUN.findall(text):
+        n = 2 if _CJK_CHAR.match(run) else 3
+        result.update(run[i : i + n] for i in range(len(run) - n + 1))
+    return result
+
+
+def search_columns(name: str | None, description: str | None, address: str | None) -> dict:
+    return {
+        "search_text": f"{normalize(name)}\n{normalize(description)}",
+        "search_address": normalize(address),
+    }
+
+
+def gram_rows(
+    company_id: uuid.UUID, name: str | None, description: str | None, address: str | None
+) -> list[dict]:
+    fields = {"name": name, "description": description, "address": address}
+    return [
+        {"gram": gram, "field": field, "company_id": company_id}
+        for field, value in fields.items()
+        for gram in sorted(grams(normalize(value)))
+    ]
+
+
+def _search_fields_changed(company: Company) -> bool:
+    attrs = inspect(company).attrs
+    return any(attrs[key].history.has_changes() for key in ("name", "description", "address"))
+
+
+@event.listens_for(Session, "before_flush")
+def _refresh_search_columns(session: Session, _flush_context, _instances) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    for obj in (*session.new, *session.dirty):
+        if not isinstance(obj, Company):
+            continue
+        is_new = obj in session.new
+        if not is_new and not _search_fields_changed(obj):
+            continue
+        if obj.id is None:
+            obj.id = uuid.uuid4()
+        for key, value in search_columns(obj.name, obj.description, obj.address).items():
+            setattr(obj, key, value)
+        pending[obj.id] = (is_new, gram_rows(obj.id, obj.name, obj.description, obj.address))
+
+
+@event.listens_for(Session, "after_flush")
+def _write_search_grams(session: Session, _flush_context) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    conn = session.connection()
+    stale = [company_id for company_id, (is_new, _rows) in pending.items() if not is_new]
+    if stale:
+        conn.execute(delete(CompanySearchGram).where(CompanySearchGram.company_id.in_(stale)))
+    rows = [row for _is_new, company_rows in pending.values() for row in company_rows]
+    if rows:
+        conn.execute(insert(CompanySearchGram), rows)
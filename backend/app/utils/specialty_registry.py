@@ -0,0 +1,117 @@
+"""専門分野マスタのプロセス内レジストリ
+
+specialties はほぼ更新されない小さな表なので、起動時に全件を不変のスナップショットとして
+読み込み、レスポンスの専門分野名はここから引く (DB へのクエリも JOIN も発生しない)。
+
+スナップショットは丸ごと差し替えるだけで書き換えないため、参照側はロック不要。
+このプロセスで専門分野を変更すると flush 時とコミット後に stale になり、
+次の ensure_fresh で読み直す (principal_cache と同じく 2 回破棄する)。
+他ワーカーでの変更は SPECIALTY_REGISTRY_REFRESH_SECONDS ごとの読み直しで反映される。
+"""
+
+import hashlib
+import json
+import time
+import uuid
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.config import settings
+from app.models.company import Specialty
+from app.repositories.company_repository import CompanyRepository
+
+_CHANGED_KEY = "specialty_registry.changed"
+
+
+@dataclass(frozen=True, slots=True)
+class SpecialtyEntry:
+    id: uuid.UUID
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class SpecialtySnapshot:
+    entries: tuple[SpecialtyEntry, ...]
+    by_id: MappingProxyType
+    etag: str
+
+    @classmethod
+    def build(cls, entries: list[SpecialtyEntry]) -> "SpecialtySnapshot":
+        ordered = tuple(sorted(entries, key=lambda e: (e.name, e.id)))
+        body = json.dumps([[str(e.id), e.name] for e in ordered], ensure_ascii=False)
+        return cls(
+            entries=ordered,
+            by_id=MappingProxyType({e.id: e for e in ordered}),
+            etag=f'"{hashlib.sha256(body.encode()).hexdigest()[:32]}"',
+        )
+
+
+class SpecialtyRegistry:
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self.snapshot = SpecialtySnapshot.build([])
+        self.loaded_at: float | None = None
+        self.stale = True
+        self.reloads = 0
+
+    def get(self, specialty_id: uuid.UUID | None) -> SpecialtyEntry | None:
+        if specialty_id is None:
+            return None
+        return self.snapshot.by_id.get(specialty_id)
+
+    async def load(self, db: AsyncSession) -> SpecialtySnapshot:
+        specialties = await CompanyRepository(db).get_all_specialties()
+        self.snapshot = SpecialtySnapshot.build(
+            [SpecialtyEntry(id=s.id, name=s.name) for s in specialties]
+        )
+        self.loaded_at = time.monotonic()
+        self.stale = False
+        self.reloads += 1
+        return self.snapshot
+
+    async def ensure_fresh(self, db: AsyncSession) -> SpecialtySnapshot:
+        expired = (
+            self.loaded_at is None or time.monotonic() - self.loaded_at > self.refresh_interval
+        )
+        if self.stale or expired:
+            return await self.load(db)
+        return self.snapshot
+
+    def invalidate(self) -> None:
+        self.stale = True
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.snapshot.entries),
+            "etag": self.snapshot.etag,
+            "stale": self.stale,
+            "reloads": self.reloads,
+        }
+
+
+specialty_registry = SpecialtyRegistry(
+    refresh_interval=settings.SPECIALTY_REGISTRY_REFRESH_SECONDS
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_specialty_changes(session: Session, _flush_context) -> None:
+    if any(isinstance(obj, Specialty) for obj in (*session.new, *session.dirty, *session.deleted)):
+        specialty_registry.invalidate()
+        session.info[_CHANGED_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    if session.info.pop(_CHANGED_KEY, False):
+        specialty_registry.invalidate()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_CHANGED_KEY, None)
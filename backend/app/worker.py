@@ -0,0 +1,61 @@
+"""バックグラウンドジョブのワーカープロセス
+
+API プロセスとは別にジョブを実行し、アウトボックスのイベントを中継する。複数台で
+起動してよい (PostgreSQL では FOR UPDATE SKIP LOCKED で重ならずに取得する)。API 側の
+ワーカー・中継を止める場合は JOB_WORKER_IN_PROCESS=false / OUTBOX_RELAY_IN_PROCESS=false
+にする。SIGINT / SIGTERM で実行中のジョブを待って終了する。
+
+使い方:
+    python -m app.worker
+    python -m app.worker --queues default=8,ratings=2
+    python -m app.worker --drain    # 実行可能なジョブとイベントをすべて処理して終了
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+
+import app.events  # noqa: F401  (イベントのハンドラを登録する)
+import app.jobs  # noqa: F401  (ジョブのハンドラを登録する)
+from app.config import settings
+from app.database import async_session_factory
+from app.utils.job_queue import JobWorker, parse_queues
+from app.utils.outbox import OutboxRelay
+
+
+async def run(queues: str, drain: bool) -> int:
+    worker = JobWorker(async_session_factory, parse_queues(queues))
+    relay = OutboxRelay(async_session_factory)
+    if drain:
+        executed = await worker.drain()
+        relayed = await relay.drain()
+        print(f"jobs drained: {executed} executed, {worker.counts}")
+        print(f"events drained: {relayed} relayed, {relay.stats()}")
+        return 0 if worker.counts["failed"] == 0 and relay.failed == 0 else 1
+
+    def stop() -> None:
+        worker.stop()
+        relay.stop()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop)
+    print(f"job worker {worker.worker_id} started: {worker.queues}")
+    await asyncio.gather(worker.run(), relay.run())
+    print(f"job worker stopped: {worker.counts}, events: {relay.stats()}")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run background jobs and relay outbox events")
+    parser.add_argument("--queues", default=settings.JOB_QUEUES)
+    parser.add_argument("--drain", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(run(args.queues, args.drain)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""ベンチマーク共通ユーティリティ
+
+既定ではインメモリ SQLite を使う。``BENCH_DATABASE_URL`` を指定すると
+PostgreSQL などの実 DB で計測できる (スキーマは作成・削除される)。
+"""
+
+import hashlib
+import os
+import random
+import statistics
+import threading
+import time
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from app.constants import OrderStatus, ProjectStatus, QuoteStatus, UserRole
+from app.models.base import Base
+from app.models.company import Company
+from app.models.order import Order
+from app.models.project import Project
+from app.models.quote import Quote
+from app.models.review import Review
+from app.models.user import User
+
+BENCH_DATABASE_URL = os.environ.get("BENCH_DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *_args):
+        self.count += 1
+
+
+@asynccontextmanager
+async def bench_engine() -> AsyncIterator[AsyncEngine]:
+    engine = create_async_engine(BENCH_DATABASE_URL, echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        yield engine
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+async def measure(
+    engine: AsyncEngine,
+    fn: Callable[[], Awaitable[object]],
+    iterations: int,
+) -> dict:
+    """``fn`` を繰り返し実行し、1 回あたりの SQL 文数とレイテンシを返す"""
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    timings = []
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await fn()
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+    return {
+        "statements": counter.count / iterations,
+        "p50_ms": statistics.median(timings),
+        "p95_ms": percentile(timings, 95),
+    }
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def print_table(rows: list[tuple[str, dict]]) -> None:
+    print(f"{'variant':<28}{'stmts/op':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, result in rows:
+        print(
+            f"{name:<28}{result['statements']:>10.1f}"
+            f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+        )
+
+
+async def seed_marketplace(
+    session: AsyncSession,
+    contractors: int,
+    subcontractors: int,
+    projects_per_contractor: int,
+    quotes_per_project: int,
+) -> dict:
+    """元請け・下請け・案件・見積もり・発注・レビューを一括投入する"""
+    rng = random.Random(42)
+    users, companies = [], []
+    contractor_ids, subcontractor_ids = [], []
+    for role, count, ids in (
+        (UserRole.CONTRACTOR, contractors, contractor_ids),
+        (UserRole.SUBCONTRACTOR, subcontractors, subcontractor_ids),
+    ):
+        for i in range(count):
+            user_id, company_id = uuid.uuid4(), uuid.uuid4()
+            users.append(
+                {
+                    "id": user_id,
+                    "email": f"{role.value}-{i}@bench.example.com",
+                    "hashed_password": "x",
+                    "role": role.value,
+                    "is_active": True,
+                }
+            )
+            companies.append({"id": company_id, "user_id": user_id, "name": f"{role.value} {i}"})
+            ids.append(company_id)
+
+    projects, quotes, orders, reviews = [], [], [], []
+    statuses = list(ProjectStatus)
+    for contractor_id in contractor_ids:
+        for i in range(projects_per_contractor):
+            project_id = uuid.uuid4()
+            status = rng.choice(statuses)
+            projects.append(
+                {
+                    "id": project_id,
+                    "company_id": contractor_id,
+                    "title": f"Project {i}",
+                    "status": status.value,
+                }
+            )
+            bidders = rng.sample(
+                subcontractor_ids, min(quotes_per_project, len(subcontractor_ids))
+            )
+            accepted = status in (ProjectStatus.IN_PROGRESS, ProjectStatus.COMPLETED)
+            for j, bidder in enumerate(bidders):
+                quote_id = uuid.uuid4()
+                if accepted:
+                    quote_status = QuoteStatus.ACCEPTED if j == 0 else QuoteStatus.REJECTED
+                else:
+                    quote_status = QuoteStatus.SUBMITTED
+                amount = rng.randrange(100_000, 10_000_000, 10_000)
+                quotes.append(
+                    {
+                        "id": quote_id,
+                        "project_id": project_id,
+                        "company_id": bidder,
+                        "amount": amount,
+                        "status": quote_status.value,
+                    }
+                )
+                if quote_status is QuoteStatus.ACCEPTED:
+                    order_id = uuid.uuid4()
+                    done = status is ProjectStatus.COMPLETED
+                    orders.append(
+                        {
+                            "id": order_id,
+                            "project_id": project_id,
+                            "quote_id": quote_id,
+                            "contractor_company_id": contractor_id,
+                            "subcontractor_company_id": bidder,
+                            "amount": amount,
+                            "status": (
+                                OrderStatus.COMPLETED if done else OrderStatus.CONFIRMED
+                            ).value,
+                        }
+                    )
+                    if done:
+                        reviews.append(
+                            {
+                                "id": uuid.uuid4(),
+                                "order_id": order_id,
+                                "reviewer_company_id": contractor_id,
+                                "reviewee_company_id": bidder,
+                                "rating": rng.randint(1, 5),
+                            }
+                        )
+
+    for model, rows in (
+        (User, users),
+        (Company, companies),
+        (Project, projects),
+        (Quote, quotes),
+        (Order, orders),
+        (Review, reviews),
+    ):
+        if rows:
+            await session.execute(insert(model), rows)
+    await session.commit()
+    return {"contractor_ids": contractor_ids, "subcontractor_ids": subcontractor_ids}
+
+
+class _LocalS3Handler(BaseHTTPRequestHandler):
+    """ベンチマーク用の最小限の S3 互換サーバー (オブジェクトはサイズと ETag と更新時刻だけ持つ)
+
+    bandwidth (bytes/s) を指定すると、受信した本文の大きさに応じて応答を遅らせる。
+    """
+
+    protocol_version = "HTTP/1.1"
+    server: "_LocalS3Server"
+
+    def log_message(self, *_args) -> None:
+        pass
+
+    def _query(self) -> tuple[str, dict[str, str]]:
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query, True).items()}
+        return url.path, query
+
+    def _body(self) -> bytes:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.server.bandwidth:
+            time.sleep(len(body) / self.server.bandwidth)
+        return body
+
+    def _reply(self, status: int = 200, body: bytes = b"", headers: dict | None = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_PUT(self) -> None:
+        path, query = self._query()
+        body = self._body()
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if "uploadId" in query:
+            self.server.parts[query["uploadId"]][int(query["partNumber"])] = len(body)
+        else:
+            self.server.objects[path] = (len(body), etag, datetime.now(timezone.utc))
+        self._reply(headers={"ETag": etag})
+
+    def do_POST(self) -> None:
+        path, query = self._query()
+        self._body()
+        if "uploads" in query:
+            upload_id = uuid.uuid4().hex
+            self.server.parts[upload_id] = {}
+            xml = f"<InitiateMultipartUploadResult><UploadId>{upload_id}</UploadId>"
+            self._reply(body=f"{xml}</InitiateMultipartUploadResult>".encode())
+        else:
+            size = sum(self.server.parts.pop(query["uploadId"]).values())
+            self.server.objects[path] = (size, '"multipart"', datetime.now(timezone.utc))
+            xml = '<CompleteMultipartUploadResult><ETag>"multipart"</ETag>'
+            self._reply(body=f"{xml}</CompleteMultipartUploadResult>".encode())
+
+    def do_HEAD(self) -> None:
+        path, _ = self._query()
+        if path not in self.server.objects:
+            self._reply(404)
+            return
+        size, etag, modified = self.server.objects[path]
+        self.send_response(200)
+        self.send_header("Content-Length", str(size))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", format_datetime(modified, usegmt=True))
+        self.end_headers()
+
+    def do_GET(self) -> None:
+        # ListObjectsV2 だけに対応する (1 ページで全件返す)
+        path, query = self._query()
+        bucket = path.rstrip("/") + "/"
+        prefix = bucket + query.get("prefix", "")
+        contents = "".join(
+            f"<Contents><Key>{escape(unquote(key[len(bucket) :]))}</Key>"
+            f"<LastModified>{modified.strftime('%Y-%m-%dT%H:%M:%S.000Z')}</LastModified>"
+            f"<ETag>{escape(etag)}</ETag><Size>{size}</Size></Contents>"
+            for key, (size, etag, modified) in list(self.server.objects.items())
+            if unquote(key).startswith(prefix)
+        )
+        xml = f"<ListBucketResult><IsTruncated>false</IsTruncated>{contents}</ListBucketResult>"
+        self._reply(body=xml.encode())
+
+    def do_DELETE(self) -> None:
+        path, query = self._query()
+        if "uploadId" in query:
+            self.server.parts.pop(query["uploadId"], None)
+        else:
+            self.server.objects.pop(path, None)
+        self._reply(204)
+
+
+class _LocalS3Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, bandwidth: float | None):
+        super().__init__(("127.0.0.1", 0), _LocalS3Handler)
+        self.bandwidth = bandwidth
+        self.objects: dict[str, tuple[int, str, datetime]] = {}
+        self.parts: dict[str, dict[int, int]] = {}
+
+
+@contextmanager
+def local_s3(bandwidth: float | None = None) -> Iterator[_LocalS3Server]:
+    """S3 の代わりにローカルの HTTP サーバーを起動し、S3_ENDPOINT_URL をそこへ向ける"""
+    from app.config import settings
+
+    server = _LocalS3Server(bandwidth)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    original = settings.S3_ENDPOINT_URL
+    settings.S3_ENDPOINT_URL = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        yield server
+    finally:
+        settings.S3_ENDPOINT_URL = original
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,154 @@
+"""ダッシュボード集計のベンチマーク
+
+従来の件数ごとの SELECT 実装と、company_stats の主キー参照を比較する。
+
+    cd backend && python -m benchmarks.dashboard
+"""
+
+import argparse
+import asyncio
+import uuid
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.constants import OrderStatus, ProjectStatus, QuoteStatus
+from app.models.order import Order
+from app.models.project import Project
+from app.models.quote import Quote
+from app.models.review import Review
+from app.services.dashboard_service import DashboardService
+from benchmarks._harness import bench_engine, measure, print_table, seed_marketplace
+
+
+class SequentialDashboardService:
+    """比較用: 件数ごとに SELECT を発行する従来実装"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_contractor_dashboard(self, company_id: uuid.UUID) -> dict:
+        project_count = select(func.count()).select_from(Project)
+        result = {
+            "total_projects": await self._count(
+                project_count.where(Project.company_id == company_id)
+            )
+        }
+        for key, status in (
+            ("open_projects", ProjectStatus.OPEN),
+            ("in_progress_projects", ProjectStatus.IN_PROGRESS),
+            ("completed_projects", ProjectStatus.COMPLETED),
+        ):
+            result[key] = await self._count(
+                project_count.where(
+                    Project.company_id == company_id, Project.status == status.value
+                )
+            )
+        result["total_orders"] = await self._count(
+            select(func.count())
+            .select_from(Order)
+            .where(Order.contractor_company_id == company_id)
+        )
+        result["pending_quotes"] = await self._count(
+            select(func.count())
+            .select_from(Quote)
+            .join(Project, Quote.project_id == Project.id)
+            .where(
+                Project.company_id == company_id,
+                Quote.status == QuoteStatus.SUBMITTED.value,
+            )
+        )
+        return result
+
+    async def get_subcontractor_dashboard(self, company_id: uuid.UUID) -> dict:
+        quote_count = select(func.count()).select_from(Quote)
+        order_count = select(func.count()).select_from(Order)
+        avg = (
+            await self.db.execute(
+                select(func.avg(Review.rating)).where(Review.reviewee_company_id == company_id)
+            )
+        ).scalar_one_or_none()
+        return {
+            "total_quotes": await self._count(quote_count.where(Quote.company_id == company_id)),
+            "accepted_quotes": await self._count(
+                quote_count.where(
+                    Quote.company_id == company_id,
+                    Quote.status == QuoteStatus.ACCEPTED.value,
+                )
+            ),
+            "active_orders": await self._count(
+                order_count.where(
+                    Order.subcontractor_company_id == company_id,
+                    Order.status == OrderStatus.CONFIRMED.value,
+                )
+            ),
+            "completed_orders": await self._count(
+                order_count.where(
+                    Order.subcontractor_company_id == company_id,
+                    Order.status == OrderStatus.COMPLETED.value,
+                )
+            ),
+            "average_rating": round(float(avg), 2) if avg else None,
+        }
+
+    async def _count(self, query) -> int:
+        return (await self.db.execute(query)).scalar_one()
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with bench_engine() as engine:
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as session:
+            ids = await seed_marketplace(
+                session,
+                contractors=args.contractors,
+                subcontractors=args.subcontractors,
+                projects_per_contractor=args.projects,
+                quotes_per_project=args.quotes,
+            )
+            contractor_id = ids["contractor_ids"][0]
+            subcontractor_id = ids["subcontractor_ids"][0]
+
+            rows = []
+            for name, service in (
+                ("sequential", SequentialDashboardService(session)),
+                ("company_stats", DashboardService(session)),
+            ):
+                rows.append(
+                    (
+                        f"{name} / contractor",
+                        await measure(
+                            engine,
+                            lambda s=service: s.get_contractor_dashboard(contractor_id),
+                            args.iterations,
+                        ),
+                    )
+                )
+                rows.append(
+                    (
+                        f"{name} / subcontractor",
+                        await measure(
+                            engine,
+                            lambda s=service: s.get_subcontractor_dashboard(subcontractor_id),
+                            args.iterations,
+                        ),
+                    )
+                )
+
+            expected = await SequentialDashboardService(session).get_contractor_dashboard(
+                contractor_id
+            )
+            actual = await DashboardService(session).get_contractor_dashboard(contractor_id)
+            assert expected.items() <= actual.items(), (expected, actual)
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--contractors", type=int, default=50)
+    parser.add_argument("--subcontractors", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=200, help="projects per contractor")
+    parser.add_argument("--quotes", type=int, default=5, help="quotes per project")
+    parser.add_argument("--iterations", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,94 @@
+"""案件一覧のダウンロード用署名付き URL のベンチマーク
+
+100 件の案件 × 10 ファイルの一覧 1 ページ (GET /api/projects?per_page=100) の読み込みを、
+次の 3 つで比較する。一覧の結果キャッシュは通さず、毎回 DB から読む。
+
+- per file: ファイルごとにイベントループ上で s3_storage.presigned_url を呼ぶ
+- batched / cold: download_urls.get_many で 1 回のスレッド実行にまとめて署名する (キャッシュは空)
+- batched / warm: 署名済みの URL を使い回す
+
+    cd backend && python -m benchmarks.download_urls --iterations 20
+"""
+
+import argparse
+import asyncio
+import uuid
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models.project import Project, ProjectFile
+from app.services import project_service
+from app.services.project_service import _load_project_list
+from app.utils.download_urls import attach_download_urls, download_urls, key_from_url
+from app.utils.s3 import object_url, s3_storage
+from benchmarks._harness import bench_engine, measure, print_table, seed_marketplace
+
+
+async def _per_file(files) -> None:
+    """比較用: ファイルごとにその場で署名する"""
+    for file in files:
+        key = key_from_url(file.file_url)
+        file.download_url = (
+            s3_storage.presigned_url(key, file_name=file.file_name) if key else None
+        )
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with bench_engine() as engine:
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as session:
+            await seed_marketplace(
+                session,
+                contractors=1,
+                subcontractors=1,
+                projects_per_contractor=args.projects,
+                quotes_per_project=0,
+            )
+            project_ids = (await session.scalars(select(Project.id))).all()
+            await session.execute(
+                insert(ProjectFile),
+                [
+                    {
+                        "project_id": project_id,
+                        "file_name": f"drawing-{i}.pdf",
+                        "file_url": object_url(f"uploads/{uuid.uuid4().hex}/drawing-{i}.pdf"),
+                        "file_size": 1024,
+                    }
+                    for project_id in project_ids
+                    for i in range(args.files)
+                ],
+            )
+            await session.commit()
+
+        await s3_storage.start()
+
+        async def load_page():
+            async with session_factory() as db:
+                await _load_project_list(db, per_page=args.projects)
+
+        async def cold_page():
+            download_urls.clear()
+            await load_page()
+
+        project_service.attach_download_urls = _per_file
+        per_file = await measure(engine, load_page, args.iterations)
+        project_service.attach_download_urls = attach_download_urls
+        rows = [
+            ("per file", per_file),
+            ("batched / cold", await measure(engine, cold_page, args.iterations)),
+            ("batched / warm", await measure(engine, load_page, args.iterations)),
+        ]
+        await s3_storage.stop()
+
+    print_table(rows)
+    print(f"\n{args.projects} projects x {args.files} files per page")
+    print(download_urls.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, default=100, help="projects per page")
+    parser.add_argument("--files", type=int, default=10, help="files per project")
+    parser.add_argument("--iterations", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
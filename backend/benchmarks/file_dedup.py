@@ -0,0 +1,156 @@
+"""内容アドレスによるファイルの重複排除のベンチマーク
+
+同じ仕様書・図面を多くの案件に繰り返しアップロードする負荷 (--distinct 種類のファイルから
+偏りのある選び方で --uploads 回) を、ローカルの S3 互換サーバー (受信速度を --bandwidth MB/s
+に制限) に対して流し、次の 2 つを比較する。
+
+- per upload: 以前の実装。アップロードごとに新しいキーで S3 に送る
+- content addressed: FileService.upload_file。SHA-256 をキーにし、既にある内容は送らない
+
+最後に --remove-fraction の割合の案件のファイルを消して GC (app.commands.blob_gc) を実行し、
+消した本体を表示する。
+
+    cd backend && python -m benchmarks.file_dedup --uploads 200 --distinct 20 --size-mb 4
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.datastructures import UploadFile
+
+from app.commands.blob_gc import collect_garbage
+from app.models.project import Project, ProjectFile
+from app.repositories.file_blob_repository import FileBlobRepository
+from app.repositories.project_repository import ProjectRepository
+from app.services.file_service import FileService
+from app.utils.s3 import s3_storage
+from benchmarks._harness import bench_engine, local_s3, seed_marketplace
+
+
+async def _per_upload(db, project, file: UploadFile) -> None:
+    """比較用: 以前の実装 (毎回新しいキーで送る)"""
+    uploaded = await s3_storage.upload_stream(file, file.filename)
+    await ProjectRepository(db).add_file(
+        project_id=project.id,
+        file_name=file.filename,
+        file_url=uploaded.url,
+        file_size=uploaded.size,
+        checksum=uploaded.checksum,
+    )
+
+
+async def _content_addressed(db, project, file: UploadFile) -> None:
+    service = FileService(ProjectRepository(db), FileBlobRepository(db))
+    await service.upload_file(
+        project.id, project.company_id, file, file.filename, "application/pdf"
+    )
+
+
+VARIANTS = [("per upload", _per_upload), ("content addressed", _content_addressed)]
+
+
+async def _run(session_factory, server, fn, workload) -> dict:
+    server.objects.clear()
+    async with session_factory() as db:
+        await db.execute(delete(ProjectFile))
+        await db.commit()
+    start = time.perf_counter()
+    for project, path in workload:
+        async with session_factory() as db:
+            with path.open("rb") as raw:
+                await fn(db, project, UploadFile(raw, filename=path.name))
+            await db.commit()
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": elapsed,
+        "objects": len(server.objects),
+        "stored_mb": sum(size for size, _, _ in server.objects.values()) / 1024**2,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.distinct):
+            path = Path(tmp) / f"spec-{i}.pdf"
+            path.write_bytes(os.urandom(args.size_mb * 1024**2))
+            paths.append(path)
+
+        async with bench_engine() as engine:
+            session_factory = async_sessionmaker(engine, expire_on_commit=False)
+            async with session_factory() as session:
+                await seed_marketplace(
+                    session,
+                    contractors=1,
+                    subcontractors=1,
+                    projects_per_contractor=args.projects,
+                    quotes_per_project=0,
+                )
+                projects = (await session.scalars(select(Project))).all()
+            # よく使う仕様書ほど多くの案件に添付される
+            weights = [1 / (i + 1) for i in range(args.distinct)]
+            workload = [
+                (rng.choice(projects), rng.choices(paths, weights)[0]) for _ in range(args.uploads)
+            ]
+
+            rows = []
+            with local_s3(bandwidth=args.bandwidth * 1024**2) as server:
+                await s3_storage.start()
+                for name, fn in VARIANTS:
+                    rows.append((name, await _run(session_factory, server, fn, workload)))
+
+                async with session_factory() as session:
+                    removed = [
+                        project.id
+                        for project in projects[: int(len(projects) * args.remove_fraction)]
+                    ]
+                    await session.execute(
+                        delete(ProjectFile).where(ProjectFile.project_id.in_(removed))
+                    )
+                    await session.commit()
+                start = time.perf_counter()
+                gc = await collect_garbage(
+                    session_factory,
+                    datetime.now(timezone.utc) + timedelta(seconds=1),
+                    batch_size=100,
+                    dry_run=False,
+                )
+                gc_seconds = time.perf_counter() - start
+                await s3_storage.stop()
+
+    print(f"{'variant':<20}{'total s':>10}{'uploads/s':>12}{'objects':>10}{'stored MB':>12}")
+    for name, result in rows:
+        print(
+            f"{name:<20}{result['seconds']:>10.2f}{args.uploads / result['seconds']:>12.1f}"
+            f"{result['objects']:>10}{result['stored_mb']:>12.1f}"
+        )
+    print(
+        f"\n{args.uploads} uploads of {args.distinct} distinct {args.size_mb} MB files "
+        f"into {args.projects} projects"
+    )
+    print(
+        f"gc after removing {args.remove_fraction:.0%} of the projects' files: "
+        f"{gc['deleted']} blobs "
+        f"({gc['deleted_bytes'] / 1024**2:.1f} MB) deleted in {gc_seconds:.2f} s, "
+        f"{gc['usage']['saved_bytes'] / 1024**2:.1f} MB saved on the remaining files"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploads", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=20)
+    parser.add_argument("--size-mb", type=int, default=4)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--remove-fraction", type=float, default=0.9)
+    parser.add_argument("--bandwidth", type=float, default=100.0, help="MB/s per connection")
+    asyncio.run(main(parser.parse_args()))
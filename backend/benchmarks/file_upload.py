@@ -0,0 +1,110 @@
+"""案件ファイルアップロードのベンチマーク
+
+ローカルの S3 互換サーバー (受信速度を --bandwidth MB/s に制限) に対して、同時に
+--concurrency 件のアップロードを行い、次の 2 つを比較する。
+
+- buffered: 以前の実装。UploadFile.read() で全体を読み、イベントループ上で put_object する
+- streaming: s3_storage.upload_stream。パートごとにスレッドで送り、サイズと SHA-256 も計算する
+
+イベントループの停止時間 (10 ms ごとに起きるタスクの最大遅延) は、アップロード中に
+同じワーカーの他のリクエストが待たされる時間に相当する。メモリは tracemalloc のピーク。
+
+    cd backend && python -m benchmarks.file_upload --size-mb 50 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+from starlette.datastructures import UploadFile
+
+from app.config import settings
+from app.utils.s3 import create_s3_client, s3_storage
+from benchmarks._harness import local_s3
+
+
+async def _buffered(file: UploadFile) -> int:
+    """比較用: 以前の実装 (全体を読み込み、同期の put_object でループを止める)"""
+    content = await file.read()
+    create_s3_client().put_object(
+        Bucket=settings.S3_BUCKET_NAME,
+        Key=f"uploads/{uuid.uuid4().hex}/{file.filename}",
+        Body=content,
+        ContentType="application/octet-stream",
+    )
+    return len(content)
+
+
+async def _streaming(file: UploadFile) -> int:
+    return (await s3_storage.upload_stream(file, file.filename)).size
+
+
+async def _probe(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """イベントループの最大の遅れ (ms)"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst * 1000
+
+
+async def _run(fn, path: Path, concurrency: int) -> dict:
+    files = [UploadFile(path.open("rb"), filename=f"{i}.dwg") for i in range(concurrency)]
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(stop))
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        sizes = await asyncio.gather(*(fn(file) for file in files))
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stop.set()
+        for file in files:
+            await file.close()
+    return {
+        "seconds": elapsed,
+        "mb_per_second": sum(sizes) / elapsed / 1024**2,
+        "peak_mb": peak / 1024**2,
+        "max_stall_ms": await probe,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "drawing.dwg"
+        with path.open("wb") as out:
+            for _ in range(args.size_mb):
+                out.write(bytes(1024 * 1024))
+
+        rows = []
+        with local_s3(bandwidth=args.bandwidth * 1024**2):
+            await s3_storage.start()
+            for name, fn in (("buffered", _buffered), ("streaming", _streaming)):
+                rows.append((name, await _run(fn, path, args.concurrency)))
+            await s3_storage.stop()
+
+    print(f"{'variant':<14}{'total s':>10}{'MB/s':>10}{'peak MB':>10}{'max stall ms':>14}")
+    for name, result in rows:
+        print(
+            f"{name:<14}{result['seconds']:>10.2f}{result['mb_per_second']:>10.1f}"
+            f"{result['peak_mb']:>10.1f}{result['max_stall_ms']:>14.1f}"
+        )
+    print(
+        f"\n{args.concurrency} concurrent uploads of {args.size_mb} MB, "
+        f"part size {settings.S3_UPLOAD_PART_SIZE_BYTES // 1024**2} MB"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--bandwidth", type=float, default=200.0, help="MB/s per connection")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,100 @@
+"""所在地による案件絞り込みのベンチマーク
+
+従来の location に対する ILIKE '%語%' と、ジオコーディング済みの prefecture_code /
+(latitude, longitude) インデックスを使う絞り込みを比較する。
+
+    cd backend && python -m benchmarks.geo_search --projects 200000
+"""
+
+import argparse
+import asyncio
+import csv
+import random
+import uuid
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.constants import UserRole
+from app.models.company import Company
+from app.models.project import Project
+from app.models.user import User
+from app.repositories.project_repository import ProjectRepository
+from app.utils.geocoder import REFERENCE_PATH, geo_columns, geocoder
+from benchmarks._harness import bench_engine, measure, print_table
+
+
+async def _seed(session: AsyncSession, projects: int) -> None:
+    rng = random.Random(42)
+    with REFERENCE_PATH.open(encoding="utf-8", newline="") as f:
+        areas = [f"{row['prefecture']}{row['municipality']}" for row in csv.DictReader(f)]
+    user_id, company_id = uuid.uuid4(), uuid.uuid4()
+    await session.execute(
+        insert(User),
+        [
+            {
+                "id": user_id,
+                "email": "geo@bench.example.com",
+                "hashed_password": "x",
+                "role": UserRole.CONTRACTOR.value,
+                "is_active": True,
+            }
+        ],
+    )
+    await session.execute(insert(Company), [{"id": company_id, "user_id": user_id, "name": "geo"}])
+    rows = []
+    for i in range(projects):
+        location = f"{rng.choice(areas)}{rng.randint(1, 9)}-{rng.randint(1, 30)}"
+        rows.append(
+            {
+                "id": uuid.uuid4(),
+                "company_id": company_id,
+                "title": f"Project {i}",
+                "status": "open",
+                "location": location,
+                **geo_columns(location),
+            }
+        )
+    for start in range(0, len(rows), 10_000):
+        await session.execute(insert(Project), rows[start : start + 10_000])
+    await session.commit()
+
+
+async def _ilike(session: AsyncSession, needle: str) -> None:
+    """比較用: 従来の部分一致 (件数 + 1 ページ目)"""
+    query = select(Project).where(Project.location.ilike(f"%{needle}%"))
+    await session.execute(select(func.count()).select_from(query.subquery()))
+    await session.execute(query.order_by(Project.created_at.desc(), Project.id.desc()).limit(21))
+
+
+async def main(args: argparse.Namespace) -> None:
+    origin = geocoder.geocode("東京都千代田区")
+    async with bench_engine() as engine:
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as session:
+            await _seed(session, args.projects)
+            repo = ProjectRepository(session)
+            variants = [
+                ("ilike / 東京都", lambda: _ilike(session, "東京都")),
+                ("prefecture_code / 13", lambda: repo.list_projects(prefecture_code="13")),
+                ("ilike / 港区", lambda: _ilike(session, "港区")),
+                ("municipality / 港区", lambda: repo.list_projects(location="東京都港区")),
+                (
+                    f"radius {args.radius_km:g}km",
+                    lambda: repo.list_projects(near=(origin, args.radius_km)),
+                ),
+            ]
+            rows = []
+            for name, fn in variants:
+                rows.append((name, await measure(engine, fn, args.iterations)))
+                session.expunge_all()
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, default=200_000)
+    parser.add_argument("--radius-km", type=float, default=20)
+    parser.add_argument("--iterations", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,185 @@
+"""推薦スコアのベンチマーク
+
+下請け業者向けの推薦案件を、結合と CASE 式で採点する SQL と、MatchingIndex の
+ベクトル演算で求める場合を比較する。全件読み込みと 1 案件の差分更新の時間も表示する。
+
+    cd backend && python -m benchmarks.matching --contractors 200 --projects 100
+"""
+
+import argparse
+import asyncio
+import csv
+import random
+import time
+import uuid
+
+from sqlalchemy import and_, case, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.constants import ProjectStatus, QuoteStatus
+from app.models.company import Company, Specialty, company_specialties
+from app.models.project import Project
+from app.models.quote import Quote
+from app.utils.geocoder import REFERENCE_PATH, geo_columns
+from app.utils.matching import WEIGHTS, MatchingIndex
+from benchmarks._harness import bench_engine, measure, print_table, seed_marketplace
+
+
+async def _assign_features(session: AsyncSession, ids: dict, specialties: int) -> None:
+    """seed_marketplace の案件・業者に専門分野・所在地・予算を割り当てる"""
+    rng = random.Random(7)
+    with REFERENCE_PATH.open(encoding="utf-8", newline="") as f:
+        areas = [f"{row['prefecture']}{row['municipality']}" for row in csv.DictReader(f)]
+    geo = {area: geo_columns(area) for area in areas}
+    specialty_ids = [uuid.uuid4() for _ in range(specialties)]
+    await session.execute(
+        insert(Specialty),
+        [{"id": sid, "name": f"専門分野 {i}"} for i, sid in enumerate(specialty_ids)],
+    )
+    project_ids = (await session.execute(select(Project.id))).scalars().all()
+    rows = []
+    for project_id in project_ids:
+        area = rng.choice(areas)
+        budget_min = rng.randrange(500_000, 5_000_000, 100_000)
+        rows.append(
+            {
+                "id": project_id,
+                "required_specialty_id": rng.choice(specialty_ids),
+                "location": area,
+                "budget_min": budget_min,
+                "budget_max": budget_min * 2,
+                **geo[area],
+            }
+        )
+    await session.execute(update(Project), rows)
+    companies = []
+    pairs = []
+    for company_id in ids["subcontractor_ids"]:
+        area = rng.choice(areas)
+        companies.append(
+            {
+                "id": company_id,
+                "address": area,
+                "average_rating": round(rng.uniform(1, 5), 2),
+                **geo[area],
+            }
+        )
+        for specialty_id in rng.sample(specialty_ids, 3):
+            pairs.append({"company_id": company_id, "specialty_id": specialty_id})
+    await session.execute(update(Company), companies)
+    await session.execute(insert(company_specialties), pairs)
+    await session.commit()
+
+
+async def _sql_recommend(session: AsyncSession, company_id: uuid.UUID, limit: int) -> None:
+    """比較用: 専門分野・都道府県・評価・予算・採用数を結合して SQL で採点する"""
+    sub = (
+        select(Company.prefecture_code, Company.average_rating)
+        .where(Company.id == company_id)
+        .subquery()
+    )
+    stats = (
+        select(func.count().label("accepted"), func.avg(Quote.amount).label("amount"))
+        .where(Quote.company_id == company_id, Quote.status == QuoteStatus.ACCEPTED.value)
+        .subquery()
+    )
+    owned = company_specialties.alias()
+    score = (
+        WEIGHTS["specialty"] * case((owned.c.specialty_id.is_not(None), 1.0), else_=0.0)
+        + WEIGHTS["distance"]
+        * case((Project.prefecture_code == sub.c.prefecture_code, 1.0), else_=0.0)
+        + WEIGHTS["rating"] * func.coalesce((sub.c.average_rating - 1) / 4, 0.5)
+        + WEIGHTS["budget"]
+        * case(
+            (stats.c.amount.between(Project.budget_min, Project.budget_max), 1.0),
+            else_=0.5,
+        )
+        + WEIGHTS["experience"] * case((stats.c.accepted > 0, 1.0), else_=literal(0.0))
+    )
+    quoted = select(Quote.project_id).where(Quote.company_id == company_id)
+    query = (
+        select(Project.id, score.label("score"))
+        .join(sub, literal(True))
+        .join(stats, literal(True))
+        .outerjoin(
+            owned,
+            and_(
+                owned.c.company_id == company_id,
+                owned.c.specialty_id == Project.required_specialty_id,
+            ),
+        )
+        .where(Project.status == ProjectStatus.OPEN.value, Project.id.not_in(quoted))
+        .order_by(score.desc())
+        .limit(limit)
+    )
+    await session.execute(query)
+
+
+async def _index_recommend(
+    session: AsyncSession, index: MatchingIndex, company_id: uuid.UUID, limit: int
+) -> None:
+    quoted = (
+        await session.execute(select(Quote.project_id).where(Quote.company_id == company_id))
+    ).scalars()
+    index.recommend_projects(company_id, limit, exclude=set(quoted))
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with bench_engine() as engine:
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as session:
+            ids = await seed_marketplace(
+                session,
+                contractors=args.contractors,
+                subcontractors=args.subcontractors,
+                projects_per_contractor=args.projects,
+                quotes_per_project=3,
+            )
+            await _assign_features(session, ids, args.specialties)
+
+            index = MatchingIndex(refresh_interval=3600)
+            start = time.perf_counter()
+            await index.load(session)
+            load_ms = (time.perf_counter() - start) * 1000
+
+            project_id = next(iter(index.projects.rows))
+            index.mark(project_ids={project_id})
+            start = time.perf_counter()
+            await index.ensure_fresh(session)
+            refresh_ms = (time.perf_counter() - start) * 1000
+
+            rng = random.Random(1)
+            subs = ids["subcontractor_ids"]
+            rows = [
+                (
+                    "sql join + case",
+                    await measure(
+                        engine,
+                        lambda: _sql_recommend(session, rng.choice(subs), args.limit),
+                        args.iterations,
+                    ),
+                ),
+                (
+                    "numpy index",
+                    await measure(
+                        engine,
+                        lambda: _index_recommend(session, index, rng.choice(subs), args.limit),
+                        args.iterations,
+                    ),
+                ),
+            ]
+
+    print_table(rows)
+    print(f"\nindex: {index.stats()}")
+    print(f"full load {load_ms:.1f} ms, incremental refresh of 1 project {refresh_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--contractors", type=int, default=200)
+    parser.add_argument("--subcontractors", type=int, default=2000)
+    parser.add_argument("--projects", type=int, default=100, help="元請け 1 社あたりの案件数")
+    parser.add_argument("--specialties", type=int, default=30)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
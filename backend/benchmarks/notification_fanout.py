@@ -0,0 +1,78 @@
+"""通知プッシュハブの負荷試験
+
+1 ワーカー内に数千のアイドルな SSE 購読 (NotificationHub.stream を読むタスク) を作り、
+購読 1 件あたりのメモリと、特定ユーザーへの配信レイテンシ・全員への配信時間を測る。
+
+    cd backend && python -m benchmarks.notification_fanout --subscribers 5000
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+import uuid
+
+from app.utils.notification_hub import NotificationHub
+from benchmarks._harness import percentile
+
+
+async def _consume(hub: NotificationHub, user_id: uuid.UUID, received: dict) -> None:
+    async for chunk in hub.stream(user_id, heartbeat=3600):
+        if chunk.startswith("event: notification"):
+            received[user_id].set()
+
+
+async def main(args: argparse.Namespace) -> None:
+    hub = NotificationHub()
+    users = [uuid.uuid4() for _ in range(args.subscribers // args.connections_per_user)]
+    received = {user_id: asyncio.Event() for user_id in users}
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    tasks = [
+        asyncio.create_task(_consume(hub, user_id, received))
+        for user_id in users
+        for _ in range(args.connections_per_user)
+    ]
+    while hub.subscriber_count < len(tasks):
+        await asyncio.sleep(0.01)
+    subscribe_s = time.perf_counter() - start
+    per_subscriber_kib = (tracemalloc.get_traced_memory()[0] - before) / len(tasks) / 1024
+    tracemalloc.stop()
+
+    latencies = []
+    for user_id in users[: args.samples]:
+        received[user_id].clear()
+        start = time.perf_counter()
+        hub.publish(user_id, '{"title": "bench"}')
+        await received[user_id].wait()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    for event in received.values():
+        event.clear()
+    start = time.perf_counter()
+    for user_id in users:
+        hub.publish(user_id, '{"title": "broadcast"}')
+    await asyncio.gather(*(event.wait() for event in received.values()))
+    broadcast_ms = (time.perf_counter() - start) * 1000
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"idle subscribers          {len(tasks):>10}")
+    print(f"users                     {len(users):>10}")
+    print(f"subscribe all (s)         {subscribe_s:>10.2f}")
+    print(f"memory / subscriber (KiB) {per_subscriber_kib:>10.2f}")
+    print(f"single-user p50 (ms)      {percentile(latencies, 50):>10.3f}")
+    print(f"single-user p95 (ms)      {percentile(latencies, 95):>10.3f}")
+    print(f"publish to all users (ms) {broadcast_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--connections-per-user", type=int, default=2)
+    parser.add_argument("--samples", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
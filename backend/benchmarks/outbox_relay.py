@@ -0,0 +1,94 @@
+"""アウトボックス中継のベンチマーク
+
+quote.submitted のイベントを積み、OutboxRelay.drain で通知まで配信し終えるまでの時間を
+バッチサイズごとに比較する。バッチが大きいほど、取得・配信済みへの更新・通知先の解決・
+通知の INSERT がまとめて 1 回になり、1 イベントあたりの SQL 文数が減る。
+
+    cd backend && python -m benchmarks.outbox_relay --events 2000
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+import app.events  # noqa: F401  (イベントのハンドラを登録する)
+from app.constants import EventType
+from app.models.notification import Notification
+from app.models.outbox_event import OutboxEvent
+from app.models.project import Project
+from app.models.quote import Quote
+from app.repositories.outbox_repository import OutboxRepository
+from app.utils.outbox import OutboxRelay
+from benchmarks._harness import StatementCounter, bench_engine, seed_marketplace
+
+
+async def _record(session: AsyncSession, quotes: list[tuple], count: int) -> None:
+    repo = OutboxRepository(session)
+    for i in range(count):
+        quote_id, company_id, project_id, title, contractor_id = quotes[i % len(quotes)]
+        await repo.add(
+            EventType.QUOTE_SUBMITTED.value,
+            {
+                "quote_id": str(quote_id),
+                "project_id": str(project_id),
+                "project_title": title,
+                "company_id": str(company_id),
+                "contractor_company_id": str(contractor_id),
+            },
+            aggregate_id=quote_id,
+        )
+    await session.commit()
+
+
+async def main(args: argparse.Namespace) -> None:
+    rows = []
+    async with bench_engine() as engine:
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as session:
+            await seed_marketplace(
+                session,
+                contractors=20,
+                subcontractors=200,
+                projects_per_contractor=5,
+                quotes_per_project=10,
+            )
+            quotes = (
+                await session.execute(
+                    select(
+                        Quote.id, Quote.company_id, Project.id, Project.title, Project.company_id
+                    ).join(Project, Quote.project_id == Project.id)
+                )
+            ).all()
+
+        for batch_size in args.batch_sizes:
+            async with session_factory() as session:
+                await session.execute(delete(Notification))
+                await session.execute(delete(OutboxEvent))
+                await _record(session, quotes, args.events)
+
+            relay = OutboxRelay(session_factory, batch_size=batch_size)
+            counter = StatementCounter()
+            event.listen(engine.sync_engine, "before_cursor_execute", counter)
+            start = time.perf_counter()
+            try:
+                relayed = await relay.drain()
+            finally:
+                event.remove(engine.sync_engine, "before_cursor_execute", counter)
+            elapsed = time.perf_counter() - start
+            assert relayed == relay.dispatched == args.events
+            rows.append((batch_size, counter.count / args.events, elapsed, relayed / elapsed))
+
+    print(f"{'batch size':<14}{'stmts/event':>12}{'total ms':>12}{'events/s':>12}")
+    for batch_size, statements, elapsed, throughput in rows:
+        print(f"{batch_size:<14}{statements:>12.2f}{elapsed * 1000:>12.1f}{throughput:>12.0f}")
+    print(f"\nevents per run: {args.events}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 500])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,69 @@
+"""署名付き URL 生成のベンチマーク
+
+以前の実装 (呼び出しごとに boto3 クライアントを作って generate_presigned_url) と、
+共有クライアントでローカルに署名する s3_storage.presigned_url の 1 秒あたりの生成数を比較する。
+どちらも通信はしない (クライアントの作成にかかる時間の差がそのまま出る)。
+
+    cd backend && python -m benchmarks.presign --count 2000
+"""
+
+import argparse
+import statistics
+import time
+
+import boto3
+from botocore.config import Config
+
+from app.config import settings
+from app.utils.s3 import s3_storage
+
+
+def _per_call_client(key: str) -> str:
+    """比較用: 以前の実装 (呼び出しごとに既定セッションからクライアントを作る)"""
+    client = boto3.client(
+        "s3",
+        endpoint_url=settings.S3_ENDPOINT_URL,
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_REGION,
+        config=Config(signature_version="s3v4"),
+    )
+    return client.generate_presigned_url(
+        "get_object",
+        Params={"Bucket": settings.S3_BUCKET_NAME, "Key": key},
+        ExpiresIn=settings.S3_PRESIGN_EXPIRE_SECONDS,
+    )
+
+
+def _run(fn, count: int) -> dict:
+    timings = []
+    for i in range(count):
+        start = time.perf_counter()
+        fn(f"uploads/{i:08x}/drawing.pdf")
+        timings.append(time.perf_counter() - start)
+    return {
+        "per_second": count / sum(timings),
+        "p50_us": statistics.median(timings) * 1e6,
+        "max_us": max(timings) * 1e6,
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    # 初回のサービス定義の読み込みは lifespan の起動時に済んでいる想定なので除く
+    s3_storage.presigned_url("warmup")
+    rows = [
+        ("client per call", _run(_per_call_client, max(1, args.count // 20))),
+        ("shared client", _run(s3_storage.presigned_url, args.count)),
+    ]
+    print(f"{'variant':<20}{'urls/s':>12}{'p50 us':>12}{'max us':>12}")
+    for name, result in rows:
+        print(
+            f"{name:<20}{result['per_second']:>12.0f}"
+            f"{result['p50_us']:>12.1f}{result['max_us']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=2000)
+    main(parser.parse_args())
@@ -0,0 +1,121 @@
+"""案件一覧のファセット集計のベンチマーク
+
+ファセットごとに count(*) ... GROUP BY を発行する方式 (件数 1 + ファセット数) と、
+ProjectRepository.count_facets の 1 クエリ (PostgreSQL では GROUPING SETS) を比較する。
+一覧 1 ページ分を含めた _load_project_list 全体の SQL 数・レイテンシも表示する。
+GROUPING SETS の計測には BENCH_DATABASE_URL で PostgreSQL を指定する
+(既定の SQLite では UNION ALL の代替クエリになる)。
+
+    cd backend && python -m benchmarks.project_facets --projects 500000
+"""
+
+import argparse
+import asyncio
+import csv
+import random
+import uuid
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.constants import ProjectStatus, UserRole
+from app.models.company import Company, Specialty
+from app.models.project import Project
+from app.models.user import User
+from app.repositories.project_repository import FACET_COLUMNS, ProjectRepository
+from app.services.project_service import _load_project_list
+from app.utils.geocoder import REFERENCE_PATH, geo_columns
+from benchmarks._harness import bench_engine, measure, print_table
+
+FACETS = tuple(FACET_COLUMNS)
+
+
+async def _seed(session: AsyncSession, projects: int, specialties: int) -> None:
+    rng = random.Random(42)
+    with REFERENCE_PATH.open(encoding="utf-8", newline="") as f:
+        areas = [f"{row['prefecture']}{row['municipality']}" for row in csv.DictReader(f)]
+    geo = {area: geo_columns(area) for area in areas}
+    user_id, company_id = uuid.uuid4(), uuid.uuid4()
+    await session.execute(
+        insert(User),
+        [
+            {
+                "id": user_id,
+                "email": "facets@bench.example.com",
+                "hashed_password": "x",
+                "role": UserRole.CONTRACTOR.value,
+                "is_active": True,
+            }
+        ],
+    )
+    await session.execute(
+        insert(Company), [{"id": company_id, "user_id": user_id, "name": "facets"}]
+    )
+    specialty_ids = [uuid.uuid4() for _ in range(specialties)]
+    await session.execute(
+        insert(Specialty),
+        [{"id": sid, "name": f"専門分野 {i}"} for i, sid in enumerate(specialty_ids)],
+    )
+    statuses = [status.value for status in ProjectStatus]
+    rows = []
+    for i in range(projects):
+        area = rng.choice(areas)
+        rows.append(
+            {
+                "id": uuid.uuid4(),
+                "company_id": company_id,
+                "title": f"Project {i}",
+                "status": rng.choice(statuses),
+                "required_specialty_id": rng.choice([*specialty_ids, None]),
+                "location": area,
+                **geo[area],
+            }
+        )
+        if len(rows) == 10_000:
+            await session.execute(insert(Project), rows)
+            rows = []
+    if rows:
+        await session.execute(insert(Project), rows)
+    await session.commit()
+
+
+async def _per_facet_counts(session: AsyncSession, status: str | None) -> None:
+    """比較用: 件数とファセットごとの GROUP BY を個別に発行する"""
+    conditions = [Project.status == status] if status else []
+    await session.execute(select(func.count()).select_from(Project).where(*conditions))
+    for column in FACET_COLUMNS.values():
+        await session.execute(select(column, func.count()).where(*conditions).group_by(column))
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with bench_engine() as engine:
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as session:
+            await _seed(session, args.projects, args.specialties)
+            repo = ProjectRepository(session)
+            open_ = ProjectStatus.OPEN.value
+            variants = [
+                ("per-facet / all", lambda: _per_facet_counts(session, None)),
+                ("grouping sets / all", lambda: repo.count_facets(FACETS)),
+                ("per-facet / open", lambda: _per_facet_counts(session, open_)),
+                ("grouping sets / open", lambda: repo.count_facets(FACETS, status=open_)),
+                ("list + count", lambda: _load_project_list(session, status=open_)),
+                (
+                    "list + facets",
+                    lambda: _load_project_list(session, status=open_, facets=FACETS),
+                ),
+            ]
+            rows = []
+            for name, fn in variants:
+                rows.append((name, await measure(engine, fn, args.iterations)))
+                session.expunge_all()
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, default=500_000)
+    parser.add_argument("--specialties", type=int, default=30)
+    parser.add_argument("--iterations", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,79 @@
+"""公開案件一覧の結果キャッシュのベンチマーク
+
+同じ条件の一覧への同時リクエスト (burst) を、キャッシュ無し・コールド・ウォームで比較し、
+最後にキャッシュの統計 (ヒット率・読み込みレイテンシ) を表示する。
+
+    cd backend && python -m benchmarks.project_list_cache --burst 50
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.constants import ProjectStatus
+from app.repositories.company_stats_repository import CompanyStatsRepository
+from app.repositories.project_repository import ProjectRepository
+from app.services.project_service import ProjectService, _load_project_list
+from app.utils.result_cache import project_list_cache
+from benchmarks._harness import bench_engine, measure, print_table, seed_marketplace
+
+FILTERS = [
+    {"status": ProjectStatus.OPEN.value},
+    {"status": ProjectStatus.OPEN.value, "page": 2},
+    {"status": ProjectStatus.COMPLETED.value},
+    {},
+]
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with bench_engine() as engine:
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as session:
+            await seed_marketplace(
+                session,
+                contractors=args.contractors,
+                subcontractors=20,
+                projects_per_contractor=args.projects,
+                quotes_per_project=0,
+            )
+
+        project_list_cache.session_factory = session_factory
+        project_list_cache.clear()
+
+        async def uncached_burst():
+            async def one(filters):
+                async with session_factory() as db:
+                    await _load_project_list(db, **filters)
+
+            await asyncio.gather(*(one(f) for f in FILTERS for _ in range(args.burst)))
+
+        async def cached_burst():
+            async def one(filters):
+                async with session_factory() as db:
+                    service = ProjectService(ProjectRepository(db), CompanyStatsRepository(db))
+                    await service.list_projects(**filters)
+
+            await asyncio.gather(*(one(f) for f in FILTERS for _ in range(args.burst)))
+
+        async def cold_burst():
+            project_list_cache.invalidate()
+            await cached_burst()
+
+        rows = [
+            ("no cache / burst", await measure(engine, uncached_burst, args.iterations)),
+            ("cold cache / burst", await measure(engine, cold_burst, args.iterations)),
+            ("warm cache / burst", await measure(engine, cached_burst, args.iterations)),
+        ]
+
+    print_table(rows)
+    print(project_list_cache.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--contractors", type=int, default=50)
+    parser.add_argument("--projects", type=int, default=200, help="projects per contractor")
+    parser.add_argument("--burst", type=int, default=50, help="concurrent requests per filter")
+    parser.add_argument("--iterations", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,90 @@
+"""見積もり却下通知のベンチマーク
+
+入札の多い案件で見積もりを承認したとき、却下された入札者全員への通知を作る処理について、
+宛先ごとに企業を引いて create_notification する場合と、notify_companies で通知先の解決
+1 回・複数行 INSERT 1 回にまとめる場合を比較する。
+
+    cd backend && python -m benchmarks.quote_notifications --bids 200
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.constants import NotificationType
+from app.models.company import Company
+from app.models.quote import Quote
+from app.repositories.notification_repository import NotificationRepository
+from app.services.notification_service import CompanyNotification, NotificationService
+from benchmarks._harness import bench_engine, measure, print_table, seed_marketplace
+
+
+def _rejections(bids: list[tuple]) -> list[CompanyNotification]:
+    return [
+        CompanyNotification(
+            company_id=company_id,
+            notification_type=NotificationType.QUOTE_REJECTED,
+            title="見積もりは採用されませんでした",
+            message="「Project 0」は他社の見積もりが採用されました。",
+            reference_id=quote_id,
+        )
+        for quote_id, company_id in bids
+    ]
+
+
+async def _per_recipient(session: AsyncSession, bids: list[tuple]) -> None:
+    """比較用: 宛先ごとに通知先ユーザーを引き、1 件ずつ INSERT + flush する"""
+    service = NotificationService(NotificationRepository(session))
+    for n in _rejections(bids):
+        user_id = (
+            await session.execute(select(Company.user_id).where(Company.id == n.company_id))
+        ).scalar_one()
+        await service.create_notification(
+            user_id=user_id,
+            notification_type=n.notification_type,
+            title=n.title,
+            message=n.message,
+            reference_id=n.reference_id,
+        )
+
+
+async def _batched(session: AsyncSession, bids: list[tuple]) -> None:
+    service = NotificationService(NotificationRepository(session))
+    await service.notify_companies(_rejections(bids))
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with bench_engine() as engine:
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as session:
+            await seed_marketplace(
+                session,
+                contractors=1,
+                subcontractors=args.bids,
+                projects_per_contractor=1,
+                quotes_per_project=args.bids,
+            )
+            bids = (await session.execute(select(Quote.id, Quote.company_id))).all()
+            rows = [
+                (
+                    "per-recipient insert",
+                    await measure(engine, lambda: _per_recipient(session, bids), args.iterations),
+                ),
+                (
+                    "notify_companies",
+                    await measure(engine, lambda: _batched(session, bids), args.iterations),
+                ),
+            ]
+            await session.rollback()
+
+    print_table(rows)
+    print(f"\nrecipients per operation: {len(bids)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bids", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
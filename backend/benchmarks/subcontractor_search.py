@@ -0,0 +1,137 @@
+"""下請け企業検索のベンチマーク
+
+従来の name / description / address に対する ILIKE '%語%' の部分一致と、
+n-gram インデックス + 関連度順の list_subcontractors を比較する。
+
+    cd backend && python -m benchmarks.subcontractor_search --companies 100000
+"""
+
+import argparse
+import asyncio
+import random
+import uuid
+
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.constants import UserRole
+from app.models.company import Company, CompanySearchGram
+from app.models.user import User
+from app.repositories.company_repository import CompanyRepository
+from app.utils.search import gram_rows, search_columns
+from benchmarks._harness import bench_engine, measure, print_table
+
+_FAMILY = ["山田", "佐藤", "鈴木", "高橋", "田中", "伊藤", "渡辺", "中村", "小林", "加藤"]
+_TRADES = ["電気", "塗装", "内装", "設備", "解体", "左官", "防水", "鳶", "配管", "空調"]
+_SUFFIX = ["工業", "工務店", "建設", "工事", "興業"]
+_PREFECTURES = ["東京都", "大阪府", "愛知県", "福岡県", "北海道", "宮城県", "広島県"]
+_WARDS = ["中央区", "北区", "港区", "西区", "南区", "東区"]
+_DESCRIPTIONS = [
+    "{trade}工事一式を請け負います。",
+    "{trade}の改修・メンテナンスに対応。",
+    "住宅から店舗まで{trade}の施工実績多数。",
+]
+# 検索語: (keyword, location)
+_QUERIES = [
+    ("電気", None),
+    ("塗装工業", None),
+    ("改修", "東京"),
+    ("田中防水", None),
+]
+
+
+async def _seed(session: AsyncSession, companies: int) -> None:
+    rng = random.Random(42)
+    users, rows, grams = [], [], []
+    for i in range(companies):
+        user_id, company_id = uuid.uuid4(), uuid.uuid4()
+        trade = rng.choice(_TRADES)
+        name = f"{rng.choice(_FAMILY)}{trade}{rng.choice(_SUFFIX)}"
+        description = rng.choice(_DESCRIPTIONS).format(trade=trade)
+        address = f"{rng.choice(_PREFECTURES)}{rng.choice(_WARDS)}{rng.randint(1, 9)}-{i}"
+        users.append(
+            {
+                "id": user_id,
+                "email": f"sub-{i}@bench.example.com",
+                "hashed_password": "x",
+                "role": UserRole.SUBCONTRACTOR.value,
+                "is_active": True,
+            }
+        )
+        rows.append(
+            {
+                "id": company_id,
+                "user_id": user_id,
+                "name": name,
+                "description": description,
+                "address": address,
+                "average_rating": round(rng.uniform(1, 5), 2) if rng.random() < 0.6 else None,
+                **search_columns(name, description, address),
+            }
+        )
+        grams.extend(gram_rows(company_id, name, description, address))
+
+    for model, batch in ((User, users), (Company, rows), (CompanySearchGram, grams)):
+        for start in range(0, len(batch), 10_000):
+            await session.execute(insert(model), batch[start : start + 10_000])
+    await session.commit()
+
+
+async def _legacy_search(session: AsyncSession, keyword: str, location: str | None) -> None:
+    """比較用: インデックスを使えない前方後方一致の従来実装"""
+    query = (
+        select(Company)
+        .join(User, Company.user_id == User.id)
+        .where(
+            User.role == UserRole.SUBCONTRACTOR.value,
+            or_(Company.name.ilike(f"%{keyword}%"), Company.description.ilike(f"%{keyword}%")),
+        )
+    )
+    if location is not None:
+        query = query.where(Company.address.ilike(f"%{location}%"))
+    await session.execute(select(func.count()).select_from(query.subquery()))
+    await session.execute(query.order_by(Company.created_at.desc()).limit(21))
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with bench_engine() as engine:
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as session:
+            await _seed(session, args.companies)
+            repo = CompanyRepository(session)
+
+            rows = []
+            for keyword, location in _QUERIES:
+                label = keyword if location is None else f"{keyword}+{location}"
+                rows.append(
+                    (
+                        f"ilike / {label}",
+                        await measure(
+                            engine,
+                            lambda k=keyword, loc=location: _legacy_search(session, k, loc),
+                            args.iterations,
+                        ),
+                    )
+                )
+                rows.append(
+                    (
+                        f"n-gram / {label}",
+                        await measure(
+                            engine,
+                            lambda k=keyword, loc=location: repo.list_subcontractors(
+                                keyword=k, location=loc
+                            ),
+                            args.iterations,
+                        ),
+                    )
+                )
+                session.expunge_all()
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--companies", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -3,11 +3,17 @@ from collections.abc import AsyncGenerator
 
 import pytest
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.database import get_db
 from app.main import app
 from app.models.base import Base
+from app.utils.download_urls import download_urls
+from app.utils.matching import matching_index
+from app.utils.price_index import price_index
+from app.utils.result_cache import project_list_cache
+from app.utils.specialty_registry import specialty_registry
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
@@ -41,6 +47,12 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
+    # テストごとに DB の内容が異なるため、プロセス内のキャッシュは持ち越さない
+    specialty_registry.invalidate()
+    project_list_cache.clear()
+    download_urls.clear()
+    matching_index.clear()
+    price_index.clear()
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
@@ -50,3 +62,28 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
 @pytest.fixture
 def random_email() -> str:
     return f"test-{uuid.uuid4().hex[:8]}@example.com"
+
+
+class StatementCounter:
+    """Records every SQL statement sent to the test engine."""
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def __call__(self, _conn, _cursor, statement, _parameters, _context, _executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def reset(self) -> None:
+        self.statements.clear()
+
+
+@pytest.fixture
+def statement_counter() -> StatementCounter:
+    counter = StatementCounter()
+    event.listen(test_engine.sync_engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(test_engine.sync_engine, "before_cursor_execute", counter)
@@ -1,6 +1,10 @@
+import uuid
+
 import pytest
 from httpx import AsyncClient
 
+from app.utils.principal_cache import principal_cache
+
 
 @pytest.mark.asyncio
 async def test_register_contractor(client: AsyncClient, random_email: str):
@@ -108,3 +112,56 @@ async def test_unauthorized_without_token(client: AsyncClient):
     response = await client.get("/api/auth/me")
     # HTTPBearer returns 403 when no credentials provided
     assert response.status_code in (401, 403)
+
+
+@pytest.mark.asyncio
+async def test_cached_principal_skips_auth_queries(client: AsyncClient, statement_counter):
+    await client.post(
+        "/api/auth/register",
+        json={
+            "email": "principal-cache@test.com",
+            "password": "testpass123",
+            "role": "contractor",
+        },
+    )
+    login_resp = await client.post(
+        "/api/auth/login",
+        json={"email": "principal-cache@test.com", "password": "testpass123"},
+    )
+    headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+
+    # 1 回目で principal をキャッシュし、2 回目は認証で SQL を発行しない
+    await client.get("/api/notifications", headers=headers)
+    statement_counter.reset()
+    response = await client.get("/api/notifications", headers=headers)
+    assert response.status_code == 200
+    assert statement_counter.count == 1
+
+    stats = (await client.get("/api/health/cache")).json()["principal"]
+    assert stats["hits"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_company_creation_invalidates_cached_principal(client: AsyncClient):
+    await client.post(
+        "/api/auth/register",
+        json={
+            "email": "principal-company@test.com",
+            "password": "testpass123",
+            "role": "contractor",
+        },
+    )
+    login_resp = await client.post(
+        "/api/auth/login",
+        json={"email": "principal-company@test.com", "password": "testpass123"},
+    )
+    headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+    me = await client.get("/api/auth/me", headers=headers)
+    user_id = uuid.UUID(me.json()["id"])
+    assert principal_cache.get(user_id).company_id is None
+
+    company = await client.post("/api/companies/me", json={"name": "Cache Co"}, headers=headers)
+    assert principal_cache.get(user_id) is None
+
+    await client.get("/api/auth/me", headers=headers)
+    assert principal_cache.get(user_id).company_id == uuid.UUID(company.json()["id"])
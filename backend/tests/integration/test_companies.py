@@ -1,5 +1,11 @@
+import uuid
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import insert, update
+
+from app.models.company import Company, Specialty
+from app.repositories.company_repository import CompanyRepository
 
 
 async def _create_and_login(client: AsyncClient, email: str, role: str = "contractor") -> str:
@@ -93,3 +99,178 @@ async def test_create_duplicate_company(client: AsyncClient, random_email: str):
         headers={"Authorization": f"Bearer {token}"},
     )
     assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_list_subcontractors_cursor_pagination(client: AsyncClient):
+    names = []
+    for i in range(3):
+        token = await _create_and_login(client, f"cursor-sub{i}@test.com", "subcontractor")
+        name = f"Keyset Painter {i}"
+        await client.post(
+            "/api/companies/me",
+            json={"name": name},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        names.append(name)
+
+    params = {"per_page": 2}
+    resp = await client.get("/api/companies/subcontractors", params=params)
+    data = resp.json()
+    assert data["total"] == 3
+    seen = [c["name"] for c in data["items"]]
+    assert data["next_cursor"]
+
+    resp = await client.get(
+        "/api/companies/subcontractors", params={**params, "cursor": data["next_cursor"]}
+    )
+    data = resp.json()
+    assert data["total"] is None
+    assert data["next_cursor"] is None
+    seen.extend(c["name"] for c in data["items"])
+    assert seen == list(reversed(names))
+
+
+async def _create_subcontractor(client: AsyncClient, email: str, **company) -> str:
+    token = await _create_and_login(client, email, "subcontractor")
+    resp = await client.post(
+        "/api/companies/me", json=company, headers={"Authorization": f"Bearer {token}"}
+    )
+    return resp.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_search_subcontractors_ranks_by_relevance_and_rating(
+    client: AsyncClient, db_session
+):
+    by_name = await _create_subcontractor(client, "search-a@test.com", name="山田電気工事")
+    by_desc = await _create_subcontractor(
+        client, "search-b@test.com", name="鈴木設備", description="電気工事と空調"
+    )
+    rated = await _create_subcontractor(
+        client, "search-c@test.com", name="佐藤建設", description="電気工事全般"
+    )
+    # 2-gram はすべて含むが連続して一致しない企業は除外される
+    await _create_subcontractor(
+        client, "search-d@test.com", name="田中塗装", description="電気と工事"
+    )
+    await db_session.execute(
+        update(Company).where(Company.id == uuid.UUID(rated)).values(average_rating=4.8)
+    )
+
+    resp = await client.get("/api/companies/subcontractors", params={"keyword": "電気工事"})
+    data = resp.json()
+    assert data["total"] == 3
+    assert [c["id"] for c in data["items"]] == [by_name, rated, by_desc]
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_search_subcontractors_normalizes_and_updates_on_write(client: AsyncClient):
+    token = await _create_and_login(client, "search-w@test.com", "subcontractor")
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.post(
+        "/api/companies/me",
+        json={"name": "ＡＢＣ Painting", "address": "東京都港区芝公園"},
+        headers=headers,
+    )
+
+    search = "/api/companies/subcontractors"
+    resp = await client.get(search, params={"keyword": "abc paint"})
+    assert resp.json()["total"] == 1
+    resp = await client.get(search, params={"location": "港区"})
+    assert resp.json()["total"] == 1
+
+    await client.patch("/api/companies/me", json={"address": "大阪府大阪市北区"}, headers=headers)
+    resp = await client.get(search, params={"location": "港区"})
+    assert resp.json()["total"] == 0
+    resp = await client.get(search, params={"location": "大阪"})
+    assert resp.json()["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_search_subcontractors_rejects_cursor_with_keyword(client: AsyncClient):
+    resp = await client.get(
+        "/api/companies/subcontractors", params={"keyword": "電気", "cursor": "abc"}
+    )
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_rebuild_search_index_covers_bulk_inserted_companies(
+    client: AsyncClient, db_session
+):
+    token = await _create_and_login(client, "search-r@test.com", "subcontractor")
+    me = await client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+    user_id = uuid.UUID(me.json()["id"])
+    # ORM を通らない INSERT は flush 時のインデックス更新を経由しない
+    await db_session.execute(
+        insert(Company), [{"id": uuid.uuid4(), "user_id": user_id, "name": "北斗塗装"}]
+    )
+
+    search = "/api/companies/subcontractors"
+    resp = await client.get(search, params={"keyword": "塗装"})
+    assert resp.json()["total"] == 0
+
+    rebuilt = await CompanyRepository(db_session).rebuild_search_index(batch_size=1)
+    assert rebuilt == 1
+    resp = await client.get(search, params={"keyword": "塗装"})
+    assert resp.json()["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_list_subcontractors_near_project(client: AsyncClient):
+    token = await _create_and_login(client, "geo-c@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.post("/api/companies/me", json={"name": "元請"}, headers=headers)
+    resp = await client.post(
+        "/api/projects", json={"title": "改修", "location": "東京都港区芝公園"}, headers=headers
+    )
+    project_id = resp.json()["id"]
+    for i, address in enumerate(("東京都渋谷区神南", "神奈川県横浜市西区", "大阪市北区")):
+        await _create_subcontractor(client, f"geo-s{i}@test.com", name=address, address=address)
+
+    async def names(**params) -> set[str]:
+        resp = await client.get(
+            "/api/companies/subcontractors", params={"near_project_id": project_id, **params}
+        )
+        assert resp.status_code == 200, resp.json()
+        return {item["name"] for item in resp.json()["items"]}
+
+    assert await names(radius_km=40) == {"東京都渋谷区神南", "神奈川県横浜市西区"}
+    assert await names(radius_km=5) == {"東京都渋谷区神南"}
+    assert await names(same_prefecture=True) == {"東京都渋谷区神南"}
+    assert await names(radius_km=500, same_prefecture=True) == {"東京都渋谷区神南"}
+
+    resp = await client.get(
+        "/api/companies/subcontractors",
+        params={"near_project_id": str(uuid.uuid4()), "radius_km": 5},
+    )
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_list_specialties_served_from_registry_with_etag(
+    client: AsyncClient, db_session, statement_counter
+):
+    db_session.add_all([Specialty(name="電気"), Specialty(name="塗装")])
+    await db_session.flush()
+
+    resp = await client.get("/api/companies/specialties")
+    assert [s["name"] for s in resp.json()] == ["塗装", "電気"]
+    etag = resp.headers["etag"]
+
+    statement_counter.reset()
+    resp = await client.get("/api/companies/specialties")
+    assert resp.headers["etag"] == etag
+    resp = await client.get("/api/companies/specialties", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert statement_counter.count == 0, statement_counter.statements
+
+    # 変更を flush するとレジストリが読み直され、ETag も変わる
+    db_session.add(Specialty(name="内装"))
+    await db_session.flush()
+    resp = await client.get("/api/companies/specialties", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert len(resp.json()) == 3
+    assert resp.headers["etag"] != etag
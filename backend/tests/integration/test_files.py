@@ -0,0 +1,283 @@
+import hashlib
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from botocore.exceptions import ClientError
+from httpx import AsyncClient
+from sqlalchemy import delete, select
+
+from app.commands.blob_gc import collect_garbage
+from app.config import settings
+from app.models.file_blob import FileBlob
+from app.models.project import ProjectFile
+from app.repositories.file_blob_repository import FileBlobRepository
+from app.utils.download_urls import download_urls
+from app.utils.s3 import blob_key, create_s3_client, s3_storage
+
+LONG_AGO = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeS3:
+    """署名はローカルで計算できるので本物のクライアントに任せ、通信する操作だけ置き換える"""
+
+    def __init__(self):
+        self.signer = create_s3_client()
+        self.objects: dict[str, int] = {}
+        self.modified: dict[str, datetime] = {}
+        self.puts = 0
+
+    def generate_presigned_post(self, **kwargs):
+        return self.signer.generate_presigned_post(**kwargs)
+
+    def generate_presigned_url(self, *args, **kwargs):
+        return self.signer.generate_presigned_url(*args, **kwargs)
+
+    def put_object(self, **kwargs):
+        self.objects[kwargs["Key"]] = len(kwargs["Body"])
+        self.modified[kwargs["Key"]] = datetime.now(timezone.utc)
+        self.puts += 1
+
+    def delete_object(self, **kwargs):
+        del self.objects[kwargs["Key"]]
+
+    def get_paginator(self, operation):
+        fake = self
+
+        class Paginator:
+            def paginate(self, **kwargs):
+                keys = [key for key in fake.objects if key.startswith(kwargs["Prefix"])]
+                return [{"Contents": [{"Key": key, "LastModified": LONG_AGO} for key in keys]}]
+
+        return Paginator()
+
+    def head_object(self, **kwargs):
+        if kwargs["Key"] not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {
+            "ContentLength": self.objects[kwargs["Key"]],
+            "LastModified": self.modified.get(kwargs["Key"], LONG_AGO),
+        }
+
+
+@pytest.fixture
+def fake_s3(monkeypatch) -> FakeS3:
+    client = FakeS3()
+    monkeypatch.setattr(s3_storage, "_client", client)
+    return client
+
+
+async def _auth(client: AsyncClient, email: str, role: str) -> dict:
+    await client.post(
+        "/api/auth/register", json={"email": email, "password": "testpass123", "role": role}
+    )
+    resp = await client.post("/api/auth/login", json={"email": email, "password": "testpass123"})
+    headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+    await client.post("/api/companies/me", json={"name": email}, headers=headers)
+    return headers
+
+
+async def _project(client: AsyncClient, headers: dict) -> str:
+    resp = await client.post("/api/projects", json={"title": "Drawings"}, headers=headers)
+    return resp.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_upload_through_api_records_size_and_checksum(client: AsyncClient, fake_s3):
+    headers = await _auth(client, "files-api@test.com", "contractor")
+    project_id = await _project(client, headers)
+
+    resp = await client.post(
+        f"/api/projects/{project_id}/files",
+        files={"file": ("plan.pdf", b"%PDF-1.7 plan", "application/pdf")},
+        headers=headers,
+    )
+    assert resp.status_code == 201
+    data = resp.json()
+    assert (data["file_name"], data["file_size"]) == ("plan.pdf", 13)
+    assert data["checksum"] == hashlib.sha256(b"%PDF-1.7 plan").hexdigest()
+    assert fake_s3.objects == {blob_key(data["checksum"]): 13}
+    assert "X-Amz-Signature=" in data["download_url"]
+
+
+@pytest.mark.asyncio
+async def test_direct_upload_flow(client: AsyncClient, fake_s3):
+    headers = await _auth(client, "files-direct@test.com", "contractor")
+    project_id = await _project(client, headers)
+
+    resp = await client.post(
+        f"/api/projects/{project_id}/files/upload-url",
+        json={"file_name": "site/plan.dwg", "content_type": "image/vnd.dwg", "file_size": 4096},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    upload = resp.json()
+    assert upload["key"].startswith(f"uploads/{project_id}/")
+    assert upload["key"].endswith("/site_plan.dwg")
+    assert upload["url"] == f"{settings.S3_ENDPOINT_URL}/{settings.S3_BUCKET_NAME}"
+    assert upload["fields"]["key"] == upload["key"]
+    assert upload["fields"]["Content-Type"] == "image/vnd.dwg"
+    assert {"policy", "x-amz-signature"} <= upload["fields"].keys()
+
+    complete = f"/api/projects/{project_id}/files/complete"
+    # オブジェクトが無いうちは登録しない
+    resp = await client.post(complete, json={"key": upload["key"]}, headers=headers)
+    assert resp.status_code == 400
+
+    # ブラウザが S3 に直接送った想定
+    fake_s3.objects[upload["key"]] = 4096
+    resp = await client.post(complete, json={"key": upload["key"]}, headers=headers)
+    assert resp.status_code == 201
+    data = resp.json()
+    assert (data["file_name"], data["file_size"]) == ("site_plan.dwg", 4096)
+
+    # 完了の再送は同じファイルを返す
+    again = await client.post(complete, json={"key": upload["key"]}, headers=headers)
+    assert again.json()["id"] == data["id"]
+    resp = await client.get(f"/api/projects/{project_id}", headers=headers)
+    assert [f["id"] for f in resp.json()["files"]] == [data["id"]]
+    # 詳細・一覧でも同じ署名付き URL を使い回す
+    assert resp.json()["files"][0]["download_url"] == data["download_url"]
+    resp = await client.get("/api/projects", headers=headers)
+    files = [f for p in resp.json()["items"] for f in p["files"]]
+    assert [f["download_url"] for f in files] == [data["download_url"]]
+    # 更新のレスポンスにも付ける
+    resp = await client.patch(
+        f"/api/projects/{project_id}", json={"title": "Drawings v2"}, headers=headers
+    )
+    assert resp.json()["files"][0]["download_url"] == data["download_url"]
+    resp = await client.patch(
+        f"/api/projects/{project_id}/status", json={"status": "open"}, headers=headers
+    )
+    assert resp.json()["files"][0]["download_url"] == data["download_url"]
+    # 募集中になった案件の推薦にも付ける
+    sub_headers = await _auth(client, "files-direct-sub@test.com", "subcontractor")
+    resp = await client.get("/api/projects/recommended", headers=sub_headers)
+    [item] = resp.json()["items"]
+    assert item["project"]["files"][0]["download_url"] == data["download_url"]
+
+
+@pytest.mark.asyncio
+async def test_direct_upload_rejections(client: AsyncClient, fake_s3):
+    headers = await _auth(client, "files-owner@test.com", "contractor")
+    other = await _auth(client, "files-other@test.com", "contractor")
+    project_id = await _project(client, headers)
+    other_project_id = await _project(client, other)
+    upload_url = f"/api/projects/{project_id}/files/upload-url"
+
+    too_large = {"file_name": "huge.dwg", "file_size": settings.FILE_UPLOAD_MAX_BYTES + 1}
+    resp = await client.post(upload_url, json=too_large, headers=headers)
+    assert resp.status_code == 400
+
+    small = {"file_name": "plan.dwg", "file_size": 10}
+    resp = await client.post(upload_url, json=small, headers=other)
+    assert resp.status_code == 403
+
+    # 他の案件のキーでは完了できない
+    resp = await client.post(
+        f"/api/projects/{other_project_id}/files/upload-url", json=small, headers=other
+    )
+    other_key = resp.json()["key"]
+    fake_s3.objects[other_key] = 10
+    resp = await client.post(
+        f"/api/projects/{project_id}/files/complete", json={"key": other_key}, headers=headers
+    )
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_project_etag_changes_with_signing_window(client: AsyncClient, fake_s3, monkeypatch):
+    headers = await _auth(client, "files-etag@test.com", "contractor")
+    project_id = await _project(client, headers)
+    await client.post(
+        f"/api/projects/{project_id}/files",
+        files={"file": ("plan.pdf", b"plan", "application/pdf")},
+        headers=headers,
+    )
+    resp = await client.get(f"/api/projects/{project_id}", headers=headers)
+    etag, last_modified = resp.headers["ETag"], resp.headers["Last-Modified"]
+    resp = await client.get(
+        f"/api/projects/{project_id}", headers={**headers, "If-None-Match": etag}
+    )
+    assert resp.status_code == 304
+
+    # 署名の窓が変わったら、使い続けている download_url が切れる前に取り直させる
+    window = download_urls.window()
+    monkeypatch.setattr(download_urls, "window", lambda now=None: window + 1)
+    for conditional in ({"If-None-Match": etag}, {"If-Modified-Since": last_modified}):
+        resp = await client.get(f"/api/projects/{project_id}", headers={**headers, **conditional})
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] != etag
+
+
+async def _upload(client: AsyncClient, headers: dict, project_id: str, name: str, body: bytes):
+    resp = await client.post(
+        f"/api/projects/{project_id}/files",
+        files={"file": (name, body, "application/pdf")},
+        headers=headers,
+    )
+    assert resp.status_code == 201
+    return resp.json()
+
+
+@pytest.mark.asyncio
+async def test_identical_uploads_share_one_blob(client: AsyncClient, db_session, fake_s3):
+    headers = await _auth(client, "files-dedup@test.com", "contractor")
+    first, second = await _project(client, headers), await _project(client, headers)
+    spec, drawing = b"%PDF-1.7 spec" * 100, b"%PDF-1.7 drawing"
+
+    a = await _upload(client, headers, first, "spec.pdf", spec)
+    b = await _upload(client, headers, second, "spec-copy.pdf", spec)
+    await _upload(client, headers, first, "drawing.pdf", drawing)
+
+    # 2 回目は S3 に送らず、同じ本体を参照する
+    assert fake_s3.puts == 2
+    assert a["file_url"] == b["file_url"]
+    assert a["download_url"] != b["download_url"]
+    assert "spec-copy.pdf" in b["download_url"]
+    blob = await db_session.get(FileBlob, a["checksum"])
+    assert (blob.size, blob.ref_count) == (len(spec), 2)
+    assert await FileBlobRepository(db_session).usage() == {
+        "files": 3,
+        "blobs": 2,
+        "logical_bytes": 2 * len(spec) + len(drawing),
+        "stored_bytes": len(spec) + len(drawing),
+        "saved_bytes": len(spec),
+    }
+
+
+@pytest.mark.asyncio
+async def test_garbage_collection_deletes_unreferenced_blobs(
+    client: AsyncClient, db_session, fake_s3
+):
+    headers = await _auth(client, "files-gc@test.com", "contractor")
+    first, second = await _project(client, headers), await _project(client, headers)
+    spec = await _upload(client, headers, first, "spec.pdf", b"spec")
+    await _upload(client, headers, second, "spec.pdf", b"spec")
+    drawing = await _upload(client, headers, first, "drawing.pdf", b"drawing")
+    # 登録前に失敗したアップロードの残り
+    fake_s3.objects[blob_key("ab" * 32)] = 1
+    # 一覧では古く見えるが、消す前に送り直された (登録はこれから)
+    reuploaded = blob_key("cd" * 32)
+    fake_s3.objects[reuploaded] = 1
+
+    # 案件の削除で消えた参照 (ProjectFile は外部キーの CASCADE で消える)
+    await db_session.execute(delete(ProjectFile).where(ProjectFile.project_id == uuid.UUID(first)))
+
+    @asynccontextmanager
+    async def session_factory():
+        yield db_session
+
+    # 猶予の内側では消さない
+    result = await collect_garbage(session_factory, LONG_AGO, batch_size=10, dry_run=False)
+    assert (result["recounted"], result["deleted"]) == (2, 0)
+
+    now = datetime.now(timezone.utc) + timedelta(seconds=1)
+    fake_s3.modified[reuploaded] = now
+    result = await collect_garbage(session_factory, now, batch_size=10, dry_run=False)
+    assert (result["deleted"], result["deleted_bytes"], result["orphans"]) == (1, 7, 1)
+    assert fake_s3.objects == {blob_key(spec["checksum"]): 4, reuploaded: 1}
+    digests = (await db_session.scalars(select(FileBlob.digest))).all()
+    assert digests == [spec["checksum"]]
+    assert drawing["checksum"] not in digests
@@ -1,6 +1,10 @@
 import pytest
 from httpx import AsyncClient
 
+from app.repositories.job_repository import JobRepository
+from app.repositories.outbox_repository import OutboxRepository
+from app.services.job_service import JobService
+
 
 @pytest.mark.asyncio
 async def test_health_check(client: AsyncClient):
@@ -8,3 +12,19 @@ async def test_health_check(client: AsyncClient):
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "ok"
+
+
+@pytest.mark.asyncio
+async def test_job_stats(client: AsyncClient, db_session):
+    await JobService(JobRepository(db_session)).enqueue(
+        "ratings.recompute", {"company_id": "00000000-0000-0000-0000-000000000000"}
+    )
+    response = await client.get("/api/health/jobs")
+    assert response.json() == {"queues": {"ratings": {"queued": 1}}, "workers": []}
+
+
+@pytest.mark.asyncio
+async def test_outbox_stats(client: AsyncClient, db_session):
+    await OutboxRepository(db_session).add("quote.submitted", {})
+    response = await client.get("/api/health/outbox")
+    assert response.json() == {"events": {"pending": 1}, "relays": []}
@@ -0,0 +1,242 @@
+"""ジョブキューのテスト
+
+ワーカーは複数のセッションから並行してコミットするため、テスト共通のインメモリ DB
+(1 接続の外側トランザクション) ではなく、ファイルの SQLite を使う (ポーリングでの取得)。
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.models.base import Base
+from app.models.job import Job
+from app.repositories.job_repository import JobRepository
+from app.services.job_service import JobService
+from app.utils.job_queue import JobHandler, JobWorker, handlers, parse_queues, retry_delay
+
+
+@pytest.fixture
+async def session_factory(tmp_path) -> async_sessionmaker[AsyncSession]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+def _register(monkeypatch, name: str, fn, queue: str = "test", max_attempts: int = 3):
+    monkeypatch.setitem(handlers, name, JobHandler(fn, queue, 0, max_attempts))
+
+
+async def _enqueue(session_factory, name: str, count: int = 1, **kwargs) -> None:
+    async with session_factory() as session:
+        service = JobService(JobRepository(session))
+        for i in range(count):
+            await service.enqueue(name, {"n": i}, **kwargs)
+        await session.commit()
+
+
+async def _jobs(session_factory) -> list[Job]:
+    async with session_factory() as session:
+        result = await session.execute(select(Job).order_by(Job.created_at))
+        return list(result.scalars().all())
+
+
+async def _make_due(session_factory) -> None:
+    async with session_factory() as session:
+        await session.execute(update(Job).values(run_at=datetime.now(timezone.utc)))
+        await session.commit()
+
+
+def test_parse_queues_and_backoff(monkeypatch):
+    assert parse_queues("default=4, ratings=1,files") == {"default": 4, "ratings": 1, "files": 1}
+    monkeypatch.setattr(settings, "JOB_RETRY_BASE_SECONDS", 2.0)
+    monkeypatch.setattr(settings, "JOB_RETRY_MAX_SECONDS", 20.0)
+    assert 1.0 <= retry_delay(1) <= 2.0
+    assert 4.0 <= retry_delay(3) <= 8.0
+    assert 10.0 <= retry_delay(10) <= 20.0
+
+
+@pytest.mark.asyncio
+async def test_claim_by_priority_without_double_claims(session_factory, monkeypatch):
+    _register(monkeypatch, "test.noop", lambda _db, _payload: asyncio.sleep(0))
+    await _enqueue(session_factory, "test.noop", count=2)
+    await _enqueue(session_factory, "test.noop", priority=10)
+    await _enqueue(session_factory, "test.noop", delay=3600)
+
+    now = datetime.now(timezone.utc)
+    async with session_factory() as a, session_factory() as b:
+        first = await JobRepository(a).claim("test", 2, "worker-a", now)
+        await a.commit()
+        second = await JobRepository(b).claim("test", 5, "worker-b", now)
+        await b.commit()
+
+    assert [job.priority for job in first] == [10, 0]
+    # 予定時刻前のジョブと、他のワーカーが取得済みのジョブは取得しない
+    assert len(second) == 1
+    assert {job.id for job in first}.isdisjoint(job.id for job in second)
+    assert all(job.attempts == 1 for job in first + second)
+
+
+@pytest.mark.asyncio
+async def test_failed_jobs_retry_with_backoff_then_fail(session_factory, monkeypatch):
+    calls = []
+
+    async def flaky(_db, payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise RuntimeError("temporary")
+
+    async def broken(_db, _payload):
+        raise RuntimeError("permanent")
+
+    _register(monkeypatch, "test.flaky", flaky)
+    _register(monkeypatch, "test.broken", broken, max_attempts=2)
+    await _enqueue(session_factory, "test.flaky")
+    await _enqueue(session_factory, "test.broken")
+    worker = JobWorker(session_factory, {"test": 1})
+
+    started = datetime.now(timezone.utc)
+    assert await worker.drain() == 2
+    flaky_job, broken_job = await _jobs(session_factory)
+    assert (flaky_job.status, flaky_job.attempts) == ("queued", 1)
+    assert flaky_job.last_error == "RuntimeError: temporary"
+    assert flaky_job.run_at.replace(tzinfo=timezone.utc) > started + timedelta(
+        seconds=settings.JOB_RETRY_BASE_SECONDS * 0.5 - 1
+    )
+    # 待ち時間が過ぎるまでは再実行しない
+    assert await worker.drain() == 0
+
+    await _make_due(session_factory)
+    assert await worker.drain() == 2
+    flaky_job, broken_job = await _jobs(session_factory)
+    assert (flaky_job.status, flaky_job.attempts, flaky_job.locked_by) == ("succeeded", 2, None)
+    assert (broken_job.status, broken_job.attempts) == ("failed", 2)
+    assert worker.counts == {"succeeded": 1, "retried": 2, "failed": 1}
+
+
+@pytest.mark.asyncio
+async def test_handler_writes_roll_back_with_the_failed_attempt(session_factory, monkeypatch):
+    async def half_done(db, _payload):
+        await db.execute(update(Job).values(last_error="written by the handler"))
+        raise RuntimeError("boom")
+
+    _register(monkeypatch, "test.half_done", half_done, max_attempts=1)
+    await _enqueue(session_factory, "test.half_done")
+    await JobWorker(session_factory, {"test": 1}).drain()
+    [job] = await _jobs(session_factory)
+    assert (job.status, job.last_error) == ("failed", "RuntimeError: boom")
+
+
+@pytest.mark.asyncio
+async def test_worker_respects_queue_concurrency_and_wakes_on_commit(session_factory, monkeypatch):
+    active, peak, done = 0, 0, asyncio.Event()
+    executed = []
+
+    async def slow(_db, payload):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        executed.append(payload["n"])
+        if len(executed) == 6:
+            done.set()
+
+    _register(monkeypatch, "test.slow", slow)
+    # ポーリング間隔を長くして、コミット直後の起床で拾われることを確かめる
+    worker = JobWorker(session_factory, {"test": 2}, poll_interval=60)
+    task = asyncio.create_task(worker.run())
+    await asyncio.sleep(0.05)
+    await _enqueue(session_factory, "test.slow", count=6)
+    await asyncio.wait_for(done.wait(), timeout=10)
+    worker.stop()
+    await task
+
+    assert sorted(executed) == list(range(6))
+    assert peak == 2
+    assert {job.status for job in await _jobs(session_factory)} == {"succeeded"}
+
+
+@pytest.mark.asyncio
+async def test_stale_running_jobs_are_released(session_factory, monkeypatch):
+    _register(monkeypatch, "test.noop", lambda _db, _payload: asyncio.sleep(0))
+    await _enqueue(session_factory, "test.noop")
+    now = datetime.now(timezone.utc)
+    async with session_factory() as session:
+        await JobRepository(session).claim("test", 1, "crashed-worker", now)
+        assert await JobRepository(session).release_stale(now - timedelta(minutes=1)) == 0
+        assert await JobRepository(session).release_stale(now + timedelta(minutes=1)) == 1
+        await session.commit()
+
+    assert await JobWorker(session_factory, {"test": 1}).drain() == 1
+    [job] = await _jobs(session_factory)
+    assert (job.status, job.attempts) == ("succeeded", 2)
+
+
+@pytest.mark.asyncio
+async def test_claim_orders_by_priority_then_run_at(session_factory, monkeypatch):
+    _register(monkeypatch, "test.noop", lambda _db, _payload: asyncio.sleep(0))
+    await _enqueue(session_factory, "test.noop", count=3)
+    now = datetime.now(timezone.utc)
+    async with session_factory() as session:
+        for minutes, n in ((3, 0), (1, 1), (2, 2)):
+            await session.execute(
+                update(Job)
+                .where(Job.payload["n"].as_integer() == n)
+                .values(run_at=now - timedelta(minutes=minutes))
+            )
+        await session.commit()
+    async with session_factory() as session:
+        claimed = await JobRepository(session).claim("test", 3, "worker", now)
+    assert [job.payload["n"] for job in claimed] == [0, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_running_jobs_keep_their_lock(session_factory, monkeypatch):
+    released = []
+
+    async def slow(_db, _payload):
+        await asyncio.sleep(0.5)
+        async with session_factory() as session:
+            before = datetime.now(timezone.utc) - timedelta(seconds=0.3)
+            released.append(await JobRepository(session).release_stale(before))
+            await session.commit()
+
+    _register(monkeypatch, "test.slow", slow)
+    await _enqueue(session_factory, "test.slow")
+    worker = JobWorker(session_factory, {"test": 1}, lock_timeout=0.3)
+    assert await worker.drain() == 1
+    # 実行中はロックが延長されるので、期限切れとして戻されない
+    assert released == [0]
+    [job] = await _jobs(session_factory)
+    assert (job.status, job.attempts) == ("succeeded", 1)
+
+
+@pytest.mark.asyncio
+async def test_worker_that_lost_the_lock_discards_its_result(session_factory, monkeypatch):
+    async def overtaken(db, _payload):
+        # 実行中に期限切れで戻され、他のワーカーが取得し直した
+        async with session_factory() as session:
+            await session.execute(update(Job).values(locked_by="other-worker"))
+            await session.commit()
+        await db.execute(update(Job).values(last_error="written by the handler"))
+
+    async def overtaken_and_broken(db, payload):
+        await overtaken(db, payload)
+        raise RuntimeError("boom")
+
+    _register(monkeypatch, "test.overtaken", overtaken)
+    _register(monkeypatch, "test.broken", overtaken_and_broken)
+    worker = JobWorker(session_factory, {"test": 1})
+    for name in ("test.overtaken", "test.broken"):
+        await _enqueue(session_factory, name)
+        assert await worker.drain() == 1
+    assert [
+        (job.status, job.locked_by, job.last_error) for job in await _jobs(session_factory)
+    ] == [("running", "other-worker", None)] * 2
+    assert worker.counts == {"succeeded": 0, "retried": 0, "failed": 0}
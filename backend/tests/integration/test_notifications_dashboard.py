@@ -1,6 +1,18 @@
+import json
+import uuid
+
 import pytest
 from httpx import AsyncClient
 
+from app.constants import NotificationType
+from app.models.company_stats import COUNTER_COLUMNS
+from app.repositories.company_stats_repository import CompanyStatsRepository
+from app.repositories.notification_repository import NotificationRepository
+from app.services.company_stats_service import CompanyStatsService
+from app.services.dashboard_service import DashboardService
+from app.services.notification_service import NotificationService
+from app.utils.notification_hub import notification_hub
+
 
 async def _register_login(client: AsyncClient, email: str, role: str) -> str:
     await client.post(
@@ -47,6 +59,75 @@ async def test_mark_all_as_read(client: AsyncClient):
     assert resp.json()["status"] == "ok"
 
 
+@pytest.mark.asyncio
+async def test_list_notifications_cursor_pagination(
+    client: AsyncClient, db_session, statement_counter
+):
+    token = await _register_login(client, "notif-page@test.com", "subcontractor")
+    headers = {"Authorization": f"Bearer {token}"}
+    me = await client.get("/api/auth/me", headers=headers)
+    user_id = uuid.UUID(me.json()["id"])
+
+    repo = NotificationRepository(db_session)
+    for i in range(5):
+        await repo.create(
+            user_id=user_id,
+            type=NotificationType.QUOTE_RECEIVED.value,
+            title=f"Notice {i}",
+            is_read=i < 2,
+        )
+
+    statement_counter.reset()
+    items, total, unread_count, has_more = await repo.list_by_user(user_id, limit=2)
+    assert statement_counter.count == 1
+    assert (len(items), total, unread_count, has_more) == (2, 5, 3, True)
+
+    titles = []
+    params = {"limit": 2}
+    while True:
+        resp = await client.get("/api/notifications", params=params, headers=headers)
+        data = resp.json()
+        assert data["total"] == 5
+        assert data["unread_count"] == 3
+        titles.extend(n["title"] for n in data["items"])
+        if not data["next_cursor"]:
+            break
+        params["cursor"] = data["next_cursor"]
+    assert titles == [f"Notice {i}" for i in reversed(range(5))]
+
+    resp = await client.get("/api/notifications", params={"unread_only": "true"}, headers=headers)
+    data = resp.json()
+    assert [n["title"] for n in data["items"]] == ["Notice 4", "Notice 3", "Notice 2"]
+    assert data["total"] == 3
+
+
+@pytest.mark.asyncio
+async def test_notification_pushed_after_commit(client: AsyncClient, db_session):
+    token = await _register_login(client, "notif-push@test.com", "subcontractor")
+    me = await client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+    user_id = uuid.UUID(me.json()["id"])
+
+    service = NotificationService(NotificationRepository(db_session))
+    async with notification_hub.subscribe(user_id) as queue:
+        await service.create_notification(
+            user_id=user_id,
+            notification_type=NotificationType.QUOTE_ACCEPTED,
+            title="見積もりが承認されました",
+        )
+        assert queue.empty()
+
+        await db_session.commit()
+        pushed = json.loads(queue.get_nowait())
+        assert pushed["title"] == "見積もりが承認されました"
+        assert pushed["user_id"] == str(user_id)
+
+
+@pytest.mark.asyncio
+async def test_notification_stream_requires_valid_token(client: AsyncClient):
+    resp = await client.get("/api/notifications/stream", params={"access_token": "invalid"})
+    assert resp.status_code == 401
+
+
 @pytest.mark.asyncio
 async def test_contractor_dashboard(client: AsyncClient):
     token = await _register_login(client, "dash-c1@test.com", "contractor")
@@ -139,3 +220,145 @@ async def test_dashboard_with_data(client: AsyncClient):
     )
     data = resp.json()
     assert data["total_quotes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_dashboards_use_single_statement(client: AsyncClient, db_session, statement_counter):
+    """Each dashboard is a single primary-key read of company_stats."""
+    c_token = await _register_login(client, "dash-one-c@test.com", "contractor")
+    s_token = await _register_login(client, "dash-one-s@test.com", "subcontractor")
+    c_company = await _create_company(client, c_token, "Dash One Contractor")
+    s_company = await _create_company(client, s_token, "Dash One Sub")
+
+    proj = await client.post(
+        "/api/projects",
+        json={"title": "Single Query Project"},
+        headers={"Authorization": f"Bearer {c_token}"},
+    )
+    project_id = proj.json()["id"]
+    await client.patch(
+        f"/api/projects/{project_id}/status",
+        json={"status": "open"},
+        headers={"Authorization": f"Bearer {c_token}"},
+    )
+    await client.post(
+        f"/api/projects/{project_id}/quotes",
+        json={"amount": 500000},
+        headers={"Authorization": f"Bearer {s_token}"},
+    )
+
+    service = DashboardService(db_session)
+    statement_counter.reset()
+    contractor = await service.get_contractor_dashboard(uuid.UUID(c_company["id"]))
+    assert statement_counter.count == 1
+    assert contractor == {
+        "total_projects": 1,
+        "open_projects": 1,
+        "in_progress_projects": 0,
+        "completed_projects": 0,
+        "total_orders": 0,
+        "pending_quotes": 1,
+        "pending_direct_orders": 0,
+        "active_direct_orders": 0,
+        "completed_direct_orders": 0,
+    }
+
+    statement_counter.reset()
+    sub = await service.get_subcontractor_dashboard(uuid.UUID(s_company["id"]))
+    assert statement_counter.count == 1
+    assert sub == {
+        "total_quotes": 1,
+        "accepted_quotes": 0,
+        "active_orders": 0,
+        "completed_orders": 0,
+        "pending_direct_orders": 0,
+        "active_direct_orders": 0,
+        "completed_direct_orders": 0,
+        "average_rating": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_company_stats_match_source_after_full_flow(client: AsyncClient, db_session):
+    """Incremental counters agree with a rebuild from the source tables."""
+    c_token = await _register_login(client, "stats-c@test.com", "contractor")
+    s_token = await _register_login(client, "stats-s@test.com", "subcontractor")
+    s2_token = await _register_login(client, "stats-s2@test.com", "subcontractor")
+    c_company = await _create_company(client, c_token, "Stats Contractor")
+    s_company = await _create_company(client, s_token, "Stats Sub")
+    await _create_company(client, s2_token, "Stats Sub 2")
+    c_headers = {"Authorization": f"Bearer {c_token}"}
+    s_headers = {"Authorization": f"Bearer {s_token}"}
+
+    proj = await client.post("/api/projects", json={"title": "Stats"}, headers=c_headers)
+    project_id = proj.json()["id"]
+    await client.patch(
+        f"/api/projects/{project_id}/status", json={"status": "open"}, headers=c_headers
+    )
+    q1 = await client.post(
+        f"/api/projects/{project_id}/quotes", json={"amount": 100}, headers=s_headers
+    )
+    await client.post(
+        f"/api/projects/{project_id}/quotes",
+        json={"amount": 200},
+        headers={"Authorization": f"Bearer {s2_token}"},
+    )
+    await client.post(f"/api/quotes/{q1.json()['id']}/accept", headers=c_headers)
+    orders = await client.get("/api/orders", headers=c_headers)
+    order_id = orders.json()["items"][0]["id"]
+    await client.post(f"/api/orders/{order_id}/complete", headers=c_headers)
+    await client.post(f"/api/orders/{order_id}/reviews", json={"rating": 4}, headers=c_headers)
+
+    direct = await client.post(
+        "/api/direct-orders",
+        json={"title": "Direct", "amount": 300, "subcontractor_company_id": s_company["id"]},
+        headers=c_headers,
+    )
+    await client.post(f"/api/direct-orders/{direct.json()['id']}/accept", headers=s_headers)
+
+    resp = await client.get("/api/dashboard/subcontractor", headers=s_headers)
+    data = resp.json()
+    assert data["total_quotes"] == 1
+    assert data["accepted_quotes"] == 1
+    assert data["completed_orders"] == 1
+    assert data["active_direct_orders"] == 1
+    assert data["average_rating"] == 4.0
+
+    resp = await client.get("/api/dashboard/contractor", headers=c_headers)
+    data = resp.json()
+    assert data["completed_projects"] == 1
+    assert data["pending_quotes"] == 0
+    assert data["total_orders"] == 1
+
+    stats_repo = CompanyStatsRepository(db_session)
+    company_ids = [uuid.UUID(c_company["id"]), uuid.UUID(s_company["id"])]
+    expected = await stats_repo.compute_from_source(company_ids)
+    for company_id in company_ids:
+        stats = await stats_repo.get(company_id)
+        assert {column: getattr(stats, column) for column in COUNTER_COLUMNS} == expected[
+            company_id
+        ]
+
+
+@pytest.mark.asyncio
+async def test_company_stats_reconcile_reports_and_fixes_drift(client: AsyncClient, db_session):
+    token = await _register_login(client, "stats-drift@test.com", "contractor")
+    company = await _create_company(client, token, "Drift Contractor")
+    await client.post(
+        "/api/projects",
+        json={"title": "Drift"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    company_id = uuid.UUID(company["id"])
+    stats_repo = CompanyStatsRepository(db_session)
+    await stats_repo.increment(company_id, total_projects=5)
+
+    service = CompanyStatsService(stats_repo)
+    drift = await service.reconcile(fix=True)
+    assert {
+        "company_id": company_id,
+        "column": "total_projects",
+        "stored": 6,
+        "expected": 1,
+    } in drift
+    assert await service.reconcile() == []
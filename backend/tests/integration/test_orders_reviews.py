@@ -1,5 +1,9 @@
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.jobs import recompute_company_rating
+from app.models.job import Job
 
 
 async def _register_login(client: AsyncClient, email: str, role: str) -> str:
@@ -220,7 +224,7 @@ async def test_company_reviews_list(client: AsyncClient):
 
 
 @pytest.mark.asyncio
-async def test_full_lifecycle(client: AsyncClient):
+async def test_full_lifecycle(client: AsyncClient, db_session):
     """Full lifecycle: project -> quote -> accept -> order -> complete -> review"""
     c_token = await _register_login(client, "lifecycle-c@test.com", "contractor")
     s_token = await _register_login(client, "lifecycle-s@test.com", "subcontractor")
@@ -290,3 +294,13 @@ async def test_full_lifecycle(client: AsyncClient):
     # 8. Check reviews
     resp = await client.get(f"/api/companies/{s_company['id']}/reviews")
     assert resp.json()["average_rating"] == 5.0
+
+    # 9. The denormalized Company.average_rating is recomputed by a background job
+    jobs = (await db_session.execute(select(Job).order_by(Job.created_at))).scalars().all()
+    assert [(job.name, job.queue, job.status) for job in jobs] == [
+        ("ratings.recompute", "ratings", "queued")
+    ] * 2
+    assert jobs[0].payload == {"company_id": s_company["id"]}
+    await recompute_company_rating(db_session, jobs[0].payload)
+    resp = await client.get(f"/api/companies/{s_company['id']}")
+    assert resp.json()["average_rating"] == 5.0
@@ -0,0 +1,200 @@
+"""アウトボックス (ドメインイベントの記録と中継) のテスト
+
+API 経由のテストはテスト共通のセッションで OutboxRelay.dispatch_batch を直接呼ぶ。
+中継のループ・再試行は複数のセッションからコミットするため、ファイルの SQLite を使う。
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.constants import OutboxStatus
+from app.models.base import Base
+from app.models.outbox_event import OutboxEvent
+from app.repositories.outbox_repository import OutboxRepository
+from app.utils.outbox import EventHandler, OutboxRelay, handlers
+
+
+async def _setup_company(client: AsyncClient, email: str, role: str) -> tuple[dict, str]:
+    await client.post(
+        "/api/auth/register", json={"email": email, "password": "testpass123", "role": role}
+    )
+    resp = await client.post("/api/auth/login", json={"email": email, "password": "testpass123"})
+    headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+    resp = await client.post("/api/companies/me", json={"name": email}, headers=headers)
+    return headers, resp.json()["id"]
+
+
+@pytest.fixture
+async def session_factory(tmp_path) -> async_sessionmaker[AsyncSession]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'outbox.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+def _register(monkeypatch, event_type: str, fn) -> None:
+    monkeypatch.setitem(handlers, event_type, [EventHandler(fn.__name__, fn)])
+
+
+async def _add(session_factory, event_type: str, count: int = 1) -> None:
+    async with session_factory() as session:
+        for i in range(count):
+            await OutboxRepository(session).add(event_type, {"n": i})
+        await session.commit()
+
+
+async def _events(session_factory) -> list[OutboxEvent]:
+    async with session_factory() as session:
+        result = await session.execute(select(OutboxEvent).order_by(OutboxEvent.id))
+        return list(result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_direct_order_events_notify_the_counterpart(client: AsyncClient, db_session):
+    c_headers, _ = await _setup_company(client, "outbox-c@test.com", "contractor")
+    s_headers, s_company_id = await _setup_company(client, "outbox-s@test.com", "subcontractor")
+    relay = OutboxRelay(session_factory=None)
+
+    resp = await client.post(
+        "/api/direct-orders",
+        json={"subcontractor_company_id": s_company_id, "title": "直発", "amount": 300},
+        headers=c_headers,
+    )
+    direct_order_id = resp.json()["id"]
+    await client.post(f"/api/direct-orders/{direct_order_id}/accept", headers=s_headers)
+    [created, accepted] = (
+        (await db_session.execute(select(OutboxEvent).order_by(OutboxEvent.id))).scalars().all()
+    )
+    assert (created.event_type, accepted.event_type) == (
+        "direct_order.created",
+        "direct_order.accepted",
+    )
+    assert str(created.aggregate_id) == direct_order_id
+
+    assert await relay.dispatch_batch(db_session) == 2
+    assert await relay.dispatch_batch(db_session) == 0
+    s_items = (await client.get("/api/notifications", headers=s_headers)).json()["items"]
+    c_items = (await client.get("/api/notifications", headers=c_headers)).json()["items"]
+    assert [n["type"] for n in s_items] == ["direct_order_received"]
+    assert [n["type"] for n in c_items] == ["direct_order_accepted"]
+    assert s_items[0]["message"] == "「直発」の直接発注が届きました。"
+    assert relay.stats()["by_type"] == {"direct_order.created": 1, "direct_order.accepted": 1}
+
+    # 再配信しても同じ通知は作り直さない
+    assert await OutboxRepository(db_session).requeue() == 2
+    assert await relay.dispatch_batch(db_session) == 2
+    s_items = (await client.get("/api/notifications", headers=s_headers)).json()["items"]
+    assert [n["type"] for n in s_items] == ["direct_order_received"]
+
+
+@pytest.mark.asyncio
+async def test_events_roll_back_with_the_request(db_session):
+    async with db_session.begin_nested() as savepoint:
+        await OutboxRepository(db_session).add("test.rolled_back", {})
+        await savepoint.rollback()
+    assert await OutboxRelay(session_factory=None).dispatch_batch(db_session) == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_type_retries_then_fails_without_blocking_others(
+    session_factory, monkeypatch
+):
+    delivered = []
+
+    async def record(db, events):
+        await db.execute(update(OutboxEvent).values(last_error="written by the handler"))
+        delivered.extend(event.payload["n"] for event in events)
+
+    async def broken(db, _events):
+        await db.execute(update(OutboxEvent).values(last_error="written by the broken handler"))
+        raise RuntimeError("boom")
+
+    _register(monkeypatch, "test.ok", record)
+    _register(monkeypatch, "test.broken", broken)
+    await _add(session_factory, "test.ok", count=3)
+    await _add(session_factory, "test.broken", count=2)
+    relay = OutboxRelay(session_factory, batch_size=10, max_attempts=2)
+
+    assert await relay.drain() == 5
+    events = await _events(session_factory)
+    assert delivered == [0, 1, 2]
+    assert [(e.status, e.attempts) for e in events] == [("dispatched", 0)] * 3 + [
+        ("pending", 1)
+    ] * 2
+    # 失敗した種別の書き込みだけが取り消される
+    assert [e.last_error for e in events] == ["written by the handler"] * 3 + [
+        "RuntimeError: boom"
+    ] * 2
+    # バックオフが過ぎるまでは再配信しない
+    assert await relay.drain() == 0
+
+    async with session_factory() as session:
+        await session.execute(update(OutboxEvent).values(available_at=datetime.now(timezone.utc)))
+        await session.commit()
+    assert await relay.drain() == 2
+    assert [e.status for e in await _events(session_factory)][3:] == ["failed"] * 2
+    assert (relay.dispatched, relay.retried, relay.failed) == (3, 2, 2)
+
+    async with session_factory() as session:
+        repo = OutboxRepository(session)
+        assert await repo.requeue(status=OutboxStatus.FAILED) == 2
+        assert await repo.count_by_status() == {"dispatched": 3, "pending": 2}
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_failing_event_is_retried_alone(session_factory, monkeypatch):
+    delivered = []
+
+    async def picky(_db, events):
+        if any(event.payload["n"] == 1 for event in events):
+            raise RuntimeError("bad payload")
+        delivered.extend(event.payload["n"] for event in events)
+
+    _register(monkeypatch, "test.picky", picky)
+    await _add(session_factory, "test.picky", count=3)
+    relay = OutboxRelay(session_factory, batch_size=10, max_attempts=2)
+
+    assert await relay.drain() == 3
+    # まとめての配信が失敗したら 1 件ずつ配信し直し、失敗したイベントだけを再試行に回す
+    assert delivered == [0, 2]
+    events = await _events(session_factory)
+    assert [(e.status, e.attempts) for e in events] == [
+        ("dispatched", 0),
+        ("pending", 1),
+        ("dispatched", 0),
+    ]
+    assert [e.last_error for e in events][1] == "RuntimeError: bad payload"
+    assert (relay.dispatched, relay.retried) == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_relay_batches_events_and_wakes_on_commit(session_factory, monkeypatch):
+    batches, done = [], asyncio.Event()
+
+    async def collect(_db, events):
+        batches.append(len(events))
+        if sum(batches) == 7:
+            done.set()
+
+    _register(monkeypatch, "test.collect", collect)
+    # ポーリング間隔を長くして、コミット直後の起床で拾われることを確かめる
+    relay = OutboxRelay(session_factory, batch_size=5, poll_interval=60)
+    task = asyncio.create_task(relay.run())
+    await asyncio.sleep(0.05)
+    await _add(session_factory, "test.collect", count=7)
+    await asyncio.wait_for(done.wait(), timeout=10)
+    relay.stop()
+    await task
+
+    assert batches == [5, 2]
+    stats = relay.stats()
+    assert (stats["batches"], stats["dispatched"], stats["avg_batch_size"]) == (2, 7, 3.5)
+    assert stats["lag_seconds"] is not None
+    assert {e.status for e in await _events(session_factory)} == {"dispatched"}
@@ -1,5 +1,15 @@
+import uuid
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.exc import InvalidRequestError
+
+from app.models.company import Specialty
+from app.models.project import Project
+from app.repositories.project_repository import ProjectRepository
+from app.utils.outbox import OutboxRelay
+from app.utils.price_index import price_index
 
 
 async def _register_login(client: AsyncClient, email: str, role: str) -> str:
@@ -273,3 +283,451 @@ async def test_subcontractor_cannot_create_project(client: AsyncClient):
         headers={"Authorization": f"Bearer {s_token}"},
     )
     assert resp.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_list_projects_cursor_pagination(client: AsyncClient):
+    token, company = await _setup_contractor(client, "contractor-cursor@test.com")
+    created = []
+    for i in range(5):
+        resp = await client.post(
+            "/api/projects",
+            json={"title": f"Cursor {i}"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        created.append(resp.json()["id"])
+
+    # First page uses the page/per_page contract and hands out a cursor
+    resp = await client.get("/api/projects", params={"company_id": company["id"], "per_page": 2})
+    data = resp.json()
+    assert data["total"] == 5
+    assert data["pages"] == 3
+    seen = [p["id"] for p in data["items"]]
+
+    while data["next_cursor"]:
+        resp = await client.get(
+            "/api/projects",
+            params={"company_id": company["id"], "per_page": 2, "cursor": data["next_cursor"]},
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["total"] is None
+        assert data["page"] is None
+        seen.extend(p["id"] for p in data["items"])
+
+    assert seen == list(reversed(created))
+
+
+@pytest.mark.asyncio
+async def test_list_projects_without_total(client: AsyncClient):
+    resp = await client.get("/api/projects", params={"include_total": "false"})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["total"] is None
+    assert data["pages"] is None
+
+
+@pytest.mark.asyncio
+async def test_list_projects_invalid_cursor(client: AsyncClient):
+    resp = await client.get("/api/projects", params={"cursor": "not-a-cursor"})
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_project_loader_profiles(client: AsyncClient, db_session, statement_counter):
+    """プロファイルで指定した関連だけが読み込まれ、それ以外へのアクセスは例外になる"""
+    c_token, _ = await _setup_contractor(client, "contractor-load@test.com")
+    s_token, _ = await _setup_subcontractor(client, "sub-load@test.com")
+    c_headers = {"Authorization": f"Bearer {c_token}"}
+    resp = await client.post("/api/projects", json={"title": "Loaders"}, headers=c_headers)
+    project_id = uuid.UUID(resp.json()["id"])
+    await client.patch(
+        f"/api/projects/{project_id}/status", json={"status": "open"}, headers=c_headers
+    )
+    await client.post(
+        f"/api/projects/{project_id}/quotes",
+        json={"amount": 100000},
+        headers={"Authorization": f"Bearer {s_token}"},
+    )
+    repo = ProjectRepository(db_session)
+
+    db_session.expunge_all()
+    statement_counter.reset()
+    project = await repo.get_by_id(project_id, load="minimal")
+    assert statement_counter.count == 1
+    with pytest.raises(InvalidRequestError):
+        project.files
+    with pytest.raises(InvalidRequestError):
+        project.company
+
+    db_session.expunge_all()
+    statement_counter.reset()
+    project = await repo.get_by_id(project_id)
+    assert statement_counter.count == 2
+    assert project.files == []
+    with pytest.raises(InvalidRequestError):
+        project.quotes
+
+    db_session.expunge_all()
+    project = await repo.get_by_id(project_id, load="with_quotes")
+    assert [q.amount for q in project.quotes] == [100000]
+
+
+@pytest.mark.asyncio
+async def test_list_projects_near_project(client: AsyncClient):
+    token, _ = await _setup_contractor(client, "contractor-geo@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    ids = {}
+    for location in (
+        "東京都港区芝公園",
+        "東京都新宿区西新宿",
+        "横浜市中区",
+        "大阪府大阪市",
+        "未定",
+    ):
+        resp = await client.post(
+            "/api/projects", json={"title": location, "location": location}, headers=headers
+        )
+        ids[location] = resp.json()["id"]
+    assert resp.json()["prefecture_code"] is None
+    minato = ids["東京都港区芝公園"]
+
+    async def titles(**params) -> set[str]:
+        resp = await client.get("/api/projects", params=params)
+        assert resp.status_code == 200, resp.json()
+        return {item["title"] for item in resp.json()["items"]}
+
+    assert await titles(near_project_id=minato, radius_km=10) == {
+        "東京都港区芝公園",
+        "東京都新宿区西新宿",
+    }
+    assert "横浜市中区" in await titles(near_project_id=minato, radius_km=40)
+    assert await titles(near_project_id=minato, same_prefecture=True) == {
+        "東京都港区芝公園",
+        "東京都新宿区西新宿",
+    }
+    assert await titles(location="東京都新宿区") == {"東京都新宿区西新宿"}
+
+    # 所在地を変更すると解決結果も更新される
+    await client.patch(f"/api/projects/{minato}", json={"location": "大阪市北区"}, headers=headers)
+    assert await titles(location="大阪府") == {"大阪府大阪市", "東京都港区芝公園"}
+
+    resp = await client.get("/api/projects", params={"radius_km": 10})
+    assert resp.status_code == 400
+    resp = await client.get(
+        "/api/projects", params={"near_project_id": ids["未定"], "radius_km": 10}
+    )
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_list_projects_served_from_result_cache(client: AsyncClient, statement_counter):
+    token, _ = await _setup_contractor(client, "contractor-cache@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.post("/api/projects", json={"title": "Cached A"}, headers=headers)
+
+    resp = await client.get("/api/projects", params={"per_page": 5})
+    assert resp.json()["total"] == 1
+    statement_counter.reset()
+    resp = await client.get("/api/projects", params={"per_page": 5, "page": 1})
+    assert resp.json()["total"] == 1
+    assert statement_counter.count == 0, statement_counter.statements
+
+    # 案件の作成でキャッシュは破棄される
+    await client.post("/api/projects", json={"title": "Cached B"}, headers=headers)
+    resp = await client.get("/api/projects", params={"per_page": 5})
+    assert resp.json()["total"] == 2
+
+
+@pytest.mark.asyncio
+async def test_list_projects_facets_in_one_query(
+    client: AsyncClient, db_session, statement_counter
+):
+    token, _ = await _setup_contractor(client, "contractor-facets@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    specialty = Specialty(name="内装工事")
+    db_session.add(specialty)
+    await db_session.flush()
+    for title, location, specialty_id in (
+        ("A", "東京都港区", str(specialty.id)),
+        ("B", "東京都新宿区", str(specialty.id)),
+        ("C", "大阪府大阪市", None),
+        ("D", "未定", None),
+    ):
+        resp = await client.post(
+            "/api/projects",
+            json={"title": title, "location": location, "required_specialty_id": specialty_id},
+            headers=headers,
+        )
+        if title == "A":
+            await client.patch(
+                f"/api/projects/{resp.json()['id']}/status",
+                json={"status": "open"},
+                headers=headers,
+            )
+
+    statement_counter.reset()
+    resp = await client.get(
+        "/api/projects", params={"facets": "prefecture,status,specialty", "per_page": 2}
+    )
+    data = resp.json()
+    # 一覧 (ページ + files) とファセット集計だけで、件数クエリは発行しない
+    assert statement_counter.count == 3, statement_counter.statements
+    assert data["total"] == 4
+    assert len(data["items"]) == 2
+    assert data["facets"] == {
+        "status": [{"value": "draft", "count": 3}, {"value": "open", "count": 1}],
+        "specialty": [{"value": str(specialty.id), "count": 2}, {"value": None, "count": 2}],
+        "prefecture": [
+            {"value": "13", "count": 2},
+            {"value": "27", "count": 1},
+            {"value": None, "count": 1},
+        ],
+    }
+
+    # 絞り込みはファセットにも適用される
+    resp = await client.get("/api/projects", params={"facets": "status", "location": "東京都"})
+    assert resp.json()["total"] == 2
+    assert resp.json()["facets"] == {
+        "status": [{"value": "draft", "count": 1}, {"value": "open", "count": 1}],
+        "specialty": None,
+        "prefecture": None,
+    }
+
+    resp = await client.get("/api/projects")
+    assert resp.json()["facets"] is None
+    resp = await client.get("/api/projects", params={"facets": "status,budget"})
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_location_filter_matches_projects_without_area_codes(
+    client: AsyncClient, db_session
+):
+    token, _ = await _setup_contractor(client, "contractor-location@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    ids = {}
+    for title, location in (("coded", "東京都港区芝公園"), ("legacy", "東京都港区六本木")):
+        resp = await client.post(
+            "/api/projects", json={"title": title, "location": location}, headers=headers
+        )
+        ids[title] = uuid.UUID(resp.json()["id"])
+    # ジオコーディング導入前の案件 (コード未設定)
+    await db_session.execute(
+        update(Project)
+        .where(Project.id == ids["legacy"])
+        .values(prefecture_code=None, municipality_code=None)
+    )
+
+    resp = await client.get("/api/projects", params={"location": "東京都港区"})
+    assert sorted(item["title"] for item in resp.json()["items"]) == ["coded", "legacy"]
+    resp = await client.get("/api/projects", params={"location": "東京都"})
+    assert resp.json()["total"] == 2
+    resp = await client.get("/api/projects", params={"location": "大阪府"})
+    assert resp.json()["total"] == 0
+
+
+@pytest.mark.asyncio
+async def test_recommendations_follow_project_lifecycle(
+    client: AsyncClient, db_session, statement_counter
+):
+    c_token, _ = await _setup_contractor(client, "contractor-match@test.com")
+    s_token, sub = await _setup_subcontractor(client, "sub-match@test.com")
+    c_headers = {"Authorization": f"Bearer {c_token}"}
+    s_headers = {"Authorization": f"Bearer {s_token}"}
+    specialty = Specialty(name="電気設備工事")
+    db_session.add(specialty)
+    await db_session.flush()
+    await client.patch("/api/companies/me", json={"address": "東京都新宿区"}, headers=s_headers)
+    await client.put(
+        "/api/companies/me/specialties",
+        json={"specialty_ids": [str(specialty.id)]},
+        headers=s_headers,
+    )
+
+    ids = {}
+    for title, location, specialty_id in (
+        ("match", "東京都港区", str(specialty.id)),
+        ("far", "大阪府大阪市", str(specialty.id)),
+        ("other", "東京都港区", None),
+        ("draft", "東京都港区", str(specialty.id)),
+    ):
+        resp = await client.post(
+            "/api/projects",
+            json={"title": title, "location": location, "required_specialty_id": specialty_id},
+            headers=c_headers,
+        )
+        ids[title] = resp.json()["id"]
+        if title != "draft":
+            await client.patch(
+                f"/api/projects/{ids[title]}/status", json={"status": "open"}, headers=c_headers
+            )
+
+    resp = await client.get("/api/projects/recommended", headers=s_headers)
+    assert resp.status_code == 200, resp.json()
+    items = resp.json()["items"]
+    assert [item["project"]["title"] for item in items] == ["match", "other", "far"]
+    assert items[0]["scores"]["specialty"] == 1.0
+
+    # 索引が最新なら、見積もり済み案件の確認と案件本体 (+ files) の読み込みだけ
+    statement_counter.reset()
+    await client.get("/api/projects/recommended", headers=s_headers)
+    assert statement_counter.count == 3, statement_counter.statements
+
+    await client.post(
+        f"/api/projects/{ids['far']}/quotes", json={"amount": 100000}, headers=s_headers
+    )
+    resp = await client.get(
+        f"/api/projects/{ids['match']}/recommended-subcontractors", headers=c_headers
+    )
+    assert [item["company"]["id"] for item in resp.json()["items"]] == [sub["id"]]
+    assert resp.json()["items"][0]["company"]["specialties"][0]["name"] == "電気設備工事"
+
+    # 募集を締め切った案件は差分更新で推薦から外れる
+    await client.patch(
+        f"/api/projects/{ids['match']}/status", json={"status": "closed"}, headers=c_headers
+    )
+    resp = await client.get("/api/projects/recommended", headers=s_headers)
+    assert [item["project"]["title"] for item in resp.json()["items"]] == ["other"]
+    resp = await client.get(
+        f"/api/projects/{ids['match']}/recommended-subcontractors", headers=c_headers
+    )
+    assert resp.status_code == 400
+    resp = await client.get(
+        f"/api/projects/{ids['other']}/recommended-subcontractors", headers=s_headers
+    )
+    assert resp.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_price_hints_follow_committed_orders(client: AsyncClient, db_session, monkeypatch):
+    monkeypatch.setattr(price_index, "min_samples", 1)
+    c_token, _ = await _setup_contractor(client, "contractor-price@test.com")
+    s_token, _ = await _setup_subcontractor(client, "sub-price@test.com")
+    c_headers = {"Authorization": f"Bearer {c_token}"}
+    s_headers = {"Authorization": f"Bearer {s_token}"}
+
+    async def open_project(title: str) -> str:
+        resp = await client.post(
+            "/api/projects", json={"title": title, "location": "東京都港区"}, headers=c_headers
+        )
+        project_id = resp.json()["id"]
+        await client.patch(
+            f"/api/projects/{project_id}/status", json={"status": "open"}, headers=c_headers
+        )
+        return project_id
+
+    resp = await client.post(
+        f"/api/projects/{await open_project('First')}/quotes",
+        json={"amount": 1200000},
+        headers=s_headers,
+    )
+    assert resp.status_code == 201
+    assert resp.json()["price_hint"] is None
+    await client.post(f"/api/quotes/{resp.json()['id']}/accept", headers=c_headers)
+    # 受注はコミットされてから相場に加わる
+    assert price_index.samples == 0
+    await db_session.commit()
+    assert price_index.samples == 1
+
+    resp = await client.get(
+        "/api/price-hints", params={"location": "東京都港区芝公園"}, headers=s_headers
+    )
+    assert resp.json()["prefecture_code"] == "13"
+    assert abs(resp.json()["p50"] - 1200000) <= 12000
+
+    resp = await client.post(
+        f"/api/projects/{await open_project('Second')}/quotes",
+        json={"amount": 900000},
+        headers=s_headers,
+    )
+    assert resp.json()["price_hint"]["sample_count"] == 1
+
+    # 再構築結果を読み込んでも、取り込み済みの受注を二重に数えない
+    assert await price_index.rebuild(db_session) == 1
+    await price_index.load(db_session)
+    assert price_index.samples == 1
+
+
+@pytest.mark.asyncio
+async def test_price_hints_count_direct_orders_only_when_accepted(
+    client: AsyncClient, db_session, monkeypatch
+):
+    monkeypatch.setattr(price_index, "min_samples", 1)
+    c_token, _ = await _setup_contractor(client, "contractor-direct-price@test.com")
+    s_token, s_company = await _setup_subcontractor(client, "sub-direct-price@test.com")
+    c_headers = {"Authorization": f"Bearer {c_token}"}
+    s_headers = {"Authorization": f"Bearer {s_token}"}
+
+    async def offer(amount: int) -> str:
+        resp = await client.post(
+            "/api/direct-orders",
+            json={
+                "title": "Direct",
+                "amount": amount,
+                "location": "東京都港区",
+                "subcontractor_company_id": s_company["id"],
+            },
+            headers=c_headers,
+        )
+        return resp.json()["id"]
+
+    accepted, declined = await offer(500000), await offer(90000000)
+    await offer(1000)  # 承認待ちのまま
+    await client.post(f"/api/direct-orders/{declined}/decline", headers=s_headers)
+    await db_session.commit()
+    assert price_index.samples == 0
+
+    await client.post(f"/api/direct-orders/{accepted}/accept", headers=s_headers)
+    await db_session.commit()
+    assert price_index.samples == 1
+
+    # 再構築・再生でも承認された直接発注だけを数える
+    assert await price_index.rebuild(db_session) == 1
+    await price_index.load(db_session)
+    assert price_index.samples == 1
+    hint = price_index.hint(None, "13")
+    assert (hint.sample_count, hint.prefecture_code) == (1, "13")
+    assert abs(hint.p50 - 500000) <= 5000
+
+
+@pytest.mark.asyncio
+async def test_quote_lifecycle_notifies_bidders_in_one_batch(
+    client: AsyncClient, db_session, statement_counter
+):
+    relay = OutboxRelay(session_factory=None)
+    c_token, _ = await _setup_contractor(client, "contractor-notify@test.com")
+    c_headers = {"Authorization": f"Bearer {c_token}"}
+    resp = await client.post("/api/projects", json={"title": "Notify"}, headers=c_headers)
+    project_id = resp.json()["id"]
+    await client.patch(
+        f"/api/projects/{project_id}/status", json={"status": "open"}, headers=c_headers
+    )
+    bidders = []
+    for i in range(4):
+        s_token, _ = await _setup_subcontractor(client, f"sub{i}-notify@test.com")
+        headers = {"Authorization": f"Bearer {s_token}"}
+        resp = await client.post(
+            f"/api/projects/{project_id}/quotes", json={"amount": 100000 + i}, headers=headers
+        )
+        bidders.append((headers, resp.json()["id"]))
+
+    # 通知は中継が配信するまで作られない
+    resp = await client.get("/api/notifications", headers=c_headers)
+    assert resp.json()["items"] == []
+    assert await relay.dispatch_batch(db_session) == 4
+    resp = await client.get("/api/notifications", headers=c_headers)
+    assert [n["type"] for n in resp.json()["items"]] == ["quote_received"] * 4
+
+    await client.post(f"/api/quotes/{bidders[0][1]}/accept", headers=c_headers)
+    statement_counter.reset()
+    assert await relay.dispatch_batch(db_session) == 1
+    # 通知先の解決 1 回 + 複数行 INSERT 1 回 (入札者数によらない)
+    inserts = [s for s in statement_counter.statements if s.startswith("INSERT INTO notif")]
+    assert len(inserts) == 1
+    assert await relay.dispatch_batch(db_session) == 0
+
+    for i, (headers, quote_id) in enumerate(bidders):
+        items = (await client.get("/api/notifications", headers=headers)).json()["items"]
+        assert [n["type"] for n in items] == ["quote_rejected" if i else "quote_accepted"]
+        assert items[0]["reference_id"] == quote_id
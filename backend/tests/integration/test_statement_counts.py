@@ -0,0 +1,251 @@
+"""エンドポイントごとの SQL 発行数の回帰テスト
+
+認証 (principal キャッシュ) と企業 ID の解決はキャッシュ済みなら SQL を発行しないため、
+ここでの件数は各エンドポイント本来の処理分だけになる。
+"""
+
+import uuid
+
+import pytest
+from httpx import AsyncClient
+
+from app.models.company import Specialty
+from app.models.project import ProjectFile
+from app.utils.principal_cache import principal_cache
+
+
+async def _register_login(client: AsyncClient, email: str, role: str) -> str:
+    await client.post(
+        "/api/auth/register",
+        json={"email": email, "password": "testpass123", "role": role},
+    )
+    resp = await client.post(
+        "/api/auth/login",
+        json={"email": email, "password": "testpass123"},
+    )
+    return resp.json()["access_token"]
+
+
+async def _create_company(client: AsyncClient, token: str, name: str) -> dict:
+    resp = await client.post(
+        "/api/companies/me",
+        json={"name": name},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    return resp.json()
+
+
+@pytest.fixture
+async def marketplace(client: AsyncClient) -> dict:
+    c_token = await _register_login(client, "count-c@test.com", "contractor")
+    s_token = await _register_login(client, "count-s@test.com", "subcontractor")
+    c_company = await _create_company(client, c_token, "Count Contractor")
+    s_company = await _create_company(client, s_token, "Count Sub")
+    c_headers = {"Authorization": f"Bearer {c_token}"}
+    s_headers = {"Authorization": f"Bearer {s_token}"}
+
+    project = await client.post("/api/projects", json={"title": "Count"}, headers=c_headers)
+    project_id = project.json()["id"]
+    await client.patch(
+        f"/api/projects/{project_id}/status", json={"status": "open"}, headers=c_headers
+    )
+    quote = await client.post(
+        f"/api/projects/{project_id}/quotes", json={"amount": 100000}, headers=s_headers
+    )
+    direct_order = await client.post(
+        "/api/direct-orders",
+        json={
+            "title": "Count Direct",
+            "amount": 50000,
+            "subcontractor_company_id": s_company["id"],
+        },
+        headers=c_headers,
+    )
+    # 以降の計測で principal がキャッシュ済みになるよう一度ずつ認証しておく
+    await client.get("/api/auth/me", headers=c_headers)
+    await client.get("/api/auth/me", headers=s_headers)
+    return {
+        "contractor": c_headers,
+        "subcontractor": s_headers,
+        "c_company_id": c_company["id"],
+        "s_company_id": s_company["id"],
+        "project_id": project_id,
+        "quote_id": quote.json()["id"],
+        "direct_order_id": direct_order.json()["id"],
+    }
+
+
+# (ロール, メソッド, パス, ボディ, 想定 SQL 数)
+ENDPOINTS = [
+    ("contractor", "GET", "/api/dashboard/contractor", None, 1),
+    ("subcontractor", "GET", "/api/dashboard/subcontractor", None, 1),
+    ("contractor", "GET", "/api/orders", None, 1),
+    ("subcontractor", "GET", "/api/my-quotes", None, 1),
+    ("contractor", "GET", "/api/direct-orders", None, 3),
+    ("contractor", "GET", "/api/notifications", None, 1),
+    ("contractor", "POST", "/api/projects", {"title": "New"}, 2),
+    ("contractor", "PATCH", "/api/projects/{project_id}", {"title": "Renamed"}, 3),
+    ("contractor", "PATCH", "/api/projects/{project_id}/status", {"status": "closed"}, 4),
+    ("contractor", "POST", "/api/quotes/{quote_id}/accept", None, 12),
+    ("contractor", "POST", "/api/quotes/{quote_id}/reject", None, 5),
+    (
+        "contractor",
+        "POST",
+        "/api/direct-orders",
+        {"title": "Again", "amount": 1, "subcontractor_company_id": "{s_company_id}"},
+        6,
+    ),
+    ("subcontractor", "POST", "/api/direct-orders/{direct_order_id}/accept", None, 7),
+    ("contractor", "PATCH", "/api/companies/me", {"name": "Renamed Co"}, 5),
+]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("role", "method", "path", "body", "expected"), ENDPOINTS)
+async def test_endpoint_statement_counts(
+    client: AsyncClient, marketplace: dict, statement_counter, role, method, path, body, expected
+):
+    if body is not None:
+        body = {key: str(value).format(**marketplace) for key, value in body.items()}
+    statement_counter.reset()
+    resp = await client.request(
+        method, path.format(**marketplace), json=body, headers=marketplace[role]
+    )
+    assert resp.status_code in (200, 201), resp.text
+    assert statement_counter.count == expected, statement_counter.statements
+
+
+@pytest.mark.asyncio
+async def test_company_resolution_without_cached_principal(
+    client: AsyncClient, marketplace: dict, statement_counter
+):
+    """キャッシュが空でも認証と企業解決は ID だけの 1 クエリで済む (従来は 3 クエリ)"""
+    principal_cache.clear()
+    statement_counter.reset()
+    resp = await client.get("/api/orders", headers=marketplace["contractor"])
+    assert resp.status_code == 200
+    assert statement_counter.count == 2
+    assert "companies.id" in statement_counter.statements[0]
+    assert "companies.name" not in statement_counter.statements[0]
+
+
+@pytest.mark.asyncio
+async def test_writes_return_server_values_without_refetch(
+    client: AsyncClient, marketplace: dict, statement_counter
+):
+    """updated_at は UPDATE 時にアプリ側で決まるため、書き込み後に再 SELECT しない"""
+    statement_counter.reset()
+    resp = await client.patch(
+        "/api/projects/{project_id}".format(**marketplace),
+        json={"title": "Returning"},
+        headers=marketplace["contractor"],
+    )
+    assert resp.status_code == 200
+    assert resp.json()["title"] == "Returning"
+    writes = [s for s in statement_counter.statements if s.startswith("UPDATE projects")]
+    assert len(writes) == 1
+    assert "updated_at" in writes[0]
+    assert statement_counter.statements[-1] == writes[0]
+
+
+@pytest.mark.asyncio
+async def test_direct_order_specialty_resolved_from_registry(
+    client: AsyncClient, db_session, marketplace: dict, statement_counter
+):
+    specialty = Specialty(name="電気工事")
+    db_session.add(specialty)
+    await db_session.flush()
+    resp = await client.post(
+        "/api/direct-orders",
+        json={
+            "title": "With Specialty",
+            "amount": 1,
+            "subcontractor_company_id": marketplace["s_company_id"],
+            "specialty_id": str(specialty.id),
+        },
+        headers=marketplace["contractor"],
+    )
+    assert resp.json()["specialty"] == {"id": str(specialty.id), "name": "電気工事"}
+
+    statement_counter.reset()
+    resp = await client.get(
+        f"/api/direct-orders/{resp.json()['id']}", headers=marketplace["contractor"]
+    )
+    assert resp.json()["specialty"]["name"] == "電気工事"
+    # 発注本体と元請け・下請け企業だけ (specialties は引かない)
+    assert statement_counter.count == 3, statement_counter.statements
+
+
+async def _conditional_get(client: AsyncClient, path: str, headers: dict, statement_counter):
+    """1 回目の ETag で再検証し、(2 回目のレスポンス, その SQL 数) を返す"""
+    first = await client.get(path, headers=headers)
+    assert first.status_code == 200, first.text
+    statement_counter.reset()
+    resp = await client.get(path, headers={**headers, "If-None-Match": first.headers["etag"]})
+    return first, resp, statement_counter.count
+
+
+@pytest.mark.asyncio
+async def test_detail_endpoints_answer_304_with_one_narrow_query(
+    client: AsyncClient, marketplace: dict, statement_counter
+):
+    c_headers = marketplace["contractor"]
+    await client.post("/api/quotes/{quote_id}/accept".format(**marketplace), headers=c_headers)
+    orders = await client.get("/api/orders", headers=c_headers)
+    order_id = orders.json()["items"][0]["id"]
+
+    for path in (
+        "/api/projects/{project_id}",
+        "/api/companies/{s_company_id}",
+        f"/api/orders/{order_id}",
+        "/api/direct-orders/{direct_order_id}",
+    ):
+        first, resp, count = await _conditional_get(
+            client, path.format(**marketplace), c_headers, statement_counter
+        )
+        assert resp.status_code == 304, path
+        assert resp.headers["etag"] == first.headers["etag"]
+        assert "last-modified" in resp.headers
+        assert count == 1, (path, statement_counter.statements)
+
+
+@pytest.mark.asyncio
+async def test_detail_etags_change_with_resource_and_children(
+    client: AsyncClient, db_session, marketplace: dict
+):
+    c_headers, s_headers = marketplace["contractor"], marketplace["subcontractor"]
+    project_path = "/api/projects/{project_id}".format(**marketplace)
+    direct_order_path = "/api/direct-orders/{direct_order_id}".format(**marketplace)
+    company_path = "/api/companies/{s_company_id}".format(**marketplace)
+
+    async def etag(path: str) -> str:
+        return (await client.get(path, headers=c_headers)).headers["etag"]
+
+    before = await etag(project_path)
+    db_session.add(
+        ProjectFile(project_id=uuid.UUID(marketplace["project_id"]), file_name="a", file_url="k")
+    )
+    await db_session.flush()
+    after_file = await etag(project_path)
+    assert after_file != before
+    await client.patch(project_path, json={"title": "Changed"}, headers=c_headers)
+    resp = await client.get(project_path, headers={**c_headers, "If-None-Match": after_file})
+    assert resp.status_code == 200
+    assert resp.json()["title"] == "Changed"
+
+    # 下請け企業名の変更は直接発注の ETag にも反映される
+    before = await etag(direct_order_path)
+    await client.patch("/api/companies/me", json={"name": "Renamed Sub"}, headers=s_headers)
+    assert await etag(direct_order_path) != before
+
+    # 専門分野の付け替え (関連表だけの変更) も企業の ETag を変える
+    specialty = Specialty(name="塗装")
+    db_session.add(specialty)
+    await db_session.flush()
+    before = await etag(company_path)
+    await client.put(
+        "/api/companies/me/specialties",
+        json={"specialty_ids": [str(specialty.id)]},
+        headers=s_headers,
+    )
+    assert await etag(company_path) != before
@@ -0,0 +1,103 @@
+import pytest
+from pydantic import ValidationError
+
+from app.config import Settings, settings
+from app.utils import download_urls as module
+from app.utils.download_urls import DownloadUrlCache, key_from_url
+from app.utils.s3 import object_url, s3_storage
+
+
+class FakeSigner:
+    def __init__(self):
+        self.signed = []
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):  # noqa: N803
+        self.signed.append(Params["Key"])
+        return f"https://signed/{Params['Key']}?n={len(self.signed)}"
+
+
+def _keys(*keys: str) -> list[tuple[str, str]]:
+    return [(key, "plan.pdf") for key in keys]
+
+
+@pytest.fixture
+def signer(monkeypatch) -> FakeSigner:
+    fake = FakeSigner()
+    monkeypatch.setattr(s3_storage, "_client", fake)
+    return fake
+
+
+def test_key_from_url():
+    assert key_from_url(object_url("uploads/a b/plan.pdf")) == "uploads/a b/plan.pdf"
+    assert key_from_url("https://example.com/other-bucket/plan.pdf") is None
+    assert key_from_url(f"https://cdn.example.com/{settings.S3_BUCKET_NAME}/x") == "x"
+    # キーはエンコードされていないので、"#" や "?" もファイル名の一部
+    for name in ("図面#2.pdf", "a?b.pdf", "50%.pdf"):
+        assert key_from_url(object_url(f"uploads/0f/{name}")) == f"uploads/0f/{name}"
+
+
+def test_refresh_margin_is_validated():
+    with pytest.raises(ValueError):
+        DownloadUrlCache(expiration=300, refresh_margin=300)
+    # 署名の窓が作れない余裕や、一覧の結果キャッシュより短い余裕では起動しない
+    with pytest.raises(ValidationError, match="S3_PRESIGN_EXPIRE_SECONDS"):
+        Settings(S3_PRESIGN_EXPIRE_SECONDS=600, S3_DOWNLOAD_URL_REFRESH_MARGIN_SECONDS=600)
+    with pytest.raises(ValidationError, match="PROJECT_LIST_CACHE_STALE_SECONDS"):
+        Settings(PROJECT_LIST_CACHE_TTL_SECONDS=60, PROJECT_LIST_CACHE_STALE_SECONDS=300)
+    Settings(S3_PRESIGN_EXPIRE_SECONDS=600, S3_DOWNLOAD_URL_REFRESH_MARGIN_SECONDS=120)
+
+
+@pytest.mark.asyncio
+async def test_get_many_signs_misses_in_one_batch(signer):
+    cache = DownloadUrlCache(expiration=3600, refresh_margin=300)
+
+    urls = await cache.get_many(_keys("a", "b", "a"))
+    assert urls == {
+        ("a", "plan.pdf"): "https://signed/a?n=1",
+        ("b", "plan.pdf"): "https://signed/b?n=2",
+    }
+    assert cache.batches == 1
+
+    # 署名済みの URL はそのまま返し、足りない分だけ署名する
+    urls = await cache.get_many(_keys("a", "b", "c"))
+    assert urls["a", "plan.pdf"] == "https://signed/a?n=1"
+    assert signer.signed == ["a", "b", "c"]
+    assert cache.stats() == {
+        "size": 3,
+        "hits": 2,
+        "misses": 3,
+        "hit_ratio": 0.4,
+        "evictions": 0,
+        "batches": 2,
+    }
+
+    assert await cache.get_many([]) == {}
+    assert cache.batches == 2
+
+
+@pytest.mark.asyncio
+async def test_urls_are_renewed_each_signing_window(signer, monkeypatch):
+    cache = DownloadUrlCache(expiration=3600, refresh_margin=300)
+    now = 3300 * 300 + 10.0
+    monkeypatch.setattr(module.time, "time", lambda: now)
+    window = cache.window()
+    await cache.get_many(_keys("a"))
+
+    now = 3300 * 301 - 1
+    assert (await cache.get_many(_keys("a")))["a", "plan.pdf"].endswith("n=1")
+    # 窓が変わったら署名し直す。窓の中で返した URL は窓の終わりから refresh_margin 秒以上有効
+    now = 3300 * 301
+    assert cache.window() == window + 1
+    assert (await cache.get_many(_keys("a")))["a", "plan.pdf"].endswith("n=2")
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_is_evicted(signer):
+    cache = DownloadUrlCache(expiration=3600, refresh_margin=300, max_size=2)
+    await cache.get_many(_keys("a", "b"))
+    await cache.get_many(_keys("a"))
+    await cache.get_many(_keys("c"))
+
+    assert cache.evictions == 1
+    await cache.get_many(_keys("a", "b"))
+    assert signer.signed == ["a", "b", "c", "b"]
@@ -0,0 +1,22 @@
+from app.utils.geocoder import geocoder
+
+
+def test_geocode_resolves_municipality_and_falls_back_to_prefecture():
+    minato = geocoder.geocode("〒105-0011 東京都 港区芝公園4-2-8")
+    assert (minato.prefecture_code, minato.municipality_code) == ("13", "13103")
+
+    # 政令指定都市の区は市の代表点、都道府県の省略も可
+    osaka = geocoder.geocode("大阪市北区梅田1-1")
+    assert (osaka.prefecture_code, osaka.municipality_code) == ("27", "27100")
+
+    hakone = geocoder.geocode("神奈川県足柄下郡箱根町")
+    assert (hakone.prefecture_code, hakone.municipality_code) == ("14", None)
+    assert geocoder.geocode("東京駅前").prefecture_code == "13"
+    assert geocoder.geocode("Tokyo") is None
+    assert geocoder.geocode(None) is None
+
+
+def test_resolve_area_requires_an_area_name_only():
+    assert geocoder.resolve_area("東京都港区").municipality_code == "13103"
+    assert geocoder.resolve_area("北海道").municipality_code is None
+    assert geocoder.resolve_area("東京都港区芝公園") is None
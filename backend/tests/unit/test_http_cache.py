@@ -0,0 +1,23 @@
+from datetime import datetime, timezone
+
+from app.utils.http_cache import Validator
+
+
+def test_validator_is_stable_across_timezone_representations():
+    aware = datetime(2025, 1, 2, 3, 4, 5, 600000, tzinfo=timezone.utc)
+    naive = aware.replace(tzinfo=None)
+    assert Validator.from_versions(aware, 2).etag == Validator.from_versions(naive, 2).etag
+    assert Validator.from_versions(aware, 2).etag != Validator.from_versions(aware, 3).etag
+
+
+def test_validator_matches_if_none_match_and_if_modified_since():
+    validator = Validator.from_versions(datetime(2025, 1, 2, 3, 4, 5, 600000))
+    assert validator.matches(f'W/{validator.etag}, "other"')
+    assert validator.matches("*")
+    assert not validator.matches('"other"')
+
+    assert validator.matches(None, "Thu, 02 Jan 2025 03:04:05 GMT")
+    assert not validator.matches(None, "Thu, 02 Jan 2025 03:04:04 GMT")
+    assert not validator.matches(None, "not a date")
+    # If-None-Match があれば If-Modified-Since は見ない
+    assert not validator.matches('"other"', "Thu, 02 Jan 2025 03:04:05 GMT")
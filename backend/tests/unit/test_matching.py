@@ -0,0 +1,87 @@
+import uuid
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.utils.matching import MatchingIndex, _budget_score, _FeatureTable
+
+TOKYO = {"prefecture_code": "13", "latitude": 35.6581, "longitude": 139.7514}
+OSAKA = {"prefecture_code": "27", "latitude": 34.6863, "longitude": 135.52}
+
+
+def _project(specialty_id=None, budget=(None, None), **geo):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        required_specialty_id=specialty_id,
+        prefecture_code=geo.get("prefecture_code"),
+        latitude=geo.get("latitude"),
+        longitude=geo.get("longitude"),
+        budget_min=budget[0],
+        budget_max=budget[1],
+    )
+
+
+def _subcontractor(rating=None, **geo):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        prefecture_code=geo.get("prefecture_code"),
+        latitude=geo.get("latitude"),
+        longitude=geo.get("longitude"),
+        average_rating=rating,
+    )
+
+
+def test_feature_table_reuses_rows_and_grows():
+    table = _FeatureTable({"value": (np.float64, np.nan)}, capacity=2)
+    a, b, c = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    table.upsert(a, value=1)
+    row_b = table.upsert(b, value=2)
+    table.upsert(c, value=3)
+    assert table.capacity == 4
+    table.remove(b)
+    assert np.isnan(table.data["value"][row_b])
+    assert table.upsert(uuid.uuid4(), value=4) == row_b
+    assert len(table) == 3
+    assert int(table.active.sum()) == 3
+
+
+def test_budget_score_prefers_amounts_within_budget():
+    budget_min = np.array([1_000_000, 1_000_000, np.nan, np.nan])
+    budget_max = np.array([3_000_000, 1_500_000, np.nan, 5_000_000])
+    scores = _budget_score(2_000_000.0, budget_min, budget_max)
+    assert scores[0] == 1.0
+    assert 0 < scores[1] < 1
+    assert scores[2] == 0.5
+    assert scores[3] == 1.0
+    assert np.all(_budget_score(np.nan, budget_min, budget_max) == 0.5)
+
+
+def test_recommendations_rank_specialty_and_distance():
+    index = MatchingIndex(refresh_interval=300)
+    electric = uuid.uuid4()
+    near_match = _project(electric, **TOKYO)
+    far_match = _project(electric, **OSAKA)
+    near_other = _project(uuid.uuid4(), **TOKYO)
+    for project in (near_match, far_match, near_other):
+        index._upsert_project(project)
+    sub = _subcontractor(rating=4.0, **TOKYO)
+    stranger = _subcontractor(**OSAKA)
+    index._apply_subcontractors([sub, stranger], [(sub.id, electric)], [(sub.id, 3, 2_000_000)])
+
+    matches = index.recommend_projects(sub.id, limit=10)
+    assert [m.id for m in matches] == [near_match.id, far_match.id, near_other.id]
+    assert matches[0].scores["specialty"] == 1.0
+    assert matches[0].scores["distance"] == 1.0
+    assert matches[0].scores["rating"] == 0.75
+
+    excluded = index.recommend_projects(sub.id, limit=10, exclude={near_match.id})
+    assert [m.id for m in excluded] == [far_match.id, near_other.id]
+
+    ranked = index.recommend_subcontractors(near_match.id, limit=1)
+    assert [m.id for m in ranked] == [sub.id]
+    assert index.recommend_projects(uuid.uuid4(), limit=10) is None
+
+    # 募集を終えた案件・業者は候補から外れる
+    index.projects.remove(near_match.id)
+    index._remove_subcontractor(sub.id)
+    assert [m.id for m in index.recommend_subcontractors(far_match.id, limit=5)] == [stranger.id]
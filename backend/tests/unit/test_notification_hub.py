@@ -0,0 +1,75 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.utils.notification_hub import NotificationHub
+
+
+@pytest.mark.asyncio
+async def test_publish_fans_out_to_every_connection_of_user():
+    hub = NotificationHub()
+    user_id, other_id = uuid.uuid4(), uuid.uuid4()
+
+    async with hub.subscribe(user_id) as q1, hub.subscribe(user_id) as q2:
+        async with hub.subscribe(other_id) as q3:
+            assert hub.subscriber_count == 3
+            hub.publish(user_id, '{"title": "hello"}')
+            assert q1.get_nowait() == '{"title": "hello"}'
+            assert q2.get_nowait() == '{"title": "hello"}'
+            assert q3.empty()
+
+    assert hub.subscriber_count == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_drops_oldest_events():
+    hub = NotificationHub(queue_size=2)
+    user_id = uuid.uuid4()
+    async with hub.subscribe(user_id) as queue:
+        for i in range(3):
+            hub.publish(user_id, str(i))
+        assert [queue.get_nowait(), queue.get_nowait()] == ["1", "2"]
+
+
+@pytest.mark.asyncio
+async def test_stream_formats_server_sent_events():
+    hub = NotificationHub()
+    user_id = uuid.uuid4()
+    stream = hub.stream(user_id, heartbeat=0.01)
+
+    assert await anext(stream) == ": connected\n\n"
+    assert await anext(stream) == ": keep-alive\n\n"
+    hub.publish(user_id, '{"id": 1}')
+    assert await anext(stream) == 'event: notification\ndata: {"id": 1}\n\n'
+
+    await stream.aclose()
+    await asyncio.sleep(0)
+    assert hub.subscriber_count == 0
+
+
+class _FakeConn:
+    def __init__(self):
+        self.notified = []
+        self.closed = False
+
+    async def execute(self, _query, channel, payload):
+        await asyncio.sleep(0.01)
+        self.notified.append((channel, payload))
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_pending_notifies_are_kept_and_awaited_on_stop():
+    hub = NotificationHub()
+    conn = hub._pg_conn = _FakeConn()
+    hub.publish(uuid.uuid4(), '{"id": 1}')
+    hub.publish(uuid.uuid4(), '{"id": 2}')
+    assert len(hub._tasks) == 2
+
+    await hub.stop()
+    assert [channel for channel, _ in conn.notified] == ["notifications"] * 2
+    assert conn.closed
+    assert not hub._tasks
@@ -0,0 +1,63 @@
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from app.utils.price_index import PriceIndex, PriceSample, QuantileSketch
+
+NOW = datetime(2026, 10, 15, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("alpha", [0.01, 0.05])
+def test_sketch_quantiles_within_relative_accuracy(alpha):
+    rng = np.random.default_rng(42)
+    values = np.round(rng.lognormal(mean=14, sigma=1.2, size=20_000), -3)
+    sketch = QuantileSketch(alpha)
+    for value in values:
+        sketch.add(float(value))
+
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        exact = np.quantile(values, q, method="lower")
+        assert abs(sketch.quantile(q) - exact) <= alpha * exact
+
+
+def test_merged_sketches_match_a_single_sketch_and_survive_json():
+    rng = np.random.default_rng(7)
+    values = rng.uniform(100_000, 5_000_000, size=3_000)
+    whole, parts = QuantileSketch(), [QuantileSketch() for _ in range(3)]
+    for i, value in enumerate(values):
+        whole.add(float(value))
+        parts[i % 3].add(float(value))
+    merged = QuantileSketch()
+    for part in parts:
+        merged.merge(QuantileSketch.from_json(part.to_json(), alpha=0.01))
+
+    assert merged.count == whole.count == 3_000
+    assert [merged.quantile(q) for q in (0.1, 0.5, 0.9)] == [
+        whole.quantile(q) for q in (0.1, 0.5, 0.9)
+    ]
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_hint_falls_back_to_coarser_buckets_and_ignores_old_months():
+    index = PriceIndex(alpha=0.01, window_months=12, min_samples=3)
+    electric, plumbing = uuid.uuid4(), uuid.uuid4()
+    for amount in (1_000_000, 2_000_000, 3_000_000):
+        index.add(PriceSample(electric, "13", amount, NOW))
+    index.add(PriceSample(plumbing, "13", 500_000, NOW))
+    # 期間外の受注は目安に含めない
+    index.add(PriceSample(plumbing, "27", 9_000_000, datetime(2024, 1, 1, tzinfo=timezone.utc)))
+
+    exact = index.hint(electric, "13", now=NOW)
+    assert (exact.specialty_id, exact.prefecture_code, exact.sample_count) == (electric, "13", 3)
+    assert abs(exact.p50 - 2_000_000) <= 20_000
+
+    # 大阪の電気工事は無いので、電気工事の全国に切り替える
+    assert index.hint(electric, "27", now=NOW).prefecture_code is None
+    # 配管工事は 1 件しか無いので、東京都の全分野に切り替える
+    fallback = index.hint(plumbing, "13", now=NOW)
+    assert (fallback.specialty_id, fallback.prefecture_code) == (None, "13")
+    assert fallback.sample_count == 4
+    assert index.hint(plumbing, "27", now=NOW).sample_count == 4
+    assert index.hint(None, None, now=datetime(2030, 1, 1, tzinfo=timezone.utc)) is None
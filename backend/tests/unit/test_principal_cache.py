@@ -0,0 +1,39 @@
+import uuid
+
+from app.utils.principal_cache import Principal, PrincipalCache
+
+
+def _principal() -> Principal:
+    return Principal(id=uuid.uuid4(), role="contractor", is_active=True, company_id=None)
+
+
+def test_get_counts_hits_and_misses():
+    cache = PrincipalCache(ttl=60)
+    principal = _principal()
+
+    assert cache.get(principal.id) is None
+    cache.set(principal)
+    assert cache.get(principal.id) == principal
+    cache.invalidate(principal.id)
+    assert cache.get(principal.id) is None
+    assert cache.stats() == {"size": 0, "hits": 1, "misses": 2, "hit_ratio": 0.3333}
+
+
+def test_expired_entries_are_misses():
+    cache = PrincipalCache(ttl=-1)
+    principal = _principal()
+    cache.set(principal)
+    assert cache.get(principal.id) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PrincipalCache(ttl=60, max_size=2)
+    first, second, third = _principal(), _principal(), _principal()
+    cache.set(first)
+    cache.set(second)
+    cache.get(first.id)
+    cache.set(third)
+
+    assert cache.get(second.id) is None
+    assert cache.get(first.id) == first
+    assert cache.get(third.id) == third
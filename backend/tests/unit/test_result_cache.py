@@ -0,0 +1,100 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.utils.result_cache import ResultCache, cache_key
+
+
+@asynccontextmanager
+async def _session():
+    yield None
+
+
+class _Loader:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, _db):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.calls
+
+
+def test_cache_key_ignores_order_and_unset_params():
+    assert cache_key(status="open", page=1, location=None) == cache_key(page=1, status="open")
+    assert cache_key(status="open") != cache_key(status="closed")
+
+
+async def test_concurrent_misses_share_one_load():
+    cache = ResultCache(ttl=60, stale_ttl=60, session_factory=_session)
+    loader = _Loader(delay=0.01)
+    results = await asyncio.gather(*(cache.get("k", loader, None) for _ in range(20)))
+    assert results == [1] * 20
+    assert loader.calls == 1
+    assert cache.stats()["coalesced"] == 19
+
+
+async def test_stale_entry_is_served_while_one_refresh_runs():
+    cache = ResultCache(ttl=0, stale_ttl=60, session_factory=_session)
+    loader = _Loader()
+    assert await cache.get("k", loader, None) == 1
+    assert await cache.get("k", loader, None) == 1
+    assert await cache.get("k", loader, None) == 1
+    await cache.wait_for_refreshes()
+    assert loader.calls == 2
+    assert await cache.get("k", loader, None) == 2
+    assert cache.stats()["stale_hits"] == 3
+
+
+async def test_load_started_before_invalidation_is_not_stored():
+    cache = ResultCache(ttl=60, stale_ttl=60, session_factory=_session)
+    loader = _Loader(delay=0.01)
+    task = asyncio.create_task(cache.get("k", loader, None))
+    await asyncio.sleep(0)
+    cache.invalidate()
+    assert await task == 1
+    assert await cache.get("k", loader, None) == 2
+
+
+async def test_errors_reach_every_waiter_and_are_not_cached():
+    cache = ResultCache(ttl=60, stale_ttl=60, session_factory=_session)
+
+    async def failing(_db):
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *(cache.get("k", failing, None) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(r, ValueError) for r in results)
+    assert cache.stats()["size"] == 0
+    with pytest.raises(ValueError):
+        await cache.get("k", failing, None)
+
+
+async def test_waiters_reload_when_the_first_request_is_cancelled():
+    cache = ResultCache(ttl=60, stale_ttl=60, session_factory=_session)
+    loader = _Loader(delay=0.05)
+    first = asyncio.create_task(cache.get("k", loader, None))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(cache.get("k", loader, None)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    # 待っていた側は取り消されず、1 件だけが読み直す
+    assert await asyncio.gather(*waiters) == [2] * 3
+    assert first.cancelled()
+    assert loader.calls == 2
+
+    # 待っている側自身の取り消しはそのまま伝わる
+    cache.clear()
+    leader = asyncio.create_task(cache.get("other", loader, None))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get("other", loader, None))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert await leader == 3
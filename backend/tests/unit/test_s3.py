@@ -0,0 +1,133 @@
+import asyncio
+import hashlib
+import io
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from app.exceptions import BadRequestException
+from app.utils import s3
+from app.utils.s3 import S3Storage
+
+PART = 5 * 1024 * 1024
+
+
+class FakeS3:
+    def __init__(self):
+        self.calls = []
+        self.parts = {}
+
+    def put_object(self, **kwargs):
+        self.calls.append(("put_object", len(kwargs["Body"])))
+
+    def create_multipart_upload(self, **kwargs):
+        self.calls.append(("create_multipart_upload", kwargs["ContentType"]))
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, **kwargs):
+        self.parts[kwargs["PartNumber"]] = len(kwargs["Body"])
+        return {"ETag": f'"etag-{kwargs["PartNumber"]}"'}
+
+    def complete_multipart_upload(self, **kwargs):
+        self.calls.append(("complete_multipart_upload", kwargs["MultipartUpload"]["Parts"]))
+
+    def abort_multipart_upload(self, **kwargs):
+        self.calls.append(("abort_multipart_upload", kwargs["UploadId"]))
+
+
+class TrickleFile:
+    """1 回の read で最大 1 MiB しか返さないファイル (ネットワーク越しの本文を想定)"""
+
+    def __init__(self, data: bytes):
+        self.buffer = io.BytesIO(data)
+        self.largest_read = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        self.largest_read = max(self.largest_read, size)
+        return self.buffer.read(min(size, 1024 * 1024))
+
+
+@pytest.fixture
+def fake_s3(monkeypatch) -> FakeS3:
+    client = FakeS3()
+    monkeypatch.setattr(s3.s3_storage, "_client", client)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_large_file_is_sent_in_parts_with_checksum(fake_s3):
+    data = bytes(range(256)) * (PART * 2 // 256) + b"tail"
+    file = TrickleFile(data)
+    result = await s3.s3_storage.upload_stream(file, "plan.dwg", "image/vnd.dwg", part_size=PART)
+
+    assert (result.size, result.checksum) == (len(data), hashlib.sha256(data).hexdigest())
+    assert result.key.startswith("uploads/") and result.key.endswith("/plan.dwg")
+    assert fake_s3.parts == {1: PART, 2: PART, 3: 4}
+    assert fake_s3.calls == [
+        ("create_multipart_upload", "image/vnd.dwg"),
+        (
+            "complete_multipart_upload",
+            [{"PartNumber": n, "ETag": f'"etag-{n}"'} for n in (1, 2, 3)],
+        ),
+    ]
+    # 全体を一度に読まない
+    assert file.largest_read == PART
+
+
+@pytest.mark.asyncio
+async def test_small_file_is_sent_with_one_put(fake_s3):
+    result = await s3.s3_storage.upload_stream(TrickleFile(b"hello"), "memo.txt", part_size=PART)
+    assert (result.size, result.checksum) == (5, hashlib.sha256(b"hello").hexdigest())
+    assert fake_s3.calls == [("put_object", 5)]
+
+
+@pytest.mark.asyncio
+async def test_oversized_upload_is_aborted(fake_s3):
+    file = TrickleFile(bytes(PART * 5))
+    with pytest.raises(BadRequestException):
+        await s3.s3_storage.upload_stream(file, "huge.dwg", part_size=PART, max_bytes=PART * 2)
+    assert fake_s3.calls[-1] == ("abort_multipart_upload", "upload-1")
+    # 上限を超えた時点で読むのをやめる
+    assert file.buffer.tell() == PART * 3
+    assert len(fake_s3.parts) == 2
+
+
+@pytest.mark.asyncio
+async def test_storage_bounds_concurrent_calls_and_presigns_locally():
+    storage = S3Storage(max_pool_connections=2)
+    lock, active, peak = threading.Lock(), 0, 0
+
+    def blocking_call(n):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        return n
+
+    await storage.start()
+    client = storage.client
+    results = await asyncio.gather(*(storage.call(blocking_call, n) for n in range(6)))
+    assert (results, peak) == (list(range(6)), 2)
+
+    url = storage.presigned_url("uploads/abc/plan.pdf", expiration=600)
+    query = parse_qs(urlsplit(url).query)
+    assert urlsplit(url).path.endswith("/uploads/abc/plan.pdf")
+    assert query["X-Amz-Expires"] == ["600"] and "X-Amz-Signature" in query
+    # クライアントは作り直さない
+    storage.presigned_url("uploads/abc/other.pdf")
+    assert storage.client is client
+    assert storage.stats() == {
+        "started": True,
+        "max_pool_connections": 2,
+        "in_flight": 0,
+        "calls": 6,
+        "presigned": 2,
+    }
+
+    await storage.stop()
+    assert storage.stats()["started"] is False
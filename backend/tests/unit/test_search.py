@@ -0,0 +1,22 @@
+from app.utils.search import gram_rows, grams, normalize
+
+
+def test_normalize_folds_width_and_case():
+    assert normalize("ＡＢＣ　ﾃﾞﾝｷ") == "abc デンキ"
+
+
+def test_grams_use_bigrams_for_cjk_and_trigrams_for_alphanumerics():
+    assert grams(normalize("東京都")) == {"東京", "京都"}
+    assert grams(normalize("Paint")) == {"pai", "ain", "int"}
+    assert grams(normalize("電気ab工事")) == {"電気", "工事"}
+    assert grams("都") == set()
+
+
+def test_gram_rows_are_tagged_by_field():
+    rows = gram_rows("company", "山田電気", None, "港区")
+    assert {(row["field"], row["gram"]) for row in rows} == {
+        ("name", "山田"),
+        ("name", "田電"),
+        ("name", "電気"),
+        ("address", "港区"),
+    }
@@ -141,9 +141,7 @@ export default function ProjectDetailPage() {
   async function handleFileUpload(e: React.ChangeEvent<HTMLInputElement>) {
     const file = e.target.files?.[0];
     if (!file) return;
-    const formData = new FormData();
-    formData.append("file", file);
-    await uploadFile.mutateAsync(formData);
+    await uploadFile.mutateAsync(file);
     setSnackbar("ファイルをアップロードしました");
     if (fileInputRef.current) fileInputRef.current.value = "";
   }
@@ -303,7 +301,7 @@ export default function ProjectDetailPage() {
                       <IconButton
                         edge="end"
                         component="a"
-                        href={file.file_url}
+                        href={file.download_url ?? file.file_url}
                         target="_blank"
                         rel="noopener noreferrer"
                       >
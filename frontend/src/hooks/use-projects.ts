@@ -5,6 +5,7 @@ import {
   useMutation,
   useQueryClient,
 } from "@tanstack/react-query";
+import axios from "axios";
 import api from "@/lib/api";
 import type {
   ProjectListResponse,
@@ -13,6 +14,9 @@ import type {
   ProjectUpdate,
   QuoteListResponse,
   ProjectFileResponse,
+  ProjectFileUploadUrlResponse,
+  RecommendedProjectListResponse,
+  RecommendedSubcontractorListResponse,
 } from "@/types";
 
 // ---------------------------------------------------------------------------
@@ -26,6 +30,7 @@ export function useProjects(params?: {
   location?: string;
   page?: number;
   per_page?: number;
+  facets?: string;
 }) {
   return useQuery<ProjectListResponse>({
     queryKey: ["projects", params],
@@ -55,6 +60,37 @@ export function useProject(projectId: string) {
   });
 }
 
+// ---------------------------------------------------------------------------
+// Recommendations
+// ---------------------------------------------------------------------------
+
+export function useRecommendedProjects(limit = 20) {
+  return useQuery<RecommendedProjectListResponse>({
+    queryKey: ["projects", "recommended", limit],
+    queryFn: async () => {
+      const { data } = await api.get<RecommendedProjectListResponse>(
+        "/projects/recommended",
+        { params: { limit } },
+      );
+      return data;
+    },
+  });
+}
+
+export function useRecommendedSubcontractors(projectId: string, limit = 20) {
+  return useQuery<RecommendedSubcontractorListResponse>({
+    queryKey: ["project", projectId, "recommended-subcontractors", limit],
+    queryFn: async () => {
+      const { data } = await api.get<RecommendedSubcontractorListResponse>(
+        `/projects/${projectId}/recommended-subcontractors`,
+        { params: { limit } },
+      );
+      return data;
+    },
+    enabled: !!projectId,
+  });
+}
+
 // ---------------------------------------------------------------------------
 // Create project
 // ---------------------------------------------------------------------------
@@ -124,12 +160,26 @@ export function useUpdateProjectStatus(projectId: string) {
 export function useUploadProjectFile(projectId: string) {
   const queryClient = useQueryClient();
 
-  return useMutation<ProjectFileResponse, Error, FormData>({
-    mutationFn: async (formData) => {
+  // 署名付き POST でブラウザから S3 へ直接送り、API には完了だけを通知する
+  return useMutation<ProjectFileResponse, Error, File>({
+    mutationFn: async (file) => {
+      const { data: upload } = await api.post<ProjectFileUploadUrlResponse>(
+        `/projects/${projectId}/files/upload-url`,
+        {
+          file_name: file.name,
+          content_type: file.type || "application/octet-stream",
+          file_size: file.size,
+        },
+      );
+      const formData = new FormData();
+      Object.entries(upload.fields).forEach(([name, value]) =>
+        formData.append(name, value),
+      );
+      formData.append("file", file);
+      await axios.post(upload.url, formData);
       const { data } = await api.post<ProjectFileResponse>(
-        `/projects/${projectId}/files`,
-        formData,
-        { headers: { "Content-Type": "multipart/form-data" } },
+        `/projects/${projectId}/files/complete`,
+        { key: upload.key },
       );
       return data;
     },
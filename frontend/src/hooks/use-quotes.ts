@@ -6,7 +6,13 @@ import {
   useQueryClient,
 } from "@tanstack/react-query";
 import api from "@/lib/api";
-import type { QuoteListResponse, QuoteResponse, QuoteCreate } from "@/types";
+import type {
+  PriceHint,
+  QuoteListResponse,
+  QuoteResponse,
+  QuoteSubmitResponse,
+  QuoteCreate,
+} from "@/types";
 
 // ---------------------------------------------------------------------------
 // My quotes
@@ -29,9 +35,9 @@ export function useMyQuotes() {
 export function useSubmitQuote(projectId: string) {
   const queryClient = useQueryClient();
 
-  return useMutation<QuoteResponse, Error, QuoteCreate>({
+  return useMutation<QuoteSubmitResponse, Error, QuoteCreate>({
     mutationFn: async (body) => {
-      const { data } = await api.post<QuoteResponse>(
+      const { data } = await api.post<QuoteSubmitResponse>(
         `/projects/${projectId}/quotes`,
         body,
       );
@@ -46,6 +52,26 @@ export function useSubmitQuote(projectId: string) {
   });
 }
 
+// ---------------------------------------------------------------------------
+// Price hint (market p10 / p50 / p90 for a specialty and region)
+// ---------------------------------------------------------------------------
+
+export function usePriceHint(params: {
+  specialty_id?: string | null;
+  prefecture_code?: string | null;
+  location?: string | null;
+}) {
+  return useQuery<PriceHint | null>({
+    queryKey: ["price-hint", params],
+    queryFn: async () => {
+      const { data } = await api.get<PriceHint | null>("/price-hints", {
+        params,
+      });
+      return data;
+    },
+  });
+}
+
 // ---------------------------------------------------------------------------
 // Accept quote
 // ---------------------------------------------------------------------------
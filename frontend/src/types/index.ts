@@ -73,6 +73,10 @@ export type CompanyResponse = {
   established_year: number | null;
   employee_count: number | null;
   average_rating: number | null;
+  prefecture_code: string | null;
+  municipality_code: string | null;
+  latitude: number | null;
+  longitude: number | null;
   created_at: string;
   updated_at: string;
 };
@@ -120,6 +124,15 @@ export type ProjectFileResponse = {
   file_name: string;
   file_url: string;
   file_size: number | null;
+  checksum: string | null;
+  download_url: string | null;
+};
+
+export type ProjectFileUploadUrlResponse = {
+  url: string;
+  fields: Record<string, string>;
+  key: string;
+  expires_in: number;
 };
 
 export type ProjectResponse = {
@@ -133,17 +146,63 @@ export type ProjectResponse = {
   deadline: string | null;
   status: string;
   required_specialty_id: string | null;
+  prefecture_code: string | null;
+  municipality_code: string | null;
+  latitude: number | null;
+  longitude: number | null;
   created_at: string;
   updated_at: string;
   files: ProjectFileResponse[];
 };
 
+export type FacetCount = {
+  value: string | null;
+  count: number;
+};
+
+export type ProjectFacets = {
+  status?: FacetCount[] | null;
+  specialty?: FacetCount[] | null;
+  prefecture?: FacetCount[] | null;
+};
+
 export type ProjectListResponse = {
   items: ProjectResponse[];
   total: number;
   page: number;
   per_page: number;
   pages: number;
+  next_cursor: string | null;
+  facets?: ProjectFacets | null;
+};
+
+// Recommendation
+export type MatchScores = {
+  specialty: number;
+  distance: number;
+  rating: number;
+  budget: number;
+  experience: number;
+};
+
+export type RecommendedProject = {
+  project: ProjectResponse;
+  score: number;
+  scores: MatchScores;
+};
+
+export type RecommendedProjectListResponse = {
+  items: RecommendedProject[];
+};
+
+export type RecommendedSubcontractor = {
+  company: CompanyWithSpecialtiesResponse;
+  score: number;
+  scores: MatchScores;
+};
+
+export type RecommendedSubcontractorListResponse = {
+  items: RecommendedSubcontractor[];
 };
 
 // Quote
@@ -165,6 +224,19 @@ export type QuoteResponse = {
   updated_at: string;
 };
 
+export type PriceHint = {
+  p10: number;
+  p50: number;
+  p90: number;
+  sample_count: number;
+  specialty_id: string | null;
+  prefecture_code: string | null;
+};
+
+export type QuoteSubmitResponse = QuoteResponse & {
+  price_hint: PriceHint | null;
+};
+
 export type QuoteListResponse = {
   items: QuoteResponse[];
   total: number;
@@ -226,6 +298,7 @@ export type NotificationListResponse = {
   items: NotificationResponse[];
   total: number;
   unread_count: number;
+  next_cursor: string | null;
 };
 
 // Direct Order
@@ -282,6 +355,7 @@ export type SubcontractorListResponse = {
   page: number;
   per_page: number;
   pages: number;
+  next_cursor: string | null;
 };
 
 // Dashboard